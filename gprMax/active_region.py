@@ -0,0 +1,96 @@
+# Copyright (C) 2015-2019: The University of Edinburgh
+#                 Authors: Craig Warren and Antonis Giannopoulos
+#
+# This file is part of gprMax.
+#
+# gprMax is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# gprMax is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with gprMax.  If not, see <http://www.gnu.org/licenses/>.
+
+
+class ActiveRegion(object):
+    """
+    Box of cells, around the sources of a model, outside of which all field
+    components are still zero. Field components are zero at the start of a
+    simulation and sources only change the field components of their own
+    cells. A field update of a cell only depends on the field components of
+    the cell and its neighbours, so the box grows by one cell in each
+    direction for every field update, i.e. twice per iteration, and field
+    updates outside of it can be skipped until it covers the domain.
+    """
+
+    def __init__(self, G):
+        """
+        Args:
+            G (class): Grid class instance - holds essential parameters describing the model.
+        """
+
+        self.nx = G.nx
+        self.ny = G.ny
+        self.nz = G.nz
+
+        # Cells of sources, and their neighbours
+        sources = G.voltagesources + G.hertziandipoles + G.magneticdipoles + G.transmissionlines
+        self.xs = max(min(src.xcoord for src in sources) - 1, 0)
+        self.xf = min(max(src.xcoord for src in sources) + 2, G.nx + 1)
+        self.ys = max(min(src.ycoord for src in sources) - 1, 0)
+        self.yf = min(max(src.ycoord for src in sources) + 2, G.ny + 1)
+        self.zs = max(min(src.zcoord for src in sources) - 1, 0)
+        self.zf = min(max(src.zcoord for src in sources) + 2, G.nz + 1)
+
+    def grow(self):
+        """Grow the box by one cell in each direction, i.e. before a field update."""
+
+        self.xs = max(self.xs - 1, 0)
+        self.xf = min(self.xf + 1, self.nx + 1)
+        self.ys = max(self.ys - 1, 0)
+        self.yf = min(self.yf + 1, self.ny + 1)
+        self.zs = max(self.zs - 1, 0)
+        self.zf = min(self.zf + 1, self.nz + 1)
+
+    def full(self):
+        """Check if the box covers the domain."""
+
+        return (self.xs, self.ys, self.zs) == (0, 0, 0) and (self.xf, self.yf, self.zf) == (self.nx + 1, self.ny + 1, self.nz + 1)
+
+    def extent(self):
+        """Get the extent of the box, i.e. xs, xf, ys, yf, zs, zf."""
+
+        return self.xs, self.xf, self.ys, self.yf, self.zs, self.zf
+
+    def overlaps(self, pml):
+        """Check if the box overlaps a PML slab.
+
+        Args:
+            pml (class): PML class instance.
+
+        Returns:
+            (bool): True if the PML correction has to be applied.
+        """
+
+        return (pml.xs <= self.xf and pml.xf >= self.xs and pml.ys <= self.yf and pml.yf >= self.ys and pml.zs <= self.zf and pml.zf >= self.zs)
+
+    def active_pmls(self, pmls, G):
+        """Get the PML slabs, or all PML slabs updated together, that
+            overlap the box.
+
+        Args:
+            pmls (list): PML class instances, or PMLSlabs class instance, that are updated.
+            G (class): Grid class instance - holds essential parameters describing the model.
+
+        Returns:
+            (list): PML class instances, or PMLSlabs class instance, to update.
+        """
+
+        if G.pmlfused:
+            return pmls if any(self.overlaps(pml) for pml in G.pmls) else []
+        return [pml for pml in pmls if self.overlaps(pml)]
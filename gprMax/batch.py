@@ -0,0 +1,105 @@
+# Copyright (C) 2015-2019: The University of Edinburgh
+#                 Authors: Craig Warren and Antonis Giannopoulos
+#
+# This file is part of gprMax.
+#
+# gprMax is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# gprMax is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with gprMax.  If not, see <http://www.gnu.org/licenses/>.
+
+import copy
+
+import numpy as np
+
+from gprMax.constants import floattype
+from gprMax.materials import Material
+
+
+class ModelBatch(object):
+    """
+    Batch of models, e.g. traces of a B-scan, that are advanced together on
+    CPU. The field arrays of the models have a leading batch dimension, so
+    if the models share their geometry the electric and magnetic field
+    updates of all of them are carried out in a single sweep over the grid.
+    PML, sources, receivers and snapshots are updated for each model in turn.
+    """
+
+    # Arrays of the grid that have a leading batch dimension
+    fields = ('Ex', 'Ey', 'Ez', 'Hx', 'Hy', 'Hz')
+
+    def __init__(self, nmodels, G):
+        """
+        Args:
+            nmodels (int): Number of models in the batch.
+            G (class): Grid class instance of the first model in the batch.
+        """
+
+        self.nmodels = nmodels
+        self.shape = (G.nx, G.ny, G.nz)
+
+        # Field arrays of 2D models only have a single cell in the invariant
+        # direction (see FDTDGrid.initialise_field_arrays)
+        for name in self.fields:
+            setattr(self, name, np.zeros((nmodels,) + getattr(G, name).shape, dtype=floattype))
+
+        # Grid, output file name and number appended to file names, of each model
+        self.models = []
+
+    def add(self, G, outputfile, appendmodelnumber):
+        """Add a model to the batch. The field arrays of the model are replaced
+            with its slice of the field arrays of the batch.
+
+        Args:
+            G (class): Grid class instance - holds essential parameters describing the model.
+            outputfile (str): Name of the output file of the model.
+            appendmodelnumber (str): Number appended to file names of the model.
+        """
+
+        if (G.nx, G.ny, G.nz) == self.shape:
+            for name in self.fields:
+                setattr(G, name, getattr(self, name)[len(self.models)])
+        self.models.append((G, outputfile, appendmodelnumber))
+
+    def full(self):
+        """Check if all models of the batch have been added."""
+
+        return len(self.models) == self.nmodels
+
+    def grids(self):
+        """Get the grids of the models in the batch."""
+
+        return [model[0] for model in self.models]
+
+    def shared(self):
+        """Check if the models of the batch share their geometry and time
+            window, and can be updated together, i.e. 3D models with
+            non-dispersive materials, without subgrids and with uniform
+            spatial steps.
+        """
+
+        grids = self.grids()
+        G = grids[0]
+        if G.mode != '3D' or Material.maxpoles != 0 or G.subgrids or G.grading is not None or G.domain or G.materialruns is None:
+            return False
+
+        return all(Gm.geometryhash is not None and Gm.geometryhash == G.geometryhash and Gm.iterations == G.iterations
+                   and all(getattr(Gm, name).base is getattr(self, name) for name in self.fields) for Gm in grids)
+
+    def separate_pmls(self):
+        """Give each model its own PML field arrays, as the PMLs of models
+            that share their geometry are shared.
+        """
+
+        for G in self.grids()[1:]:
+            G.pmls = [copy.copy(pml) for pml in G.pmls]
+            for pml in G.pmls:
+                pml.initialise_field_arrays()
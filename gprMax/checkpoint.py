@@ -0,0 +1,246 @@
+# Copyright (C) 2015-2019: The University of Edinburgh
+#                 Authors: Craig Warren and Antonis Giannopoulos
+#
+# This file is part of gprMax.
+#
+# gprMax is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# gprMax is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with gprMax.  If not, see <http://www.gnu.org/licenses/>.
+
+import os
+
+import h5py
+import numpy as np
+
+from gprMax._version import __version__
+from gprMax.exceptions import GeneralError
+from gprMax.materials import Material
+from gprMax.pml import CFS
+from gprMax.pml import PML
+from gprMax.yee_cell_build_ext import build_material_runs
+
+
+class Checkpoint(object):
+    """
+    Checkpoint of the state of the solver for a model, written periodically
+    to an HDF5 file during the time stepping loop. A model can be resumed from
+    its checkpoint without building its geometry, and the results are then
+    identical to those of the model run without interruption. A checkpoint of
+    the state at the end of the simulation can also be used to extend the time
+    window of a finished model.
+    """
+
+    # Arrays of the grid, and of each PML, that are stored in a checkpoint
+    geometry = ('ID', 'updatecoeffsE', 'updatecoeffsH')
+    fields = ('Ex', 'Ey', 'Ez', 'Hx', 'Hy', 'Hz')
+    pmlarrays = ('EPhi1', 'EPhi2', 'HPhi1', 'HPhi2', 'ERA', 'ERB', 'ERE', 'ERF', 'HRA', 'HRB', 'HRE', 'HRF')
+
+    def __init__(self, filename, interval=None, final=False):
+        """
+        Args:
+            filename (str): Name of the checkpoint file.
+            interval (int): Number of iterations between checkpoints, or None
+                            to not write checkpoints.
+            final (bool): Write a checkpoint of the state at the end of the
+                            simulation and keep it, e.g. to extend the time
+                            window of the model later.
+        """
+
+        self.filename = filename
+        self.interval = interval
+        self.final = final
+
+        # Iteration the model is resumed from, and receiver outputs up to it
+        self.iteration = 0
+        self.rxoutputs = []
+
+    def exists(self):
+        """Check if there is a checkpoint file to resume the model from."""
+
+        return os.path.isfile(self.filename)
+
+    def finished_iterations(self):
+        """Get the number of iterations of a finished model from the checkpoint
+            of its state at the end of the simulation.
+
+        Returns:
+            iterations (int): Number of iterations (time window) of the model.
+        """
+
+        if not self.exists():
+            raise GeneralError('No checkpoint file {} of the state at the end of the simulation to extend the model from'.format(self.filename))
+        with h5py.File(self.filename, 'r') as f:
+            if f.attrs['Iteration'] != f.attrs['Iterations']:
+                raise GeneralError('Checkpoint file {} is not of the state at the end of the simulation, i.e. the model has not finished and should be resumed'.format(self.filename))
+            return int(f.attrs['Iterations'])
+
+    def write(self, iteration, G):
+        """Write the state of the solver at the start of an iteration to the
+            checkpoint file. The file is replaced only once it has been
+            written completely, so the previous checkpoint is kept if the
+            model is interrupted while writing.
+
+        Args:
+            iteration (int): Iteration the model can be resumed from.
+            G (class): Grid class instance - holds essential parameters describing the model.
+        """
+
+        tmpfilename = self.filename + '.tmp'
+        with h5py.File(tmpfilename, 'w') as f:
+            f.attrs['gprMax'] = __version__
+            f.attrs['Title'] = G.title
+            f.attrs['Iterations'] = G.iterations
+            f.attrs['nx_ny_nz'] = (G.nx, G.ny, G.nz)
+            f.attrs['dx_dy_dz'] = (G.dx, G.dy, G.dz)
+            f.attrs['dt'] = G.dt
+            f.attrs['Iteration'] = iteration
+
+            # Material IDs and update coefficients, i.e. the built geometry
+            for name in self.geometry:
+                f['/geometry/' + name] = getattr(G, name)
+            f.attrs['maxpoles'] = Material.maxpoles
+            if Material.maxpoles != 0:
+                f['/geometry/updatecoeffsdispersive'] = G.updatecoeffsdispersive
+                if G.dispersivecells is not None:
+                    for component, cells in zip('xyz', G.dispersivecells):
+                        f['/geometry/dispersivecells' + component] = cells
+
+            # Field components, and temporary values of dispersive materials
+            for name in self.fields:
+                f['/fields/' + name] = getattr(G, name)
+            if Material.maxpoles != 0:
+                for name in ('Tx', 'Ty', 'Tz'):
+                    f['/fields/' + name] = getattr(G, name)
+
+            # PML slabs, in the order they are updated
+            for n, pml in enumerate(G.pmls):
+                grp = f.create_group('/pmls/pml' + str(n + 1))
+                grp.attrs['ID'] = pml.ID
+                grp.attrs['direction'] = pml.direction
+                grp.attrs['extent'] = (pml.xs, pml.xf, pml.ys, pml.yf, pml.zs, pml.zf)
+                for name in self.pmlarrays:
+                    grp[name] = getattr(pml, name)
+
+            # Transmission lines, and outputs up to the iteration
+            for n, tl in enumerate(G.transmissionlines):
+                grp = f.create_group('/tls/tl' + str(n + 1))
+                grp.attrs['abcv0'] = tl.abcv0
+                grp.attrs['abcv1'] = tl.abcv1
+                grp['voltage'] = tl.voltage
+                grp['current'] = tl.current
+                grp['Vtotal'] = tl.Vtotal[:iteration]
+                grp['Itotal'] = tl.Itotal[:iteration]
+
+            for n, rx in enumerate(G.rxs):
+                for output, values in rx.outputs.items():
+                    f['/rxs/rx' + str(n + 1) + '/' + output] = values[:iteration]
+
+            # Snapshots that have been stored
+            for n, snap in enumerate(G.snapshots):
+                if snap.time <= iteration:
+                    f['/snapshots/snap' + str(n + 1) + '/electric'] = snap.electric
+                    f['/snapshots/snap' + str(n + 1) + '/magnetic'] = snap.magnetic
+
+        os.replace(tmpfilename, self.filename)
+
+    def read(self, G):
+        """Restore the built geometry and the state of the solver from the
+            checkpoint file, i.e. in place of building the model.
+
+        Args:
+            G (class): Grid class instance - holds essential parameters describing the model.
+        """
+
+        with h5py.File(self.filename, 'r') as f:
+            # The time window of the model can only differ from that of the
+            # checkpoint to extend a finished model
+            iterations = f.attrs['Iterations']
+            extended = f.attrs['Iteration'] == iterations and G.iterations > iterations
+            if (tuple(f.attrs['nx_ny_nz']) != (G.nx, G.ny, G.nz) or f.attrs['dt'] != G.dt or (iterations != G.iterations and not extended)
+                    or len(f.get('pmls', [])) != sum(1 for value in G.pmlthickness.values() if value > 0)
+                    or len(f.get('tls', [])) != len(G.transmissionlines) or len(f.get('rxs', [])) != len(G.rxs)):
+                raise GeneralError('Checkpoint file {} is not for this model, e.g. the input file has been changed since it was written'.format(self.filename))
+
+            self.iteration = int(f.attrs['Iteration'])
+
+            for name in self.geometry:
+                setattr(G, name, f['/geometry/' + name][()])
+            G.IDlookup = {'Ex': 0, 'Ey': 1, 'Ez': 2, 'Hx': 3, 'Hy': 4, 'Hz': 5}
+            for name in self.fields:
+                setattr(G, name, f['/fields/' + name][()])
+            Material.maxpoles = max(Material.maxpoles, int(f.attrs['maxpoles']))
+            if Material.maxpoles != 0:
+                G.updatecoeffsdispersive = f['/geometry/updatecoeffsdispersive'][()]
+                G.dispersivetype = G.updatecoeffsdispersive.dtype.type
+                if '/geometry/dispersivecellsx' in f:
+                    G.dispersivecells = [f['/geometry/dispersivecells' + component][()] for component in 'xyz']
+                for name in ('Tx', 'Ty', 'Tz'):
+                    setattr(G, name, f['/fields/' + name][()])
+
+            if G.mode == '3D' and G.grading is None:
+                G.materialruns = build_material_runs(G.ID, G.nx, G.ny, G.nz)
+
+            if 'pmls' in f and not G.cfs:
+                G.cfs = [CFS()]
+            for n in range(len(f.get('pmls', []))):
+                grp = f['/pmls/pml' + str(n + 1)]
+                xs, xf, ys, yf, zs, zf = (int(x) for x in grp.attrs['extent'])
+                pml = PML(G, ID=grp.attrs['ID'], direction=grp.attrs['direction'], xs=xs, xf=xf, ys=ys, yf=yf, zs=zs, zf=zf)
+                for name in self.pmlarrays:
+                    setattr(pml, name, grp[name][()])
+                pml.cpu_get_update_funcs(G)
+                G.pmls.append(pml)
+
+            for n, tl in enumerate(G.transmissionlines):
+                grp = f['/tls/tl' + str(n + 1)]
+                tl.abcv0 = grp.attrs['abcv0']
+                tl.abcv1 = grp.attrs['abcv1']
+                # Only the cells of the line up to the connection with the
+                # grid are used (see calculate_incident_V_I), and the length
+                # of the line depends on the time window
+                tl.voltage[:tl.nl] = grp['voltage'][:tl.nl]
+                tl.current[:tl.nl] = grp['current'][:tl.nl]
+                tl.Vtotal[:self.iteration] = grp['Vtotal']
+                tl.Itotal[:self.iteration] = grp['Itotal']
+
+            # Receiver outputs are restored once the arrays they are stored
+            # in have been initialised (see restore_outputs)
+            self.rxoutputs = [{output: values[()] for output, values in f['/rxs/rx' + str(n + 1)].items()} for n in range(len(G.rxs))]
+
+            for n, snap in enumerate(G.snapshots):
+                if '/snapshots/snap' + str(n + 1) in f:
+                    snap.electric = f['/snapshots/snap' + str(n + 1) + '/electric'][()]
+                    snap.magnetic = f['/snapshots/snap' + str(n + 1) + '/magnetic'][()]
+
+    def restore_outputs(self, G):
+        """Restore the outputs of receivers up to the iteration the model is
+            resumed from.
+
+        Args:
+            G (class): Grid class instance - holds essential parameters describing the model.
+
+        Returns:
+            iteration (int): Iteration the model is resumed from.
+        """
+
+        for rx, outputs in zip(G.rxs, self.rxoutputs):
+            for output, values in outputs.items():
+                rx.outputs[output][:self.iteration] = values
+        self.rxoutputs = []
+
+        return self.iteration
+
+    def remove(self):
+        """Remove the checkpoint file, i.e. once the model has finished."""
+
+        if self.exists():
+            os.remove(self.filename)
@@ -20,9 +20,13 @@ import numpy as np
 cimport numpy as np
 
 # Data types:
-#   Solid and ID arrays use 32-bit integers (0 to 4294967295)
+#   Solid and ID arrays use 32-bit integers (0 to 4294967295) whilst a model is
+#       built, then the narrowest of 8, 16 or 32-bit integers (idtype_t) that
+#       can store the numeric IDs of all materials
 #   Rigid arrays use 8-bit integers (the smallest available type to store true/false)
 #   Fractal and dispersive coefficient arrays use complex numbers (complextype) which are represented as two floats
+#   Dispersive coefficient and temporary arrays use floats (floattype) instead
+#       if all poles are real, i.e. only Debye and Drude materials (dispersivetype_t)
 #   Main field arrays use floats (floattype) and complex numbers (complextype)
 
 # Single precision
@@ -32,3 +36,14 @@ ctypedef np.complex64_t complextype_t
 # Double precision
 # ctypedef np.float64_t floattype_t
 # ctypedef np.complex128_t complextype_t
+
+# Solid and ID arrays
+ctypedef fused idtype_t:
+    np.uint8_t
+    np.uint16_t
+    np.uint32_t
+
+# Dispersive coefficient and temporary arrays
+ctypedef fused dispersivetype_t:
+    floattype_t
+    complextype_t
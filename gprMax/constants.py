@@ -25,10 +25,14 @@ from scipy.constants import epsilon_0 as e0
 z0 = np.sqrt(m0 / e0)
 
 # Data types:
-#   Solid and ID arrays use 32-bit integers (0 to 4294967295)
+#   Solid and ID arrays use 32-bit integers (0 to 4294967295) whilst a model is
+#       built, then the narrowest of 8, 16 or 32-bit integers (idtypes) that
+#       can store the numeric IDs of all materials
 #   Rigid arrays use 8-bit integers (the smallest available type to store true/false)
 #   Fractal and dispersive coefficient arrays use complex numbers (complextype)
 #                    which are represented as two floats
+#   Dispersive coefficient and temporary arrays use floats (floattype) instead
+#       if all poles are real, i.e. only Debye and Drude materials
 #   Main field arrays use floats (floattype) and complex numbers (complextype)
 
 # Single precision
@@ -48,3 +52,6 @@ cudacomplextype = 'pycuda::complex<float>'
 # For C (CUDA) arrays
 # cudafloattype = 'double'
 # cudacomplextype = 'pycuda::complex<double>'
+
+# Solid and ID arrays
+idtypes = (np.uint8, np.uint16, np.uint32)
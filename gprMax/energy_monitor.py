@@ -0,0 +1,117 @@
+# Copyright (C) 2015-2019: The University of Edinburgh
+#                 Authors: Craig Warren and Antonis Giannopoulos
+#
+# This file is part of gprMax.
+#
+# gprMax is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# gprMax is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with gprMax.  If not, see <http://www.gnu.org/licenses/>.
+
+import numpy as np
+
+from gprMax.constants import e0
+from gprMax.constants import m0
+from gprMax.exceptions import GeneralError
+from gprMax.fields_outputs_ext import sum_squares
+
+
+class EnergyMonitor(object):
+    """
+    Monitor of the total energy of the electric and magnetic fields of a
+    model, sampled periodically during the time stepping loop. The model is
+    stopped if the energy is not finite, or grows once the excitation of the
+    sources has ended, i.e. the model is unstable. Optionally the model is
+    stopped early once the energy has decayed below a fraction of its peak.
+    """
+
+    # Factor by which the energy may exceed its peak during the excitation,
+    # once the excitation has ended, before the model is considered unstable
+    growth = 10
+
+    # Waveform values, relative to the maximum of the waveform, below which a
+    # source is considered to have ended its excitation
+    excitationtol = 1e-3
+
+    def __init__(self, interval, threshold=None):
+        """
+        Args:
+            interval (int): Number of iterations between samples of the energy.
+            threshold (float): Fraction of the peak energy below which the
+                                model is stopped, or None to not stop early.
+        """
+
+        self.interval = interval
+        self.threshold = threshold
+
+        # Iteration the excitation of the sources has ended at, and peak
+        # energy during the excitation
+        self.excitationend = 0
+        self.peak = 0
+
+    def initialise(self, G):
+        """Find the iteration the excitation of the sources ends at.
+
+        Args:
+            G (class): Grid class instance - holds essential parameters describing the model.
+        """
+
+        self.excitationend = 0
+        self.peak = 0
+        for src in G.voltagesources + G.hertziandipoles + G.magneticdipoles + G.transmissionlines:
+            for values in (np.abs(src.waveformvaluesJ), np.abs(src.waveformvaluesM)):
+                significant = np.flatnonzero(values > self.excitationtol * values.max())
+                if significant.size:
+                    self.excitationend = max(self.excitationend, significant[-1] + 1)
+
+    def energy(self, G, Ex, Ey, Ez, Hx, Hy, Hz):
+        """Calculate the total energy of the electric and magnetic fields.
+
+        Args:
+            G (class): Grid class instance - holds essential parameters describing the model.
+            Ex, Ey, Ez, Hx, Hy, Hz (arrays): Field component arrays.
+
+        Returns:
+            energy (float): Total energy of the fields.
+        """
+
+        electric = sum(sum_squares(field.ravel(), G.nthreads) for field in (Ex, Ey, Ez))
+        magnetic = sum(sum_squares(field.ravel(), G.nthreads) for field in (Hx, Hy, Hz))
+
+        return 0.5 * G.dx * G.dy * G.dz * (e0 * electric + m0 * magnetic)
+
+    def check(self, iteration, G, Ex, Ey, Ez, Hx, Hy, Hz):
+        """Sample the energy at the end of an iteration, and check if the
+            model is unstable or the energy has decayed.
+
+        Args:
+            iteration (int): Current iteration (timestep).
+            G (class): Grid class instance - holds essential parameters describing the model.
+            Ex, Ey, Ez, Hx, Hy, Hz (arrays): Field component arrays.
+
+        Returns:
+            (bool): True if the energy has decayed and the model can be stopped.
+        """
+
+        energy = self.energy(G, Ex, Ey, Ez, Hx, Hy, Hz)
+
+        if not np.isfinite(energy):
+            raise GeneralError('Total energy of the fields is not finite at iteration {}, i.e. the model is unstable. Check the properties of materials, and the time step stability factor.'.format(iteration + 1))
+
+        # Energy can only grow during the excitation
+        if iteration < self.excitationend or self.peak == 0:
+            self.peak = max(self.peak, energy)
+            return False
+
+        if energy > self.growth * self.peak:
+            raise GeneralError('Total energy of the fields has grown to {:g} times its peak after the excitation of the sources ended, at iteration {}, i.e. the model is unstable. Check the properties of materials, and the time step stability factor.'.format(energy / self.peak, iteration + 1))
+
+        return self.threshold is not None and energy < self.threshold * self.peak
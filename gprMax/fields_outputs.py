@@ -21,29 +21,31 @@ from string import Template
 import h5py
 
 from gprMax._version import __version__
+from gprMax.fields_outputs_ext import store_rx_outputs
 
 
-def store_outputs(iteration, Ex, Ey, Ez, Hx, Hy, Hz, G):
-    """Stores field component values for every receiver and transmission line.
+def store_outputs(iteration, Ex, Ey, Ez, Hx, Hy, Hz, G, rxarrays, transmissionlines=None):
+    """Stores field component values for receivers and every transmission line.
 
     Args:
         iteration (int): Current iteration number.
         Ex, Ey, Ez, Hx, Hy, Hz (memory view): Current electric and magnetic field values.
         G (class): Grid class instance - holds essential parameters describing the model.
+        rxarrays (tuple): Arrays of receiver cells, output components, cell
+                            sizes and field components for receivers (see
+                            cpu_initialise_rx_arrays).
+        transmissionlines (list): Transmission lines to store values for
+                                    (defaults to all in the model).
     """
 
-    for rx in G.rxs:
-        for output in rx.outputs:
-            # Store electric or magnetic field components
-            if 'I' not in output:
-                field = locals()[output]
-                rx.outputs[output][iteration] = field[rx.xcoord, rx.ycoord, rx.zcoord]
-            # Store current component
-            else:
-                func = globals()[output]
-                rx.outputs[output][iteration] = func(rx.xcoord, rx.ycoord, rx.zcoord, Hx, Hy, Hz, G)
-
-    for tl in G.transmissionlines:
+    rxindices, rxcomponents, rxspacings, rxoutputs = rxarrays
+    if len(rxindices):
+        store_rx_outputs(len(rxindices), iteration, rxindices, rxcomponents, rxspacings, rxoutputs, Ex, Ey, Ez, Hx, Hy, Hz)
+
+    if transmissionlines is None:
+        transmissionlines = G.transmissionlines
+
+    for tl in transmissionlines:
         tl.Vtotal[iteration] = tl.voltage[tl.antpos]
         tl.Itotal[iteration] = tl.current[tl.antpos]
 
@@ -104,39 +106,47 @@ def write_hdf5_outputfile(outputfile, G):
     f.attrs['nx_ny_nz'] = (G.nx, G.ny, G.nz)
     f.attrs['dx_dy_dz'] = (G.dx, G.dy, G.dz)
     f.attrs['dt'] = G.dt
-    nsrc = len(G.voltagesources + G.hertziandipoles + G.magneticdipoles + G.transmissionlines)
+    # Sources and receivers of the main grid followed by those of any
+    # subgrids, whose outputs are stored at every iteration of the main grid
+    grids = [G] + G.subgrids
+    nsrc = sum(len(grid.voltagesources + grid.hertziandipoles + grid.magneticdipoles + grid.transmissionlines) for grid in grids)
     f.attrs['nsrc'] = nsrc
-    f.attrs['nrx'] = len(G.rxs)
+    f.attrs['nrx'] = sum(len(grid.rxs) for grid in grids)
     f.attrs['srcsteps'] = G.srcsteps
     f.attrs['rxsteps'] = G.rxsteps
 
     # Create group for sources (except transmission lines); add type and positional data attributes
-    srclist = G.voltagesources + G.hertziandipoles + G.magneticdipoles
-    for srcindex, src in enumerate(srclist):
+    srclist = [(grid, src) for grid in grids for src in grid.voltagesources + grid.hertziandipoles + grid.magneticdipoles]
+    for srcindex, (grid, src) in enumerate(srclist):
         grp = f.create_group('/srcs/src' + str(srcindex + 1))
         grp.attrs['Type'] = type(src).__name__
-        grp.attrs['Position'] = (src.xcoord * G.dx, src.ycoord * G.dy, src.zcoord * G.dz)
+        grp.attrs['Position'] = grid.position(src)
 
     # Create group for transmission lines; add positional data, line resistance and
     # line discretisation attributes; write arrays for line voltages and currents
-    for tlindex, tl in enumerate(G.transmissionlines):
+    tllist = [(grid, tl) for grid in grids for tl in grid.transmissionlines]
+    for tlindex, (grid, tl) in enumerate(tllist):
+        step = grid.iterations // G.iterations
         grp = f.create_group('/tls/tl' + str(tlindex + 1))
-        grp.attrs['Position'] = (tl.xcoord * G.dx, tl.ycoord * G.dy, tl.zcoord * G.dz)
+        grp.attrs['Position'] = grid.position(tl)
         grp.attrs['Resistance'] = tl.resistance
         grp.attrs['dl'] = tl.dl
         # Save incident voltage and current
-        grp['Vinc'] = tl.Vinc
-        grp['Iinc'] = tl.Iinc
+        grp['Vinc'] = tl.Vinc[::step]
+        grp['Iinc'] = tl.Iinc[::step]
         # Save total voltage and current
-        f['/tls/tl' + str(tlindex + 1) + '/Vtotal'] = tl.Vtotal
-        f['/tls/tl' + str(tlindex + 1) + '/Itotal'] = tl.Itotal
-
-    # Create group, add positional data and write field component arrays for receivers
-    for rxindex, rx in enumerate(G.rxs):
+        f['/tls/tl' + str(tlindex + 1) + '/Vtotal'] = tl.Vtotal[::step]
+        f['/tls/tl' + str(tlindex + 1) + '/Itotal'] = tl.Itotal[::step]
+
+    # Create group, add positional data and write field component arrays for
+    # receivers, in the order of their commands in the input file
+    rxlist = sorted(((grid, rx) for grid in grids for rx in grid.rxs), key=lambda item: item[1].inputorder)
+    for rxindex, (grid, rx) in enumerate(rxlist):
+        step = grid.iterations // G.iterations
         grp = f.create_group('/rxs/rx' + str(rxindex + 1))
         if rx.ID:
             grp.attrs['Name'] = rx.ID
-        grp.attrs['Position'] = (rx.xcoord * G.dx, rx.ycoord * G.dy, rx.zcoord * G.dz)
+        grp.attrs['Position'] = grid.position(rx)
 
         for output in rx.outputs:
-            f['/rxs/rx' + str(rxindex + 1) + '/' + output] = rx.outputs[output]
+            f['/rxs/rx' + str(rxindex + 1) + '/' + output] = rx.outputs[output][::step]
@@ -0,0 +1,37 @@
+# Copyright (C) 2015-2019: The University of Edinburgh
+#                 Authors: Craig Warren and Antonis Giannopoulos
+#
+# This file is part of gprMax.
+#
+# gprMax is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# gprMax is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with gprMax.  If not, see <http://www.gnu.org/licenses/>.
+
+cimport numpy as np
+
+from gprMax.constants cimport floattype_t
+
+
+cpdef void store_rx_outputs(
+                    int NRX,
+                    int iteration,
+                    np.int64_t[::1] rxindices,
+                    int[:, ::1] rxcomponents,
+                    floattype_t[:, ::1] rxspacings,
+                    floattype_t[:, :, ::1] rxs,
+                    floattype_t[:, :, ::1] Ex,
+                    floattype_t[:, :, ::1] Ey,
+                    floattype_t[:, :, ::1] Ez,
+                    floattype_t[:, :, ::1] Hx,
+                    floattype_t[:, :, ::1] Hy,
+                    floattype_t[:, :, ::1] Hz
+            ) noexcept nogil
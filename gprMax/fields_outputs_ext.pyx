@@ -0,0 +1,114 @@
+# Copyright (C) 2015-2019: The University of Edinburgh
+#                 Authors: Craig Warren and Antonis Giannopoulos
+#
+# This file is part of gprMax.
+#
+# gprMax is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# gprMax is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with gprMax.  If not, see <http://www.gnu.org/licenses/>.
+
+cimport numpy as np
+from cython.parallel import prange
+
+from gprMax.constants cimport floattype_t
+
+
+cpdef void store_rx_outputs(
+                    int NRX,
+                    int iteration,
+                    np.int64_t[::1] rxindices,
+                    int[:, ::1] rxcomponents,
+                    floattype_t[:, ::1] rxspacings,
+                    floattype_t[:, :, ::1] rxs,
+                    floattype_t[:, :, ::1] Ex,
+                    floattype_t[:, :, ::1] Ey,
+                    floattype_t[:, :, ::1] Ez,
+                    floattype_t[:, :, ::1] Hx,
+                    floattype_t[:, :, ::1] Hy,
+                    floattype_t[:, :, ::1] Hz
+            ) noexcept nogil:
+    """This function stores field component values for receivers. Currents
+        are calculated from the magnetic field (see Ix, Iy and Iz in grid.py).
+
+    Args:
+        NRX (int): Number of receivers
+        iteration (int): Current iteration (timestep)
+        rxindices, rxcomponents, rxspacings (memoryviews): Access to flat indices
+            of receiver cells in field arrays, output components and sizes of
+            receiver cells (see cpu_initialise_rx_arrays)
+        rxs (memoryview): Access to array to store field components for receivers
+            - rows are receivers; columns are output components; pages are iterations
+        E, H (memoryviews): Access to field component arrays
+    """
+
+    cdef Py_ssize_t rx, n, ijk
+    cdef int component
+
+    # Strides of field arrays in x and y directions
+    cdef Py_ssize_t sx = Ex.shape[1] * Ex.shape[2]
+    cdef Py_ssize_t sy = Ex.shape[2]
+
+    # Flat access to field arrays
+    cdef floattype_t *ex = &Ex[0, 0, 0]
+    cdef floattype_t *ey = &Ey[0, 0, 0]
+    cdef floattype_t *ez = &Ez[0, 0, 0]
+    cdef floattype_t *hx = &Hx[0, 0, 0]
+    cdef floattype_t *hy = &Hy[0, 0, 0]
+    cdef floattype_t *hz = &Hz[0, 0, 0]
+
+    for rx in range(NRX):
+        ijk = rxindices[rx]
+        for n in range(rxcomponents.shape[1]):
+            component = rxcomponents[rx, n]
+            if component == 0:
+                rxs[rx, n, iteration] = ex[ijk]
+            elif component == 1:
+                rxs[rx, n, iteration] = ey[ijk]
+            elif component == 2:
+                rxs[rx, n, iteration] = ez[ijk]
+            elif component == 3:
+                rxs[rx, n, iteration] = hx[ijk]
+            elif component == 4:
+                rxs[rx, n, iteration] = hy[ijk]
+            elif component == 5:
+                rxs[rx, n, iteration] = hz[ijk]
+            elif component == 6:
+                rxs[rx, n, iteration] = rxspacings[rx, 1] * (hy[ijk - 1] - hy[ijk]) + rxspacings[rx, 2] * (hz[ijk] - hz[ijk - sy])
+            elif component == 7:
+                rxs[rx, n, iteration] = rxspacings[rx, 0] * (hx[ijk] - hx[ijk - 1]) + rxspacings[rx, 2] * (hz[ijk - sx] - hz[ijk])
+            elif component == 8:
+                rxs[rx, n, iteration] = rxspacings[rx, 0] * (hx[ijk - sy] - hx[ijk]) + rxspacings[rx, 1] * (hy[ijk] - hy[ijk - sx])
+
+
+cpdef double sum_squares(
+                    floattype_t[::1] field,
+                    int nthreads
+            ) noexcept nogil:
+    """This function sums the squares of the values of a field component, i.e.
+        for the energy of the field (see EnergyMonitor). The sum is not
+        finite if any value is not finite.
+
+    Args:
+        field (memoryview): Access to field component array (flattened)
+        nthreads (int): Number of threads to use
+
+    Returns:
+        total (double): Sum of the squares of the values
+    """
+
+    cdef Py_ssize_t n
+    cdef double total = 0
+
+    for n in prange(field.shape[0], nogil=True, schedule='static', num_threads=nthreads):
+        total += <double>field[n] * field[n]
+
+    return total
@@ -0,0 +1,355 @@
+# Copyright (C) 2015-2019: The University of Edinburgh
+#                 Authors: Craig Warren and Antonis Giannopoulos
+#
+# This file is part of gprMax.
+#
+# gprMax is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# gprMax is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with gprMax.  If not, see <http://www.gnu.org/licenses/>.
+
+cimport numpy as np
+
+from gprMax.constants cimport floattype_t
+from gprMax.constants cimport idtype_t
+from gprMax.constants cimport dispersivetype_t
+
+
+# Electric field updates - standard materials
+cpdef void update_electric(
+                    int nx,
+                    int ny,
+                    int nz,
+                    int nthreads,
+                    floattype_t[:, ::1] updatecoeffsE,
+                    idtype_t[:, :, :, ::1] ID,
+                    floattype_t[:, :, ::1] Ex,
+                    floattype_t[:, :, ::1] Ey,
+                    floattype_t[:, :, ::1] Ez,
+                    floattype_t[:, :, ::1] Hx,
+                    floattype_t[:, :, ::1] Hy,
+                    floattype_t[:, :, ::1] Hz
+            ) noexcept nogil
+
+cpdef void update_electric_tiled(
+                    int nx,
+                    int ny,
+                    int nz,
+                    int nthreads,
+                    int tilex,
+                    int tiley,
+                    floattype_t[:, ::1] updatecoeffsE,
+                    idtype_t[:, :, :, ::1] ID,
+                    floattype_t[:, :, ::1] Ex,
+                    floattype_t[:, :, ::1] Ey,
+                    floattype_t[:, :, ::1] Ez,
+                    floattype_t[:, :, ::1] Hx,
+                    floattype_t[:, :, ::1] Hy,
+                    floattype_t[:, :, ::1] Hz
+            ) noexcept nogil
+
+cpdef void update_electric_runs(
+                    int nx,
+                    int ny,
+                    int nz,
+                    int nthreads,
+                    floattype_t[:, ::1] updatecoeffsE,
+                    idtype_t[:, :, :, ::1] ID,
+                    int[:, ::1] offsets,
+                    int[:, ::1] runs,
+                    floattype_t[:, :, ::1] Ex,
+                    floattype_t[:, :, ::1] Ey,
+                    floattype_t[:, :, ::1] Ez,
+                    floattype_t[:, :, ::1] Hx,
+                    floattype_t[:, :, ::1] Hy,
+                    floattype_t[:, :, ::1] Hz
+            ) noexcept nogil
+
+cpdef void update_electric_slab(
+                    int xs,
+                    int xf,
+                    int nx,
+                    int ny,
+                    int nz,
+                    int nthreads,
+                    floattype_t[:, ::1] updatecoeffsE,
+                    idtype_t[:, :, :, ::1] ID,
+                    floattype_t[:, :, ::1] Ex,
+                    floattype_t[:, :, ::1] Ey,
+                    floattype_t[:, :, ::1] Ez,
+                    floattype_t[:, :, ::1] Hx,
+                    floattype_t[:, :, ::1] Hy,
+                    floattype_t[:, :, ::1] Hz
+            ) noexcept nogil
+
+cpdef void update_electric_graded(
+                    int nx,
+                    int ny,
+                    int nz,
+                    int nthreads,
+                    floattype_t[:, ::1] updatecoeffsE,
+                    idtype_t[:, :, :, ::1] ID,
+                    floattype_t[::1] gradingx,
+                    floattype_t[::1] gradingy,
+                    floattype_t[::1] gradingz,
+                    floattype_t[:, :, ::1] Ex,
+                    floattype_t[:, :, ::1] Ey,
+                    floattype_t[:, :, ::1] Ez,
+                    floattype_t[:, :, ::1] Hx,
+                    floattype_t[:, :, ::1] Hy,
+                    floattype_t[:, :, ::1] Hz
+            ) noexcept nogil
+
+# Electric field updates - dispersive materials
+cpdef void update_electric_dispersive_multipole(
+                    int nx,
+                    int ny,
+                    int nz,
+                    int nthreads,
+                    int maxpoles,
+                    floattype_t[:, ::1] updatecoeffsE,
+                    dispersivetype_t[:, ::1] updatecoeffsdispersive,
+                    idtype_t[:, :, :, ::1] ID,
+                    dispersivetype_t[:, :, :, ::1] Tx,
+                    dispersivetype_t[:, :, :, ::1] Ty,
+                    dispersivetype_t[:, :, :, ::1] Tz,
+                    floattype_t[:, :, ::1] Ex,
+                    floattype_t[:, :, ::1] Ey,
+                    floattype_t[:, :, ::1] Ez,
+                    floattype_t[:, :, ::1] Hx,
+                    floattype_t[:, :, ::1] Hy,
+                    floattype_t[:, :, ::1] Hz
+            ) noexcept nogil
+
+cpdef void update_electric_dispersive_1pole(
+                    int nx,
+                    int ny,
+                    int nz,
+                    int nthreads,
+                    floattype_t[:, ::1] updatecoeffsE,
+                    dispersivetype_t[:, ::1] updatecoeffsdispersive,
+                    idtype_t[:, :, :, ::1] ID,
+                    dispersivetype_t[:, :, :, ::1] Tx,
+                    dispersivetype_t[:, :, :, ::1] Ty,
+                    dispersivetype_t[:, :, :, ::1] Tz,
+                    floattype_t[:, :, ::1] Ex,
+                    floattype_t[:, :, ::1] Ey,
+                    floattype_t[:, :, ::1] Ez,
+                    floattype_t[:, :, ::1] Hx,
+                    floattype_t[:, :, ::1] Hy,
+                    floattype_t[:, :, ::1] Hz
+            ) noexcept nogil
+
+cpdef void update_electric_dispersive_cells(
+                    int nthreads,
+                    int maxpoles,
+                    dispersivetype_t[:, ::1] updatecoeffsdispersive,
+                    idtype_t[:, :, :, ::1] ID,
+                    np.int64_t[::1] cellsx,
+                    np.int64_t[::1] cellsy,
+                    np.int64_t[::1] cellsz,
+                    dispersivetype_t[:, ::1] Tx,
+                    dispersivetype_t[:, ::1] Ty,
+                    dispersivetype_t[:, ::1] Tz,
+                    float[::1] phix,
+                    float[::1] phiy,
+                    float[::1] phiz,
+                    floattype_t[:, :, ::1] Ex,
+                    floattype_t[:, :, ::1] Ey,
+                    floattype_t[:, :, ::1] Ez
+            ) noexcept nogil
+
+cpdef void update_electric_dispersive_cells_phi(
+                    int nthreads,
+                    floattype_t[:, ::1] updatecoeffsE,
+                    idtype_t[:, :, :, ::1] ID,
+                    np.int64_t[::1] cellsx,
+                    np.int64_t[::1] cellsy,
+                    np.int64_t[::1] cellsz,
+                    float[::1] phix,
+                    float[::1] phiy,
+                    float[::1] phiz,
+                    floattype_t[:, :, ::1] Ex,
+                    floattype_t[:, :, ::1] Ey,
+                    floattype_t[:, :, ::1] Ez
+            ) noexcept nogil
+
+cpdef void update_magnetic(
+                    int nx,
+                    int ny,
+                    int nz,
+                    int nthreads,
+                    floattype_t[:, ::1] updatecoeffsH,
+                    idtype_t[:, :, :, ::1] ID,
+                    floattype_t[:, :, ::1] Ex,
+                    floattype_t[:, :, ::1] Ey,
+                    floattype_t[:, :, ::1] Ez,
+                    floattype_t[:, :, ::1] Hx,
+                    floattype_t[:, :, ::1] Hy,
+                    floattype_t[:, :, ::1] Hz
+            ) noexcept nogil
+
+cpdef void update_magnetic_tiled(
+                    int nx,
+                    int ny,
+                    int nz,
+                    int nthreads,
+                    int tilex,
+                    int tiley,
+                    floattype_t[:, ::1] updatecoeffsH,
+                    idtype_t[:, :, :, ::1] ID,
+                    floattype_t[:, :, ::1] Ex,
+                    floattype_t[:, :, ::1] Ey,
+                    floattype_t[:, :, ::1] Ez,
+                    floattype_t[:, :, ::1] Hx,
+                    floattype_t[:, :, ::1] Hy,
+                    floattype_t[:, :, ::1] Hz
+            ) noexcept nogil
+
+cpdef void update_magnetic_runs(
+                    int nx,
+                    int ny,
+                    int nz,
+                    int nthreads,
+                    floattype_t[:, ::1] updatecoeffsH,
+                    idtype_t[:, :, :, ::1] ID,
+                    int[:, ::1] offsets,
+                    int[:, ::1] runs,
+                    floattype_t[:, :, ::1] Ex,
+                    floattype_t[:, :, ::1] Ey,
+                    floattype_t[:, :, ::1] Ez,
+                    floattype_t[:, :, ::1] Hx,
+                    floattype_t[:, :, ::1] Hy,
+                    floattype_t[:, :, ::1] Hz
+            ) noexcept nogil
+
+cpdef void update_magnetic_slab(
+                    int xs,
+                    int xf,
+                    int nx,
+                    int ny,
+                    int nz,
+                    int nthreads,
+                    floattype_t[:, ::1] updatecoeffsH,
+                    idtype_t[:, :, :, ::1] ID,
+                    floattype_t[:, :, ::1] Ex,
+                    floattype_t[:, :, ::1] Ey,
+                    floattype_t[:, :, ::1] Ez,
+                    floattype_t[:, :, ::1] Hx,
+                    floattype_t[:, :, ::1] Hy,
+                    floattype_t[:, :, ::1] Hz
+            ) noexcept nogil
+
+
+cpdef void update_magnetic_graded(
+                    int nx,
+                    int ny,
+                    int nz,
+                    int nthreads,
+                    floattype_t[:, ::1] updatecoeffsH,
+                    idtype_t[:, :, :, ::1] ID,
+                    floattype_t[::1] gradingx,
+                    floattype_t[::1] gradingy,
+                    floattype_t[::1] gradingz,
+                    floattype_t[:, :, ::1] Ex,
+                    floattype_t[:, :, ::1] Ey,
+                    floattype_t[:, :, ::1] Ez,
+                    floattype_t[:, :, ::1] Hx,
+                    floattype_t[:, :, ::1] Hy,
+                    floattype_t[:, :, ::1] Hz
+            ) noexcept nogil
+
+# Field updates - 2D models (TMx, TMy, TMz modes)
+cpdef void update_electric_TMx(
+                    int ny,
+                    int nz,
+                    int nthreads,
+                    floattype_t[:, ::1] updatecoeffsE,
+                    idtype_t[:, :, ::1] ID,
+                    floattype_t[:, ::1] Ex,
+                    floattype_t[:, ::1] Hy,
+                    floattype_t[:, ::1] Hz
+            ) noexcept nogil
+
+cpdef void update_electric_TMy(
+                    int nx,
+                    int nz,
+                    int nthreads,
+                    floattype_t[:, ::1] updatecoeffsE,
+                    idtype_t[:, :, ::1] ID,
+                    floattype_t[:, ::1] Ey,
+                    floattype_t[:, ::1] Hx,
+                    floattype_t[:, ::1] Hz
+            ) noexcept nogil
+
+cpdef void update_electric_TMz(
+                    int nx,
+                    int ny,
+                    int nthreads,
+                    floattype_t[:, ::1] updatecoeffsE,
+                    idtype_t[:, :, ::1] ID,
+                    floattype_t[:, ::1] Ez,
+                    floattype_t[:, ::1] Hx,
+                    floattype_t[:, ::1] Hy
+            ) noexcept nogil
+
+cpdef void update_magnetic_TMx(
+                    int ny,
+                    int nz,
+                    int nthreads,
+                    floattype_t[:, ::1] updatecoeffsH,
+                    idtype_t[:, :, ::1] ID,
+                    floattype_t[:, ::1] Ex,
+                    floattype_t[:, ::1] Hy,
+                    floattype_t[:, ::1] Hz
+            ) noexcept nogil
+
+cpdef void update_magnetic_TMy(
+                    int nx,
+                    int nz,
+                    int nthreads,
+                    floattype_t[:, ::1] updatecoeffsH,
+                    idtype_t[:, :, ::1] ID,
+                    floattype_t[:, ::1] Ey,
+                    floattype_t[:, ::1] Hx,
+                    floattype_t[:, ::1] Hz
+            ) noexcept nogil
+
+cpdef void update_magnetic_TMz(
+                    int nx,
+                    int ny,
+                    int nthreads,
+                    floattype_t[:, ::1] updatecoeffsH,
+                    idtype_t[:, :, ::1] ID,
+                    floattype_t[:, ::1] Ez,
+                    floattype_t[:, ::1] Hx,
+                    floattype_t[:, ::1] Hy
+            ) noexcept nogil
+
+cpdef void update_electric_dispersive_cells_2D(
+                    int nthreads,
+                    int maxpoles,
+                    dispersivetype_t[:, ::1] updatecoeffsdispersive,
+                    idtype_t[:, :, ::1] ID,
+                    np.int64_t[::1] cells,
+                    dispersivetype_t[:, ::1] T,
+                    float[::1] phi,
+                    floattype_t[:, ::1] E
+            ) noexcept nogil
+
+cpdef void update_electric_dispersive_cells_phi_2D(
+                    int nthreads,
+                    floattype_t[:, ::1] updatecoeffsE,
+                    idtype_t[:, :, ::1] ID,
+                    np.int64_t[::1] cells,
+                    float[::1] phi,
+                    floattype_t[:, ::1] E
+            ) noexcept nogil
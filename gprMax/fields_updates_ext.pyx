@@ -21,7 +21,8 @@ cimport numpy as np
 from cython.parallel import prange
 
 from gprMax.constants cimport floattype_t
-from gprMax.constants cimport complextype_t
+from gprMax.constants cimport idtype_t
+from gprMax.constants cimport dispersivetype_t
 
 
 ###############################################
@@ -33,14 +34,14 @@ cpdef void update_electric(
                     int nz,
                     int nthreads,
                     floattype_t[:, ::1] updatecoeffsE,
-                    np.uint32_t[:, :, :, ::1] ID,
+                    idtype_t[:, :, :, ::1] ID,
                     floattype_t[:, :, ::1] Ex,
                     floattype_t[:, :, ::1] Ey,
                     floattype_t[:, :, ::1] Ez,
                     floattype_t[:, :, ::1] Hx,
                     floattype_t[:, :, ::1] Hy,
                     floattype_t[:, :, ::1] Hz
-            ):
+            ) noexcept nogil:
     """This function updates the electric field components.
 
     Args:
@@ -107,105 +108,586 @@ cpdef void update_electric(
                 Ez[i, j, 0] = updatecoeffsE[materialEz, 0] * Ez[i, j, 0] + updatecoeffsE[materialEz, 1] * (Hy[i, j, 0] - Hy[i - 1, j, 0]) - updatecoeffsE[materialEz, 2] * (Hx[i, j, 0] - Hx[i, j - 1, 0])
 
 
-#################################################
-# Electric field updates - dispersive materials #
-#################################################
-cpdef void update_electric_dispersive_multipole_A(
+cpdef void update_electric_tiled(
                     int nx,
                     int ny,
                     int nz,
                     int nthreads,
-                    int maxpoles,
+                    int tilex,
+                    int tiley,
                     floattype_t[:, ::1] updatecoeffsE,
-                    complextype_t[:, ::1] updatecoeffsdispersive,
-                    np.uint32_t[:, :, :, ::1] ID,
-                    complextype_t[:, :, :, ::1] Tx,
-                    complextype_t[:, :, :, ::1] Ty,
-                    complextype_t[:, :, :, ::1] Tz,
+                    idtype_t[:, :, :, ::1] ID,
                     floattype_t[:, :, ::1] Ex,
                     floattype_t[:, :, ::1] Ey,
                     floattype_t[:, :, ::1] Ez,
                     floattype_t[:, :, ::1] Hx,
                     floattype_t[:, :, ::1] Hy,
                     floattype_t[:, :, ::1] Hz
-            ):
-    """This function updates the electric field components when dispersive materials (with multiple poles) are present.
+            ) noexcept nogil:
+    """This function updates the electric field components using cache blocking,
+        i.e. the x-y plane is split into tiles which are distributed across
+        threads, and full (contiguous) z-direction runs are used within a tile.
+        Results are identical to update_electric. Only 3D grids are tiled, 2D
+        grids use the standard update.
 
     Args:
         nx, ny, nz (int): Grid size in cells
-        maxpoles (int): Maximum number of poles
         nthreads (int): Number of threads to use
-        updatecoeffs, T, ID, E, H (memoryviews): Access to update coeffients, temporary, ID and field component arrays
+        tilex, tiley (int): Tile size in cells in the x and y directions
+        updatecoeffs, ID, E, H (memoryviews): Access to update coeffients, ID and field component arrays
     """
 
-    cdef Py_ssize_t i, j, k, pole
-    cdef int material
-    cdef float phi = 0
+    cdef Py_ssize_t i, j, k, tile, ntilesx, ntilesy, istart, istop, jstart, jstop
+    cdef int materialEx, materialEy, materialEz
 
-    # Ex component
-    if ny != 1 or nz != 1:
-        for i in prange(0, nx, nogil=True, schedule='static', num_threads=nthreads):
-            for j in range(1, ny):
-                for k in range(1, nz):
-                    material = ID[0, i, j, k]
-                    phi = 0
-                    for pole in range(maxpoles):
-                        phi = phi + updatecoeffsdispersive[material, pole * 3].real * Tx[pole, i, j, k].real
-                        Tx[pole, i, j, k] = updatecoeffsdispersive[material, 1 + (pole * 3)] * Tx[pole, i, j, k] + updatecoeffsdispersive[material, 2 + (pole * 3)] * Ex[i, j, k]
-                    Ex[i, j, k] = updatecoeffsE[material, 0] * Ex[i, j, k] + updatecoeffsE[material, 2] * (Hz[i, j, k] - Hz[i, j - 1, k]) - updatecoeffsE[material, 3] * (Hy[i, j, k] - Hy[i, j, k - 1]) - updatecoeffsE[material, 4] * phi
+    if nx == 1 or ny == 1 or nz == 1:
+        update_electric(nx, ny, nz, nthreads, updatecoeffsE, ID, Ex, Ey, Ez, Hx, Hy, Hz)
+        return
 
-    # Ey component
-    if nx != 1 or nz != 1:
-        for i in prange(1, nx, nogil=True, schedule='static', num_threads=nthreads):
-            for j in range(0, ny):
+    ntilesx = (nx - 1 + tilex - 1) // tilex
+    ntilesy = (ny - 1 + tiley - 1) // tiley
+
+    for tile in prange(0, ntilesx * ntilesy, nogil=True, schedule='static', num_threads=nthreads):
+        istart = 1 + (tile // ntilesy) * tilex
+        istop = min(istart + tilex, nx)
+        jstart = 1 + (tile % ntilesy) * tiley
+        jstop = min(jstart + tiley, ny)
+        for i in range(istart, istop):
+            for j in range(jstart, jstop):
                 for k in range(1, nz):
-                    material = ID[1, i, j, k]
-                    phi = 0
-                    for pole in range(maxpoles):
-                        phi = phi + updatecoeffsdispersive[material, pole * 3].real * Ty[pole, i, j, k].real
-                        Ty[pole, i, j, k] = updatecoeffsdispersive[material, 1 + (pole * 3)] * Ty[pole, i, j, k] + updatecoeffsdispersive[material, 2 + (pole * 3)] * Ey[i, j, k]
-                    Ey[i, j, k] = updatecoeffsE[material, 0] * Ey[i, j, k] + updatecoeffsE[material, 3] * (Hx[i, j, k] - Hx[i, j, k - 1]) - updatecoeffsE[material, 1] * (Hz[i, j, k] - Hz[i - 1, j, k]) - updatecoeffsE[material, 4] * phi
+                    materialEx = ID[0, i, j, k]
+                    materialEy = ID[1, i, j, k]
+                    materialEz = ID[2, i, j, k]
+                    Ex[i, j, k] = updatecoeffsE[materialEx, 0] * Ex[i, j, k] + updatecoeffsE[materialEx, 2] * (Hz[i, j, k] - Hz[i, j - 1, k]) - updatecoeffsE[materialEx, 3] * (Hy[i, j, k] - Hy[i, j, k - 1])
+                    Ey[i, j, k] = updatecoeffsE[materialEy, 0] * Ey[i, j, k] + updatecoeffsE[materialEy, 3] * (Hx[i, j, k] - Hx[i, j, k - 1]) - updatecoeffsE[materialEy, 1] * (Hz[i, j, k] - Hz[i - 1, j, k])
+                    Ez[i, j, k] = updatecoeffsE[materialEz, 0] * Ez[i, j, k] + updatecoeffsE[materialEz, 1] * (Hy[i, j, k] - Hy[i - 1, j, k]) - updatecoeffsE[materialEz, 2] * (Hx[i, j, k] - Hx[i, j - 1, k])
 
-    # Ez component
-    if nx != 1 or ny != 1:
-        for i in prange(1, nx, nogil=True, schedule='static', num_threads=nthreads):
+    # Ex components at i = 0
+    for j in prange(1, ny, nogil=True, schedule='static', num_threads=nthreads):
+        for k in range(1, nz):
+            materialEx = ID[0, 0, j, k]
+            Ex[0, j, k] = updatecoeffsE[materialEx, 0] * Ex[0, j, k] + updatecoeffsE[materialEx, 2] * (Hz[0, j, k] - Hz[0, j - 1, k]) - updatecoeffsE[materialEx, 3] * (Hy[0, j, k] - Hy[0, j, k - 1])
+
+    # Ey components at j = 0
+    for i in prange(1, nx, nogil=True, schedule='static', num_threads=nthreads):
+        for k in range(1, nz):
+            materialEy = ID[1, i, 0, k]
+            Ey[i, 0, k] = updatecoeffsE[materialEy, 0] * Ey[i, 0, k] + updatecoeffsE[materialEy, 3] * (Hx[i, 0, k] - Hx[i, 0, k - 1]) - updatecoeffsE[materialEy, 1] * (Hz[i, 0, k] - Hz[i - 1, 0, k])
+
+    # Ez components at k = 0
+    for i in prange(1, nx, nogil=True, schedule='static', num_threads=nthreads):
+        for j in range(1, ny):
+            materialEz = ID[2, i, j, 0]
+            Ez[i, j, 0] = updatecoeffsE[materialEz, 0] * Ez[i, j, 0] + updatecoeffsE[materialEz, 1] * (Hy[i, j, 0] - Hy[i - 1, j, 0]) - updatecoeffsE[materialEz, 2] * (Hx[i, j, 0] - Hx[i, j - 1, 0])
+
+
+cpdef void update_electric_runs(
+                    int nx,
+                    int ny,
+                    int nz,
+                    int nthreads,
+                    floattype_t[:, ::1] updatecoeffsE,
+                    idtype_t[:, :, :, ::1] ID,
+                    int[:, ::1] offsets,
+                    int[:, ::1] runs,
+                    floattype_t[:, :, ::1] Ex,
+                    floattype_t[:, :, ::1] Ey,
+                    floattype_t[:, :, ::1] Ez,
+                    floattype_t[:, :, ::1] Hx,
+                    floattype_t[:, :, ::1] Hy,
+                    floattype_t[:, :, ::1] Hz
+            ) noexcept nogil:
+    """This function updates the electric field components using runs of cells
+        in the z direction that share a single material (see
+        build_material_runs), i.e. update coefficients are loaded once per run
+        in homogeneous regions rather than gathered for every cell. Results are
+        identical to update_electric. Only 3D grids use runs, 2D grids use the
+        standard update.
+
+    Args:
+        nx, ny, nz (int): Grid size in cells
+        nthreads (int): Number of threads to use
+        updatecoeffs, ID, E, H (memoryviews): Access to update coeffients, ID and field component arrays
+        offsets, runs (memoryviews): Access to indices of runs for each component and column of cells, and runs
+    """
+
+    cdef Py_ssize_t i, j, k, col, run
+    cdef int materialEx, materialEy, materialEz
+    cdef floattype_t coeff0, coeff1, coeff2, coeff3
+
+    if nx == 1 or ny == 1 or nz == 1:
+        update_electric(nx, ny, nz, nthreads, updatecoeffsE, ID, Ex, Ey, Ez, Hx, Hy, Hz)
+        return
+
+    for i in prange(1, nx, nogil=True, schedule='static', num_threads=nthreads):
+        for j in range(1, ny):
+            col = i * (ny + 1) + j
+            for run in range(offsets[0, col], offsets[0, col + 1]):
+                materialEx = runs[run, 2]
+                if materialEx < 0:
+                    for k in range(runs[run, 0], runs[run, 1]):
+                        materialEx = ID[0, i, j, k]
+                        Ex[i, j, k] = updatecoeffsE[materialEx, 0] * Ex[i, j, k] + updatecoeffsE[materialEx, 2] * (Hz[i, j, k] - Hz[i, j - 1, k]) - updatecoeffsE[materialEx, 3] * (Hy[i, j, k] - Hy[i, j, k - 1])
+                else:
+                    coeff0 = updatecoeffsE[materialEx, 0]
+                    coeff2 = updatecoeffsE[materialEx, 2]
+                    coeff3 = updatecoeffsE[materialEx, 3]
+                    for k in range(runs[run, 0], runs[run, 1]):
+                        Ex[i, j, k] = coeff0 * Ex[i, j, k] + coeff2 * (Hz[i, j, k] - Hz[i, j - 1, k]) - coeff3 * (Hy[i, j, k] - Hy[i, j, k - 1])
+
+            for run in range(offsets[1, col], offsets[1, col + 1]):
+                materialEy = runs[run, 2]
+                if materialEy < 0:
+                    for k in range(runs[run, 0], runs[run, 1]):
+                        materialEy = ID[1, i, j, k]
+                        Ey[i, j, k] = updatecoeffsE[materialEy, 0] * Ey[i, j, k] + updatecoeffsE[materialEy, 3] * (Hx[i, j, k] - Hx[i, j, k - 1]) - updatecoeffsE[materialEy, 1] * (Hz[i, j, k] - Hz[i - 1, j, k])
+                else:
+                    coeff0 = updatecoeffsE[materialEy, 0]
+                    coeff1 = updatecoeffsE[materialEy, 1]
+                    coeff3 = updatecoeffsE[materialEy, 3]
+                    for k in range(runs[run, 0], runs[run, 1]):
+                        Ey[i, j, k] = coeff0 * Ey[i, j, k] + coeff3 * (Hx[i, j, k] - Hx[i, j, k - 1]) - coeff1 * (Hz[i, j, k] - Hz[i - 1, j, k])
+
+            for run in range(offsets[2, col], offsets[2, col + 1]):
+                materialEz = runs[run, 2]
+                if materialEz < 0:
+                    for k in range(runs[run, 0], runs[run, 1]):
+                        materialEz = ID[2, i, j, k]
+                        Ez[i, j, k] = updatecoeffsE[materialEz, 0] * Ez[i, j, k] + updatecoeffsE[materialEz, 1] * (Hy[i, j, k] - Hy[i - 1, j, k]) - updatecoeffsE[materialEz, 2] * (Hx[i, j, k] - Hx[i, j - 1, k])
+                else:
+                    coeff0 = updatecoeffsE[materialEz, 0]
+                    coeff1 = updatecoeffsE[materialEz, 1]
+                    coeff2 = updatecoeffsE[materialEz, 2]
+                    for k in range(runs[run, 0], runs[run, 1]):
+                        Ez[i, j, k] = coeff0 * Ez[i, j, k] + coeff1 * (Hy[i, j, k] - Hy[i - 1, j, k]) - coeff2 * (Hx[i, j, k] - Hx[i, j - 1, k])
+
+    # Ex components at i = 0
+    for j in prange(1, ny, nogil=True, schedule='static', num_threads=nthreads):
+        for k in range(1, nz):
+            materialEx = ID[0, 0, j, k]
+            Ex[0, j, k] = updatecoeffsE[materialEx, 0] * Ex[0, j, k] + updatecoeffsE[materialEx, 2] * (Hz[0, j, k] - Hz[0, j - 1, k]) - updatecoeffsE[materialEx, 3] * (Hy[0, j, k] - Hy[0, j, k - 1])
+
+    # Ey components at j = 0
+    for i in prange(1, nx, nogil=True, schedule='static', num_threads=nthreads):
+        for k in range(1, nz):
+            materialEy = ID[1, i, 0, k]
+            Ey[i, 0, k] = updatecoeffsE[materialEy, 0] * Ey[i, 0, k] + updatecoeffsE[materialEy, 3] * (Hx[i, 0, k] - Hx[i, 0, k - 1]) - updatecoeffsE[materialEy, 1] * (Hz[i, 0, k] - Hz[i - 1, 0, k])
+
+    # Ez components at k = 0
+    for i in prange(1, nx, nogil=True, schedule='static', num_threads=nthreads):
+        for j in range(1, ny):
+            materialEz = ID[2, i, j, 0]
+            Ez[i, j, 0] = updatecoeffsE[materialEz, 0] * Ez[i, j, 0] + updatecoeffsE[materialEz, 1] * (Hy[i, j, 0] - Hy[i - 1, j, 0]) - updatecoeffsE[materialEz, 2] * (Hx[i, j, 0] - Hx[i, j - 1, 0])
+
+
+cpdef void update_electric_box(
+                    int xs,
+                    int xf,
+                    int ys,
+                    int yf,
+                    int zs,
+                    int zf,
+                    int nx,
+                    int ny,
+                    int nz,
+                    int nthreads,
+                    floattype_t[:, ::1] updatecoeffsE,
+                    idtype_t[:, :, :, ::1] ID,
+                    int[:, ::1] offsets,
+                    int[:, ::1] runs,
+                    floattype_t[:, :, ::1] Ex,
+                    floattype_t[:, :, ::1] Ey,
+                    floattype_t[:, :, ::1] Ez,
+                    floattype_t[:, :, ::1] Hx,
+                    floattype_t[:, :, ::1] Hy,
+                    floattype_t[:, :, ::1] Hz
+            ) noexcept nogil:
+    """This function updates the electric field components in a box of cells
+        of a 3D grid, outside of which all field components are zero (see
+        ActiveRegion), using the parts of runs of cells that share a single
+        material (see build_material_runs) within the box. Results are
+        identical to update_electric.
+
+    Args:
+        xs, xf, ys, yf, zs, zf (int): Cell coordinates of the box
+        nx, ny, nz (int): Grid size in cells
+        nthreads (int): Number of threads to use
+        updatecoeffs, ID, E, H (memoryviews): Access to update coeffients, ID and field component arrays
+        offsets, runs (memoryviews): Access to indices of runs for each component and column of cells, and runs
+    """
+
+    cdef Py_ssize_t i, j, k, col, run
+    cdef int materialEx, materialEy, materialEz, kstart, kstop
+    cdef floattype_t coeff0, coeff1, coeff2, coeff3
+    cdef int xs1 = max(xs, 1)
+    cdef int ys1 = max(ys, 1)
+    cdef int zs1 = max(zs, 1)
+
+    # Box is within the cells of the grid
+    xf = min(xf, nx)
+    yf = min(yf, ny)
+    zf = min(zf, nz)
+
+    for i in prange(xs1, xf, nogil=True, schedule='static', num_threads=nthreads):
+        for j in range(ys1, yf):
+            col = i * (ny + 1) + j
+            for run in range(offsets[0, col], offsets[0, col + 1]):
+                kstart = max(runs[run, 0], zs)
+                kstop = min(runs[run, 1], zf)
+                materialEx = runs[run, 2]
+                if materialEx < 0:
+                    for k in range(kstart, kstop):
+                        materialEx = ID[0, i, j, k]
+                        Ex[i, j, k] = updatecoeffsE[materialEx, 0] * Ex[i, j, k] + updatecoeffsE[materialEx, 2] * (Hz[i, j, k] - Hz[i, j - 1, k]) - updatecoeffsE[materialEx, 3] * (Hy[i, j, k] - Hy[i, j, k - 1])
+                else:
+                    coeff0 = updatecoeffsE[materialEx, 0]
+                    coeff2 = updatecoeffsE[materialEx, 2]
+                    coeff3 = updatecoeffsE[materialEx, 3]
+                    for k in range(kstart, kstop):
+                        Ex[i, j, k] = coeff0 * Ex[i, j, k] + coeff2 * (Hz[i, j, k] - Hz[i, j - 1, k]) - coeff3 * (Hy[i, j, k] - Hy[i, j, k - 1])
+
+            for run in range(offsets[1, col], offsets[1, col + 1]):
+                kstart = max(runs[run, 0], zs)
+                kstop = min(runs[run, 1], zf)
+                materialEy = runs[run, 2]
+                if materialEy < 0:
+                    for k in range(kstart, kstop):
+                        materialEy = ID[1, i, j, k]
+                        Ey[i, j, k] = updatecoeffsE[materialEy, 0] * Ey[i, j, k] + updatecoeffsE[materialEy, 3] * (Hx[i, j, k] - Hx[i, j, k - 1]) - updatecoeffsE[materialEy, 1] * (Hz[i, j, k] - Hz[i - 1, j, k])
+                else:
+                    coeff0 = updatecoeffsE[materialEy, 0]
+                    coeff1 = updatecoeffsE[materialEy, 1]
+                    coeff3 = updatecoeffsE[materialEy, 3]
+                    for k in range(kstart, kstop):
+                        Ey[i, j, k] = coeff0 * Ey[i, j, k] + coeff3 * (Hx[i, j, k] - Hx[i, j, k - 1]) - coeff1 * (Hz[i, j, k] - Hz[i - 1, j, k])
+
+            for run in range(offsets[2, col], offsets[2, col + 1]):
+                kstart = max(runs[run, 0], zs)
+                kstop = min(runs[run, 1], zf)
+                materialEz = runs[run, 2]
+                if materialEz < 0:
+                    for k in range(kstart, kstop):
+                        materialEz = ID[2, i, j, k]
+                        Ez[i, j, k] = updatecoeffsE[materialEz, 0] * Ez[i, j, k] + updatecoeffsE[materialEz, 1] * (Hy[i, j, k] - Hy[i - 1, j, k]) - updatecoeffsE[materialEz, 2] * (Hx[i, j, k] - Hx[i, j - 1, k])
+                else:
+                    coeff0 = updatecoeffsE[materialEz, 0]
+                    coeff1 = updatecoeffsE[materialEz, 1]
+                    coeff2 = updatecoeffsE[materialEz, 2]
+                    for k in range(kstart, kstop):
+                        Ez[i, j, k] = coeff0 * Ez[i, j, k] + coeff1 * (Hy[i, j, k] - Hy[i - 1, j, k]) - coeff2 * (Hx[i, j, k] - Hx[i, j - 1, k])
+
+    # Ex components at i = 0
+    if xs <= 0:
+        for j in prange(ys1, yf, nogil=True, schedule='static', num_threads=nthreads):
+            for k in range(zs1, zf):
+                materialEx = ID[0, 0, j, k]
+                Ex[0, j, k] = updatecoeffsE[materialEx, 0] * Ex[0, j, k] + updatecoeffsE[materialEx, 2] * (Hz[0, j, k] - Hz[0, j - 1, k]) - updatecoeffsE[materialEx, 3] * (Hy[0, j, k] - Hy[0, j, k - 1])
+
+    # Ey components at j = 0
+    if ys <= 0:
+        for i in prange(xs1, xf, nogil=True, schedule='static', num_threads=nthreads):
+            for k in range(zs1, zf):
+                materialEy = ID[1, i, 0, k]
+                Ey[i, 0, k] = updatecoeffsE[materialEy, 0] * Ey[i, 0, k] + updatecoeffsE[materialEy, 3] * (Hx[i, 0, k] - Hx[i, 0, k - 1]) - updatecoeffsE[materialEy, 1] * (Hz[i, 0, k] - Hz[i - 1, 0, k])
+
+    # Ez components at k = 0
+    if zs <= 0:
+        for i in prange(xs1, xf, nogil=True, schedule='static', num_threads=nthreads):
+            for j in range(ys1, yf):
+                materialEz = ID[2, i, j, 0]
+                Ez[i, j, 0] = updatecoeffsE[materialEz, 0] * Ez[i, j, 0] + updatecoeffsE[materialEz, 1] * (Hy[i, j, 0] - Hy[i - 1, j, 0]) - updatecoeffsE[materialEz, 2] * (Hx[i, j, 0] - Hx[i, j - 1, 0])
+
+
+cpdef void update_electric_slab(
+                    int xs,
+                    int xf,
+                    int nx,
+                    int ny,
+                    int nz,
+                    int nthreads,
+                    floattype_t[:, ::1] updatecoeffsE,
+                    idtype_t[:, :, :, ::1] ID,
+                    floattype_t[:, :, ::1] Ex,
+                    floattype_t[:, :, ::1] Ey,
+                    floattype_t[:, :, ::1] Ez,
+                    floattype_t[:, :, ::1] Hx,
+                    floattype_t[:, :, ::1] Hy,
+                    floattype_t[:, :, ::1] Hz
+            ) noexcept nogil:
+    """This function updates the electric field components in a slab of
+        x-planes of a 3D grid, i.e. for use with temporal blocking (wavefront)
+        of the time stepping loop. The electric field components in x-plane i
+        depend only on the magnetic field components in x-planes i and i - 1.
+        Results are identical to update_electric.
+
+    Args:
+        xs, xf (int): Start and finish x-planes of the slab
+        nx, ny, nz (int): Grid size in cells
+        nthreads (int): Number of threads to use
+        updatecoeffs, ID, E, H (memoryviews): Access to update coeffients, ID and field component arrays
+    """
+
+    cdef Py_ssize_t i, j, k, ij
+    cdef int materialEx, materialEy, materialEz
+
+    xf = min(xf, nx)
+
+    for ij in prange(0, max(xf - xs, 0) * ny, nogil=True, schedule='static', num_threads=nthreads):
+        i = xs + ij // ny
+        j = ij % ny
+        if i > 0 and j > 0:
+            for k in range(1, nz):
+                materialEx = ID[0, i, j, k]
+                materialEy = ID[1, i, j, k]
+                materialEz = ID[2, i, j, k]
+                Ex[i, j, k] = updatecoeffsE[materialEx, 0] * Ex[i, j, k] + updatecoeffsE[materialEx, 2] * (Hz[i, j, k] - Hz[i, j - 1, k]) - updatecoeffsE[materialEx, 3] * (Hy[i, j, k] - Hy[i, j, k - 1])
+                Ey[i, j, k] = updatecoeffsE[materialEy, 0] * Ey[i, j, k] + updatecoeffsE[materialEy, 3] * (Hx[i, j, k] - Hx[i, j, k - 1]) - updatecoeffsE[materialEy, 1] * (Hz[i, j, k] - Hz[i - 1, j, k])
+                Ez[i, j, k] = updatecoeffsE[materialEz, 0] * Ez[i, j, k] + updatecoeffsE[materialEz, 1] * (Hy[i, j, k] - Hy[i - 1, j, k]) - updatecoeffsE[materialEz, 2] * (Hx[i, j, k] - Hx[i, j - 1, k])
+
+            # Ez components at k = 0
+            materialEz = ID[2, i, j, 0]
+            Ez[i, j, 0] = updatecoeffsE[materialEz, 0] * Ez[i, j, 0] + updatecoeffsE[materialEz, 1] * (Hy[i, j, 0] - Hy[i - 1, j, 0]) - updatecoeffsE[materialEz, 2] * (Hx[i, j, 0] - Hx[i, j - 1, 0])
+
+        # Ex components at i = 0
+        elif j > 0:
+            for k in range(1, nz):
+                materialEx = ID[0, 0, j, k]
+                Ex[0, j, k] = updatecoeffsE[materialEx, 0] * Ex[0, j, k] + updatecoeffsE[materialEx, 2] * (Hz[0, j, k] - Hz[0, j - 1, k]) - updatecoeffsE[materialEx, 3] * (Hy[0, j, k] - Hy[0, j, k - 1])
+
+        # Ey components at j = 0
+        elif i > 0:
+            for k in range(1, nz):
+                materialEy = ID[1, i, 0, k]
+                Ey[i, 0, k] = updatecoeffsE[materialEy, 0] * Ey[i, 0, k] + updatecoeffsE[materialEy, 3] * (Hx[i, 0, k] - Hx[i, 0, k - 1]) - updatecoeffsE[materialEy, 1] * (Hz[i, 0, k] - Hz[i - 1, 0, k])
+
+
+cpdef void update_electric_batch(
+                    int nbatch,
+                    int nx,
+                    int ny,
+                    int nz,
+                    int nthreads,
+                    floattype_t[:, ::1] updatecoeffsE,
+                    idtype_t[:, :, :, ::1] ID,
+                    int[:, ::1] offsets,
+                    int[:, ::1] runs,
+                    floattype_t[:, :, :, ::1] Ex,
+                    floattype_t[:, :, :, ::1] Ey,
+                    floattype_t[:, :, :, ::1] Ez,
+                    floattype_t[:, :, :, ::1] Hx,
+                    floattype_t[:, :, :, ::1] Hy,
+                    floattype_t[:, :, :, ::1] Hz
+            ) noexcept nogil:
+    """This function updates the electric field components of a batch of
+        models that share the geometry of a 3D grid, i.e. field component
+        arrays have a leading batch dimension. Runs of cells that share a
+        single material (see build_material_runs) are updated for all models
+        in the batch in turn, and the material IDs and update coefficients of
+        cells in mixed runs are loaded once for the batch. Results are
+        identical to update_electric for each model.
+
+    Args:
+        nbatch (int): Number of models in the batch
+        nx, ny, nz (int): Grid size in cells
+        nthreads (int): Number of threads to use
+        updatecoeffs, ID, E, H (memoryviews): Access to update coeffients, ID and field component arrays
+        offsets, runs (memoryviews): Access to indices of runs for each component and column of cells, and runs
+    """
+
+    cdef Py_ssize_t i, j, k, b, col, run
+    cdef int materialEx, materialEy, materialEz
+    cdef floattype_t coeff0, coeff1, coeff2, coeff3
+
+    for i in prange(1, nx, nogil=True, schedule='static', num_threads=nthreads):
+        for j in range(1, ny):
+            col = i * (ny + 1) + j
+            for run in range(offsets[0, col], offsets[0, col + 1]):
+                materialEx = runs[run, 2]
+                if materialEx < 0:
+                    for k in range(runs[run, 0], runs[run, 1]):
+                        materialEx = ID[0, i, j, k]
+                        coeff0 = updatecoeffsE[materialEx, 0]
+                        coeff2 = updatecoeffsE[materialEx, 2]
+                        coeff3 = updatecoeffsE[materialEx, 3]
+                        for b in range(nbatch):
+                            Ex[b, i, j, k] = coeff0 * Ex[b, i, j, k] + coeff2 * (Hz[b, i, j, k] - Hz[b, i, j - 1, k]) - coeff3 * (Hy[b, i, j, k] - Hy[b, i, j, k - 1])
+                else:
+                    coeff0 = updatecoeffsE[materialEx, 0]
+                    coeff2 = updatecoeffsE[materialEx, 2]
+                    coeff3 = updatecoeffsE[materialEx, 3]
+                    for b in range(nbatch):
+                        for k in range(runs[run, 0], runs[run, 1]):
+                            Ex[b, i, j, k] = coeff0 * Ex[b, i, j, k] + coeff2 * (Hz[b, i, j, k] - Hz[b, i, j - 1, k]) - coeff3 * (Hy[b, i, j, k] - Hy[b, i, j, k - 1])
+
+            for run in range(offsets[1, col], offsets[1, col + 1]):
+                materialEy = runs[run, 2]
+                if materialEy < 0:
+                    for k in range(runs[run, 0], runs[run, 1]):
+                        materialEy = ID[1, i, j, k]
+                        coeff0 = updatecoeffsE[materialEy, 0]
+                        coeff3 = updatecoeffsE[materialEy, 3]
+                        coeff1 = updatecoeffsE[materialEy, 1]
+                        for b in range(nbatch):
+                            Ey[b, i, j, k] = coeff0 * Ey[b, i, j, k] + coeff3 * (Hx[b, i, j, k] - Hx[b, i, j, k - 1]) - coeff1 * (Hz[b, i, j, k] - Hz[b, i - 1, j, k])
+                else:
+                    coeff0 = updatecoeffsE[materialEy, 0]
+                    coeff1 = updatecoeffsE[materialEy, 1]
+                    coeff3 = updatecoeffsE[materialEy, 3]
+                    for b in range(nbatch):
+                        for k in range(runs[run, 0], runs[run, 1]):
+                            Ey[b, i, j, k] = coeff0 * Ey[b, i, j, k] + coeff3 * (Hx[b, i, j, k] - Hx[b, i, j, k - 1]) - coeff1 * (Hz[b, i, j, k] - Hz[b, i - 1, j, k])
+
+            for run in range(offsets[2, col], offsets[2, col + 1]):
+                materialEz = runs[run, 2]
+                if materialEz < 0:
+                    for k in range(runs[run, 0], runs[run, 1]):
+                        materialEz = ID[2, i, j, k]
+                        coeff0 = updatecoeffsE[materialEz, 0]
+                        coeff1 = updatecoeffsE[materialEz, 1]
+                        coeff2 = updatecoeffsE[materialEz, 2]
+                        for b in range(nbatch):
+                            Ez[b, i, j, k] = coeff0 * Ez[b, i, j, k] + coeff1 * (Hy[b, i, j, k] - Hy[b, i - 1, j, k]) - coeff2 * (Hx[b, i, j, k] - Hx[b, i, j - 1, k])
+                else:
+                    coeff0 = updatecoeffsE[materialEz, 0]
+                    coeff1 = updatecoeffsE[materialEz, 1]
+                    coeff2 = updatecoeffsE[materialEz, 2]
+                    for b in range(nbatch):
+                        for k in range(runs[run, 0], runs[run, 1]):
+                            Ez[b, i, j, k] = coeff0 * Ez[b, i, j, k] + coeff1 * (Hy[b, i, j, k] - Hy[b, i - 1, j, k]) - coeff2 * (Hx[b, i, j, k] - Hx[b, i, j - 1, k])
+
+    # Ex components at i = 0
+    for j in prange(1, ny, nogil=True, schedule='static', num_threads=nthreads):
+        for b in range(nbatch):
+            for k in range(1, nz):
+                materialEx = ID[0, 0, j, k]
+                Ex[b, 0, j, k] = updatecoeffsE[materialEx, 0] * Ex[b, 0, j, k] + updatecoeffsE[materialEx, 2] * (Hz[b, 0, j, k] - Hz[b, 0, j - 1, k]) - updatecoeffsE[materialEx, 3] * (Hy[b, 0, j, k] - Hy[b, 0, j, k - 1])
+
+    # Ey components at j = 0
+    for i in prange(1, nx, nogil=True, schedule='static', num_threads=nthreads):
+        for b in range(nbatch):
+            for k in range(1, nz):
+                materialEy = ID[1, i, 0, k]
+                Ey[b, i, 0, k] = updatecoeffsE[materialEy, 0] * Ey[b, i, 0, k] + updatecoeffsE[materialEy, 3] * (Hx[b, i, 0, k] - Hx[b, i, 0, k - 1]) - updatecoeffsE[materialEy, 1] * (Hz[b, i, 0, k] - Hz[b, i - 1, 0, k])
+
+    # Ez components at k = 0
+    for i in prange(1, nx, nogil=True, schedule='static', num_threads=nthreads):
+        for b in range(nbatch):
             for j in range(1, ny):
-                for k in range(0, nz):
-                    material = ID[2, i, j, k]
-                    phi = 0
-                    for pole in range(maxpoles):
-                        phi = phi + updatecoeffsdispersive[material, pole * 3].real * Tz[pole, i, j, k].real
-                        Tz[pole, i, j, k] = updatecoeffsdispersive[material, 1 + (pole * 3)] * Tz[pole, i, j, k] + updatecoeffsdispersive[material, 2 + (pole * 3)] * Ez[i, j, k]
-                    Ez[i, j, k] = updatecoeffsE[material, 0] * Ez[i, j, k] + updatecoeffsE[material, 1] * (Hy[i, j, k] - Hy[i - 1, j, k]) - updatecoeffsE[material, 2] * (Hx[i, j, k] - Hx[i, j - 1, k]) - updatecoeffsE[material, 4] * phi
+                materialEz = ID[2, i, j, 0]
+                Ez[b, i, j, 0] = updatecoeffsE[materialEz, 0] * Ez[b, i, j, 0] + updatecoeffsE[materialEz, 1] * (Hy[b, i, j, 0] - Hy[b, i - 1, j, 0]) - updatecoeffsE[materialEz, 2] * (Hx[b, i, j, 0] - Hx[b, i, j - 1, 0])
+
+
+cpdef void update_electric_graded(
+                    int nx,
+                    int ny,
+                    int nz,
+                    int nthreads,
+                    floattype_t[:, ::1] updatecoeffsE,
+                    idtype_t[:, :, :, ::1] ID,
+                    floattype_t[::1] gradingx,
+                    floattype_t[::1] gradingy,
+                    floattype_t[::1] gradingz,
+                    floattype_t[:, :, ::1] Ex,
+                    floattype_t[:, :, ::1] Ey,
+                    floattype_t[:, :, ::1] Ez,
+                    floattype_t[:, :, ::1] Hx,
+                    floattype_t[:, :, ::1] Hy,
+                    floattype_t[:, :, ::1] Hz
+            ) noexcept nogil:
+    """This function updates the electric field components of a 3D grid with
+        a graded mesh. The update coefficients are calculated with the
+        smallest spatial step along each axis, and the spatial derivatives are
+        scaled by the ratio of this to the spatial step at the field component.
+
+    Args:
+        nx, ny, nz (int): Grid size in cells
+        nthreads (int): Number of threads to use
+        updatecoeffs, ID (memoryviews): Access to update coeffients and ID arrays
+        gradingx, gradingy, gradingz (memoryviews): Access to ratios of spatial steps along each axis for the electric field components
+        E, H (memoryviews): Access to field component arrays
+    """
+
+    cdef Py_ssize_t i, j, k
+    cdef int materialEx, materialEy, materialEz
+
+    for i in prange(1, nx, nogil=True, schedule='static', num_threads=nthreads):
+        for j in range(1, ny):
+            for k in range(1, nz):
+                materialEx = ID[0, i, j, k]
+                materialEy = ID[1, i, j, k]
+                materialEz = ID[2, i, j, k]
+                Ex[i, j, k] = updatecoeffsE[materialEx, 0] * Ex[i, j, k] + updatecoeffsE[materialEx, 2] * gradingy[j] * (Hz[i, j, k] - Hz[i, j - 1, k]) - updatecoeffsE[materialEx, 3] * gradingz[k] * (Hy[i, j, k] - Hy[i, j, k - 1])
+                Ey[i, j, k] = updatecoeffsE[materialEy, 0] * Ey[i, j, k] + updatecoeffsE[materialEy, 3] * gradingz[k] * (Hx[i, j, k] - Hx[i, j, k - 1]) - updatecoeffsE[materialEy, 1] * gradingx[i] * (Hz[i, j, k] - Hz[i - 1, j, k])
+                Ez[i, j, k] = updatecoeffsE[materialEz, 0] * Ez[i, j, k] + updatecoeffsE[materialEz, 1] * gradingx[i] * (Hy[i, j, k] - Hy[i - 1, j, k]) - updatecoeffsE[materialEz, 2] * gradingy[j] * (Hx[i, j, k] - Hx[i, j - 1, k])
+
+    # Ex components at i = 0
+    for j in prange(1, ny, nogil=True, schedule='static', num_threads=nthreads):
+        for k in range(1, nz):
+            materialEx = ID[0, 0, j, k]
+            Ex[0, j, k] = updatecoeffsE[materialEx, 0] * Ex[0, j, k] + updatecoeffsE[materialEx, 2] * gradingy[j] * (Hz[0, j, k] - Hz[0, j - 1, k]) - updatecoeffsE[materialEx, 3] * gradingz[k] * (Hy[0, j, k] - Hy[0, j, k - 1])
+
+    # Ey components at j = 0
+    for i in prange(1, nx, nogil=True, schedule='static', num_threads=nthreads):
+        for k in range(1, nz):
+            materialEy = ID[1, i, 0, k]
+            Ey[i, 0, k] = updatecoeffsE[materialEy, 0] * Ey[i, 0, k] + updatecoeffsE[materialEy, 3] * gradingz[k] * (Hx[i, 0, k] - Hx[i, 0, k - 1]) - updatecoeffsE[materialEy, 1] * gradingx[i] * (Hz[i, 0, k] - Hz[i - 1, 0, k])
+
+    # Ez components at k = 0
+    for i in prange(1, nx, nogil=True, schedule='static', num_threads=nthreads):
+        for j in range(1, ny):
+            materialEz = ID[2, i, j, 0]
+            Ez[i, j, 0] = updatecoeffsE[materialEz, 0] * Ez[i, j, 0] + updatecoeffsE[materialEz, 1] * gradingx[i] * (Hy[i, j, 0] - Hy[i - 1, j, 0]) - updatecoeffsE[materialEz, 2] * gradingy[j] * (Hx[i, j, 0] - Hx[i, j - 1, 0])
+
 
+#################################################
+# Electric field updates - dispersive materials #
+#################################################
+cdef inline float real_part(dispersivetype_t x) noexcept nogil:
+    """Real part of a dispersive coefficient or temporary value, which are
+        real if all poles are real (see Material.realpoles).
+    """
+
+    if dispersivetype_t is floattype_t:
+        return x
+    else:
+        return x.real
 
 
-cpdef void update_electric_dispersive_multipole_B(
+cpdef void update_electric_dispersive_multipole(
                     int nx,
                     int ny,
                     int nz,
                     int nthreads,
                     int maxpoles,
-                    complextype_t[:, ::1] updatecoeffsdispersive,
-                    np.uint32_t[:, :, :, ::1] ID,
-                    complextype_t[:, :, :, ::1] Tx,
-                    complextype_t[:, :, :, ::1] Ty,
-                    complextype_t[:, :, :, ::1] Tz,
+                    floattype_t[:, ::1] updatecoeffsE,
+                    dispersivetype_t[:, ::1] updatecoeffsdispersive,
+                    idtype_t[:, :, :, ::1] ID,
+                    dispersivetype_t[:, :, :, ::1] Tx,
+                    dispersivetype_t[:, :, :, ::1] Ty,
+                    dispersivetype_t[:, :, :, ::1] Tz,
                     floattype_t[:, :, ::1] Ex,
                     floattype_t[:, :, ::1] Ey,
-                    floattype_t[:, :, ::1] Ez
-            ):
-    """This function updates a temporary dispersive material array when disperisive materials (with multiple poles) are present.
+                    floattype_t[:, :, ::1] Ez,
+                    floattype_t[:, :, ::1] Hx,
+                    floattype_t[:, :, ::1] Hy,
+                    floattype_t[:, :, ::1] Hz
+            ) noexcept nogil:
+    """This function updates the electric field components when dispersive materials (with multiple poles) are present.
+        The temporary dispersive arrays are updated in the same sweep, i.e.
+        the 2nd part of their update from the previous iteration (which
+        requires the electric field after the PML and source updates) is
+        completed before the 1st part of their update for this iteration.
 
     Args:
         nx, ny, nz (int): Grid size in cells
         maxpoles (int): Maximum number of poles
         nthreads (int): Number of threads to use
-        updatecoeffs, T, ID, E (memoryviews): Access to update coeffients, temporary, ID and field component arrays
+        updatecoeffs, T, ID, E, H (memoryviews): Access to update coeffients, temporary, ID and field component arrays
     """
 
     cdef Py_ssize_t i, j, k, pole
     cdef int material
+    cdef float phi = 0
 
     # Ex component
     if ny != 1 or nz != 1:
@@ -213,8 +695,12 @@ cpdef void update_electric_dispersive_multipole_B(
             for j in range(1, ny):
                 for k in range(1, nz):
                     material = ID[0, i, j, k]
+                    phi = 0
                     for pole in range(maxpoles):
                         Tx[pole, i, j, k] = Tx[pole, i, j, k] - updatecoeffsdispersive[material, 2 + (pole * 3)] * Ex[i, j, k]
+                        phi = phi + real_part(updatecoeffsdispersive[material, pole * 3]) * real_part(Tx[pole, i, j, k])
+                        Tx[pole, i, j, k] = updatecoeffsdispersive[material, 1 + (pole * 3)] * Tx[pole, i, j, k] + updatecoeffsdispersive[material, 2 + (pole * 3)] * Ex[i, j, k]
+                    Ex[i, j, k] = updatecoeffsE[material, 0] * Ex[i, j, k] + updatecoeffsE[material, 2] * (Hz[i, j, k] - Hz[i, j - 1, k]) - updatecoeffsE[material, 3] * (Hy[i, j, k] - Hy[i, j, k - 1]) - updatecoeffsE[material, 4] * phi
 
     # Ey component
     if nx != 1 or nz != 1:
@@ -222,8 +708,12 @@ cpdef void update_electric_dispersive_multipole_B(
             for j in range(0, ny):
                 for k in range(1, nz):
                     material = ID[1, i, j, k]
+                    phi = 0
                     for pole in range(maxpoles):
                         Ty[pole, i, j, k] = Ty[pole, i, j, k] - updatecoeffsdispersive[material, 2 + (pole * 3)] * Ey[i, j, k]
+                        phi = phi + real_part(updatecoeffsdispersive[material, pole * 3]) * real_part(Ty[pole, i, j, k])
+                        Ty[pole, i, j, k] = updatecoeffsdispersive[material, 1 + (pole * 3)] * Ty[pole, i, j, k] + updatecoeffsdispersive[material, 2 + (pole * 3)] * Ey[i, j, k]
+                    Ey[i, j, k] = updatecoeffsE[material, 0] * Ey[i, j, k] + updatecoeffsE[material, 3] * (Hx[i, j, k] - Hx[i, j, k - 1]) - updatecoeffsE[material, 1] * (Hz[i, j, k] - Hz[i - 1, j, k]) - updatecoeffsE[material, 4] * phi
 
     # Ez component
     if nx != 1 or ny != 1:
@@ -231,29 +721,35 @@ cpdef void update_electric_dispersive_multipole_B(
             for j in range(1, ny):
                 for k in range(0, nz):
                     material = ID[2, i, j, k]
+                    phi = 0
                     for pole in range(maxpoles):
                         Tz[pole, i, j, k] = Tz[pole, i, j, k] - updatecoeffsdispersive[material, 2 + (pole * 3)] * Ez[i, j, k]
+                        phi = phi + real_part(updatecoeffsdispersive[material, pole * 3]) * real_part(Tz[pole, i, j, k])
+                        Tz[pole, i, j, k] = updatecoeffsdispersive[material, 1 + (pole * 3)] * Tz[pole, i, j, k] + updatecoeffsdispersive[material, 2 + (pole * 3)] * Ez[i, j, k]
+                    Ez[i, j, k] = updatecoeffsE[material, 0] * Ez[i, j, k] + updatecoeffsE[material, 1] * (Hy[i, j, k] - Hy[i - 1, j, k]) - updatecoeffsE[material, 2] * (Hx[i, j, k] - Hx[i, j - 1, k]) - updatecoeffsE[material, 4] * phi
 
 
-cpdef void update_electric_dispersive_1pole_A(
+cpdef void update_electric_dispersive_1pole(
                     int nx,
                     int ny,
                     int nz,
                     int nthreads,
                     floattype_t[:, ::1] updatecoeffsE,
-                    complextype_t[:, ::1] updatecoeffsdispersive,
-                    np.uint32_t[:, :, :, ::1] ID,
-                    complextype_t[:, :, :, ::1] Tx,
-                    complextype_t[:, :, :, ::1] Ty,
-                    complextype_t[:, :, :, ::1] Tz,
+                    dispersivetype_t[:, ::1] updatecoeffsdispersive,
+                    idtype_t[:, :, :, ::1] ID,
+                    dispersivetype_t[:, :, :, ::1] Tx,
+                    dispersivetype_t[:, :, :, ::1] Ty,
+                    dispersivetype_t[:, :, :, ::1] Tz,
                     floattype_t[:, :, ::1] Ex,
                     floattype_t[:, :, ::1] Ey,
                     floattype_t[:, :, ::1] Ez,
                     floattype_t[:, :, ::1] Hx,
                     floattype_t[:, :, ::1] Hy,
                     floattype_t[:, :, ::1] Hz
-            ):
+            ) noexcept nogil:
     """This function updates the electric field components when dispersive materials (with 1 pole) are present.
+        The temporary dispersive arrays are updated in the same sweep (see
+        update_electric_dispersive_multipole).
 
     Args:
         nx, ny, nz (int): Grid size in cells
@@ -271,7 +767,8 @@ cpdef void update_electric_dispersive_1pole_A(
             for j in range(1, ny):
                 for k in range(1, nz):
                     material = ID[0, i, j, k]
-                    phi = updatecoeffsdispersive[material, 0].real * Tx[0, i, j, k].real
+                    Tx[0, i, j, k] = Tx[0, i, j, k] - updatecoeffsdispersive[material, 2] * Ex[i, j, k]
+                    phi = real_part(updatecoeffsdispersive[material, 0]) * real_part(Tx[0, i, j, k])
                     Tx[0, i, j, k] = updatecoeffsdispersive[material, 1] * Tx[0, i, j, k] + updatecoeffsdispersive[material, 2] * Ex[i, j, k]
                     Ex[i, j, k] = updatecoeffsE[material, 0] * Ex[i, j, k] + updatecoeffsE[material, 2] * (Hz[i, j, k] - Hz[i, j - 1, k]) - updatecoeffsE[material, 3] * (Hy[i, j, k] - Hy[i, j, k - 1]) - updatecoeffsE[material, 4] * phi
 
@@ -281,7 +778,8 @@ cpdef void update_electric_dispersive_1pole_A(
             for j in range(0, ny):
                 for k in range(1, nz):
                     material = ID[1, i, j, k]
-                    phi = updatecoeffsdispersive[material, 0].real * Ty[0, i, j, k].real
+                    Ty[0, i, j, k] = Ty[0, i, j, k] - updatecoeffsdispersive[material, 2] * Ey[i, j, k]
+                    phi = real_part(updatecoeffsdispersive[material, 0]) * real_part(Ty[0, i, j, k])
                     Ty[0, i, j, k] = updatecoeffsdispersive[material, 1] * Ty[0, i, j, k] + updatecoeffsdispersive[material, 2] * Ey[i, j, k]
                     Ey[i, j, k] = updatecoeffsE[material, 0] * Ey[i, j, k] + updatecoeffsE[material, 3] * (Hx[i, j, k] - Hx[i, j, k - 1]) - updatecoeffsE[material, 1] * (Hz[i, j, k] - Hz[i - 1, j, k]) - updatecoeffsE[material, 4] * phi
 
@@ -291,59 +789,146 @@ cpdef void update_electric_dispersive_1pole_A(
             for j in range(1, ny):
                 for k in range(0, nz):
                     material = ID[2, i, j, k]
-                    phi = updatecoeffsdispersive[material, 0].real * Tz[0, i, j, k].real
+                    Tz[0, i, j, k] = Tz[0, i, j, k] - updatecoeffsdispersive[material, 2] * Ez[i, j, k]
+                    phi = real_part(updatecoeffsdispersive[material, 0]) * real_part(Tz[0, i, j, k])
                     Tz[0, i, j, k] = updatecoeffsdispersive[material, 1] * Tz[0, i, j, k] + updatecoeffsdispersive[material, 2] * Ez[i, j, k]
                     Ez[i, j, k] = updatecoeffsE[material, 0] * Ez[i, j, k] + updatecoeffsE[material, 1] * (Hy[i, j, k] - Hy[i - 1, j, k]) - updatecoeffsE[material, 2] * (Hx[i, j, k] - Hx[i, j - 1, k]) - updatecoeffsE[material, 4] * phi
 
 
-cpdef void update_electric_dispersive_1pole_B(
-                    int nx,
-                    int ny,
-                    int nz,
+####################################################################
+# Electric field updates - dispersive materials (dispersive cells) #
+####################################################################
+cdef void dispersive_cells(
                     int nthreads,
-                    complextype_t[:, ::1] updatecoeffsdispersive,
-                    np.uint32_t[:, :, :, ::1] ID,
-                    complextype_t[:, :, :, ::1] Tx,
-                    complextype_t[:, :, :, ::1] Ty,
-                    complextype_t[:, :, :, ::1] Tz,
-                    floattype_t[:, :, ::1] Ex,
-                    floattype_t[:, :, ::1] Ey,
-                    floattype_t[:, :, ::1] Ez
-            ):
-    """This function updates a temporary dispersive material array when disperisive materials (with 1 pole) are present.
+                    int maxpoles,
+                    dispersivetype_t[:, ::1] updatecoeffsdispersive,
+                    idtype_t *ID,
+                    np.int64_t[::1] cells,
+                    dispersivetype_t[:, ::1] T,
+                    float[::1] phi,
+                    floattype_t *E
+            ) noexcept nogil:
+    """This function updates a temporary dispersive material array, and stores
+        the dispersive term of the electric field update, for the cells of an
+        electric field component that are in dispersive materials.
 
     Args:
-        nx, ny, nz (int): Grid size in cells
         nthreads (int): Number of threads to use
-        updatecoeffs, T, ID, E (memoryviews): Access to update coeffients, temporary, ID and field component arrays
+        maxpoles (int): Maximum number of poles
+        updatecoeffs, ID, cells, T, phi, E: Access to update coeffients, ID
+            array (of component), flat indices of cells, temporary, dispersive
+            term and field component arrays
     """
 
-    cdef Py_ssize_t i, j, k
+    cdef Py_ssize_t n, cell, pole
     cdef int material
+    cdef float phin
 
-    # Ex component
-    if ny != 1 or nz != 1:
-        for i in prange(0, nx, nogil=True, schedule='static', num_threads=nthreads):
-            for j in range(1, ny):
-                for k in range(1, nz):
-                    material = ID[0, i, j, k]
-                    Tx[0, i, j, k] = Tx[0, i, j, k] - updatecoeffsdispersive[material, 2] * Ex[i, j, k]
+    for n in prange(0, cells.shape[0], nogil=True, schedule='static', num_threads=nthreads):
+        cell = cells[n]
+        material = ID[cell]
+        phin = 0
+        for pole in range(maxpoles):
+            T[pole, n] = T[pole, n] - updatecoeffsdispersive[material, 2 + (pole * 3)] * E[cell]
+            phin = phin + real_part(updatecoeffsdispersive[material, pole * 3]) * real_part(T[pole, n])
+            T[pole, n] = updatecoeffsdispersive[material, 1 + (pole * 3)] * T[pole, n] + updatecoeffsdispersive[material, 2 + (pole * 3)] * E[cell]
+        phi[n] = phin
 
-    # Ey component
-    if nx != 1 or nz != 1:
-        for i in prange(1, nx, nogil=True, schedule='static', num_threads=nthreads):
-            for j in range(0, ny):
-                for k in range(1, nz):
-                    material = ID[1, i, j, k]
-                    Ty[0, i, j, k] = Ty[0, i, j, k] - updatecoeffsdispersive[material, 2] * Ey[i, j, k]
 
-    # Ez component
-    if nx != 1 or ny != 1:
-        for i in prange(1, nx, nogil=True, schedule='static', num_threads=nthreads):
-            for j in range(1, ny):
-                for k in range(0, nz):
-                    material = ID[2, i, j, k]
-                    Tz[0, i, j, k] = Tz[0, i, j, k] - updatecoeffsdispersive[material, 2] * Ez[i, j, k]
+cdef void dispersive_cells_phi(
+                    int nthreads,
+                    floattype_t[:, ::1] updatecoeffsE,
+                    idtype_t *ID,
+                    np.int64_t[::1] cells,
+                    float[::1] phi,
+                    floattype_t *E
+            ) noexcept nogil:
+    """This function applies the dispersive term to the electric field
+        component for cells that are in dispersive materials.
+
+    Args:
+        nthreads (int): Number of threads to use
+        updatecoeffs, ID, cells, phi, E: Access to update coeffients, ID
+            array (of component), flat indices of cells, dispersive term and
+            field component arrays
+    """
+
+    cdef Py_ssize_t n, cell
+
+    for n in prange(0, cells.shape[0], nogil=True, schedule='static', num_threads=nthreads):
+        cell = cells[n]
+        E[cell] = E[cell] - updatecoeffsE[ID[cell], 4] * phi[n]
+
+
+cpdef void update_electric_dispersive_cells(
+                    int nthreads,
+                    int maxpoles,
+                    dispersivetype_t[:, ::1] updatecoeffsdispersive,
+                    idtype_t[:, :, :, ::1] ID,
+                    np.int64_t[::1] cellsx,
+                    np.int64_t[::1] cellsy,
+                    np.int64_t[::1] cellsz,
+                    dispersivetype_t[:, ::1] Tx,
+                    dispersivetype_t[:, ::1] Ty,
+                    dispersivetype_t[:, ::1] Tz,
+                    float[::1] phix,
+                    float[::1] phiy,
+                    float[::1] phiz,
+                    floattype_t[:, :, ::1] Ex,
+                    floattype_t[:, :, ::1] Ey,
+                    floattype_t[:, :, ::1] Ez
+            ) noexcept nogil:
+    """This function updates temporary dispersive material arrays, which are
+        only stored for cells in dispersive materials, before the electric
+        field components are updated (see update_electric_dispersive_multipole).
+        The dispersive term of the electric field update is stored, and
+        applied once the electric field components have been updated (see
+        update_electric_dispersive_cells_phi), so any of the standard updates
+        can be used for the electric field.
+
+    Args:
+        nthreads (int): Number of threads to use
+        maxpoles (int): Maximum number of poles
+        updatecoeffs, ID (memoryviews): Access to update coeffients and ID arrays
+        cells (memoryviews): Access to flat indices of cells in dispersive
+            materials for each electric field component
+        T, phi, E (memoryviews): Access to temporary, dispersive term and field component arrays
+    """
+
+    dispersive_cells(nthreads, maxpoles, updatecoeffsdispersive, &ID[0, 0, 0, 0], cellsx, Tx, phix, &Ex[0, 0, 0])
+    dispersive_cells(nthreads, maxpoles, updatecoeffsdispersive, &ID[1, 0, 0, 0], cellsy, Ty, phiy, &Ey[0, 0, 0])
+    dispersive_cells(nthreads, maxpoles, updatecoeffsdispersive, &ID[2, 0, 0, 0], cellsz, Tz, phiz, &Ez[0, 0, 0])
+
+
+cpdef void update_electric_dispersive_cells_phi(
+                    int nthreads,
+                    floattype_t[:, ::1] updatecoeffsE,
+                    idtype_t[:, :, :, ::1] ID,
+                    np.int64_t[::1] cellsx,
+                    np.int64_t[::1] cellsy,
+                    np.int64_t[::1] cellsz,
+                    float[::1] phix,
+                    float[::1] phiy,
+                    float[::1] phiz,
+                    floattype_t[:, :, ::1] Ex,
+                    floattype_t[:, :, ::1] Ey,
+                    floattype_t[:, :, ::1] Ez
+            ) noexcept nogil:
+    """This function applies the dispersive term to the electric field
+        components for cells in dispersive materials (see
+        update_electric_dispersive_cells).
+
+    Args:
+        nthreads (int): Number of threads to use
+        updatecoeffs, ID (memoryviews): Access to update coeffients and ID arrays
+        cells (memoryviews): Access to flat indices of cells in dispersive
+            materials for each electric field component
+        phi, E (memoryviews): Access to dispersive term and field component arrays
+    """
+
+    dispersive_cells_phi(nthreads, updatecoeffsE, &ID[0, 0, 0, 0], cellsx, phix, &Ex[0, 0, 0])
+    dispersive_cells_phi(nthreads, updatecoeffsE, &ID[1, 0, 0, 0], cellsy, phiy, &Ey[0, 0, 0])
+    dispersive_cells_phi(nthreads, updatecoeffsE, &ID[2, 0, 0, 0], cellsz, phiz, &Ez[0, 0, 0])
 
 
 ##########################
@@ -355,14 +940,14 @@ cpdef void update_magnetic(
                     int nz,
                     int nthreads,
                     floattype_t[:, ::1] updatecoeffsH,
-                    np.uint32_t[:, :, :, ::1] ID,
+                    idtype_t[:, :, :, ::1] ID,
                     floattype_t[:, :, ::1] Ex,
                     floattype_t[:, :, ::1] Ey,
                     floattype_t[:, :, ::1] Ez,
                     floattype_t[:, :, ::1] Hx,
                     floattype_t[:, :, ::1] Hy,
                     floattype_t[:, :, ::1] Hz
-            ):
+            ) noexcept nogil:
     """This function updates the magnetic field components.
 
     Args:
@@ -410,3 +995,673 @@ cpdef void update_magnetic(
                     Hx[i + 1, j, k] = updatecoeffsH[materialHx, 0] * Hx[i + 1, j, k] - updatecoeffsH[materialHx, 2] * (Ez[i + 1, j + 1, k] - Ez[i + 1, j, k]) + updatecoeffsH[materialHx, 3] * (Ey[i + 1, j, k + 1] - Ey[i + 1, j, k])
                     Hy[i, j + 1, k] = updatecoeffsH[materialHy, 0] * Hy[i, j + 1, k] - updatecoeffsH[materialHy, 3] * (Ex[i, j + 1, k + 1] - Ex[i, j + 1, k]) + updatecoeffsH[materialHy, 1] * (Ez[i + 1, j + 1, k] - Ez[i, j + 1, k])
                     Hz[i, j, k + 1] = updatecoeffsH[materialHz, 0] * Hz[i, j, k + 1] - updatecoeffsH[materialHz, 1] * (Ey[i + 1, j, k + 1] - Ey[i, j, k + 1]) + updatecoeffsH[materialHz, 2] * (Ex[i, j + 1, k + 1] - Ex[i, j, k + 1])
+
+
+cpdef void update_magnetic_tiled(
+                    int nx,
+                    int ny,
+                    int nz,
+                    int nthreads,
+                    int tilex,
+                    int tiley,
+                    floattype_t[:, ::1] updatecoeffsH,
+                    idtype_t[:, :, :, ::1] ID,
+                    floattype_t[:, :, ::1] Ex,
+                    floattype_t[:, :, ::1] Ey,
+                    floattype_t[:, :, ::1] Ez,
+                    floattype_t[:, :, ::1] Hx,
+                    floattype_t[:, :, ::1] Hy,
+                    floattype_t[:, :, ::1] Hz
+            ) noexcept nogil:
+    """This function updates the magnetic field components using cache blocking,
+        i.e. the x-y plane is split into tiles which are distributed across
+        threads, and full (contiguous) z-direction runs are used within a tile.
+        Results are identical to update_magnetic. Only 3D grids are tiled, 2D
+        grids use the standard update.
+
+    Args:
+        nx, ny, nz (int): Grid size in cells
+        nthreads (int): Number of threads to use
+        tilex, tiley (int): Tile size in cells in the x and y directions
+        updatecoeffs, ID, E, H (memoryviews): Access to update coeffients, ID and field component arrays
+    """
+
+    cdef Py_ssize_t i, j, k, tile, ntilesx, ntilesy, istart, istop, jstart, jstop
+    cdef int materialHx, materialHy, materialHz
+
+    if nx == 1 or ny == 1 or nz == 1:
+        update_magnetic(nx, ny, nz, nthreads, updatecoeffsH, ID, Ex, Ey, Ez, Hx, Hy, Hz)
+        return
+
+    ntilesx = (nx + tilex - 1) // tilex
+    ntilesy = (ny + tiley - 1) // tiley
+
+    for tile in prange(0, ntilesx * ntilesy, nogil=True, schedule='static', num_threads=nthreads):
+        istart = (tile // ntilesy) * tilex
+        istop = min(istart + tilex, nx)
+        jstart = (tile % ntilesy) * tiley
+        jstop = min(jstart + tiley, ny)
+        for i in range(istart, istop):
+            for j in range(jstart, jstop):
+                for k in range(0, nz):
+                    materialHx = ID[3, i + 1, j, k]
+                    materialHy = ID[4, i, j + 1, k]
+                    materialHz = ID[5, i, j, k + 1]
+                    Hx[i + 1, j, k] = updatecoeffsH[materialHx, 0] * Hx[i + 1, j, k] - updatecoeffsH[materialHx, 2] * (Ez[i + 1, j + 1, k] - Ez[i + 1, j, k]) + updatecoeffsH[materialHx, 3] * (Ey[i + 1, j, k + 1] - Ey[i + 1, j, k])
+                    Hy[i, j + 1, k] = updatecoeffsH[materialHy, 0] * Hy[i, j + 1, k] - updatecoeffsH[materialHy, 3] * (Ex[i, j + 1, k + 1] - Ex[i, j + 1, k]) + updatecoeffsH[materialHy, 1] * (Ez[i + 1, j + 1, k] - Ez[i, j + 1, k])
+                    Hz[i, j, k + 1] = updatecoeffsH[materialHz, 0] * Hz[i, j, k + 1] - updatecoeffsH[materialHz, 1] * (Ey[i + 1, j, k + 1] - Ey[i, j, k + 1]) + updatecoeffsH[materialHz, 2] * (Ex[i, j + 1, k + 1] - Ex[i, j, k + 1])
+
+
+cpdef void update_magnetic_runs(
+                    int nx,
+                    int ny,
+                    int nz,
+                    int nthreads,
+                    floattype_t[:, ::1] updatecoeffsH,
+                    idtype_t[:, :, :, ::1] ID,
+                    int[:, ::1] offsets,
+                    int[:, ::1] runs,
+                    floattype_t[:, :, ::1] Ex,
+                    floattype_t[:, :, ::1] Ey,
+                    floattype_t[:, :, ::1] Ez,
+                    floattype_t[:, :, ::1] Hx,
+                    floattype_t[:, :, ::1] Hy,
+                    floattype_t[:, :, ::1] Hz
+            ) noexcept nogil:
+    """This function updates the magnetic field components using runs of cells
+        in the z direction that share a single material (see
+        build_material_runs). Results are identical to update_magnetic. Only
+        3D grids use runs, 2D grids use the standard update.
+
+    Args:
+        nx, ny, nz (int): Grid size in cells
+        nthreads (int): Number of threads to use
+        updatecoeffs, ID, E, H (memoryviews): Access to update coeffients, ID and field component arrays
+        offsets, runs (memoryviews): Access to indices of runs for each component and column of cells, and runs
+    """
+
+    cdef Py_ssize_t i, j, k, col, run
+    cdef int materialHx, materialHy, materialHz
+    cdef floattype_t coeff0, coeff1, coeff2, coeff3
+
+    if nx == 1 or ny == 1 or nz == 1:
+        update_magnetic(nx, ny, nz, nthreads, updatecoeffsH, ID, Ex, Ey, Ez, Hx, Hy, Hz)
+        return
+
+    for i in prange(0, nx + 1, nogil=True, schedule='static', num_threads=nthreads):
+        for j in range(0, ny + 1):
+            col = i * (ny + 1) + j
+            # Hx component
+            if i > 0 and j < ny:
+                for run in range(offsets[3, col], offsets[3, col + 1]):
+                    materialHx = runs[run, 2]
+                    if materialHx < 0:
+                        for k in range(runs[run, 0], runs[run, 1]):
+                            materialHx = ID[3, i, j, k]
+                            Hx[i, j, k] = updatecoeffsH[materialHx, 0] * Hx[i, j, k] - updatecoeffsH[materialHx, 2] * (Ez[i, j + 1, k] - Ez[i, j, k]) + updatecoeffsH[materialHx, 3] * (Ey[i, j, k + 1] - Ey[i, j, k])
+                    else:
+                        coeff0 = updatecoeffsH[materialHx, 0]
+                        coeff2 = updatecoeffsH[materialHx, 2]
+                        coeff3 = updatecoeffsH[materialHx, 3]
+                        for k in range(runs[run, 0], runs[run, 1]):
+                            Hx[i, j, k] = coeff0 * Hx[i, j, k] - coeff2 * (Ez[i, j + 1, k] - Ez[i, j, k]) + coeff3 * (Ey[i, j, k + 1] - Ey[i, j, k])
+
+            # Hy component
+            if i < nx and j > 0:
+                for run in range(offsets[4, col], offsets[4, col + 1]):
+                    materialHy = runs[run, 2]
+                    if materialHy < 0:
+                        for k in range(runs[run, 0], runs[run, 1]):
+                            materialHy = ID[4, i, j, k]
+                            Hy[i, j, k] = updatecoeffsH[materialHy, 0] * Hy[i, j, k] - updatecoeffsH[materialHy, 3] * (Ex[i, j, k + 1] - Ex[i, j, k]) + updatecoeffsH[materialHy, 1] * (Ez[i + 1, j, k] - Ez[i, j, k])
+                    else:
+                        coeff0 = updatecoeffsH[materialHy, 0]
+                        coeff1 = updatecoeffsH[materialHy, 1]
+                        coeff3 = updatecoeffsH[materialHy, 3]
+                        for k in range(runs[run, 0], runs[run, 1]):
+                            Hy[i, j, k] = coeff0 * Hy[i, j, k] - coeff3 * (Ex[i, j, k + 1] - Ex[i, j, k]) + coeff1 * (Ez[i + 1, j, k] - Ez[i, j, k])
+
+            # Hz component
+            if i < nx and j < ny:
+                for run in range(offsets[5, col], offsets[5, col + 1]):
+                    materialHz = runs[run, 2]
+                    if materialHz < 0:
+                        for k in range(runs[run, 0], runs[run, 1]):
+                            materialHz = ID[5, i, j, k]
+                            Hz[i, j, k] = updatecoeffsH[materialHz, 0] * Hz[i, j, k] - updatecoeffsH[materialHz, 1] * (Ey[i + 1, j, k] - Ey[i, j, k]) + updatecoeffsH[materialHz, 2] * (Ex[i, j + 1, k] - Ex[i, j, k])
+                    else:
+                        coeff0 = updatecoeffsH[materialHz, 0]
+                        coeff1 = updatecoeffsH[materialHz, 1]
+                        coeff2 = updatecoeffsH[materialHz, 2]
+                        for k in range(runs[run, 0], runs[run, 1]):
+                            Hz[i, j, k] = coeff0 * Hz[i, j, k] - coeff1 * (Ey[i + 1, j, k] - Ey[i, j, k]) + coeff2 * (Ex[i, j + 1, k] - Ex[i, j, k])
+
+
+cpdef void update_magnetic_box(
+                    int xs,
+                    int xf,
+                    int ys,
+                    int yf,
+                    int zs,
+                    int zf,
+                    int nx,
+                    int ny,
+                    int nz,
+                    int nthreads,
+                    floattype_t[:, ::1] updatecoeffsH,
+                    idtype_t[:, :, :, ::1] ID,
+                    int[:, ::1] offsets,
+                    int[:, ::1] runs,
+                    floattype_t[:, :, ::1] Ex,
+                    floattype_t[:, :, ::1] Ey,
+                    floattype_t[:, :, ::1] Ez,
+                    floattype_t[:, :, ::1] Hx,
+                    floattype_t[:, :, ::1] Hy,
+                    floattype_t[:, :, ::1] Hz
+            ) noexcept nogil:
+    """This function updates the magnetic field components in a box of cells
+        of a 3D grid, outside of which all field components are zero (see
+        update_electric_box). Results are identical to update_magnetic.
+
+    Args:
+        xs, xf, ys, yf, zs, zf (int): Cell coordinates of the box
+        nx, ny, nz (int): Grid size in cells
+        nthreads (int): Number of threads to use
+        updatecoeffs, ID, E, H (memoryviews): Access to update coeffients, ID and field component arrays
+        offsets, runs (memoryviews): Access to indices of runs for each component and column of cells, and runs
+    """
+
+    cdef Py_ssize_t i, j, k, col, run
+    cdef int materialHx, materialHy, materialHz, kstart, kstop
+    cdef floattype_t coeff0, coeff1, coeff2, coeff3
+
+    for i in prange(xs, xf, nogil=True, schedule='static', num_threads=nthreads):
+        for j in range(ys, yf):
+            col = i * (ny + 1) + j
+            # Hx component
+            if i > 0 and j < ny:
+                for run in range(offsets[3, col], offsets[3, col + 1]):
+                    kstart = max(runs[run, 0], zs)
+                    kstop = min(runs[run, 1], zf)
+                    materialHx = runs[run, 2]
+                    if materialHx < 0:
+                        for k in range(kstart, kstop):
+                            materialHx = ID[3, i, j, k]
+                            Hx[i, j, k] = updatecoeffsH[materialHx, 0] * Hx[i, j, k] - updatecoeffsH[materialHx, 2] * (Ez[i, j + 1, k] - Ez[i, j, k]) + updatecoeffsH[materialHx, 3] * (Ey[i, j, k + 1] - Ey[i, j, k])
+                    else:
+                        coeff0 = updatecoeffsH[materialHx, 0]
+                        coeff2 = updatecoeffsH[materialHx, 2]
+                        coeff3 = updatecoeffsH[materialHx, 3]
+                        for k in range(kstart, kstop):
+                            Hx[i, j, k] = coeff0 * Hx[i, j, k] - coeff2 * (Ez[i, j + 1, k] - Ez[i, j, k]) + coeff3 * (Ey[i, j, k + 1] - Ey[i, j, k])
+
+            # Hy component
+            if i < nx and j > 0:
+                for run in range(offsets[4, col], offsets[4, col + 1]):
+                    kstart = max(runs[run, 0], zs)
+                    kstop = min(runs[run, 1], zf)
+                    materialHy = runs[run, 2]
+                    if materialHy < 0:
+                        for k in range(kstart, kstop):
+                            materialHy = ID[4, i, j, k]
+                            Hy[i, j, k] = updatecoeffsH[materialHy, 0] * Hy[i, j, k] - updatecoeffsH[materialHy, 3] * (Ex[i, j, k + 1] - Ex[i, j, k]) + updatecoeffsH[materialHy, 1] * (Ez[i + 1, j, k] - Ez[i, j, k])
+                    else:
+                        coeff0 = updatecoeffsH[materialHy, 0]
+                        coeff1 = updatecoeffsH[materialHy, 1]
+                        coeff3 = updatecoeffsH[materialHy, 3]
+                        for k in range(kstart, kstop):
+                            Hy[i, j, k] = coeff0 * Hy[i, j, k] - coeff3 * (Ex[i, j, k + 1] - Ex[i, j, k]) + coeff1 * (Ez[i + 1, j, k] - Ez[i, j, k])
+
+            # Hz component
+            if i < nx and j < ny:
+                for run in range(offsets[5, col], offsets[5, col + 1]):
+                    kstart = max(runs[run, 0], zs)
+                    kstop = min(runs[run, 1], zf)
+                    materialHz = runs[run, 2]
+                    if materialHz < 0:
+                        for k in range(kstart, kstop):
+                            materialHz = ID[5, i, j, k]
+                            Hz[i, j, k] = updatecoeffsH[materialHz, 0] * Hz[i, j, k] - updatecoeffsH[materialHz, 1] * (Ey[i + 1, j, k] - Ey[i, j, k]) + updatecoeffsH[materialHz, 2] * (Ex[i, j + 1, k] - Ex[i, j, k])
+                    else:
+                        coeff0 = updatecoeffsH[materialHz, 0]
+                        coeff1 = updatecoeffsH[materialHz, 1]
+                        coeff2 = updatecoeffsH[materialHz, 2]
+                        for k in range(kstart, kstop):
+                            Hz[i, j, k] = coeff0 * Hz[i, j, k] - coeff1 * (Ey[i + 1, j, k] - Ey[i, j, k]) + coeff2 * (Ex[i, j + 1, k] - Ex[i, j, k])
+
+
+cpdef void update_magnetic_slab(
+                    int xs,
+                    int xf,
+                    int nx,
+                    int ny,
+                    int nz,
+                    int nthreads,
+                    floattype_t[:, ::1] updatecoeffsH,
+                    idtype_t[:, :, :, ::1] ID,
+                    floattype_t[:, :, ::1] Ex,
+                    floattype_t[:, :, ::1] Ey,
+                    floattype_t[:, :, ::1] Ez,
+                    floattype_t[:, :, ::1] Hx,
+                    floattype_t[:, :, ::1] Hy,
+                    floattype_t[:, :, ::1] Hz
+            ) noexcept nogil:
+    """This function updates the magnetic field components in a slab of
+        x-planes of a 3D grid, i.e. for use with temporal blocking (wavefront)
+        of the time stepping loop. The magnetic field components in x-plane i
+        depend only on the electric field components in x-planes i and i + 1.
+        Results are identical to update_magnetic.
+
+    Args:
+        xs, xf (int): Start and finish x-planes of the slab
+        nx, ny, nz (int): Grid size in cells
+        nthreads (int): Number of threads to use
+        updatecoeffs, ID, E, H (memoryviews): Access to update coeffients, ID and field component arrays
+    """
+
+    cdef Py_ssize_t i, j, k, ij
+    cdef int materialHx, materialHy, materialHz
+
+    xf = min(xf, nx + 1)
+
+    for ij in prange(0, max(xf - xs, 0) * ny, nogil=True, schedule='static', num_threads=nthreads):
+        i = xs + ij // ny
+        j = ij % ny
+        if i > 0:
+            for k in range(0, nz):
+                materialHx = ID[3, i, j, k]
+                Hx[i, j, k] = updatecoeffsH[materialHx, 0] * Hx[i, j, k] - updatecoeffsH[materialHx, 2] * (Ez[i, j + 1, k] - Ez[i, j, k]) + updatecoeffsH[materialHx, 3] * (Ey[i, j, k + 1] - Ey[i, j, k])
+        if i < nx:
+            for k in range(0, nz):
+                materialHy = ID[4, i, j + 1, k]
+                materialHz = ID[5, i, j, k + 1]
+                Hy[i, j + 1, k] = updatecoeffsH[materialHy, 0] * Hy[i, j + 1, k] - updatecoeffsH[materialHy, 3] * (Ex[i, j + 1, k + 1] - Ex[i, j + 1, k]) + updatecoeffsH[materialHy, 1] * (Ez[i + 1, j + 1, k] - Ez[i, j + 1, k])
+                Hz[i, j, k + 1] = updatecoeffsH[materialHz, 0] * Hz[i, j, k + 1] - updatecoeffsH[materialHz, 1] * (Ey[i + 1, j, k + 1] - Ey[i, j, k + 1]) + updatecoeffsH[materialHz, 2] * (Ex[i, j + 1, k + 1] - Ex[i, j, k + 1])
+
+
+cpdef void update_magnetic_batch(
+                    int nbatch,
+                    int nx,
+                    int ny,
+                    int nz,
+                    int nthreads,
+                    floattype_t[:, ::1] updatecoeffsH,
+                    idtype_t[:, :, :, ::1] ID,
+                    int[:, ::1] offsets,
+                    int[:, ::1] runs,
+                    floattype_t[:, :, :, ::1] Ex,
+                    floattype_t[:, :, :, ::1] Ey,
+                    floattype_t[:, :, :, ::1] Ez,
+                    floattype_t[:, :, :, ::1] Hx,
+                    floattype_t[:, :, :, ::1] Hy,
+                    floattype_t[:, :, :, ::1] Hz
+            ) noexcept nogil:
+    """This function updates the magnetic field components of a batch of
+        models that share the geometry of a 3D grid (see
+        update_electric_batch). Results are identical to update_magnetic for
+        each model.
+
+    Args:
+        nbatch (int): Number of models in the batch
+        nx, ny, nz (int): Grid size in cells
+        nthreads (int): Number of threads to use
+        updatecoeffs, ID, E, H (memoryviews): Access to update coeffients, ID and field component arrays
+        offsets, runs (memoryviews): Access to indices of runs for each component and column of cells, and runs
+    """
+
+    cdef Py_ssize_t i, j, k, b, col, run
+    cdef int materialHx, materialHy, materialHz
+    cdef floattype_t coeff0, coeff1, coeff2, coeff3
+
+    for i in prange(0, nx + 1, nogil=True, schedule='static', num_threads=nthreads):
+        for j in range(0, ny + 1):
+            col = i * (ny + 1) + j
+            # Hx component
+            if i > 0 and j < ny:
+                for run in range(offsets[3, col], offsets[3, col + 1]):
+                    materialHx = runs[run, 2]
+                    if materialHx < 0:
+                        for k in range(runs[run, 0], runs[run, 1]):
+                            materialHx = ID[3, i, j, k]
+                            coeff0 = updatecoeffsH[materialHx, 0]
+                            coeff2 = updatecoeffsH[materialHx, 2]
+                            coeff3 = updatecoeffsH[materialHx, 3]
+                            for b in range(nbatch):
+                                Hx[b, i, j, k] = coeff0 * Hx[b, i, j, k] - coeff2 * (Ez[b, i, j + 1, k] - Ez[b, i, j, k]) + coeff3 * (Ey[b, i, j, k + 1] - Ey[b, i, j, k])
+                    else:
+                        coeff0 = updatecoeffsH[materialHx, 0]
+                        coeff2 = updatecoeffsH[materialHx, 2]
+                        coeff3 = updatecoeffsH[materialHx, 3]
+                        for b in range(nbatch):
+                            for k in range(runs[run, 0], runs[run, 1]):
+                                Hx[b, i, j, k] = coeff0 * Hx[b, i, j, k] - coeff2 * (Ez[b, i, j + 1, k] - Ez[b, i, j, k]) + coeff3 * (Ey[b, i, j, k + 1] - Ey[b, i, j, k])
+
+            # Hy component
+            if i < nx and j > 0:
+                for run in range(offsets[4, col], offsets[4, col + 1]):
+                    materialHy = runs[run, 2]
+                    if materialHy < 0:
+                        for k in range(runs[run, 0], runs[run, 1]):
+                            materialHy = ID[4, i, j, k]
+                            coeff0 = updatecoeffsH[materialHy, 0]
+                            coeff3 = updatecoeffsH[materialHy, 3]
+                            coeff1 = updatecoeffsH[materialHy, 1]
+                            for b in range(nbatch):
+                                Hy[b, i, j, k] = coeff0 * Hy[b, i, j, k] - coeff3 * (Ex[b, i, j, k + 1] - Ex[b, i, j, k]) + coeff1 * (Ez[b, i + 1, j, k] - Ez[b, i, j, k])
+                    else:
+                        coeff0 = updatecoeffsH[materialHy, 0]
+                        coeff1 = updatecoeffsH[materialHy, 1]
+                        coeff3 = updatecoeffsH[materialHy, 3]
+                        for b in range(nbatch):
+                            for k in range(runs[run, 0], runs[run, 1]):
+                                Hy[b, i, j, k] = coeff0 * Hy[b, i, j, k] - coeff3 * (Ex[b, i, j, k + 1] - Ex[b, i, j, k]) + coeff1 * (Ez[b, i + 1, j, k] - Ez[b, i, j, k])
+
+            # Hz component
+            if i < nx and j < ny:
+                for run in range(offsets[5, col], offsets[5, col + 1]):
+                    materialHz = runs[run, 2]
+                    if materialHz < 0:
+                        for k in range(runs[run, 0], runs[run, 1]):
+                            materialHz = ID[5, i, j, k]
+                            coeff0 = updatecoeffsH[materialHz, 0]
+                            coeff1 = updatecoeffsH[materialHz, 1]
+                            coeff2 = updatecoeffsH[materialHz, 2]
+                            for b in range(nbatch):
+                                Hz[b, i, j, k] = coeff0 * Hz[b, i, j, k] - coeff1 * (Ey[b, i + 1, j, k] - Ey[b, i, j, k]) + coeff2 * (Ex[b, i, j + 1, k] - Ex[b, i, j, k])
+                    else:
+                        coeff0 = updatecoeffsH[materialHz, 0]
+                        coeff1 = updatecoeffsH[materialHz, 1]
+                        coeff2 = updatecoeffsH[materialHz, 2]
+                        for b in range(nbatch):
+                            for k in range(runs[run, 0], runs[run, 1]):
+                                Hz[b, i, j, k] = coeff0 * Hz[b, i, j, k] - coeff1 * (Ey[b, i + 1, j, k] - Ey[b, i, j, k]) + coeff2 * (Ex[b, i, j + 1, k] - Ex[b, i, j, k])
+
+
+cpdef void update_magnetic_graded(
+                    int nx,
+                    int ny,
+                    int nz,
+                    int nthreads,
+                    floattype_t[:, ::1] updatecoeffsH,
+                    idtype_t[:, :, :, ::1] ID,
+                    floattype_t[::1] gradingx,
+                    floattype_t[::1] gradingy,
+                    floattype_t[::1] gradingz,
+                    floattype_t[:, :, ::1] Ex,
+                    floattype_t[:, :, ::1] Ey,
+                    floattype_t[:, :, ::1] Ez,
+                    floattype_t[:, :, ::1] Hx,
+                    floattype_t[:, :, ::1] Hy,
+                    floattype_t[:, :, ::1] Hz
+            ) noexcept nogil:
+    """This function updates the magnetic field components of a 3D grid with
+        a graded mesh.
+
+    Args:
+        nx, ny, nz (int): Grid size in cells
+        nthreads (int): Number of threads to use
+        updatecoeffs, ID (memoryviews): Access to update coeffients and ID arrays
+        gradingx, gradingy, gradingz (memoryviews): Access to ratios of spatial steps along each axis for the magnetic field components
+        E, H (memoryviews): Access to field component arrays
+    """
+
+    cdef Py_ssize_t i, j, k
+    cdef int materialHx, materialHy, materialHz
+
+    for i in prange(0, nx, nogil=True, schedule='static', num_threads=nthreads):
+        for j in range(0, ny):
+            for k in range(0, nz):
+                materialHx = ID[3, i + 1, j, k]
+                materialHy = ID[4, i, j + 1, k]
+                materialHz = ID[5, i, j, k + 1]
+                Hx[i + 1, j, k] = updatecoeffsH[materialHx, 0] * Hx[i + 1, j, k] - updatecoeffsH[materialHx, 2] * gradingy[j] * (Ez[i + 1, j + 1, k] - Ez[i + 1, j, k]) + updatecoeffsH[materialHx, 3] * gradingz[k] * (Ey[i + 1, j, k + 1] - Ey[i + 1, j, k])
+                Hy[i, j + 1, k] = updatecoeffsH[materialHy, 0] * Hy[i, j + 1, k] - updatecoeffsH[materialHy, 3] * gradingz[k] * (Ex[i, j + 1, k + 1] - Ex[i, j + 1, k]) + updatecoeffsH[materialHy, 1] * gradingx[i] * (Ez[i + 1, j + 1, k] - Ez[i, j + 1, k])
+                Hz[i, j, k + 1] = updatecoeffsH[materialHz, 0] * Hz[i, j, k + 1] - updatecoeffsH[materialHz, 1] * gradingx[i] * (Ey[i + 1, j, k + 1] - Ey[i, j, k + 1]) + updatecoeffsH[materialHz, 2] * gradingy[j] * (Ex[i, j + 1, k + 1] - Ex[i, j, k + 1])
+
+
+###################################################
+# Field updates - 2D models (TMx, TMy, TMz modes) #
+###################################################
+cpdef void update_electric_TMx(
+                    int ny,
+                    int nz,
+                    int nthreads,
+                    floattype_t[:, ::1] updatecoeffsE,
+                    idtype_t[:, :, ::1] ID,
+                    floattype_t[:, ::1] Ex,
+                    floattype_t[:, ::1] Hy,
+                    floattype_t[:, ::1] Hz
+            ) noexcept nogil:
+    """This function updates the electric field component of a 2D TMx model,
+        i.e. the field arrays are the (y, z) plane of the grid.
+
+    Args:
+        ny, nz (int): Grid size in cells
+        nthreads (int): Number of threads to use
+        updatecoeffs, ID, E, H (memoryviews): Access to update coeffients, ID
+            (of Ex, Hy and Hz) and field component arrays
+    """
+
+    cdef Py_ssize_t j, k
+    cdef int materialEx
+
+    for j in prange(1, ny, nogil=True, schedule='static', num_threads=nthreads):
+        for k in range(1, nz):
+            materialEx = ID[0, j, k]
+            Ex[j, k] = updatecoeffsE[materialEx, 0] * Ex[j, k] + updatecoeffsE[materialEx, 2] * (Hz[j, k] - Hz[j - 1, k]) - updatecoeffsE[materialEx, 3] * (Hy[j, k] - Hy[j, k - 1])
+
+
+cpdef void update_electric_TMy(
+                    int nx,
+                    int nz,
+                    int nthreads,
+                    floattype_t[:, ::1] updatecoeffsE,
+                    idtype_t[:, :, ::1] ID,
+                    floattype_t[:, ::1] Ey,
+                    floattype_t[:, ::1] Hx,
+                    floattype_t[:, ::1] Hz
+            ) noexcept nogil:
+    """This function updates the electric field component of a 2D TMy model,
+        i.e. the field arrays are the (x, z) plane of the grid.
+
+    Args:
+        nx, nz (int): Grid size in cells
+        nthreads (int): Number of threads to use
+        updatecoeffs, ID, E, H (memoryviews): Access to update coeffients, ID
+            (of Ey, Hx and Hz) and field component arrays
+    """
+
+    cdef Py_ssize_t i, k
+    cdef int materialEy
+
+    for i in prange(1, nx, nogil=True, schedule='static', num_threads=nthreads):
+        for k in range(1, nz):
+            materialEy = ID[0, i, k]
+            Ey[i, k] = updatecoeffsE[materialEy, 0] * Ey[i, k] + updatecoeffsE[materialEy, 3] * (Hx[i, k] - Hx[i, k - 1]) - updatecoeffsE[materialEy, 1] * (Hz[i, k] - Hz[i - 1, k])
+
+
+cpdef void update_electric_TMz(
+                    int nx,
+                    int ny,
+                    int nthreads,
+                    floattype_t[:, ::1] updatecoeffsE,
+                    idtype_t[:, :, ::1] ID,
+                    floattype_t[:, ::1] Ez,
+                    floattype_t[:, ::1] Hx,
+                    floattype_t[:, ::1] Hy
+            ) noexcept nogil:
+    """This function updates the electric field component of a 2D TMz model,
+        i.e. the field arrays are the (x, y) plane of the grid.
+
+    Args:
+        nx, ny (int): Grid size in cells
+        nthreads (int): Number of threads to use
+        updatecoeffs, ID, E, H (memoryviews): Access to update coeffients, ID
+            (of Ez, Hx and Hy) and field component arrays
+    """
+
+    cdef Py_ssize_t i, j
+    cdef int materialEz
+
+    for i in prange(1, nx, nogil=True, schedule='static', num_threads=nthreads):
+        for j in range(1, ny):
+            materialEz = ID[0, i, j]
+            Ez[i, j] = updatecoeffsE[materialEz, 0] * Ez[i, j] + updatecoeffsE[materialEz, 1] * (Hy[i, j] - Hy[i - 1, j]) - updatecoeffsE[materialEz, 2] * (Hx[i, j] - Hx[i, j - 1])
+
+
+cpdef void update_magnetic_TMx(
+                    int ny,
+                    int nz,
+                    int nthreads,
+                    floattype_t[:, ::1] updatecoeffsH,
+                    idtype_t[:, :, ::1] ID,
+                    floattype_t[:, ::1] Ex,
+                    floattype_t[:, ::1] Hy,
+                    floattype_t[:, ::1] Hz
+            ) noexcept nogil:
+    """This function updates the magnetic field components of a 2D TMx model,
+        i.e. the field arrays are the (y, z) plane of the grid.
+
+    Args:
+        ny, nz (int): Grid size in cells
+        nthreads (int): Number of threads to use
+        updatecoeffs, ID, E, H (memoryviews): Access to update coeffients, ID
+            (of Ex, Hy and Hz) and field component arrays
+    """
+
+    cdef Py_ssize_t j, k
+    cdef int materialHy, materialHz
+
+    # Hy component
+    for j in prange(1, ny, nogil=True, schedule='static', num_threads=nthreads):
+        for k in range(0, nz):
+            materialHy = ID[1, j, k]
+            Hy[j, k] = updatecoeffsH[materialHy, 0] * Hy[j, k] - updatecoeffsH[materialHy, 3] * (Ex[j, k + 1] - Ex[j, k])
+
+    # Hz component
+    for j in prange(0, ny, nogil=True, schedule='static', num_threads=nthreads):
+        for k in range(1, nz):
+            materialHz = ID[2, j, k]
+            Hz[j, k] = updatecoeffsH[materialHz, 0] * Hz[j, k] + updatecoeffsH[materialHz, 2] * (Ex[j + 1, k] - Ex[j, k])
+
+
+cpdef void update_magnetic_TMy(
+                    int nx,
+                    int nz,
+                    int nthreads,
+                    floattype_t[:, ::1] updatecoeffsH,
+                    idtype_t[:, :, ::1] ID,
+                    floattype_t[:, ::1] Ey,
+                    floattype_t[:, ::1] Hx,
+                    floattype_t[:, ::1] Hz
+            ) noexcept nogil:
+    """This function updates the magnetic field components of a 2D TMy model,
+        i.e. the field arrays are the (x, z) plane of the grid.
+
+    Args:
+        nx, nz (int): Grid size in cells
+        nthreads (int): Number of threads to use
+        updatecoeffs, ID, E, H (memoryviews): Access to update coeffients, ID
+            (of Ey, Hx and Hz) and field component arrays
+    """
+
+    cdef Py_ssize_t i, k
+    cdef int materialHx, materialHz
+
+    # Hx component
+    for i in prange(1, nx, nogil=True, schedule='static', num_threads=nthreads):
+        for k in range(0, nz):
+            materialHx = ID[1, i, k]
+            Hx[i, k] = updatecoeffsH[materialHx, 0] * Hx[i, k] + updatecoeffsH[materialHx, 3] * (Ey[i, k + 1] - Ey[i, k])
+
+    # Hz component
+    for i in prange(0, nx, nogil=True, schedule='static', num_threads=nthreads):
+        for k in range(1, nz):
+            materialHz = ID[2, i, k]
+            Hz[i, k] = updatecoeffsH[materialHz, 0] * Hz[i, k] - updatecoeffsH[materialHz, 1] * (Ey[i + 1, k] - Ey[i, k])
+
+
+cpdef void update_magnetic_TMz(
+                    int nx,
+                    int ny,
+                    int nthreads,
+                    floattype_t[:, ::1] updatecoeffsH,
+                    idtype_t[:, :, ::1] ID,
+                    floattype_t[:, ::1] Ez,
+                    floattype_t[:, ::1] Hx,
+                    floattype_t[:, ::1] Hy
+            ) noexcept nogil:
+    """This function updates the magnetic field components of a 2D TMz model,
+        i.e. the field arrays are the (x, y) plane of the grid.
+
+    Args:
+        nx, ny (int): Grid size in cells
+        nthreads (int): Number of threads to use
+        updatecoeffs, ID, E, H (memoryviews): Access to update coeffients, ID
+            (of Ez, Hx and Hy) and field component arrays
+    """
+
+    cdef Py_ssize_t i, j
+    cdef int materialHx, materialHy
+
+    # Hx component
+    for i in prange(1, nx, nogil=True, schedule='static', num_threads=nthreads):
+        for j in range(0, ny):
+            materialHx = ID[1, i, j]
+            Hx[i, j] = updatecoeffsH[materialHx, 0] * Hx[i, j] - updatecoeffsH[materialHx, 2] * (Ez[i, j + 1] - Ez[i, j])
+
+    # Hy component
+    for i in prange(0, nx, nogil=True, schedule='static', num_threads=nthreads):
+        for j in range(1, ny):
+            materialHy = ID[2, i, j]
+            Hy[i, j] = updatecoeffsH[materialHy, 0] * Hy[i, j] + updatecoeffsH[materialHy, 1] * (Ez[i + 1, j] - Ez[i, j])
+
+
+cpdef void update_electric_dispersive_cells_2D(
+                    int nthreads,
+                    int maxpoles,
+                    dispersivetype_t[:, ::1] updatecoeffsdispersive,
+                    idtype_t[:, :, ::1] ID,
+                    np.int64_t[::1] cells,
+                    dispersivetype_t[:, ::1] T,
+                    float[::1] phi,
+                    floattype_t[:, ::1] E
+            ) noexcept nogil:
+    """This function updates the temporary dispersive material array of the
+        electric field component of a 2D model, which is only stored for cells
+        in dispersive materials, before the electric field component is
+        updated (see update_electric_dispersive_cells).
+
+    Args:
+        nthreads (int): Number of threads to use
+        maxpoles (int): Maximum number of poles
+        updatecoeffs, ID (memoryviews): Access to update coeffients and ID arrays
+        cells (memoryview): Access to flat indices of cells in dispersive
+            materials in the field array
+        T, phi, E (memoryviews): Access to temporary, dispersive term and field component arrays
+    """
+
+    dispersive_cells(nthreads, maxpoles, updatecoeffsdispersive, &ID[0, 0, 0], cells, T, phi, &E[0, 0])
+
+
+cpdef void update_electric_dispersive_cells_phi_2D(
+                    int nthreads,
+                    floattype_t[:, ::1] updatecoeffsE,
+                    idtype_t[:, :, ::1] ID,
+                    np.int64_t[::1] cells,
+                    float[::1] phi,
+                    floattype_t[:, ::1] E
+            ) noexcept nogil:
+    """This function applies the dispersive term to the electric field
+        component of a 2D model for cells in dispersive materials (see
+        update_electric_dispersive_cells_2D).
+
+    Args:
+        nthreads (int): Number of threads to use
+        updatecoeffs, ID (memoryviews): Access to update coeffients and ID arrays
+        cells (memoryview): Access to flat indices of cells in dispersive
+            materials in the field array
+        phi, E (memoryviews): Access to dispersive term and field component arrays
+    """
+
+    dispersive_cells_phi(nthreads, updatecoeffsE, &ID[0, 0, 0], cells, phi, &E[0, 0])
@@ -0,0 +1,211 @@
+# Copyright (C) 2015-2019: The University of Edinburgh
+#                 Authors: Craig Warren and Antonis Giannopoulos
+#
+# This file is part of gprMax.
+#
+# gprMax is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# gprMax is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with gprMax.  If not, see <http://www.gnu.org/licenses/>.
+
+import hashlib
+import os
+
+import h5py
+import numpy as np
+
+from gprMax._version import __version__
+from gprMax.constants import floattype
+from gprMax.materials import Material
+from gprMax.pml import CFS
+from gprMax.pml import PML
+
+
+# Commands that do not change the built geometry, and are not hashed
+ignoredcmds = ('#time_window', '#title', '#messages', '#num_threads', '#excitation_file', '#src_steps', '#rx_steps', '#taguchi', '#end_taguchi', '#output_dir',
+               '#geometry_view', '#geometry_objects_write', '#waveform', '#hertzian_dipole', '#magnetic_dipole', '#transmission_line', '#rx', '#rx_array', '#snapshot')
+
+# Geometry commands, and their number of parameters without a seed, that
+# build a random geometry if the seed is not given
+seededcmds = {'#fractal_box:': 13, '#add_surface_roughness:': 12, '#add_grass:': 11}
+
+
+def geometry_hash(singlecmds, multicmds, geometry, G):
+    """Hash the commands the geometry of a model is built from, and the
+        contents of any files that geometry objects are read from. Models
+        with the same hash build the same geometry.
+
+    Args:
+        singlecmds (dict): Commands that can only occur once in the model.
+        multicmds (dict): Commands that can have multiple instances in the model.
+        geometry (list): Geometry commands in the model.
+        G (class): Grid class instance - holds essential parameters describing the model.
+
+    Returns:
+        geometryhash (str): Hash of the geometry, or None if the geometry is random,
+                            i.e. a fractal seed is not given.
+    """
+
+    if any(len(cmd.split()) - 1 == seededcmds.get(cmd.split()[0]) for cmd in geometry):
+        return None
+
+    h = hashlib.sha256()
+    h.update('{} {} {}\n'.format(__version__, np.dtype(floattype).name, G.gpu is None).encode())
+    for cmdname in sorted(singlecmds):
+        if cmdname not in ignoredcmds and singlecmds[cmdname] is not None:
+            h.update('{}: {}\n'.format(cmdname, ' '.join(singlecmds[cmdname].split())).encode())
+    for cmdname in sorted(multicmds):
+        if cmdname not in ignoredcmds:
+            for cmd in multicmds[cmdname]:
+                h.update('{}: {}\n'.format(cmdname, ' '.join(cmd.split())).encode())
+    for cmd in geometry:
+        tmp = cmd.split()
+        h.update('{}\n'.format(' '.join(tmp)).encode())
+        if tmp[0] == '#geometry_objects_read:' and len(tmp) == 6:
+            for filename in tmp[4:6]:
+                # See if file exists at specified path and if not try input file directory
+                if not os.path.isfile(filename):
+                    filename = os.path.abspath(os.path.join(G.inputdirectory, filename))
+                if os.path.isfile(filename):
+                    with open(filename, 'rb') as f:
+                        for block in iter(lambda: f.read(1 << 20), b''):
+                            h.update(block)
+
+    return h.hexdigest()
+
+
+def reuse_geometry(Gprevious, G):
+    """Reuse the built geometry, i.e. material IDs, materials and PMLs, of the
+        previous model for a model with the same geometry.
+
+    Args:
+        Gprevious (class): Grid class instance of the previous model.
+        G (class): Grid class instance - holds essential parameters describing the model.
+    """
+
+    for name in ('solid', 'rigidE', 'rigidH', 'ID', 'IDlookup', 'materials', 'dispersivetype', 'dispersivecells', 'materialruns', 'pmls'):
+        setattr(G, name, getattr(Gprevious, name))
+    Material.maxpoles = max([Material.maxpoles] + [material.poles for material in G.materials])
+
+    # Clear arrays for fields in PML
+    for pml in G.pmls:
+        pml.initialise_field_arrays()
+
+
+class GeometryCache(object):
+    """
+    Cache of the built geometry of models, i.e. material IDs, materials and PML
+    coefficients, stored in HDF5 files named by a hash of the commands that
+    the geometry is built from (see geometry_hash). Models with the same
+    geometry, e.g. the traces of a B-scan where only sources and receivers
+    move, can then reuse the geometry built by another model, including one
+    run by another process, job array task or MPI worker.
+    """
+
+    # Arrays of the grid, properties of each material, and arrays of each
+    # PML, that are stored in the cache
+    geometry = ('solid', 'rigidE', 'rigidH', 'ID')
+    materialproperties = ('ID', 'type', 'averagable', 'er', 'se', 'mr', 'sm', 'poles', 'deltaer', 'tau', 'alpha')
+    pmlarrays = ('ERA', 'ERB', 'ERE', 'ERF', 'HRA', 'HRB', 'HRE', 'HRF')
+
+    def __init__(self, directory, geometryhash):
+        """
+        Args:
+            directory (str): Directory of the cache files.
+            geometryhash (str): Hash of the geometry of the model.
+        """
+
+        self.filename = os.path.join(directory, 'geometry_' + geometryhash + '.h5')
+
+    def exists(self):
+        """Check if the geometry of the model has been built and cached."""
+
+        return os.path.isfile(self.filename)
+
+    def write(self, G):
+        """Write the built geometry of the model to the cache. The file is
+            written under a temporary name and then renamed, so other
+            processes never read a partially written file.
+
+        Args:
+            G (class): Grid class instance - holds essential parameters describing the model.
+        """
+
+        os.makedirs(os.path.dirname(self.filename), exist_ok=True)
+        tmpfilename = '{}.{}.tmp'.format(self.filename, os.getpid())
+        with h5py.File(tmpfilename, 'w') as f:
+            f.attrs['gprMax'] = __version__
+            f.attrs['nx_ny_nz'] = (G.nx, G.ny, G.nz)
+            f.attrs['maxpoles'] = Material.maxpoles
+            f.attrs['dispersivetype'] = np.dtype(G.dispersivetype).name
+
+            # Material IDs, and properties of materials (including any created
+            # by dielectric smoothing, fractals and voltage sources)
+            for name in self.geometry:
+                f['/geometry/' + name] = getattr(G, name)
+            for material in G.materials:
+                grp = f.create_group('/materials/material' + str(material.numID))
+                for name in self.materialproperties:
+                    grp.attrs[name] = getattr(material, name)
+            if Material.maxpoles != 0 and G.dispersivecells is not None:
+                for component, cells in zip('xyz', G.dispersivecells):
+                    f['/geometry/dispersivecells' + component] = cells
+
+            # PML slabs, in the order they are updated
+            for n, pml in enumerate(G.pmls):
+                grp = f.create_group('/pmls/pml' + str(n + 1))
+                grp.attrs['ID'] = pml.ID
+                grp.attrs['direction'] = pml.direction
+                grp.attrs['extent'] = (pml.xs, pml.xf, pml.ys, pml.yf, pml.zs, pml.zf)
+                for name in self.pmlarrays:
+                    grp[name] = getattr(pml, name)
+
+        os.replace(tmpfilename, self.filename)
+
+    def read(self, G):
+        """Restore the built geometry of the model from the cache, i.e. in
+            place of processing geometry commands and building the Yee cells
+            and PMLs.
+
+        Args:
+            G (class): Grid class instance - holds essential parameters describing the model.
+        """
+
+        with h5py.File(self.filename, 'r') as f:
+            for name in self.geometry:
+                setattr(G, name, f['/geometry/' + name][()])
+            G.IDlookup = {'Ex': 0, 'Ey': 1, 'Ez': 2, 'Hx': 3, 'Hy': 4, 'Hz': 5}
+            G.materials = []
+            for numID in range(len(f['materials'])):
+                grp = f['/materials/material' + str(numID)]
+                m = Material(numID, grp.attrs['ID'])
+                m.type = grp.attrs['type']
+                m.averagable = bool(grp.attrs['averagable'])
+                m.er, m.se, m.mr, m.sm = (float(grp.attrs[name]) for name in ('er', 'se', 'mr', 'sm'))
+                m.poles = int(grp.attrs['poles'])
+                m.deltaer, m.tau, m.alpha = (grp.attrs[name].tolist() for name in ('deltaer', 'tau', 'alpha'))
+                G.materials.append(m)
+            Material.maxpoles = max(Material.maxpoles, int(f.attrs['maxpoles']))
+            G.dispersivetype = np.dtype(f.attrs['dispersivetype']).type
+            if '/geometry/dispersivecellsx' in f:
+                G.dispersivecells = [f['/geometry/dispersivecells' + component][()] for component in 'xyz']
+
+            if 'pmls' in f and not G.cfs:
+                G.cfs = [CFS()]
+            for n in range(len(f.get('pmls', []))):
+                grp = f['/pmls/pml' + str(n + 1)]
+                xs, xf, ys, yf, zs, zf = (int(x) for x in grp.attrs['extent'])
+                pml = PML(G, ID=grp.attrs['ID'], direction=grp.attrs['direction'], xs=xs, xf=xf, ys=ys, yf=yf, zs=zs, zf=zf)
+                for name in self.pmlarrays:
+                    setattr(pml, name, grp[name][()])
+                if G.gpu is None:
+                    pml.cpu_get_update_funcs(G)
+                G.pmls.append(pml)
@@ -247,8 +247,11 @@ cpdef void build_face_yz(
 
     set_rigid_Ey(i, j, k, rigidE)
     set_rigid_Ez(i, j, k, rigidE)
-    set_rigid_Ey(i, j, k + 1, rigidE)
-    set_rigid_Ez(i, j + 1, k, rigidE)
+    # Edges on the upper faces of the arrays have no cell of their own
+    if k + 1 < rigidE.shape[3]:
+        set_rigid_Ey(i, j, k + 1, rigidE)
+    if j + 1 < rigidE.shape[2]:
+        set_rigid_Ez(i, j + 1, k, rigidE)
     ID[1, i, j, k] = numIDy
     ID[2, i, j, k] = numIDz
     ID[1, i, j, k + 1] = numIDy
@@ -275,8 +278,11 @@ cpdef void build_face_xz(
 
     set_rigid_Ex(i, j, k, rigidE)
     set_rigid_Ez(i, j, k, rigidE)
-    set_rigid_Ex(i, j, k + 1, rigidE)
-    set_rigid_Ez(i + 1, j, k, rigidE)
+    # Edges on the upper faces of the arrays have no cell of their own
+    if k + 1 < rigidE.shape[3]:
+        set_rigid_Ex(i, j, k + 1, rigidE)
+    if i + 1 < rigidE.shape[1]:
+        set_rigid_Ez(i + 1, j, k, rigidE)
     ID[0, i, j, k] = numIDx
     ID[2, i, j, k] = numIDz
     ID[0, i, j, k + 1] = numIDx
@@ -303,8 +309,11 @@ cpdef void build_face_xy(
 
     set_rigid_Ex(i, j, k, rigidE)
     set_rigid_Ey(i, j, k, rigidE)
-    set_rigid_Ex(i, j + 1, k, rigidE)
-    set_rigid_Ey(i + 1, j, k, rigidE)
+    # Edges on the upper faces of the arrays have no cell of their own
+    if j + 1 < rigidE.shape[2]:
+        set_rigid_Ex(i, j + 1, k, rigidE)
+    if i + 1 < rigidE.shape[1]:
+        set_rigid_Ey(i + 1, j, k, rigidE)
     ID[0, i, j, k] = numIDx
     ID[1, i, j, k] = numIDy
     ID[0, i, j + 1, k] = numIDx
@@ -395,6 +404,9 @@ cpdef void build_triangle(
                     int numIDy,
                     int numIDz,
                     bint averaging,
+                    int xo,
+                    int yo,
+                    int zo,
                     np.uint32_t[:, :, ::1] solid,
                     np.int8_t[:, :, :, ::1] rigidE,
                     np.int8_t[:, :, :, ::1] rigidH,
@@ -412,11 +424,13 @@ cpdef void build_triangle(
         dx, dy, dz (float): Spatial discretisation.
         numID, numIDx, numIDy, numIDz (int): Numeric ID of material.
         averaging (bint): Whether material property averaging will occur for the object.
+        xo, yo, zo (int): Cell coordinates of the origin of the solid, rigid
+                and ID arrays in the domain.
         solid, rigidE, rigidH, ID (memoryviews): Access to solid, rigid and ID arrays.
     """
 
     cdef Py_ssize_t i, j, k
-    cdef int i1, i2, j1, j2, sign, level, thicknesscells
+    cdef int i1, i2, j1, j2, k1, k2, io, jo, ko, ni, nj, nk, sign, level, thicknesscells
     cdef float area, s, t
 
     # Calculate a bounding box for the triangle
@@ -428,6 +442,8 @@ cpdef void build_triangle(
         j2 = round_value(np.amax([z1, z2, z3]) / dz) + 1
         level = round_value(x1 / dx)
         thicknesscells = round_value(thickness / dx)
+        io, jo, ko = yo, zo, xo
+        ni, nj, nk = solid.shape[1], solid.shape[2], solid.shape[0]
     elif normal == 'y':
         area = 0.5 * (-z2 * x3 + z1 * (-x2 + x3) + x1 * (z2 - z3) + x2 * z3)
         i1 = round_value(np.amin([x1, x2, x3]) / dx) - 1
@@ -436,6 +452,8 @@ cpdef void build_triangle(
         j2 = round_value(np.amax([z1, z2, z3]) / dz) + 1
         level = round_value(y1 /dy)
         thicknesscells = round_value(thickness / dy)
+        io, jo, ko = xo, zo, yo
+        ni, nj, nk = solid.shape[0], solid.shape[2], solid.shape[1]
     elif normal == 'z':
         area = 0.5 * (-y2 * x3 + y1 * (-x2 + x3) + x1 * (y2 - y3) + x2 * y3)
         i1 = round_value(np.amin([x1, x2, x3]) / dx) - 1
@@ -444,6 +462,18 @@ cpdef void build_triangle(
         j2 = round_value(np.amax([y1, y2, y3]) / dy) + 1
         level = round_value(z1 / dz)
         thicknesscells = round_value(thickness / dz)
+        io, jo, ko = xo, yo, zo
+        ni, nj, nk = solid.shape[0], solid.shape[1], solid.shape[2]
+
+    # Set bounds to the part of the domain held in the arrays
+    i1 = max(i1, io)
+    i2 = min(i2, io + ni)
+    j1 = max(j1, jo)
+    j2 = min(j2, jo + nj)
+    k1 = max(level, ko)
+    k2 = min(level + thicknesscells, ko + nk)
+    if thicknesscells == 0 and (level < ko or level >= ko + nk):
+        return
 
     sign = np.sign(area)
 
@@ -471,19 +501,19 @@ cpdef void build_triangle(
             if s > 0 and t > 0 and (s + t) < 2 * area * sign:
                 if thicknesscells == 0:
                     if normal == 'x':
-                        build_face_yz(level, i, j, numIDy, numIDz, rigidE, rigidH, ID)
+                        build_face_yz(level - ko, i - io, j - jo, numIDy, numIDz, rigidE, rigidH, ID)
                     elif normal == 'y':
-                        build_face_xz(i, level, j, numIDx, numIDz, rigidE, rigidH, ID)
+                        build_face_xz(i - io, level - ko, j - jo, numIDx, numIDz, rigidE, rigidH, ID)
                     elif normal == 'z':
-                        build_face_xy(i, j, level, numIDx, numIDy, rigidE, rigidH, ID)
+                        build_face_xy(i - io, j - jo, level - ko, numIDx, numIDy, rigidE, rigidH, ID)
                 else:
-                    for k in range(level, level + thicknesscells):
+                    for k in range(k1, k2):
                         if normal == 'x':
-                            build_voxel(k, i, j, numID, numIDx, numIDy, numIDz, averaging, solid, rigidE, rigidH, ID)
+                            build_voxel(k - ko, i - io, j - jo, numID, numIDx, numIDy, numIDz, averaging, solid, rigidE, rigidH, ID)
                         elif normal == 'y':
-                            build_voxel(i, k, j, numID, numIDx, numIDy, numIDz, averaging, solid, rigidE, rigidH, ID)
+                            build_voxel(i - io, k - ko, j - jo, numID, numIDx, numIDy, numIDz, averaging, solid, rigidE, rigidH, ID)
                         elif normal == 'z':
-                            build_voxel(i, j, k, numID, numIDx, numIDy, numIDz, averaging, solid, rigidE, rigidH, ID)
+                            build_voxel(i - io, j - jo, k - ko, numID, numIDx, numIDy, numIDz, averaging, solid, rigidE, rigidH, ID)
 
 
 cpdef void build_cylindrical_sector(
@@ -503,6 +533,9 @@ cpdef void build_cylindrical_sector(
                     int numIDy,
                     int numIDz,
                     bint averaging,
+                    int xo,
+                    int yo,
+                    int zo,
                     np.uint32_t[:, :, ::1] solid,
                     np.int8_t[:, :, :, ::1] rigidE,
                     np.int8_t[:, :, :, ::1] rigidH,
@@ -527,11 +560,13 @@ cpdef void build_cylindrical_sector(
         dx, dy, dz (float): Spatial discretisation.
         numID, numIDx, numIDy, numIDz (int): Numeric ID of material.
         averaging (bint): Whether material property averaging will occur for the object.
+        xo, yo, zo (int): Cell coordinates of the origin of the solid, rigid
+                and ID arrays in the domain.
         solid, rigidE, rigidH, ID (memoryviews): Access to solid, rigid and ID arrays.
     """
 
     cdef Py_ssize_t x, y, z
-    cdef int x1, x2, y1, y2, z1, z2, thicknesscells
+    cdef int x1, x2, y1, y2, z1, z2, l1, l2, thicknesscells
 
     if normal == 'x':
         # Angles are defined from zero degrees on the positive y-axis going towards positive z-axis
@@ -541,24 +576,24 @@ cpdef void build_cylindrical_sector(
         z2 = round_value((ctr2 + radius)/dz)
         thicknesscells = round_value(thickness/dx)
 
-        # Set bounds to domain if they outside
-        if y1 < 0:
-            y1 = 0
-        if y2 > solid.shape[1]:
-            y2 = solid.shape[1]
-        if z1 < 0:
-            z1 = 0
-        if z2 > solid.shape[2]:
-            z2 = solid.shape[2]
+        # Set bounds to the part of the domain held in the arrays
+        y1 = max(y1, yo)
+        y2 = min(y2, yo + solid.shape[1])
+        z1 = max(z1, zo)
+        z2 = min(z2, zo + solid.shape[2])
+        l1 = max(level, xo)
+        l2 = min(level + thicknesscells, xo + solid.shape[0])
+        if thicknesscells == 0 and (level < xo or level >= xo + solid.shape[0]):
+            return
 
         for y in range(y1, y2):
             for z in range(z1, z2):
                 if is_inside_sector(y * dy + 0.5 * dy, z * dz + 0.5 * dz, ctr1, ctr2, sectorstartangle, sectorangle, radius):
                     if thicknesscells == 0:
-                        build_face_yz(level, y, z, numIDy, numIDz, rigidE, rigidH, ID)
+                        build_face_yz(level - xo, y - yo, z - zo, numIDy, numIDz, rigidE, rigidH, ID)
                     else:
-                        for x in range(level, level + thicknesscells):
-                            build_voxel(x, y, z, numID, numIDx, numIDy, numIDz, averaging, solid, rigidE, rigidH, ID)
+                        for x in range(l1, l2):
+                            build_voxel(x - xo, y - yo, z - zo, numID, numIDx, numIDy, numIDz, averaging, solid, rigidE, rigidH, ID)
 
     elif normal == 'y':
         # Angles are defined from zero degrees on the positive x-axis going towards positive z-axis
@@ -568,24 +603,24 @@ cpdef void build_cylindrical_sector(
         z2 = round_value((ctr2 + radius)/dz)
         thicknesscells = round_value(thickness/dy)
 
-        # Set bounds to domain if they outside
-        if x1 < 0:
-            x1 = 0
-        if x2 > solid.shape[0]:
-            x2 = solid.shape[0]
-        if z1 < 0:
-            z1 = 0
-        if z2 > solid.shape[2]:
-            z2 = solid.shape[2]
+        # Set bounds to the part of the domain held in the arrays
+        x1 = max(x1, xo)
+        x2 = min(x2, xo + solid.shape[0])
+        z1 = max(z1, zo)
+        z2 = min(z2, zo + solid.shape[2])
+        l1 = max(level, yo)
+        l2 = min(level + thicknesscells, yo + solid.shape[1])
+        if thicknesscells == 0 and (level < yo or level >= yo + solid.shape[1]):
+            return
 
         for x in range(x1, x2):
             for z in range(z1, z2):
                 if is_inside_sector(x * dx + 0.5 * dx, z * dz + 0.5 * dz, ctr1, ctr2, sectorstartangle, sectorangle, radius):
                     if thicknesscells == 0:
-                        build_face_xz(x, level, z, numIDx, numIDz, rigidE, rigidH, ID)
+                        build_face_xz(x - xo, level - yo, z - zo, numIDx, numIDz, rigidE, rigidH, ID)
                     else:
-                        for y in range(level, level + thicknesscells):
-                            build_voxel(x, y, z, numID, numIDx, numIDy, numIDz, averaging, solid, rigidE, rigidH, ID)
+                        for y in range(l1, l2):
+                            build_voxel(x - xo, y - yo, z - zo, numID, numIDx, numIDy, numIDz, averaging, solid, rigidE, rigidH, ID)
 
     elif normal == 'z':
         # Angles are defined from zero degrees on the positive x-axis going towards positive y-axis
@@ -595,24 +630,24 @@ cpdef void build_cylindrical_sector(
         y2 = round_value((ctr2 + radius)/dy)
         thicknesscells = round_value(thickness/dz)
 
-        # Set bounds to domain if they outside
-        if x1 < 0:
-            x1 = 0
-        if x2 > solid.shape[0]:
-            x2 = solid.shape[0]
-        if y1 < 0:
-            y1 = 0
-        if y2 > solid.shape[1]:
-            y2 = solid.shape[1]
+        # Set bounds to the part of the domain held in the arrays
+        x1 = max(x1, xo)
+        x2 = min(x2, xo + solid.shape[0])
+        y1 = max(y1, yo)
+        y2 = min(y2, yo + solid.shape[1])
+        l1 = max(level, zo)
+        l2 = min(level + thicknesscells, zo + solid.shape[2])
+        if thicknesscells == 0 and (level < zo or level >= zo + solid.shape[2]):
+            return
 
         for x in range(x1, x2):
             for y in range(y1, y2):
                 if is_inside_sector(x * dx + 0.5 * dx, y * dy + 0.5 * dy, ctr1, ctr2, sectorstartangle, sectorangle, radius):
                     if thicknesscells == 0:
-                        build_face_xy(x, y, level, numIDx, numIDy, rigidE, rigidH, ID)
+                        build_face_xy(x - xo, y - yo, level - zo, numIDx, numIDy, rigidE, rigidH, ID)
                     else:
-                        for z in range(level, level + thicknesscells):
-                            build_voxel(x, y, z, numID, numIDx, numIDy, numIDz, averaging, solid, rigidE, rigidH, ID)
+                        for z in range(l1, l2):
+                            build_voxel(x - xo, y - yo, z - zo, numID, numIDx, numIDy, numIDz, averaging, solid, rigidE, rigidH, ID)
 
 
 cpdef void build_box(
@@ -627,6 +662,9 @@ cpdef void build_box(
                     int numIDy,
                     int numIDz,
                     bint averaging,
+                    int xo,
+                    int yo,
+                    int zo,
                     np.uint32_t[:, :, ::1] solid,
                     np.int8_t[:, :, :, ::1] rigidE,
                     np.int8_t[:, :, :, ::1] rigidH,
@@ -638,11 +676,21 @@ cpdef void build_box(
         xs, xf, ys, yf, zs, zf (int): Cell coordinates of entire box.
         numID, numIDx, numIDy, numIDz (int): Numeric ID of material.
         averaging (bint): Whether material property averaging will occur for the object.
+        xo, yo, zo (int): Cell coordinates of the origin of the solid, rigid
+                and ID arrays in the domain.
         solid, rigidE, rigidH, ID (memoryviews): Access to solid, rigid and ID arrays.
     """
 
     cdef Py_ssize_t i, j, k
 
+    # Set bounds to the part of the domain held in the arrays
+    xs = max(xs - xo, 0)
+    xf = min(xf - xo, solid.shape[0])
+    ys = max(ys - yo, 0)
+    yf = min(yf - yo, solid.shape[1])
+    zs = max(zs - zo, 0)
+    zf = min(zf - zo, solid.shape[2])
+
     if averaging:
         for i in range(xs, xf):
             for j in range(ys, yf):
@@ -705,6 +753,9 @@ cpdef void build_cylinder(
                     int numIDy,
                     int numIDz,
                     bint averaging,
+                    int xo,
+                    int yo,
+                    int zo,
                     np.uint32_t[:, :, ::1] solid,
                     np.int8_t[:, :, :, ::1] rigidE,
                     np.int8_t[:, :, :, ::1] rigidH,
@@ -718,6 +769,8 @@ cpdef void build_cylinder(
         dx, dy, dz (float): Spatial discretisation.
         numID, numIDx, numIDy, numIDz (int): Numeric ID of material.
         averaging (bint): Whether material property averaging will occur for the object.
+        xo, yo, zo (int): Cell coordinates of the origin of the solid, rigid
+                and ID arrays in the domain.
         solid, rigidE, rigidH, ID (memoryviews): Access to solid, rigid and ID arrays.
     """
 
@@ -785,19 +838,13 @@ cpdef void build_cylinder(
             zs = round_value((z2 - r) / dz) - 1
             zf = round_value((z1 + r) / dz) + 1
 
-    # Set bounds to domain if they outside
-    if xs < 0:
-        xs = 0
-    if xf > solid.shape[0]:
-        xf = solid.shape[0]
-    if ys < 0:
-        ys = 0
-    if yf > solid.shape[1]:
-        yf = solid.shape[1]
-    if zs < 0:
-        zs = 0
-    if zf > solid.shape[2]:
-        zf = solid.shape[2]
+    # Set bounds to the part of the domain held in the arrays
+    xs = max(xs, xo)
+    xf = min(xf, xo + solid.shape[0])
+    ys = max(ys, yo)
+    yf = min(yf, yo + solid.shape[1])
+    zs = max(zs, zo)
+    zf = min(zf, zo + solid.shape[2])
 
     # x-aligned cylinder
     if x_align:
@@ -805,21 +852,21 @@ cpdef void build_cylinder(
             for k in range(zs, zf):
                 if np.sqrt((j * dy + 0.5 * dy - y1)**2 + (k * dz + 0.5 * dz - z1)**2) <= r:
                     for i in range(xs, xf):
-                        build_voxel(i, j, k, numID, numIDx, numIDy, numIDz, averaging, solid, rigidE, rigidH, ID)
+                        build_voxel(i - xo, j - yo, k - zo, numID, numIDx, numIDy, numIDz, averaging, solid, rigidE, rigidH, ID)
     # y-aligned cylinder
     elif y_align:
         for i in range(xs, xf):
             for k in range(zs, zf):
                 if np.sqrt((i * dx + 0.5 * dx - x1)**2 + (k * dz + 0.5 * dz - z1)**2) <= r:
                     for j in range(ys, yf):
-                        build_voxel(i, j, k, numID, numIDx, numIDy, numIDz, averaging, solid, rigidE, rigidH, ID)
+                        build_voxel(i - xo, j - yo, k - zo, numID, numIDx, numIDy, numIDz, averaging, solid, rigidE, rigidH, ID)
     # z-aligned cylinder
     elif z_align:
         for i in range(xs, xf):
             for j in range(ys, yf):
                 if np.sqrt((i * dx + 0.5 * dx - x1)**2 + (j * dy + 0.5 * dy - y1)**2) <= r:
                     for k in range(zs, zf):
-                        build_voxel(i, j, k, numID, numIDx, numIDy, numIDz, averaging, solid, rigidE, rigidH, ID)
+                        build_voxel(i - xo, j - yo, k - zo, numID, numIDx, numIDy, numIDz, averaging, solid, rigidE, rigidH, ID)
 
     # Not aligned with any axis
     else:
@@ -867,7 +914,7 @@ cpdef void build_cylinder(
                             build = 1
 
                     if build:
-                        build_voxel(i, j, k, numID, numIDx, numIDy, numIDz, averaging, solid, rigidE, rigidH, ID)
+                        build_voxel(i - xo, j - yo, k - zo, numID, numIDx, numIDy, numIDz, averaging, solid, rigidE, rigidH, ID)
 
 
 cpdef void build_sphere(
@@ -883,6 +930,9 @@ cpdef void build_sphere(
                     int numIDy,
                     int numIDz,
                     bint averaging,
+                    int xo,
+                    int yo,
+                    int zo,
                     np.uint32_t[:, :, ::1] solid,
                     np.int8_t[:, :, :, ::1] rigidE,
                     np.int8_t[:, :, :, ::1] rigidH,
@@ -896,6 +946,8 @@ cpdef void build_sphere(
         dx, dy, dz (float): Spatial discretisation.
         numID, numIDx, numIDy, numIDz (int): Numeric ID of material.
         averaging (bint): Whether material property averaging will occur for the object.
+        xo, yo, zo (int): Cell coordinates of the origin of the solid, rigid
+                and ID arrays in the domain.
         solid, rigidE, rigidH, ID (memoryviews): Access to solid, rigid and ID arrays.
     """
 
@@ -910,25 +962,19 @@ cpdef void build_sphere(
     zs = round_value(((zc * dz) - r) / dz) - 1
     zf = round_value(((zc * dz) + r) / dz) + 1
 
-    # Set bounds to domain if they outside
-    if xs < 0:
-        xs = 0
-    if xf > solid.shape[0]:
-        xf = solid.shape[0]
-    if ys < 0:
-        ys = 0
-    if yf > solid.shape[1]:
-        yf = solid.shape[1]
-    if zs < 0:
-        zs = 0
-    if zf > solid.shape[2]:
-        zf = solid.shape[2]
+    # Set bounds to the part of the domain held in the arrays
+    xs = max(xs, xo)
+    xf = min(xf, xo + solid.shape[0])
+    ys = max(ys, yo)
+    yf = min(yf, yo + solid.shape[1])
+    zs = max(zs, zo)
+    zf = min(zf, zo + solid.shape[2])
 
     for i in range(xs, xf):
         for j in range(ys, yf):
             for k in range(zs, zf):
                 if np.sqrt((i + 0.5 - xc)**2 * dx**2 + (j + 0.5 - yc)**2 * dy**2 + (k + 0.5 - zc)**2 * dz**2) <= r:
-                    build_voxel(i, j, k, numID, numIDx, numIDy, numIDz, averaging, solid, rigidE, rigidH, ID)
+                    build_voxel(i - xo, j - yo, k - zo, numID, numIDx, numIDy, numIDz, averaging, solid, rigidE, rigidH, ID)
 
 
 cpdef void build_voxels_from_array(
@@ -938,6 +984,9 @@ cpdef void build_voxels_from_array(
                     int numexistmaterials,
                     bint averaging,
                     np.int16_t[:, :, ::1] data,
+                    int xo,
+                    int yo,
+                    int zo,
                     np.uint32_t[:, :, ::1] solid,
                     np.int8_t[:, :, :, ::1] rigidE,
                     np.int8_t[:, :, :, ::1] rigidH,
@@ -950,6 +999,8 @@ cpdef void build_voxels_from_array(
         numexistmaterials (int): Number of existing materials in model prior to building voxels.
         averaging (bint): Whether material property averaging will occur for the object.
         data (memoryview): Access to array containing numeric IDs of voxels to create.
+        xo, yo, zo (int): Cell coordinates of the origin of the solid, rigid
+                and ID arrays in the domain.
         solid, rigidE, rigidH, ID (memoryviews): Access to solid, rigid and ID arrays.
     """
 
@@ -959,32 +1010,24 @@ cpdef void build_voxels_from_array(
     # Set bounds to domain if they outside
     if xs < 0:
         xs = 0
-    if xs + data.shape[0] > solid.shape[0]:
-        xf = solid.shape[0]
-    else:
-        xf = xs + data.shape[0]
+    xf = xs + data.shape[0]
 
     if ys < 0:
         ys = 0
-    if ys + data.shape[1] > solid.shape[1]:
-        yf = solid.shape[1]
-    else:
-        yf = ys + data.shape[1]
+    yf = ys + data.shape[1]
 
     if zs < 0:
         zs = 0
-    if zs + data.shape[2] > solid.shape[2]:
-        zf = solid.shape[2]
-    else:
-        zf = zs + data.shape[2]
+    zf = zs + data.shape[2]
 
-    for i in range(xs, xf):
-        for j in range(ys, yf):
-            for k in range(zs, zf):
+    # Set bounds to the part of the domain held in the arrays
+    for i in range(max(xs, xo), min(xf, xo + solid.shape[0])):
+        for j in range(max(ys, yo), min(yf, yo + solid.shape[1])):
+            for k in range(max(zs, zo), min(zf, zo + solid.shape[2])):
                 numID = data[i - xs, j - ys, k - zs]
                 if numID >= 0:
                     numID += numexistmaterials
-                    build_voxel(i, j, k, numID, numID, numID, numID, averaging, solid, rigidE, rigidH, ID)
+                    build_voxel(i - xo, j - yo, k - zo, numID, numID, numID, numID, averaging, solid, rigidE, rigidH, ID)
 
 
 cpdef void build_voxels_from_array_mask(
@@ -996,6 +1039,9 @@ cpdef void build_voxels_from_array_mask(
                     bint averaging,
                     np.int8_t[:, :, ::1] mask,
                     np.int16_t[:, :, ::1] data,
+                    int xo,
+                    int yo,
+                    int zo,
                     np.uint32_t[:, :, ::1] solid,
                     np.int8_t[:, :, :, ::1] rigidE,
                     np.int8_t[:, :, :, ::1] rigidH,
@@ -1009,6 +1055,8 @@ cpdef void build_voxels_from_array_mask(
         averaging (bint): Whether material property averaging will occur for the object.
         data (memoryview): Access to array containing numeric IDs of voxels to create.
         mask (memoryview): Access to array containing a mask of voxels to create.
+        xo, yo, zo (int): Cell coordinates of the origin of the solid, rigid
+                and ID arrays in the domain.
         solid, rigidE, rigidH, ID (memoryviews): Access to solid, rigid and ID arrays.
     """
 
@@ -1020,15 +1068,47 @@ cpdef void build_voxels_from_array_mask(
     yf = ys + data.shape[1]
     zf = zs + data.shape[2]
 
-    for i in range(xs, xf):
-        for j in range(ys, yf):
-            for k in range(zs, zf):
+    # Set bounds to the part of the domain held in the arrays
+    for i in range(max(xs, xo), min(xf, xo + solid.shape[0])):
+        for j in range(max(ys, yo), min(yf, yo + solid.shape[1])):
+            for k in range(max(zs, zo), min(zf, zo + solid.shape[2])):
                 if mask[i - xs, j - ys, k - zs] == 1:
                     numID = numIDx = numIDy = numIDz = data[i - xs, j - ys, k - zs]
-                    build_voxel(i, j, k, numID, numIDx, numIDy, numIDz, averaging, solid, rigidE, rigidH, ID)
+                    build_voxel(i - xo, j - yo, k - zo, numID, numIDx, numIDy, numIDz, averaging, solid, rigidE, rigidH, ID)
                 elif mask[i - xs, j - ys, k - zs] == 2:
                     numID = numIDx = numIDy = numIDz = waternumID
-                    build_voxel(i, j, k, numID, numIDx, numIDy, numIDz, averaging, solid, rigidE, rigidH, ID)
+                    build_voxel(i - xo, j - yo, k - zo, numID, numIDx, numIDy, numIDz, averaging, solid, rigidE, rigidH, ID)
                 elif mask[i - xs, j - ys, k - zs] == 3:
                     numID = numIDx = numIDy = numIDz = grassnumID
+                    build_voxel(i - xo, j - yo, k - zo, numID, numIDx, numIDy, numIDz, averaging, solid, rigidE, rigidH, ID)
+
+
+cpdef void build_voxels_from_mask(
+                    int numID,
+                    int numIDx,
+                    int numIDy,
+                    int numIDz,
+                    bint averaging,
+                    np.int8_t[:, :, ::1] mask,
+                    np.uint32_t[:, :, ::1] solid,
+                    np.int8_t[:, :, :, ::1] rigidE,
+                    np.int8_t[:, :, :, ::1] rigidH,
+                    np.uint32_t[:, :, :, ::1] ID
+            ):
+    """Builds Yee voxels of a single material from a mask of the domain, e.g.
+        for objects on a graded mesh.
+
+    Args:
+        numID, numIDx, numIDy, numIDz (int): Numeric ID of material.
+        averaging (bint): Whether material property averaging will occur for the object.
+        mask (memoryview): Access to array containing a mask of voxels to create.
+        solid, rigidE, rigidH, ID (memoryviews): Access to solid, rigid and ID arrays.
+    """
+
+    cdef Py_ssize_t i, j, k
+
+    for i in range(mask.shape[0]):
+        for j in range(mask.shape[1]):
+            for k in range(mask.shape[2]):
+                if mask[i, j, k]:
                     build_voxel(i, j, k, numID, numIDx, numIDy, numIDz, averaging, solid, rigidE, rigidH, ID)
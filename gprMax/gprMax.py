@@ -34,6 +34,7 @@ from gprMax.constants import e0
 from gprMax.constants import m0
 from gprMax.constants import z0
 from gprMax.exceptions import GeneralError
+from gprMax.model_build_run import clear_models
 from gprMax.model_build_run import run_model
 from gprMax.utilities import detect_check_gpus
 from gprMax.utilities import get_host_info
@@ -52,13 +53,27 @@ def main():
     parser.add_argument('-n', default=1, type=int, help='number of times to run the input file, e.g. to create a B-scan')
     parser.add_argument('-task', type=int, help='task identifier (model number) for job array on Open Grid Scheduler/Grid Engine (http://gridscheduler.sourceforge.net/index.html)')
     parser.add_argument('-restart', type=int, help='model number to restart from, e.g. when creating B-scan')
+    parser.add_argument('--checkpoint', type=int, help='number of iterations between checkpoints of the state of the solver, written to a file that a model can be resumed from')
+    parser.add_argument('--resume', action='store_true', default=False, help='flag to resume a model from its checkpoint file, if there is one, without building its geometry')
+    parser.add_argument('--save-state', action='store_true', default=False, help='flag to keep a checkpoint of the state of the solver at the end of the simulation, so the time window of the model can be extended')
+    parser.add_argument('--extend', type=int, help='number of iterations to extend the time window of a finished model by, continuing from the checkpoint of its state at the end of the simulation')
+    parser.add_argument('--energy-monitor', type=int, help='number of iterations between samples of the total energy of the fields, to stop a model that is unstable, i.e. whose energy is not finite or grows once the excitation of the sources has ended')
+    parser.add_argument('--energy-stop', type=float, help='fraction of the peak total energy of the fields below which a model is stopped early, once the excitation of the sources has ended (receiver outputs are zero from then on)')
     parser.add_argument('-mpi', type=int, help='number of MPI tasks, i.e. master + workers')
     parser.add_argument('--mpi-no-spawn', action='store_true', default=False, help='flag to use MPI without spawn mechanism')
     parser.add_argument('--mpi-worker', action='store_true', default=False, help=argparse.SUPPRESS)
+    parser.add_argument('--shm-slabs', type=int, help='number of worker processes to split the domain of a single model into slabs for, with field arrays in shared memory, e.g. for multi-socket machines without MPI')
+    parser.add_argument('--batch', type=int, help='number of models, e.g. traces of a B-scan, that share their geometry to advance together on CPU in a single sweep over the grid for each field update')
     parser.add_argument('-gpu', type=int, action='append', nargs='*', help='flag to use Nvidia GPU or option to give list of device ID(s)')
     parser.add_argument('-benchmark', action='store_true', default=False, help='flag to switch on benchmarking mode')
     parser.add_argument('--geometry-only', action='store_true', default=False, help='flag to only build model and produce geometry file(s)')
     parser.add_argument('--geometry-fixed', action='store_true', default=False, help='flag to not reprocess model geometry, e.g. for B-scans where the geometry is fixed')
+    parser.add_argument('--geometry-cache', nargs='?', const=True, help='flag to reuse built geometry cached in files named by a hash of the geometry commands, e.g. for B-scans and job arrays, or option to give directory of the cache files (default is the input file directory)')
+    parser.add_argument('--cpu-tiling', action='store_true', default=False, help='flag to use cache blocked (tiled) field updates on CPU with tile sizes selected by autotuning')
+    parser.add_argument('--cpu-compiled', action='store_true', default=False, help='flag to run the time stepping loop on CPU in a compiled driver without the Python interpreter lock (GIL)')
+    parser.add_argument('--cpu-pml-fused', action='store_true', default=False, help='flag to update all PML slabs on CPU in a single parallel region with work shared between slabs')
+    parser.add_argument('--cpu-wavefront', type=int, help='number of iterations per block for temporal blocking (wavefront) of the time stepping loop on CPU')
+    parser.add_argument('--mpi-domain', type=int, nargs='*', help='flag to decompose the domain of a single model across MPI ranks (run with mpirun), or option to give number of ranks in the x, y and z directions')
     parser.add_argument('--write-processed', action='store_true', default=False, help='flag to write an input file after any Python code and include commands in the original input file have been processed')
     parser.add_argument('--opt-taguchi', action='store_true', default=False, help='flag to optimise parameters using the Taguchi optimisation method')
     args = parser.parse_args()
@@ -71,13 +86,27 @@ def api(
     n=1,
     task=None,
     restart=None,
+    checkpoint=None,
+    resume=False,
+    save_state=False,
+    extend=None,
+    energy_monitor=None,
+    energy_stop=None,
     mpi=False,
     mpi_no_spawn=False,
     mpicomm=None,
+    shm_slabs=None,
+    batch=None,
     gpu=None,
     benchmark=False,
     geometry_only=False,
     geometry_fixed=False,
+    geometry_cache=None,
+    cpu_tiling=False,
+    cpu_compiled=False,
+    cpu_pml_fused=False,
+    cpu_wavefront=None,
+    mpi_domain=None,
     write_processed=False,
     opt_taguchi=False
 ):
@@ -92,13 +121,27 @@ def api(
     args.n = n
     args.task = task
     args.restart = restart
+    args.checkpoint = checkpoint
+    args.resume = resume
+    args.save_state = save_state
+    args.extend = extend
+    args.energy_monitor = energy_monitor
+    args.energy_stop = energy_stop
     args.mpi = mpi
     args.mpi_no_spawn = mpi_no_spawn
     args.mpicomm = mpicomm
+    args.shm_slabs = shm_slabs
+    args.batch = batch
     args.gpu = gpu
     args.benchmark = benchmark
     args.geometry_only = geometry_only
     args.geometry_fixed = geometry_fixed
+    args.geometry_cache = geometry_cache
+    args.cpu_tiling = cpu_tiling
+    args.cpu_compiled = cpu_compiled
+    args.cpu_pml_fused = cpu_pml_fused
+    args.cpu_wavefront = cpu_wavefront
+    args.mpi_domain = mpi_domain
     args.write_processed = write_processed
     args.opt_taguchi = opt_taguchi
 
@@ -113,6 +156,39 @@ def run_main(args):
         args (dict): Namespace with input arguments from command line or api.
     """
 
+    # Domain of a single model decomposed across MPI ranks started by mpirun
+    if args.mpi_domain is not None:
+        if args.mpi or args.mpi_no_spawn or args.benchmark or args.opt_taguchi or args.gpu is not None or args.geometry_fixed or args.cpu_compiled or args.cpu_wavefront or args.shm_slabs:
+            raise GeneralError('Domain decomposition across MPI ranks cannot be combined with MPI task farm, benchmarking, or Taguchi optimisation modes, GPU, fixed geometry, the compiled driver, temporal blocking (wavefront), or slabs in shared memory')
+        from gprMax.mpi_domain import initialise_ranks
+        initialise_ranks()
+
+    # Slabs of the domain of a single model updated by worker processes
+    if args.shm_slabs and (args.mpi or args.mpi_no_spawn or args.gpu is not None or args.cpu_compiled or args.cpu_wavefront):
+        raise GeneralError('Slabs of the domain in shared memory cannot be combined with MPI task farm, GPU, the compiled driver, or temporal blocking (wavefront)')
+
+    # Models advanced together in batches
+    if args.batch and (args.mpi or args.mpi_no_spawn or args.mpi_domain is not None or args.shm_slabs or args.gpu is not None or args.cpu_compiled or args.cpu_wavefront or args.checkpoint or args.resume or args.save_state or args.extend or args.geometry_fixed or args.benchmark or args.opt_taguchi):
+        raise GeneralError('Batches of models cannot be combined with MPI, benchmarking, or Taguchi optimisation modes, GPU, slabs in shared memory, the compiled driver, temporal blocking (wavefront), checkpoints, or fixed geometry')
+
+    # Cache of built geometry shared between models
+    if args.geometry_cache and args.mpi_domain is not None:
+        raise GeneralError('Cache of built geometry cannot be combined with domain decomposition across MPI ranks')
+
+    # Checkpoints of the state of the solver, and models resumed from them
+    if (args.checkpoint or args.resume or args.save_state or args.extend) and (args.gpu is not None or args.mpi_domain is not None or args.shm_slabs or args.cpu_compiled or args.cpu_wavefront or args.geometry_fixed or args.benchmark):
+        raise GeneralError('Checkpoints cannot be combined with benchmarking mode, GPU, domain decomposition, slabs in shared memory, the compiled driver, temporal blocking (wavefront), or fixed geometry')
+
+    # Monitor of the total energy of the fields
+    if (args.energy_monitor or args.energy_stop) and (args.gpu is not None or args.mpi_domain is not None or args.shm_slabs or args.batch or args.cpu_compiled or args.cpu_wavefront or args.benchmark):
+        raise GeneralError('Monitor of the total energy of the fields cannot be combined with benchmarking mode, GPU, domain decomposition, slabs in shared memory, batches of models, the compiled driver, or temporal blocking (wavefront)')
+    if args.energy_stop and (args.save_state or args.extend):
+        raise GeneralError('Models stopped early once the total energy of the fields has decayed cannot keep a checkpoint of the state at the end of the simulation')
+
+    # Models of a previous simulation in this process, e.g. one that was
+    # interrupted, are not reused
+    clear_models()
+
     # Print gprMax logo, version, and licencing/copyright information
     logo(__version__ + ' (' + codename + ')')
 
@@ -382,6 +458,8 @@ def run_mpi_sim(args, inputfile, usernamespace, optparams=None):
                 elif '_' in key:
                     key = key.replace('_', '-')
                     myargv.append('--' + key)
+                    if value is not True:
+                        myargv.append(str(value))
                 else:
                     myargv.append('-' + key)
                     if value is not True:
@@ -28,6 +28,7 @@ np.seterr(invalid='raise')
 from gprMax.constants import c
 from gprMax.constants import floattype
 from gprMax.constants import complextype
+from gprMax.constants import idtypes
 from gprMax.exceptions import GeneralError
 from gprMax.materials import Material
 from gprMax.pml import PML
@@ -98,6 +99,60 @@ class FDTDGrid(Grid):
         # CPU - OpenMP threads
         self.nthreads = 0
 
+        # CPU - cache blocking (tiling) of field updates, and tile size (x, y)
+        # in cells (selected by autotuning at the start of the simulation)
+        self.tiling = False
+        self.tiles = None
+
+        # CPU - temporal blocking (wavefront) of time stepping loop, i.e.
+        # number of iterations advanced per block (None for no blocking)
+        self.wavefront = None
+
+        # CPU - compiled (nogil) driver for time stepping loop
+        self.compiled = False
+
+        # CPU - checkpoints of the state of the solver, and the model resumed
+        # from them (see Checkpoint), None if checkpoints are not used
+        self.checkpoint = None
+
+        # CPU - monitor of the total energy of the fields, which stops the
+        # model if it is unstable or once the energy has decayed (see
+        # EnergyMonitor), None if the energy is not monitored
+        self.energymonitor = None
+
+        # Hash of the commands the geometry is built from (see geometry_hash),
+        # None if the geometry is random or can not be reused
+        self.geometryhash = None
+
+        # Cache of built geometry shared between models (see GeometryCache),
+        # None if the geometry is not cached
+        self.geometrycache = None
+
+        # CPU - number of worker processes updating slabs of the domain with
+        # field arrays in shared memory (None for a single process)
+        self.shmslabs = None
+
+        # CPU - fused update of all PML slabs in a single parallel region
+        self.pmlfused = False
+
+        # CPU - runs of cells in the z direction that share a single material,
+        # i.e. indices of runs for each component and column of cells, and runs
+        # (3D only). Update coefficients are loaded once per homogeneous run.
+        self.materialruns = None
+
+        # CPU - flat indices of cells of each electric field component that
+        # are in dispersive materials, if temporary dispersive arrays are only
+        # stored for these cells (None if they are stored for every cell)
+        self.dispersivecells = None
+
+        # CPU - data type of dispersive coefficient and temporary arrays, i.e.
+        # real (floattype) if all poles are real, otherwise complex (complextype)
+        self.dispersivetype = complextype
+
+        # CPU - decomposition of the domain across MPI ranks (see MPIDomain),
+        # None if the model is run by a single process
+        self.domain = None
+
         # GPU
         # Threads per block - electric and magnetic field updates
         self.tpb = (256, 1, 1)
@@ -125,6 +180,16 @@ class FDTDGrid(Grid):
         self.dy = 0
         self.dz = 0
         self.dt = 0
+
+        # Graded mesh - spacing of the cells along each axis (None for an
+        # axis with a uniform spacing), and ratios of dx, dy and dz (the
+        # smallest spacings) to the spacings at the electric and magnetic
+        # field components (None if every axis has a uniform spacing)
+        self.xspacing = None
+        self.yspacing = None
+        self.zspacing = None
+        self.grading = None
+
         self.mode = None
         self.iterations = 0
         self.timewindow = 0
@@ -139,6 +204,9 @@ class FDTDGrid(Grid):
         self.pmlformulation = 'HORIPML'
 
         self.materials = []
+        # Numeric IDs of materials created by dielectric smoothing, keyed by
+        # the sorted numeric IDs of the materials they are averaged from
+        self.averagedmaterials = {}
         self.mixingmodels = []
         self.averagevolumeobjects = True
         self.fractalvolumes = []
@@ -150,9 +218,132 @@ class FDTDGrid(Grid):
         self.magneticdipoles = []
         self.transmissionlines = []
         self.rxs = []
+        # Indices in the input file of the #rx and #rx_array commands of the
+        # grid, if commands were moved to subgrids
+        self.rxcmdorder = {}
         self.srcsteps = [0, 0, 0]
         self.rxsteps = [0, 0, 0]
         self.snapshots = []
+        self.subgrids = []
+
+    def calculate_coord(self, coord, val):
+        """Index of the node nearest a coordinate (metres), which can be
+            outside the domain.
+        """
+
+        spacing = getattr(self, coord + 'spacing')
+        if spacing is None:
+            return super(FDTDGrid, self).calculate_coord(coord, val)
+
+        val = float(val)
+        nodes = self.nodes(coord)
+        if val < 0:
+            return round_value(val / spacing[0])
+        elif val > nodes[-1]:
+            return len(spacing) + round_value((val - nodes[-1]) / spacing[-1])
+        # Nearest node (half values are rounded downwards, see round_value)
+        co = int(np.searchsorted(nodes, val))
+        if co > 0 and val - nodes[co - 1] <= nodes[co] - val:
+            co -= 1
+
+        return co
+
+    def calculate_position(self, coord, co):
+        """Coordinate (metres) of a node, which can be outside the domain."""
+
+        spacing = getattr(self, coord + 'spacing')
+        if spacing is None:
+            return co * getattr(self, 'd' + coord)
+
+        if co < 0:
+            return float(co * spacing[0])
+        elif co > len(spacing):
+            return float(self.nodes(coord)[-1] + (co - len(spacing)) * spacing[-1])
+
+        return float(self.nodes(coord)[co])
+
+    def position(self, obj):
+        """Position of a source or receiver (metres)."""
+
+        return (self.calculate_position('x', obj.xcoord), self.calculate_position('y', obj.ycoord), self.calculate_position('z', obj.zcoord))
+
+    def nodes(self, coord):
+        """Coordinates (metres) of the nodes along an axis of a graded mesh."""
+
+        return np.concatenate(([0], np.cumsum(getattr(self, coord + 'spacing'))))
+
+    def cell_centres(self, coord):
+        """Coordinates (metres) of the centres of the cells along an axis."""
+
+        spacing = getattr(self, coord + 'spacing')
+        if spacing is None:
+            return (np.arange(getattr(self, 'n' + coord)) + 0.5) * getattr(self, 'd' + coord)
+
+        return self.nodes(coord)[:-1] + 0.5 * spacing
+
+    def dual_spacing(self, coord):
+        """Spacing (metres) between the centres of the cells either side of
+            each node along an axis of a graded mesh, i.e. of the dual grid.
+            The spacing of the cell next to the node is used at the edges of
+            the domain.
+        """
+
+        spacing = getattr(self, coord + 'spacing')
+
+        return np.concatenate((spacing[:1], 0.5 * (spacing[:-1] + spacing[1:]), spacing[-1:]))
+
+    def cell_size(self, component, i, j, k):
+        """Dimensions of the cell of a field component, i.e. the length of
+            the edge of the field component, and the spacing of the dual grid
+            normal to it (electric), or vice versa (magnetic).
+
+        Args:
+            component (str): Field component, e.g. 'Ex' or 'Hz'.
+            i, j, k (int): Cell coordinates of the field component.
+
+        Returns:
+            (tuple): Dimensions of the cell along each axis (metres).
+        """
+
+        if self.grading is None:
+            return (self.dx, self.dy, self.dz)
+
+        size = []
+        for coord, index in zip('xyz', (i, j, k)):
+            if getattr(self, coord + 'spacing') is None:
+                size.append(getattr(self, 'd' + coord))
+            # Edges of electric field components are along the primary grid,
+            # and edges of magnetic field components along the dual grid
+            elif (coord == component[1]) == (component[0] == 'E'):
+                size.append(float(getattr(self, coord + 'spacing')[min(index, getattr(self, 'n' + coord) - 1)]))
+            else:
+                size.append(float(self.dual_spacing(coord)[index]))
+
+        return tuple(size)
+
+    def initialise_grading(self):
+        """Set the smallest spacing along each axis of a graded mesh as dx,
+            dy or dz, i.e. the spacing the update coefficients of materials
+            are calculated with, and the ratios of these to the spacings at
+            the field components, which scale the spatial derivatives in the
+            electric and magnetic field updates.
+        """
+
+        gradingE = []
+        gradingH = []
+        for coord in 'xyz':
+            spacing = getattr(self, coord + 'spacing')
+            n = getattr(self, 'n' + coord)
+            if spacing is None:
+                gradingE.append(np.ones(n + 1, dtype=floattype))
+                gradingH.append(np.ones(n + 1, dtype=floattype))
+            else:
+                setattr(self, 'd' + coord, float(spacing.min()))
+                d = getattr(self, 'd' + coord)
+                gradingE.append((d / self.dual_spacing(coord)).astype(floattype))
+                gradingH.append((d / np.append(spacing, spacing[-1])).astype(floattype))
+
+        self.grading = tuple(gradingE + gradingH)
 
     def initialise_geometry_arrays(self):
         """
@@ -162,20 +353,57 @@ class FDTDGrid(Grid):
         Solid and ID arrays are initialised to free_space (one);
             rigid arrays to allow dielectric smoothing (zero).
         """
-        self.solid = np.ones((self.nx, self.ny, self.nz), dtype=np.uint32)
-        self.rigidE = np.zeros((12, self.nx, self.ny, self.nz), dtype=np.int8)
-        self.rigidH = np.zeros((6, self.nx, self.ny, self.nz), dtype=np.int8)
-        self.ID = np.ones((6, self.nx + 1, self.ny + 1, self.nz + 1), dtype=np.uint32)
+        # Arrays only hold the subdomain of the rank for a domain decomposed
+        # across MPI ranks
+        nx, ny, nz = self.domain.shape if self.domain else (self.nx, self.ny, self.nz)
+        self.solid = np.ones((nx, ny, nz), dtype=np.uint32)
+        self.rigidE = np.zeros((12, nx, ny, nz), dtype=np.int8)
+        self.rigidH = np.zeros((6, nx, ny, nz), dtype=np.int8)
+        self.ID = np.ones((6, nx + 1, ny + 1, nz + 1), dtype=np.uint32)
         self.IDlookup = {'Ex': 0, 'Ey': 1, 'Ez': 2, 'Hx': 3, 'Hy': 4, 'Hz': 5}
 
     def initialise_field_arrays(self):
         """Initialise arrays for the electric and magnetic field components."""
-        self.Ex = np.zeros((self.nx + 1, self.ny + 1, self.nz + 1), dtype=floattype)
-        self.Ey = np.zeros((self.nx + 1, self.ny + 1, self.nz + 1), dtype=floattype)
-        self.Ez = np.zeros((self.nx + 1, self.ny + 1, self.nz + 1), dtype=floattype)
-        self.Hx = np.zeros((self.nx + 1, self.ny + 1, self.nz + 1), dtype=floattype)
-        self.Hy = np.zeros((self.nx + 1, self.ny + 1, self.nz + 1), dtype=floattype)
-        self.Hz = np.zeros((self.nx + 1, self.ny + 1, self.nz + 1), dtype=floattype)
+        nx, ny, nz = self.domain.shape if self.domain else (self.nx, self.ny, self.nz)
+
+        # 2D models only store the field components that are live in the plane
+        # of the model (see FDTDPlane), with a single cell in the invariant
+        # direction, and the other components share an array of zeros
+        if '2D' in self.mode:
+            shape = [nx + 1, ny + 1, nz + 1]
+            shape[FDTDPlane.modes[self.mode][0]] = 1
+            zeros = np.zeros(shape, dtype=floattype)
+            live = FDTDPlane.live_components(self)
+            for component in self.IDlookup:
+                setattr(self, component, np.zeros(shape, dtype=floattype) if component in live else zeros)
+            return
+
+        self.Ex = np.zeros((nx + 1, ny + 1, nz + 1), dtype=floattype)
+        self.Ey = np.zeros((nx + 1, ny + 1, nz + 1), dtype=floattype)
+        self.Ez = np.zeros((nx + 1, ny + 1, nz + 1), dtype=floattype)
+        self.Hx = np.zeros((nx + 1, ny + 1, nz + 1), dtype=floattype)
+        self.Hy = np.zeros((nx + 1, ny + 1, nz + 1), dtype=floattype)
+        self.Hz = np.zeros((nx + 1, ny + 1, nz + 1), dtype=floattype)
+
+    def narrow_geometry_arrays(self):
+        """
+        Convert the solid and ID arrays to the narrowest unsigned integer type
+            (8, 16 or 32-bit) that can store the numeric IDs of all materials.
+            Must be called once all materials, including any created by
+            dielectric smoothing, are known.
+
+        Returns:
+            saving (int): Reduction in memory (RAM) usage (bytes).
+        """
+
+        idtype = next(dtype for dtype in idtypes if len(self.materials) - 1 <= np.iinfo(dtype).max)
+        saving = 0
+        if self.ID.dtype != idtype:
+            saving = (self.solid.size + self.ID.size) * (self.ID.itemsize - np.dtype(idtype).itemsize)
+            self.solid = self.solid.astype(idtype)
+            self.ID = self.ID.astype(idtype)
+
+        return saving
 
     def initialise_std_update_coeff_arrays(self):
         """Initialise arrays for storing update coefficients."""
@@ -184,46 +412,84 @@ class FDTDGrid(Grid):
 
     def initialise_dispersive_arrays(self):
         """Initialise arrays for storing coefficients when there are dispersive materials present."""
-        self.Tx = np.zeros((Material.maxpoles, self.nx + 1, self.ny + 1, self.nz + 1), dtype=complextype)
-        self.Ty = np.zeros((Material.maxpoles, self.nx + 1, self.ny + 1, self.nz + 1), dtype=complextype)
-        self.Tz = np.zeros((Material.maxpoles, self.nx + 1, self.ny + 1, self.nz + 1), dtype=complextype)
-        self.updatecoeffsdispersive = np.zeros((len(self.materials), 3 * Material.maxpoles), dtype=complextype)
+        if self.dispersivecells is None:
+            self.Tx = np.zeros((Material.maxpoles, self.nx + 1, self.ny + 1, self.nz + 1), dtype=self.dispersivetype)
+            self.Ty = np.zeros((Material.maxpoles, self.nx + 1, self.ny + 1, self.nz + 1), dtype=self.dispersivetype)
+            self.Tz = np.zeros((Material.maxpoles, self.nx + 1, self.ny + 1, self.nz + 1), dtype=self.dispersivetype)
+        else:
+            self.Tx, self.Ty, self.Tz = (np.zeros((Material.maxpoles, cells.size), dtype=self.dispersivetype) for cells in self.dispersivecells)
+        self.updatecoeffsdispersive = np.zeros((len(self.materials), 3 * Material.maxpoles), dtype=self.dispersivetype)
+
+    def find_dispersive_cells(self):
+        """Find the cells of each electric field component that are in
+            dispersive materials, and use them to store temporary dispersive
+            arrays if this requires less memory than storing them for every cell.
+        """
+
+        dispersive = np.zeros(len(self.materials), dtype=bool)
+        for material in self.materials:
+            dispersive[material.numID] = material.poles > 0
+
+        # Cells of each component that are updated (see update_electric)
+        cells = []
+        for component, (xs, ys, zs) in enumerate(((0, 1, 1), (1, 0, 1), (1, 1, 0))):
+            mask = np.zeros((self.nx + 1, self.ny + 1, self.nz + 1), dtype=bool)
+            mask[xs:self.nx, ys:self.ny, zs:self.nz] = dispersive[self.ID[component, xs:self.nx, ys:self.ny, zs:self.nz]]
+            cells.append(np.flatnonzero(mask))
+
+        self.dispersivecells = None
+        dense = self.memory_estimate_dispersive()
+        self.dispersivecells = cells
+        # 2D models always store them only for dispersive cells (see
+        # solve_cpu_2d), as do graded meshes (see update_electric_graded)
+        if self.memory_estimate_dispersive() >= dense and '2D' not in self.mode and self.grading is None:
+            self.dispersivecells = None
 
     def memory_estimate_basic(self):
         """Estimate the amount of memory (RAM) required to run a model."""
 
         stdoverhead = 50e6
 
-        solidarray = self.nx * self.ny * self.nz * np.dtype(np.uint32).itemsize
+        # Subdomain of the rank for a domain decomposed across MPI ranks
+        nx, ny, nz = self.domain.shape if self.domain else (self.nx, self.ny, self.nz)
+
+        solidarray = nx * ny * nz * np.dtype(np.uint32).itemsize
 
         # 12 x rigidE array components + 6 x rigidH array components
-        rigidarrays = (12 + 6) * self.nx * self.ny * self.nz * np.dtype(np.int8).itemsize
+        rigidarrays = (12 + 6) * nx * ny * nz * np.dtype(np.int8).itemsize
 
-        # 6 x field arrays + 6 x ID arrays
-        fieldarrays = (6 + 6) * (self.nx + 1) * (self.ny + 1) * (self.nz + 1) * np.dtype(floattype).itemsize
+        # 6 x field arrays + 6 x ID arrays, where 2D models only store the
+        # field components that are live in the plane of the model, and an
+        # array of zeros, with a single cell in the invariant direction
+        nodes = (nx + 1) * (ny + 1) * (nz + 1)
+        if '2D' in self.mode:
+            fieldarrays = (len(FDTDPlane.live_components(self)) + 1) * (nodes // 2) * np.dtype(floattype).itemsize + 6 * nodes * np.dtype(floattype).itemsize
+        else:
+            fieldarrays = (6 + 6) * nodes * np.dtype(floattype).itemsize
 
         # PML arrays
+        invariant = FDTDPlane.modes[self.mode][0] if '2D' in self.mode else None
         pmlarrays = 0
         for (k, v) in self.pmlthickness.items():
             if v > 0:
-                if 'x' in k:
-                    pmlarrays += ((v + 1) * self.ny * (self.nz + 1))
-                    pmlarrays += ((v + 1) * (self.ny + 1) * self.nz)
-                    pmlarrays += (v * self.ny * (self.nz + 1))
-                    pmlarrays += (v * (self.ny + 1) * self.nz)
-                elif 'y' in k:
-                    pmlarrays += (self.nx * (v + 1) * (self.nz + 1))
-                    pmlarrays += ((self.nx + 1) * (v + 1) * self.nz)
-                    pmlarrays += ((self.nx + 1) * v * self.nz)
-                    pmlarrays += (self.nx * v * (self.nz + 1))
-                elif 'z' in k:
-                    pmlarrays += (self.nx * (self.ny + 1) * (v + 1))
-                    pmlarrays += ((self.nx + 1) * self.ny * (v + 1))
-                    pmlarrays += ((self.nx + 1) * self.ny * v)
-                    pmlarrays += (self.nx * (self.ny + 1) * v)
+                shape = [v if axis == k[0] else n for axis, n in zip('xyz', (nx, ny, nz))]
+                pmlarrays += sum(int(np.prod(arrayshape)) for arrayshape in PML.field_array_shapes(k[0], *shape, invariant=invariant))
 
         self.memoryusage = int(stdoverhead + fieldarrays + solidarray + rigidarrays + pmlarrays)
 
+    def memory_estimate_dispersive(self):
+        """Estimate the amount of memory (RAM) required for temporary dispersive arrays.
+
+        Returns:
+            (int): Memory (bytes).
+        """
+
+        if self.dispersivecells is None:
+            return int(3 * Material.maxpoles * (self.nx + 1) * (self.ny + 1) * (self.nz + 1) * np.dtype(self.dispersivetype).itemsize)
+        else:
+            # Temporary arrays, flat indices of cells, and dispersive terms of electric field updates
+            return int(sum(cells.size for cells in self.dispersivecells) * (Material.maxpoles * np.dtype(self.dispersivetype).itemsize + np.dtype(np.int64).itemsize + np.dtype(np.float32).itemsize))
+
     def memory_check(self, snapsmemsize=0):
         """Check if the required amount of memory (RAM) is available on the host and GPU if specified.
 
@@ -272,6 +538,95 @@ class FDTDGrid(Grid):
         self.updatecoeffsdispersive_gpu = gpuarray.to_gpu(self.updatecoeffsdispersive)
 
 
+class FDTDPlane(object):
+    """
+    Field arrays of a 2D (TMx, TMy or TMz) model. 2D models are a single cell
+    slice of the 3D grid, so the grid only stores the field components that
+    are live in the plane of the model (the first cell in the invariant
+    direction), see FDTDGrid.initialise_field_arrays. The plane gives 2D
+    views of these arrays, together with the IDs of their materials, for the
+    field updates.
+    """
+
+    # Invariant direction, and live electric and magnetic field components, of 2D modes
+    modes = {'2D TMx': (0, 'Ex', ('Hy', 'Hz')),
+             '2D TMy': (1, 'Ey', ('Hx', 'Hz')),
+             '2D TMz': (2, 'Ez', ('Hx', 'Hy'))}
+
+    @staticmethod
+    def live_components(G):
+        """Gets the field components that are stored for a 2D model. The
+            magnetic field component normal to the plane is not coupled to
+            the live components, but magnetic dipoles are polarised along it,
+            so it is stored if there are any magnetic dipoles.
+
+        Args:
+            G (class): Grid class instance - holds essential parameters describing the model.
+
+        Returns:
+            components (list): Names of field components.
+        """
+
+        axis, Ecomponent, Hcomponents = FDTDPlane.modes[G.mode]
+        components = [Ecomponent] + list(Hcomponents)
+        if G.magneticdipoles:
+            components.append('H' + 'xyz'[axis])
+
+        return components
+
+    def __init__(self, G):
+        """
+        Args:
+            G (class): Grid class instance - holds essential parameters describing the model.
+        """
+
+        self.axis, self.Ecomponent, self.Hcomponents = self.modes[G.mode]
+
+        # Axes of the grid in the plane, size of the plane in cells, and
+        # index of the plane in arrays of the grid
+        self.axes = tuple(axis for axis in range(3) if axis != self.axis)
+        self.n = tuple((G.nx, G.ny, G.nz)[axis] for axis in self.axes)
+        self.plane = tuple(0 if axis == self.axis else slice(None) for axis in range(3))
+
+        # Field arrays of the grid, i.e. with a single cell in the invariant
+        # direction, for sources and receivers
+        self.fields = OrderedDict((component, getattr(G, component)) for component in G.IDlookup)
+
+        # Electric field component (normal to the plane), magnetic field
+        # components (in the plane, in order of axes), and IDs of their materials
+        self.E = self.fields[self.Ecomponent][self.plane]
+        self.H = [self.fields[component][self.plane] for component in self.Hcomponents]
+        self.ID = np.stack([G.ID[(G.IDlookup[component],) + self.plane] for component in (self.Ecomponent,) + self.Hcomponents])
+
+    def in_plane(self, obj):
+        """Checks if a source or receiver is in the plane of the model.
+
+        Args:
+            obj (class): Source or receiver.
+
+        Returns:
+            (bool): Source or receiver is in the plane of the model.
+        """
+
+        return (obj.xcoord, obj.ycoord, obj.zcoord)[self.axis] == 0
+
+    def flat_indices(self, indices, G):
+        """Converts flat indices of cells in field arrays of the grid to flat
+            indices of the same cells in field arrays of the plane.
+
+        Args:
+            indices (int): numpy array of flat indices in field arrays of the grid.
+            G (class): Grid class instance - holds essential parameters describing the model.
+
+        Returns:
+            (int): numpy array of flat indices in field arrays of the plane.
+        """
+
+        coords = np.unravel_index(indices, (G.nx + 1, G.ny + 1, G.nz + 1))
+
+        return np.ravel_multi_index([coords[axis] for axis in self.axes], self.E.shape).astype(np.int64)
+
+
 def dispersion_analysis(G):
     """
     Analysis of numerical dispersion (Taflove et al, 2005, p112) -
@@ -365,7 +720,9 @@ def dispersion_analysis(G):
         minwavelength = minvelocity / results['maxfreq']
 
         # Maximum spatial step
-        if '3D' in G.mode:
+        if G.grading is not None:
+            delta = max(getattr(G, 'd' + coord) if getattr(G, coord + 'spacing') is None else getattr(G, coord + 'spacing').max() for coord in 'xyz')
+        elif '3D' in G.mode:
             delta = max(G.dx, G.dy, G.dz)
         elif '2D' in G.mode:
             if G.nx == 1:
@@ -423,7 +780,8 @@ def Ix(x, y, z, Hx, Hy, Hz, G):
         Ix = 0
 
     else:
-        Ix = G.dy * (Hy[x, y, z - 1] - Hy[x, y, z]) + G.dz * (Hz[x, y, z] - Hz[x, y - 1, z])
+        dx, dy, dz = G.cell_size('Ex', x, y, z)
+        Ix = dy * (Hy[x, y, z - 1] - Hy[x, y, z]) + dz * (Hz[x, y, z] - Hz[x, y - 1, z])
 
     return Ix
 
@@ -441,7 +799,8 @@ def Iy(x, y, z, Hx, Hy, Hz, G):
         Iy = 0
 
     else:
-        Iy = G.dx * (Hx[x, y, z] - Hx[x, y, z - 1]) + G.dz * (Hz[x - 1, y, z] - Hz[x, y, z])
+        dx, dy, dz = G.cell_size('Ey', x, y, z)
+        Iy = dx * (Hx[x, y, z] - Hx[x, y, z - 1]) + dz * (Hz[x - 1, y, z] - Hz[x, y, z])
 
     return Iy
 
@@ -459,6 +818,7 @@ def Iz(x, y, z, Hx, Hy, Hz, G):
         Iz = 0
 
     else:
-        Iz = G.dx * (Hx[x, y - 1, z] - Hx[x, y, z]) + G.dy * (Hy[x, y, z] - Hy[x - 1, y, z])
+        dx, dy, dz = G.cell_size('Ez', x, y, z)
+        Iz = dx * (Hx[x, y - 1, z] - Hx[x, y, z]) + dy * (Hy[x, y, z] - Hy[x - 1, y, z])
 
     return Iz
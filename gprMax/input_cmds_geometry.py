@@ -16,6 +16,7 @@
 # You should have received a copy of the GNU General Public License
 # along with gprMax.  If not, see <http://www.gnu.org/licenses/>.
 
+from itertools import product
 import os
 import sys
 
@@ -43,11 +44,67 @@ from gprMax.geometry_primitives_ext import build_cylindrical_sector
 from gprMax.geometry_primitives_ext import build_sphere
 from gprMax.geometry_primitives_ext import build_voxels_from_array
 from gprMax.geometry_primitives_ext import build_voxels_from_array_mask
+from gprMax.geometry_primitives_ext import build_voxels_from_mask
 from gprMax.materials import Material
 from gprMax.utilities import round_value
 from gprMax.utilities import get_terminal_width
 
 
+def array_origin(G):
+    """Cell coordinates in the domain of the origin of the solid, rigid and ID
+        arrays, which only hold the subdomain of a rank when the model is
+        decomposed across MPI ranks.
+
+    Args:
+        G (class): Grid class instance - holds essential parameters describing the model.
+
+    Returns:
+        (tuple): Cell coordinates of the origin of the arrays.
+    """
+
+    return G.domain.origin if G.domain else (0, 0, 0)
+
+
+def array_cells(G, xs, xf, ys, yf, zs, zf):
+    """Array indices of the cells of a region of the domain that are held in
+        the solid, rigid and ID arrays.
+
+    Args:
+        G (class): Grid class instance - holds essential parameters describing the model.
+        xs, xf, ys, yf, zs, zf (int): Cell coordinates of the region, upper
+                coordinates exclusive.
+
+    Returns:
+        (iterator): Array indices (i, j, k) of the cells.
+    """
+
+    return product(*(range(max(s, o) - o, min(f, o + n) - o) for s, f, o, n in zip((xs, ys, zs), (xf, yf, zf), array_origin(G), G.solid.shape)))
+
+
+def array_slices(G, start, shape, arrayshape):
+    """Slices of an array to be inserted in the domain, and of the solid, rigid
+        or ID array it is inserted into, for the part held in the array.
+
+    Args:
+        G (class): Grid class instance - holds essential parameters describing the model.
+        start (tuple): Cell coordinates of the position of the array in the domain.
+        shape, arrayshape (tuple): Spatial shapes of the array to be
+                inserted and of the array it is inserted into.
+
+    Returns:
+        local, data (tuple): Slices of the array inserted into and of the array inserted.
+    """
+
+    local, data = [], []
+    for s, n, o, m in zip(start, shape, array_origin(G), arrayshape):
+        lo = max(s, o)
+        hi = max(min(s + n, o + m), lo)
+        local.append(slice(lo - o, hi - o))
+        data.append(slice(lo - s, hi - s))
+
+    return tuple(local), tuple(data)
+
+
 def process_geometrycmds(geometry, G):
     """
     This function checks the validity of command parameters, creates instances
@@ -69,12 +126,14 @@ def process_geometrycmds(geometry, G):
         tmp = object.split()
 
         if tmp[0] == '#geometry_objects_read:':
+            if G.grading is not None:
+                raise CmdInputError("'" + ' '.join(tmp) + "'" + ' can not be used with a graded mesh')
             if len(tmp) != 6:
                 raise CmdInputError("'" + ' '.join(tmp) + "'" + ' requires exactly five parameters')
 
-            xs = round_value(float(tmp[1]) / G.dx)
-            ys = round_value(float(tmp[2]) / G.dy)
-            zs = round_value(float(tmp[3]) / G.dz)
+            xs = G.calculate_coord('x', tmp[1])
+            ys = G.calculate_coord('y', tmp[2])
+            zs = G.calculate_coord('z', tmp[3])
             geofile = tmp[4]
             matfile = tmp[5]
 
@@ -131,41 +190,45 @@ def process_geometrycmds(geometry, G):
                 rigidE = f['/rigidE'][:]
                 rigidH = f['/rigidH'][:]
                 ID = f['/ID'][:]
-                G.solid[xs:xs + data.shape[0], ys:ys + data.shape[1], zs:zs + data.shape[2]] = data + numexistmaterials
-                G.rigidE[:, xs:xs + rigidE.shape[1], ys:ys + rigidE.shape[2], zs:zs + rigidE.shape[3]] = rigidE
-                G.rigidH[:, xs:xs + rigidH.shape[1], ys:ys + rigidH.shape[2], zs:zs + rigidH.shape[3]] = rigidH
-                G.ID[:, xs:xs + ID.shape[1], ys:ys + ID.shape[2], zs:zs + ID.shape[3]] = ID + numexistmaterials
+                local, part = array_slices(G, (xs, ys, zs), data.shape, G.solid.shape)
+                G.solid[local] = data[part] + numexistmaterials
+                local, part = array_slices(G, (xs, ys, zs), rigidE.shape[1:], G.rigidE.shape[1:])
+                G.rigidE[(slice(None),) + local] = rigidE[(slice(None),) + part]
+                local, part = array_slices(G, (xs, ys, zs), rigidH.shape[1:], G.rigidH.shape[1:])
+                G.rigidH[(slice(None),) + local] = rigidH[(slice(None),) + part]
+                local, part = array_slices(G, (xs, ys, zs), ID.shape[1:], G.ID.shape[1:])
+                G.ID[(slice(None),) + local] = ID[(slice(None),) + part] + numexistmaterials
                 if G.messages:
-                    tqdm.write('Geometry objects from file {} inserted at {:g}m, {:g}m, {:g}m, with corresponding materials file {}.'.format(geofile, xs * G.dx, ys * G.dy, zs * G.dz, matfile))
+                    tqdm.write('Geometry objects from file {} inserted at {:g}m, {:g}m, {:g}m, with corresponding materials file {}.'.format(geofile, G.calculate_position('x', xs), G.calculate_position('y', ys), G.calculate_position('z', zs), matfile))
             except KeyError:
                 averaging = False
-                build_voxels_from_array(xs, ys, zs, numexistmaterials, averaging, data, G.solid, G.rigidE, G.rigidH, G.ID)
+                build_voxels_from_array(xs, ys, zs, numexistmaterials, averaging, data, *array_origin(G), G.solid, G.rigidE, G.rigidH, G.ID)
                 if G.messages:
-                    tqdm.write('Geometry objects from file (voxels only) {} inserted at {:g}m, {:g}m, {:g}m, with corresponding materials file {}.'.format(geofile, xs * G.dx, ys * G.dy, zs * G.dz, matfile))
+                    tqdm.write('Geometry objects from file (voxels only) {} inserted at {:g}m, {:g}m, {:g}m, with corresponding materials file {}.'.format(geofile, G.calculate_position('x', xs), G.calculate_position('y', ys), G.calculate_position('z', zs), matfile))
 
         elif tmp[0] == '#edge:':
             if len(tmp) != 8:
                 raise CmdInputError("'" + ' '.join(tmp) + "'" + ' requires exactly seven parameters')
 
-            xs = round_value(float(tmp[1]) / G.dx)
-            xf = round_value(float(tmp[4]) / G.dx)
-            ys = round_value(float(tmp[2]) / G.dy)
-            yf = round_value(float(tmp[5]) / G.dy)
-            zs = round_value(float(tmp[3]) / G.dz)
-            zf = round_value(float(tmp[6]) / G.dz)
+            xs = G.calculate_coord('x', tmp[1])
+            xf = G.calculate_coord('x', tmp[4])
+            ys = G.calculate_coord('y', tmp[2])
+            yf = G.calculate_coord('y', tmp[5])
+            zs = G.calculate_coord('z', tmp[3])
+            zf = G.calculate_coord('z', tmp[6])
 
             if xs < 0 or xs > G.nx:
-                raise CmdInputError("'" + ' '.join(tmp) + "'" + ' the lower x-coordinate {:g}m is not within the model domain'.format(xs * G.dx))
+                raise CmdInputError("'" + ' '.join(tmp) + "'" + ' the lower x-coordinate {:g}m is not within the model domain'.format(G.calculate_position('x', xs)))
             if xf < 0 or xf > G.nx:
-                raise CmdInputError("'" + ' '.join(tmp) + "'" + ' the upper x-coordinate {:g}m is not within the model domain'.format(xf * G.dx))
+                raise CmdInputError("'" + ' '.join(tmp) + "'" + ' the upper x-coordinate {:g}m is not within the model domain'.format(G.calculate_position('x', xf)))
             if ys < 0 or ys > G.ny:
-                raise CmdInputError("'" + ' '.join(tmp) + "'" + ' the lower y-coordinate {:g}m is not within the model domain'.format(ys * G.dy))
+                raise CmdInputError("'" + ' '.join(tmp) + "'" + ' the lower y-coordinate {:g}m is not within the model domain'.format(G.calculate_position('y', ys)))
             if yf < 0 or yf > G.ny:
-                raise CmdInputError("'" + ' '.join(tmp) + "'" + ' the upper y-coordinate {:g}m is not within the model domain'.format(yf * G.dy))
+                raise CmdInputError("'" + ' '.join(tmp) + "'" + ' the upper y-coordinate {:g}m is not within the model domain'.format(G.calculate_position('y', yf)))
             if zs < 0 or zs > G.nz:
-                raise CmdInputError("'" + ' '.join(tmp) + "'" + ' the lower z-coordinate {:g}m is not within the model domain'.format(zs * G.dz))
+                raise CmdInputError("'" + ' '.join(tmp) + "'" + ' the lower z-coordinate {:g}m is not within the model domain'.format(G.calculate_position('z', zs)))
             if zf < 0 or zf > G.nz:
-                raise CmdInputError("'" + ' '.join(tmp) + "'" + ' the upper z-coordinate {:g}m is not within the model domain'.format(zf * G.dz))
+                raise CmdInputError("'" + ' '.join(tmp) + "'" + ' the upper z-coordinate {:g}m is not within the model domain'.format(G.calculate_position('z', zf)))
             if xs > xf or ys > yf or zs > zf:
                 raise CmdInputError("'" + ' '.join(tmp) + "'" + ' the lower coordinates should be less than the upper coordinates')
 
@@ -180,27 +243,27 @@ def process_geometrycmds(geometry, G):
                 if ys != yf or zs != zf:
                     raise CmdInputError("'" + ' '.join(tmp) + "'" + ' the edge is not specified correctly')
                 else:
-                    for i in range(xs, xf):
-                        build_edge_x(i, ys, zs, material.numID, G.rigidE, G.rigidH, G.ID)
+                    for i, j, k in array_cells(G, xs, xf, ys, ys + 1, zs, zs + 1):
+                        build_edge_x(i, j, k, material.numID, G.rigidE, G.rigidH, G.ID)
 
             # y-orientated wire
             elif ys != yf:
                 if xs != xf or zs != zf:
                     raise CmdInputError("'" + ' '.join(tmp) + "'" + ' the edge is not specified correctly')
                 else:
-                    for j in range(ys, yf):
-                        build_edge_y(xs, j, zs, material.numID, G.rigidE, G.rigidH, G.ID)
+                    for i, j, k in array_cells(G, xs, xs + 1, ys, yf, zs, zs + 1):
+                        build_edge_y(i, j, k, material.numID, G.rigidE, G.rigidH, G.ID)
 
             # z-orientated wire
             elif zs != zf:
                 if xs != xf or ys != yf:
                     raise CmdInputError("'" + ' '.join(tmp) + "'" + ' the edge is not specified correctly')
                 else:
-                    for k in range(zs, zf):
-                        build_edge_z(xs, ys, k, material.numID, G.rigidE, G.rigidH, G.ID)
+                    for i, j, k in array_cells(G, xs, xs + 1, ys, ys + 1, zs, zf):
+                        build_edge_z(i, j, k, material.numID, G.rigidE, G.rigidH, G.ID)
 
             if G.messages:
-                tqdm.write('Edge from {:g}m, {:g}m, {:g}m, to {:g}m, {:g}m, {:g}m of material {} created.'.format(xs * G.dx, ys * G.dy, zs * G.dz, xf * G.dx, yf * G.dy, zf * G.dz, tmp[7]))
+                tqdm.write('Edge from {:g}m, {:g}m, {:g}m, to {:g}m, {:g}m, {:g}m of material {} created.'.format(G.calculate_position('x', xs), G.calculate_position('y', ys), G.calculate_position('z', zs), G.calculate_position('x', xf), G.calculate_position('y', yf), G.calculate_position('z', zf), tmp[7]))
 
         elif tmp[0] == '#plate:':
             if len(tmp) < 8:
@@ -217,25 +280,25 @@ def process_geometrycmds(geometry, G):
             else:
                 raise CmdInputError("'" + ' '.join(tmp) + "'" + ' too many parameters have been given')
 
-            xs = round_value(float(tmp[1]) / G.dx)
-            xf = round_value(float(tmp[4]) / G.dx)
-            ys = round_value(float(tmp[2]) / G.dy)
-            yf = round_value(float(tmp[5]) / G.dy)
-            zs = round_value(float(tmp[3]) / G.dz)
-            zf = round_value(float(tmp[6]) / G.dz)
+            xs = G.calculate_coord('x', tmp[1])
+            xf = G.calculate_coord('x', tmp[4])
+            ys = G.calculate_coord('y', tmp[2])
+            yf = G.calculate_coord('y', tmp[5])
+            zs = G.calculate_coord('z', tmp[3])
+            zf = G.calculate_coord('z', tmp[6])
 
             if xs < 0 or xs > G.nx:
-                raise CmdInputError("'" + ' '.join(tmp) + "'" + ' the lower x-coordinate {:g}m is not within the model domain'.format(xs * G.dx))
+                raise CmdInputError("'" + ' '.join(tmp) + "'" + ' the lower x-coordinate {:g}m is not within the model domain'.format(G.calculate_position('x', xs)))
             if xf < 0 or xf > G.nx:
-                raise CmdInputError("'" + ' '.join(tmp) + "'" + ' the upper x-coordinate {:g}m is not within the model domain'.format(xf * G.dx))
+                raise CmdInputError("'" + ' '.join(tmp) + "'" + ' the upper x-coordinate {:g}m is not within the model domain'.format(G.calculate_position('x', xf)))
             if ys < 0 or ys > G.ny:
-                raise CmdInputError("'" + ' '.join(tmp) + "'" + ' the lower y-coordinate {:g}m is not within the model domain'.format(ys * G.dy))
+                raise CmdInputError("'" + ' '.join(tmp) + "'" + ' the lower y-coordinate {:g}m is not within the model domain'.format(G.calculate_position('y', ys)))
             if yf < 0 or yf > G.ny:
-                raise CmdInputError("'" + ' '.join(tmp) + "'" + ' the upper y-coordinate {:g}m is not within the model domain'.format(yf * G.dy))
+                raise CmdInputError("'" + ' '.join(tmp) + "'" + ' the upper y-coordinate {:g}m is not within the model domain'.format(G.calculate_position('y', yf)))
             if zs < 0 or zs > G.nz:
-                raise CmdInputError("'" + ' '.join(tmp) + "'" + ' the lower z-coordinate {:g}m is not within the model domain'.format(zs * G.dz))
+                raise CmdInputError("'" + ' '.join(tmp) + "'" + ' the lower z-coordinate {:g}m is not within the model domain'.format(G.calculate_position('z', zs)))
             if zf < 0 or zf > G.nz:
-                raise CmdInputError("'" + ' '.join(tmp) + "'" + ' the upper z-coordinate {:g}m is not within the model domain'.format(zf * G.dz))
+                raise CmdInputError("'" + ' '.join(tmp) + "'" + ' the upper z-coordinate {:g}m is not within the model domain'.format(G.calculate_position('z', zf)))
             if xs > xf or ys > yf or zs > zf:
                 raise CmdInputError("'" + ' '.join(tmp) + "'" + ' the lower coordinates should be less than the upper coordinates')
 
@@ -273,9 +336,8 @@ def process_geometrycmds(geometry, G):
                     numIDy = materials[0].numID
                     numIDz = materials[1].numID
 
-                for j in range(ys, yf):
-                    for k in range(zs, zf):
-                        build_face_yz(xs, j, k, numIDy, numIDz, G.rigidE, G.rigidH, G.ID)
+                for i, j, k in array_cells(G, xs, xs + 1, ys, yf, zs, zf):
+                    build_face_yz(i, j, k, numIDy, numIDz, G.rigidE, G.rigidH, G.ID)
 
             # xz-plane plate
             elif ys == yf:
@@ -288,9 +350,8 @@ def process_geometrycmds(geometry, G):
                     numIDx = materials[0].numID
                     numIDz = materials[1].numID
 
-                for i in range(xs, xf):
-                    for k in range(zs, zf):
-                        build_face_xz(i, ys, k, numIDx, numIDz, G.rigidE, G.rigidH, G.ID)
+                for i, j, k in array_cells(G, xs, xf, ys, ys + 1, zs, zf):
+                    build_face_xz(i, j, k, numIDx, numIDz, G.rigidE, G.rigidH, G.ID)
 
             # xy-plane plate
             elif zs == zf:
@@ -303,14 +364,15 @@ def process_geometrycmds(geometry, G):
                     numIDx = materials[0].numID
                     numIDy = materials[1].numID
 
-                for i in range(xs, xf):
-                    for j in range(ys, yf):
-                        build_face_xy(i, j, zs, numIDx, numIDy, G.rigidE, G.rigidH, G.ID)
+                for i, j, k in array_cells(G, xs, xf, ys, yf, zs, zs + 1):
+                    build_face_xy(i, j, k, numIDx, numIDy, G.rigidE, G.rigidH, G.ID)
 
             if G.messages:
-                tqdm.write('Plate from {:g}m, {:g}m, {:g}m, to {:g}m, {:g}m, {:g}m of material(s) {} created.'.format(xs * G.dx, ys * G.dy, zs * G.dz, xf * G.dx, yf * G.dy, zf * G.dz, ', '.join(materialsrequested)))
+                tqdm.write('Plate from {:g}m, {:g}m, {:g}m, to {:g}m, {:g}m, {:g}m of material(s) {} created.'.format(G.calculate_position('x', xs), G.calculate_position('y', ys), G.calculate_position('z', zs), G.calculate_position('x', xf), G.calculate_position('y', yf), G.calculate_position('z', zf), ', '.join(materialsrequested)))
 
         elif tmp[0] == '#triangle:':
+            if G.grading is not None:
+                raise CmdInputError("'" + ' '.join(tmp) + "'" + ' can not be used with a graded mesh')
             if len(tmp) < 12:
                 raise CmdInputError("'" + ' '.join(tmp) + "'" + ' requires at least eleven parameters')
 
@@ -336,15 +398,15 @@ def process_geometrycmds(geometry, G):
             else:
                 raise CmdInputError("'" + ' '.join(tmp) + "'" + ' too many parameters have been given')
 
-            x1 = round_value(float(tmp[1]) / G.dx) * G.dx
-            y1 = round_value(float(tmp[2]) / G.dy) * G.dy
-            z1 = round_value(float(tmp[3]) / G.dz) * G.dz
-            x2 = round_value(float(tmp[4]) / G.dx) * G.dx
-            y2 = round_value(float(tmp[5]) / G.dy) * G.dy
-            z2 = round_value(float(tmp[6]) / G.dz) * G.dz
-            x3 = round_value(float(tmp[7]) / G.dx) * G.dx
-            y3 = round_value(float(tmp[8]) / G.dy) * G.dy
-            z3 = round_value(float(tmp[9]) / G.dz) * G.dz
+            x1 = G.calculate_position('x', G.calculate_coord('x', tmp[1]))
+            y1 = G.calculate_position('y', G.calculate_coord('y', tmp[2]))
+            z1 = G.calculate_position('z', G.calculate_coord('z', tmp[3]))
+            x2 = G.calculate_position('x', G.calculate_coord('x', tmp[4]))
+            y2 = G.calculate_position('y', G.calculate_coord('y', tmp[5]))
+            z2 = G.calculate_position('z', G.calculate_coord('z', tmp[6]))
+            x3 = G.calculate_position('x', G.calculate_coord('x', tmp[7]))
+            y3 = G.calculate_position('y', G.calculate_coord('y', tmp[8]))
+            z3 = G.calculate_position('z', G.calculate_coord('z', tmp[9]))
             thickness = float(tmp[10])
 
             if x1 < 0 or x2 < 0 or x3 < 0 or x1 > G.nx or x2 > G.nx or x3 > G.nx:
@@ -418,7 +480,7 @@ def process_geometrycmds(geometry, G):
                     numIDy = materials[1].numID
                     numIDz = materials[2].numID
 
-            build_triangle(x1, y1, z1, x2, y2, z2, x3, y3, z3, normal, thickness, G.dx, G.dy, G.dz, numID, numIDx, numIDy, numIDz, averaging, G.solid, G.rigidE, G.rigidH, G.ID)
+            build_triangle(x1, y1, z1, x2, y2, z2, x3, y3, z3, normal, thickness, G.dx, G.dy, G.dz, numID, numIDx, numIDy, numIDz, averaging, *array_origin(G), G.solid, G.rigidE, G.rigidH, G.ID)
 
             if G.messages:
                 if thickness > 0:
@@ -456,25 +518,25 @@ def process_geometrycmds(geometry, G):
             else:
                 raise CmdInputError("'" + ' '.join(tmp) + "'" + ' too many parameters have been given')
 
-            xs = round_value(float(tmp[1]) / G.dx)
-            xf = round_value(float(tmp[4]) / G.dx)
-            ys = round_value(float(tmp[2]) / G.dy)
-            yf = round_value(float(tmp[5]) / G.dy)
-            zs = round_value(float(tmp[3]) / G.dz)
-            zf = round_value(float(tmp[6]) / G.dz)
+            xs = G.calculate_coord('x', tmp[1])
+            xf = G.calculate_coord('x', tmp[4])
+            ys = G.calculate_coord('y', tmp[2])
+            yf = G.calculate_coord('y', tmp[5])
+            zs = G.calculate_coord('z', tmp[3])
+            zf = G.calculate_coord('z', tmp[6])
 
             if xs < 0 or xs > G.nx:
-                raise CmdInputError("'" + ' '.join(tmp) + "'" + ' the lower x-coordinate {:g}m is not within the model domain'.format(xs * G.dx))
+                raise CmdInputError("'" + ' '.join(tmp) + "'" + ' the lower x-coordinate {:g}m is not within the model domain'.format(G.calculate_position('x', xs)))
             if xf < 0 or xf > G.nx:
-                raise CmdInputError("'" + ' '.join(tmp) + "'" + ' the upper x-coordinate {:g}m is not within the model domain'.format(xf * G.dx))
+                raise CmdInputError("'" + ' '.join(tmp) + "'" + ' the upper x-coordinate {:g}m is not within the model domain'.format(G.calculate_position('x', xf)))
             if ys < 0 or ys > G.ny:
-                raise CmdInputError("'" + ' '.join(tmp) + "'" + ' the lower y-coordinate {:g}m is not within the model domain'.format(ys * G.dy))
+                raise CmdInputError("'" + ' '.join(tmp) + "'" + ' the lower y-coordinate {:g}m is not within the model domain'.format(G.calculate_position('y', ys)))
             if yf < 0 or yf > G.ny:
-                raise CmdInputError("'" + ' '.join(tmp) + "'" + ' the upper y-coordinate {:g}m is not within the model domain'.format(yf * G.dy))
+                raise CmdInputError("'" + ' '.join(tmp) + "'" + ' the upper y-coordinate {:g}m is not within the model domain'.format(G.calculate_position('y', yf)))
             if zs < 0 or zs > G.nz:
-                raise CmdInputError("'" + ' '.join(tmp) + "'" + ' the lower z-coordinate {:g}m is not within the model domain'.format(zs * G.dz))
+                raise CmdInputError("'" + ' '.join(tmp) + "'" + ' the lower z-coordinate {:g}m is not within the model domain'.format(G.calculate_position('z', zs)))
             if zf < 0 or zf > G.nz:
-                raise CmdInputError("'" + ' '.join(tmp) + "'" + ' the upper z-coordinate {:g}m is not within the model domain'.format(zf * G.dz))
+                raise CmdInputError("'" + ' '.join(tmp) + "'" + ' the upper z-coordinate {:g}m is not within the model domain'.format(G.calculate_position('z', zf)))
             if xs >= xf or ys >= yf or zs >= zf:
                 raise CmdInputError("'" + ' '.join(tmp) + "'" + ' the lower coordinates should be less than the upper coordinates')
 
@@ -513,14 +575,14 @@ def process_geometrycmds(geometry, G):
                     # Append the new material object to the materials list
                     G.materials.append(m)
 
-            build_box(xs, xf, ys, yf, zs, zf, numID, numIDx, numIDy, numIDz, averaging, G.solid, G.rigidE, G.rigidH, G.ID)
+            build_box(xs, xf, ys, yf, zs, zf, numID, numIDx, numIDy, numIDz, averaging, *array_origin(G), G.solid, G.rigidE, G.rigidH, G.ID)
 
             if G.messages:
                 if averaging:
                     dielectricsmoothing = 'on'
                 else:
                     dielectricsmoothing = 'off'
-                tqdm.write('Box from {:g}m, {:g}m, {:g}m, to {:g}m, {:g}m, {:g}m of material(s) {} created, dielectric smoothing is {}.'.format(xs * G.dx, ys * G.dy, zs * G.dz, xf * G.dx, yf * G.dy, zf * G.dz, ', '.join(materialsrequested), dielectricsmoothing))
+                tqdm.write('Box from {:g}m, {:g}m, {:g}m, to {:g}m, {:g}m, {:g}m of material(s) {} created, dielectric smoothing is {}.'.format(G.calculate_position('x', xs), G.calculate_position('y', ys), G.calculate_position('z', zs), G.calculate_position('x', xf), G.calculate_position('y', yf), G.calculate_position('z', zf), ', '.join(materialsrequested), dielectricsmoothing))
 
         elif tmp[0] == '#cylinder:':
             if len(tmp) < 9:
@@ -548,12 +610,12 @@ def process_geometrycmds(geometry, G):
             else:
                 raise CmdInputError("'" + ' '.join(tmp) + "'" + ' too many parameters have been given')
 
-            x1 = round_value(float(tmp[1]) / G.dx) * G.dx
-            y1 = round_value(float(tmp[2]) / G.dy) * G.dy
-            z1 = round_value(float(tmp[3]) / G.dz) * G.dz
-            x2 = round_value(float(tmp[4]) / G.dx) * G.dx
-            y2 = round_value(float(tmp[5]) / G.dy) * G.dy
-            z2 = round_value(float(tmp[6]) / G.dz) * G.dz
+            x1 = G.calculate_position('x', G.calculate_coord('x', tmp[1]))
+            y1 = G.calculate_position('y', G.calculate_coord('y', tmp[2]))
+            z1 = G.calculate_position('z', G.calculate_coord('z', tmp[3]))
+            x2 = G.calculate_position('x', G.calculate_coord('x', tmp[4]))
+            y2 = G.calculate_position('y', G.calculate_coord('y', tmp[5]))
+            z2 = G.calculate_position('z', G.calculate_coord('z', tmp[6]))
             r = float(tmp[7])
 
             if r <= 0:
@@ -594,7 +656,16 @@ def process_geometrycmds(geometry, G):
                     # Append the new material object to the materials list
                     G.materials.append(m)
 
-            build_cylinder(x1, y1, z1, x2, y2, z2, r, G.dx, G.dy, G.dz, numID, numIDx, numIDy, numIDz, averaging, G.solid, G.rigidE, G.rigidH, G.ID)
+            if G.grading is None:
+                build_cylinder(x1, y1, z1, x2, y2, z2, r, G.dx, G.dy, G.dz, numID, numIDx, numIDy, numIDz, averaging, *array_origin(G), G.solid, G.rigidE, G.rigidH, G.ID)
+            elif (x1, y1, z1) != (x2, y2, z2):
+                # Graded mesh - cells with centres within the cylinder
+                x, y, z = np.meshgrid(*(G.cell_centres(coord) for coord in 'xyz'), indexing='ij', sparse=True)
+                axis = np.array([x2 - x1, y2 - y1, z2 - z1])
+                t = ((x - x1) * axis[0] + (y - y1) * axis[1] + (z - z1) * axis[2]) / np.dot(axis, axis)
+                distance = np.sqrt((x - x1 - t * axis[0])**2 + (y - y1 - t * axis[1])**2 + (z - z1 - t * axis[2])**2)
+                mask = (t >= 0) & (t <= 1) & (distance <= r)
+                build_voxels_from_mask(numID, numIDx, numIDy, numIDz, averaging, mask.astype(np.int8), G.solid, G.rigidE, G.rigidH, G.ID)
 
             if G.messages:
                 if averaging:
@@ -604,6 +675,8 @@ def process_geometrycmds(geometry, G):
                 tqdm.write('Cylinder with face centres {:g}m, {:g}m, {:g}m and {:g}m, {:g}m, {:g}m, with radius {:g}m, of material(s) {} created, dielectric smoothing is {}.'.format(x1, y1, z1, x2, y2, z2, r, ', '.join(materialsrequested), dielectricsmoothing))
 
         elif tmp[0] == '#cylindrical_sector:':
+            if G.grading is not None:
+                raise CmdInputError("'" + ' '.join(tmp) + "'" + ' can not be used with a graded mesh')
             if len(tmp) < 10:
                 raise CmdInputError("'" + ' '.join(tmp) + "'" + ' requires at least nine parameters')
 
@@ -715,7 +788,7 @@ def process_geometrycmds(geometry, G):
                 ctr2 = round_value(ctr2 / G.dy) * G.dy
                 level = round_value(extent1 / G.dz)
 
-            build_cylindrical_sector(ctr1, ctr2, level, sectorstartangle, sectorangle, r, normal, thickness, G.dx, G.dy, G.dz, numID, numIDx, numIDy, numIDz, averaging, G.solid, G.rigidE, G.rigidH, G.ID)
+            build_cylindrical_sector(ctr1, ctr2, level, sectorstartangle, sectorangle, r, normal, thickness, G.dx, G.dy, G.dz, numID, numIDx, numIDy, numIDz, averaging, *array_origin(G), G.solid, G.rigidE, G.rigidH, G.ID)
 
             if G.messages:
                 if thickness > 0:
@@ -754,9 +827,9 @@ def process_geometrycmds(geometry, G):
                 raise CmdInputError("'" + ' '.join(tmp) + "'" + ' too many parameters have been given')
 
             # Centre of sphere
-            xc = round_value(float(tmp[1]) / G.dx)
-            yc = round_value(float(tmp[2]) / G.dy)
-            zc = round_value(float(tmp[3]) / G.dz)
+            xc = G.calculate_coord('x', tmp[1])
+            yc = G.calculate_coord('y', tmp[2])
+            zc = G.calculate_coord('z', tmp[3])
             r = float(tmp[4])
 
             # Look up requested materials in existing list of material instances
@@ -794,23 +867,32 @@ def process_geometrycmds(geometry, G):
                     # Append the new material object to the materials list
                     G.materials.append(m)
 
-            build_sphere(xc, yc, zc, r, G.dx, G.dy, G.dz, numID, numIDx, numIDy, numIDz, averaging, G.solid, G.rigidE, G.rigidH, G.ID)
+            if G.grading is None:
+                build_sphere(xc, yc, zc, r, G.dx, G.dy, G.dz, numID, numIDx, numIDy, numIDz, averaging, *array_origin(G), G.solid, G.rigidE, G.rigidH, G.ID)
+            else:
+                # Graded mesh - cells with centres within the sphere
+                x, y, z = np.meshgrid(*(G.cell_centres(coord) for coord in 'xyz'), indexing='ij', sparse=True)
+                mask = (x - G.calculate_position('x', xc))**2 + (y - G.calculate_position('y', yc))**2 + (z - G.calculate_position('z', zc))**2 <= r**2
+                build_voxels_from_mask(numID, numIDx, numIDy, numIDz, averaging, mask.astype(np.int8), G.solid, G.rigidE, G.rigidH, G.ID)
 
             if G.messages:
                 if averaging:
                     dielectricsmoothing = 'on'
                 else:
                     dielectricsmoothing = 'off'
-                tqdm.write('Sphere with centre {:g}m, {:g}m, {:g}m, radius {:g}m, of material(s) {} created, dielectric smoothing is {}.'.format(xc * G.dx, yc * G.dy, zc * G.dz, r, ', '.join(materialsrequested), dielectricsmoothing))
+                tqdm.write('Sphere with centre {:g}m, {:g}m, {:g}m, radius {:g}m, of material(s) {} created, dielectric smoothing is {}.'.format(G.calculate_position('x', xc), G.calculate_position('y', yc), G.calculate_position('z', zc), r, ', '.join(materialsrequested), dielectricsmoothing))
 
         elif tmp[0] == '#fractal_box:':
+            if G.grading is not None:
+                raise CmdInputError("'" + ' '.join(tmp) + "'" + ' can not be used with a graded mesh')
             # Default is no dielectric smoothing for a fractal box
             averagefractalbox = False
 
             if len(tmp) < 14:
                 raise CmdInputError("'" + ' '.join(tmp) + "'" + ' requires at least thirteen parameters')
             elif len(tmp) == 14:
-                seed = None
+                # Ranks of a model decomposed across MPI ranks must share the seed
+                seed = G.domain.random_seed() if G.domain else None
             elif len(tmp) == 15:
                 seed = int(tmp[14])
             elif len(tmp) == 16:
@@ -824,25 +906,25 @@ def process_geometrycmds(geometry, G):
             else:
                 raise CmdInputError("'" + ' '.join(tmp) + "'" + ' too many parameters have been given')
 
-            xs = round_value(float(tmp[1]) / G.dx)
-            xf = round_value(float(tmp[4]) / G.dx)
-            ys = round_value(float(tmp[2]) / G.dy)
-            yf = round_value(float(tmp[5]) / G.dy)
-            zs = round_value(float(tmp[3]) / G.dz)
-            zf = round_value(float(tmp[6]) / G.dz)
+            xs = G.calculate_coord('x', tmp[1])
+            xf = G.calculate_coord('x', tmp[4])
+            ys = G.calculate_coord('y', tmp[2])
+            yf = G.calculate_coord('y', tmp[5])
+            zs = G.calculate_coord('z', tmp[3])
+            zf = G.calculate_coord('z', tmp[6])
 
             if xs < 0 or xs > G.nx:
-                raise CmdInputError("'" + ' '.join(tmp) + "'" + ' the lower x-coordinate {:g}m is not within the model domain'.format(xs * G.dx))
+                raise CmdInputError("'" + ' '.join(tmp) + "'" + ' the lower x-coordinate {:g}m is not within the model domain'.format(G.calculate_position('x', xs)))
             if xf < 0 or xf > G.nx:
-                raise CmdInputError("'" + ' '.join(tmp) + "'" + ' the upper x-coordinate {:g}m is not within the model domain'.format(xf * G.dx))
+                raise CmdInputError("'" + ' '.join(tmp) + "'" + ' the upper x-coordinate {:g}m is not within the model domain'.format(G.calculate_position('x', xf)))
             if ys < 0 or ys > G.ny:
-                raise CmdInputError("'" + ' '.join(tmp) + "'" + ' the lower y-coordinate {:g}m is not within the model domain'.format(ys * G.dy))
+                raise CmdInputError("'" + ' '.join(tmp) + "'" + ' the lower y-coordinate {:g}m is not within the model domain'.format(G.calculate_position('y', ys)))
             if yf < 0 or yf > G.ny:
-                raise CmdInputError("'" + ' '.join(tmp) + "'" + ' the upper y-coordinate {:g}m is not within the model domain'.format(yf * G.dy))
+                raise CmdInputError("'" + ' '.join(tmp) + "'" + ' the upper y-coordinate {:g}m is not within the model domain'.format(G.calculate_position('y', yf)))
             if zs < 0 or zs > G.nz:
-                raise CmdInputError("'" + ' '.join(tmp) + "'" + ' the lower z-coordinate {:g}m is not within the model domain'.format(zs * G.dz))
+                raise CmdInputError("'" + ' '.join(tmp) + "'" + ' the lower z-coordinate {:g}m is not within the model domain'.format(G.calculate_position('z', zs)))
             if zf < 0 or zf > G.nz:
-                raise CmdInputError("'" + ' '.join(tmp) + "'" + ' the upper z-coordinate {:g}m is not within the model domain'.format(zf * G.dz))
+                raise CmdInputError("'" + ' '.join(tmp) + "'" + ' the upper z-coordinate {:g}m is not within the model domain'.format(G.calculate_position('z', zf)))
             if xs >= xf or ys >= yf or zs >= zf:
                 raise CmdInputError("'" + ' '.join(tmp) + "'" + ' the lower coordinates should be less than the upper coordinates')
             if float(tmp[7]) < 0:
@@ -882,7 +964,7 @@ def process_geometrycmds(geometry, G):
                     dielectricsmoothing = 'on'
                 else:
                     dielectricsmoothing = 'off'
-                tqdm.write('Fractal box {} from {:g}m, {:g}m, {:g}m, to {:g}m, {:g}m, {:g}m with {}, fractal dimension {:g}, fractal weightings {:g}, {:g}, {:g}, fractal seeding {}, with {} material(s) created, dielectric smoothing is {}.'.format(volume.ID, xs * G.dx, ys * G.dy, zs * G.dz, xf * G.dx, yf * G.dy, zf * G.dz, volume.operatingonID, volume.dimension, volume.weighting[0], volume.weighting[1], volume.weighting[2], volume.seed, volume.nbins, dielectricsmoothing))
+                tqdm.write('Fractal box {} from {:g}m, {:g}m, {:g}m, to {:g}m, {:g}m, {:g}m with {}, fractal dimension {:g}, fractal weightings {:g}, {:g}, {:g}, fractal seeding {}, with {} material(s) created, dielectric smoothing is {}.'.format(volume.ID, G.calculate_position('x', xs), G.calculate_position('y', ys), G.calculate_position('z', zs), G.calculate_position('x', xf), G.calculate_position('y', yf), G.calculate_position('z', zf), volume.operatingonID, volume.dimension, volume.weighting[0], volume.weighting[1], volume.weighting[2], volume.seed, volume.nbins, dielectricsmoothing))
 
             G.fractalvolumes.append(volume)
 
@@ -894,7 +976,8 @@ def process_geometrycmds(geometry, G):
                     if len(tmp) < 13:
                         raise CmdInputError("'" + ' '.join(tmp) + "'" + ' requires at least twelve parameters')
                     elif len(tmp) == 13:
-                        seed = None
+                        # Ranks of a model decomposed across MPI ranks must share the seed
+                        seed = G.domain.random_seed() if G.domain else None
                     elif len(tmp) == 14:
                         seed = int(tmp[13])
                     else:
@@ -902,25 +985,25 @@ def process_geometrycmds(geometry, G):
 
                     # Only process rough surfaces for this fractal volume
                     if tmp[12] == volume.ID:
-                        xs = round_value(float(tmp[1]) / G.dx)
-                        xf = round_value(float(tmp[4]) / G.dx)
-                        ys = round_value(float(tmp[2]) / G.dy)
-                        yf = round_value(float(tmp[5]) / G.dy)
-                        zs = round_value(float(tmp[3]) / G.dz)
-                        zf = round_value(float(tmp[6]) / G.dz)
+                        xs = G.calculate_coord('x', tmp[1])
+                        xf = G.calculate_coord('x', tmp[4])
+                        ys = G.calculate_coord('y', tmp[2])
+                        yf = G.calculate_coord('y', tmp[5])
+                        zs = G.calculate_coord('z', tmp[3])
+                        zf = G.calculate_coord('z', tmp[6])
 
                         if xs < 0 or xs > G.nx:
-                            raise CmdInputError("'" + ' '.join(tmp) + "'" + ' the lower x-coordinate {:g}m is not within the model domain'.format(xs * G.dx))
+                            raise CmdInputError("'" + ' '.join(tmp) + "'" + ' the lower x-coordinate {:g}m is not within the model domain'.format(G.calculate_position('x', xs)))
                         if xf < 0 or xf > G.nx:
-                            raise CmdInputError("'" + ' '.join(tmp) + "'" + ' the upper x-coordinate {:g}m is not within the model domain'.format(xf * G.dx))
+                            raise CmdInputError("'" + ' '.join(tmp) + "'" + ' the upper x-coordinate {:g}m is not within the model domain'.format(G.calculate_position('x', xf)))
                         if ys < 0 or ys > G.ny:
-                            raise CmdInputError("'" + ' '.join(tmp) + "'" + ' the lower y-coordinate {:g}m is not within the model domain'.format(ys * G.dy))
+                            raise CmdInputError("'" + ' '.join(tmp) + "'" + ' the lower y-coordinate {:g}m is not within the model domain'.format(G.calculate_position('y', ys)))
                         if yf < 0 or yf > G.ny:
-                            raise CmdInputError("'" + ' '.join(tmp) + "'" + ' the upper y-coordinate {:g}m is not within the model domain'.format(yf * G.dy))
+                            raise CmdInputError("'" + ' '.join(tmp) + "'" + ' the upper y-coordinate {:g}m is not within the model domain'.format(G.calculate_position('y', yf)))
                         if zs < 0 or zs > G.nz:
-                            raise CmdInputError("'" + ' '.join(tmp) + "'" + ' the lower z-coordinate {:g}m is not within the model domain'.format(zs * G.dz))
+                            raise CmdInputError("'" + ' '.join(tmp) + "'" + ' the lower z-coordinate {:g}m is not within the model domain'.format(G.calculate_position('z', zs)))
                         if zf < 0 or zf > G.nz:
-                            raise CmdInputError("'" + ' '.join(tmp) + "'" + ' the upper z-coordinate {:g}m is not within the model domain'.format(zf * G.dz))
+                            raise CmdInputError("'" + ' '.join(tmp) + "'" + ' the upper z-coordinate {:g}m is not within the model domain'.format(G.calculate_position('z', zf)))
                         if xs > xf or ys > yf or zs > zf:
                             raise CmdInputError("'" + ' '.join(tmp) + "'" + ' the lower coordinates should be less than the upper coordinates')
                         if float(tmp[7]) < 0:
@@ -936,7 +1019,7 @@ def process_geometrycmds(geometry, G):
                                 raise CmdInputError("'" + ' '.join(tmp) + "'" + ' dimensions are not specified correctly')
                             if xs != volume.xs and xs != volume.xf:
                                 raise CmdInputError("'" + ' '.join(tmp) + "'" + ' can only be used on the external surfaces of a fractal box')
-                            fractalrange = (round_value(float(tmp[10]) / G.dx), round_value(float(tmp[11]) / G.dx))
+                            fractalrange = (G.calculate_coord('x', tmp[10]), G.calculate_coord('x', tmp[11]))
                             # xminus surface
                             if xs == volume.xs:
                                 if fractalrange[0] < 0 or fractalrange[1] > volume.xf:
@@ -953,7 +1036,7 @@ def process_geometrycmds(geometry, G):
                                 raise CmdInputError("'" + ' '.join(tmp) + "'" + ' dimensions are not specified correctly')
                             if ys != volume.ys and ys != volume.yf:
                                 raise CmdInputError("'" + ' '.join(tmp) + "'" + ' can only be used on the external surfaces of a fractal box')
-                            fractalrange = (round_value(float(tmp[10]) / G.dy), round_value(float(tmp[11]) / G.dy))
+                            fractalrange = (G.calculate_coord('y', tmp[10]), G.calculate_coord('y', tmp[11]))
                             # yminus surface
                             if ys == volume.ys:
                                 if fractalrange[0] < 0 or fractalrange[1] > volume.yf:
@@ -970,7 +1053,7 @@ def process_geometrycmds(geometry, G):
                                 raise CmdInputError("'" + ' '.join(tmp) + "'" + ' dimensions are not specified correctly')
                             if zs != volume.zs and zs != volume.zf:
                                 raise CmdInputError("'" + ' '.join(tmp) + "'" + ' can only be used on the external surfaces of a fractal box')
-                            fractalrange = (round_value(float(tmp[10]) / G.dz), round_value(float(tmp[11]) / G.dz))
+                            fractalrange = (G.calculate_coord('z', tmp[10]), G.calculate_coord('z', tmp[11]))
                             # zminus surface
                             if zs == volume.zs:
                                 if fractalrange[0] < 0 or fractalrange[1] > volume.zf:
@@ -1001,7 +1084,7 @@ def process_geometrycmds(geometry, G):
                         volume.fractalsurfaces.append(surface)
 
                         if G.messages:
-                            tqdm.write('Fractal surface from {:g}m, {:g}m, {:g}m, to {:g}m, {:g}m, {:g}m with fractal dimension {:g}, fractal weightings {:g}, {:g}, fractal seeding {}, and range {:g}m to {:g}m, added to {}.'.format(xs * G.dx, ys * G.dy, zs * G.dz, xf * G.dx, yf * G.dy, zf * G.dz, surface.dimension, surface.weighting[0], surface.weighting[1], surface.seed, float(tmp[10]), float(tmp[11]), surface.operatingonID))
+                            tqdm.write('Fractal surface from {:g}m, {:g}m, {:g}m, to {:g}m, {:g}m, {:g}m with fractal dimension {:g}, fractal weightings {:g}, {:g}, fractal seeding {}, and range {:g}m to {:g}m, added to {}.'.format(G.calculate_position('x', xs), G.calculate_position('y', ys), G.calculate_position('z', zs), G.calculate_position('x', xf), G.calculate_position('y', yf), G.calculate_position('z', zf), surface.dimension, surface.weighting[0], surface.weighting[1], surface.seed, float(tmp[10]), float(tmp[11]), surface.operatingonID))
 
                 if tmp[0] == '#add_surface_water:':
                     if len(tmp) != 9:
@@ -1009,26 +1092,26 @@ def process_geometrycmds(geometry, G):
 
                     # Only process surfaces for this fractal volume
                     if tmp[8] == volume.ID:
-                        xs = round_value(float(tmp[1]) / G.dx)
-                        xf = round_value(float(tmp[4]) / G.dx)
-                        ys = round_value(float(tmp[2]) / G.dy)
-                        yf = round_value(float(tmp[5]) / G.dy)
-                        zs = round_value(float(tmp[3]) / G.dz)
-                        zf = round_value(float(tmp[6]) / G.dz)
+                        xs = G.calculate_coord('x', tmp[1])
+                        xf = G.calculate_coord('x', tmp[4])
+                        ys = G.calculate_coord('y', tmp[2])
+                        yf = G.calculate_coord('y', tmp[5])
+                        zs = G.calculate_coord('z', tmp[3])
+                        zf = G.calculate_coord('z', tmp[6])
                         depth = float(tmp[7])
 
                         if xs < 0 or xs > G.nx:
-                            raise CmdInputError("'" + ' '.join(tmp) + "'" + ' the lower x-coordinate {:g}m is not within the model domain'.format(xs * G.dx))
+                            raise CmdInputError("'" + ' '.join(tmp) + "'" + ' the lower x-coordinate {:g}m is not within the model domain'.format(G.calculate_position('x', xs)))
                         if xf < 0 or xf > G.nx:
-                            raise CmdInputError("'" + ' '.join(tmp) + "'" + ' the upper x-coordinate {:g}m is not within the model domain'.format(xf * G.dx))
+                            raise CmdInputError("'" + ' '.join(tmp) + "'" + ' the upper x-coordinate {:g}m is not within the model domain'.format(G.calculate_position('x', xf)))
                         if ys < 0 or ys > G.ny:
-                            raise CmdInputError("'" + ' '.join(tmp) + "'" + ' the lower y-coordinate {:g}m is not within the model domain'.format(ys * G.dy))
+                            raise CmdInputError("'" + ' '.join(tmp) + "'" + ' the lower y-coordinate {:g}m is not within the model domain'.format(G.calculate_position('y', ys)))
                         if yf < 0 or yf > G.ny:
-                            raise CmdInputError("'" + ' '.join(tmp) + "'" + ' the upper y-coordinate {:g}m is not within the model domain'.format(yf * G.dy))
+                            raise CmdInputError("'" + ' '.join(tmp) + "'" + ' the upper y-coordinate {:g}m is not within the model domain'.format(G.calculate_position('y', yf)))
                         if zs < 0 or zs > G.nz:
-                            raise CmdInputError("'" + ' '.join(tmp) + "'" + ' the lower z-coordinate {:g}m is not within the model domain'.format(zs * G.dz))
+                            raise CmdInputError("'" + ' '.join(tmp) + "'" + ' the lower z-coordinate {:g}m is not within the model domain'.format(G.calculate_position('z', zs)))
                         if zf < 0 or zf > G.nz:
-                            raise CmdInputError("'" + ' '.join(tmp) + "'" + ' the upper z-coordinate {:g}m is not within the model domain'.format(zf * G.dz))
+                            raise CmdInputError("'" + ' '.join(tmp) + "'" + ' the upper z-coordinate {:g}m is not within the model domain'.format(G.calculate_position('z', zf)))
                         if xs > xf or ys > yf or zs > zf:
                             raise CmdInputError("'" + ' '.join(tmp) + "'" + ' the lower coordinates should be less than the upper coordinates')
                         if depth <= 0:
@@ -1109,13 +1192,14 @@ def process_geometrycmds(geometry, G):
                             raise CmdInputError("'" + ' '.join(tmp) + "'" + ' requires the time step for the model to be less than the relaxation time required to model water.')
 
                         if G.messages:
-                            tqdm.write('Water on surface from {:g}m, {:g}m, {:g}m, to {:g}m, {:g}m, {:g}m with depth {:g}m, added to {}.'.format(xs * G.dx, ys * G.dy, zs * G.dz, xf * G.dx, yf * G.dy, zf * G.dz, filldepth, surface.operatingonID))
+                            tqdm.write('Water on surface from {:g}m, {:g}m, {:g}m, to {:g}m, {:g}m, {:g}m with depth {:g}m, added to {}.'.format(G.calculate_position('x', xs), G.calculate_position('y', ys), G.calculate_position('z', zs), G.calculate_position('x', xf), G.calculate_position('y', yf), G.calculate_position('z', zf), filldepth, surface.operatingonID))
 
                 if tmp[0] == '#add_grass:':
                     if len(tmp) < 12:
                         raise CmdInputError("'" + ' '.join(tmp) + "'" + ' requires at least eleven parameters')
                     elif len(tmp) == 12:
-                        seed = None
+                        # Ranks of a model decomposed across MPI ranks must share the seed
+                        seed = G.domain.random_seed() if G.domain else None
                     elif len(tmp) == 13:
                         seed = int(tmp[12])
                     else:
@@ -1123,26 +1207,26 @@ def process_geometrycmds(geometry, G):
 
                     # Only process grass for this fractal volume
                     if tmp[11] == volume.ID:
-                        xs = round_value(float(tmp[1]) / G.dx)
-                        xf = round_value(float(tmp[4]) / G.dx)
-                        ys = round_value(float(tmp[2]) / G.dy)
-                        yf = round_value(float(tmp[5]) / G.dy)
-                        zs = round_value(float(tmp[3]) / G.dz)
-                        zf = round_value(float(tmp[6]) / G.dz)
+                        xs = G.calculate_coord('x', tmp[1])
+                        xf = G.calculate_coord('x', tmp[4])
+                        ys = G.calculate_coord('y', tmp[2])
+                        yf = G.calculate_coord('y', tmp[5])
+                        zs = G.calculate_coord('z', tmp[3])
+                        zf = G.calculate_coord('z', tmp[6])
                         numblades = int(tmp[10])
 
                         if xs < 0 or xs > G.nx:
-                            raise CmdInputError("'" + ' '.join(tmp) + "'" + ' the lower x-coordinate {:g}m is not within the model domain'.format(xs * G.dx))
+                            raise CmdInputError("'" + ' '.join(tmp) + "'" + ' the lower x-coordinate {:g}m is not within the model domain'.format(G.calculate_position('x', xs)))
                         if xf < 0 or xf > G.nx:
-                            raise CmdInputError("'" + ' '.join(tmp) + "'" + ' the upper x-coordinate {:g}m is not within the model domain'.format(xf * G.dx))
+                            raise CmdInputError("'" + ' '.join(tmp) + "'" + ' the upper x-coordinate {:g}m is not within the model domain'.format(G.calculate_position('x', xf)))
                         if ys < 0 or ys > G.ny:
-                            raise CmdInputError("'" + ' '.join(tmp) + "'" + ' the lower y-coordinate {:g}m is not within the model domain'.format(ys * G.dy))
+                            raise CmdInputError("'" + ' '.join(tmp) + "'" + ' the lower y-coordinate {:g}m is not within the model domain'.format(G.calculate_position('y', ys)))
                         if yf < 0 or yf > G.ny:
-                            raise CmdInputError("'" + ' '.join(tmp) + "'" + ' the upper y-coordinate {:g}m is not within the model domain'.format(yf * G.dy))
+                            raise CmdInputError("'" + ' '.join(tmp) + "'" + ' the upper y-coordinate {:g}m is not within the model domain'.format(G.calculate_position('y', yf)))
                         if zs < 0 or zs > G.nz:
-                            raise CmdInputError("'" + ' '.join(tmp) + "'" + ' the lower z-coordinate {:g}m is not within the model domain'.format(zs * G.dz))
+                            raise CmdInputError("'" + ' '.join(tmp) + "'" + ' the lower z-coordinate {:g}m is not within the model domain'.format(G.calculate_position('z', zs)))
                         if zf < 0 or zf > G.nz:
-                            raise CmdInputError("'" + ' '.join(tmp) + "'" + ' the upper z-coordinate {:g}m is not within the model domain'.format(zf * G.dz))
+                            raise CmdInputError("'" + ' '.join(tmp) + "'" + ' the upper z-coordinate {:g}m is not within the model domain'.format(G.calculate_position('z', zf)))
                         if xs > xf or ys > yf or zs > zf:
                             raise CmdInputError("'" + ' '.join(tmp) + "'" + ' the lower coordinates should be less than the upper coordinates')
                         if float(tmp[7]) < 0:
@@ -1156,7 +1240,7 @@ def process_geometrycmds(geometry, G):
                                 raise CmdInputError("'" + ' '.join(tmp) + "'" + ' dimensions are not specified correctly')
                             if xs != volume.xs and xs != volume.xf:
                                 raise CmdInputError("'" + ' '.join(tmp) + "'" + ' must specify external surfaces on a fractal box')
-                            fractalrange = (round_value(float(tmp[8]) / G.dx), round_value(float(tmp[9]) / G.dx))
+                            fractalrange = (G.calculate_coord('x', tmp[8]), G.calculate_coord('x', tmp[9]))
                             # xminus surface
                             if xs == volume.xs:
                                 raise CmdInputError("'" + ' '.join(tmp) + "'" + ' grass can only be specified on surfaces in the positive axis direction')
@@ -1171,7 +1255,7 @@ def process_geometrycmds(geometry, G):
                                 raise CmdInputError("'" + ' '.join(tmp) + "'" + ' dimensions are not specified correctly')
                             if ys != volume.ys and ys != volume.yf:
                                 raise CmdInputError("'" + ' '.join(tmp) + "'" + ' must specify external surfaces on a fractal box')
-                            fractalrange = (round_value(float(tmp[8]) / G.dy), round_value(float(tmp[9]) / G.dy))
+                            fractalrange = (G.calculate_coord('y', tmp[8]), G.calculate_coord('y', tmp[9]))
                             # yminus surface
                             if ys == volume.ys:
                                 raise CmdInputError("'" + ' '.join(tmp) + "'" + ' grass can only be specified on surfaces in the positive axis direction')
@@ -1186,7 +1270,7 @@ def process_geometrycmds(geometry, G):
                                 raise CmdInputError("'" + ' '.join(tmp) + "'" + ' dimensions are not specified correctly')
                             if zs != volume.zs and zs != volume.zf:
                                 raise CmdInputError("'" + ' '.join(tmp) + "'" + ' must specify external surfaces on a fractal box')
-                            fractalrange = (round_value(float(tmp[8]) / G.dz), round_value(float(tmp[9]) / G.dz))
+                            fractalrange = (G.calculate_coord('z', tmp[8]), G.calculate_coord('z', tmp[9]))
                             # zminus surface
                             if zs == volume.zs:
                                 raise CmdInputError("'" + ' '.join(tmp) + "'" + ' grass can only be specified on surfaces in the positive axis direction')
@@ -1259,7 +1343,7 @@ def process_geometrycmds(geometry, G):
                         volume.fractalsurfaces.append(surface)
 
                         if G.messages:
-                            tqdm.write('{} blades of grass on surface from {:g}m, {:g}m, {:g}m, to {:g}m, {:g}m, {:g}m with fractal dimension {:g}, fractal seeding {}, and range {:g}m to {:g}m, added to {}.'.format(numblades, xs * G.dx, ys * G.dy, zs * G.dz, xf * G.dx, yf * G.dy, zf * G.dz, surface.dimension, surface.seed, float(tmp[8]), float(tmp[9]), surface.operatingonID))
+                            tqdm.write('{} blades of grass on surface from {:g}m, {:g}m, {:g}m, to {:g}m, {:g}m, {:g}m with fractal dimension {:g}, fractal seeding {}, and range {:g}m to {:g}m, added to {}.'.format(numblades, G.calculate_position('x', xs), G.calculate_position('y', ys), G.calculate_position('z', zs), G.calculate_position('x', xf), G.calculate_position('y', yf), G.calculate_position('z', zf), surface.dimension, surface.seed, float(tmp[8]), float(tmp[9]), surface.operatingonID))
 
             # Process any modifications to the original fractal box then generate it
             if volume.fractalsurfaces:
@@ -1513,7 +1597,7 @@ def process_geometrycmds(geometry, G):
                 grassnumID = next((x.numID for x in G.materials if x.ID == 'grass'), 0)
                 data = volume.fractalvolume.astype('int16', order='C')
                 mask = volume.mask.copy(order='C')
-                build_voxels_from_array_mask(volume.xs, volume.ys, volume.zs, waternumID, grassnumID, volume.averaging, mask, data, G.solid, G.rigidE, G.rigidH, G.ID)
+                build_voxels_from_array_mask(volume.xs, volume.ys, volume.zs, waternumID, grassnumID, volume.averaging, mask, data, *array_origin(G), G.solid, G.rigidE, G.rigidH, G.ID)
 
             else:
                 if volume.nbins == 1:
@@ -1523,4 +1607,4 @@ def process_geometrycmds(geometry, G):
                     volume.fractalvolume += mixingmodel.startmaterialnum
 
                 data = volume.fractalvolume.astype('int16', order='C')
-                build_voxels_from_array(volume.xs, volume.ys, volume.zs, 0, volume.averaging, data, G.solid, G.rigidE, G.rigidH, G.ID)
+                build_voxels_from_array(volume.xs, volume.ys, volume.zs, 0, volume.averaging, data, *array_origin(G), G.solid, G.rigidE, G.rigidH, G.ID)
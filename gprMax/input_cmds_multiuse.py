@@ -60,6 +60,17 @@ def process_multicmds(multicmds, G):
             s = "'{}: {} ' {} {}-coordinate is not within the model domain".format(cmdname, ' '.join(tmp), name, err.args[0])
             raise CmdInputError(s)
 
+    # Sources are removed at the end of the time window, unless the state at
+    # the end of the simulation is kept so the time window can be extended.
+    # Then they are removed when they would be in a model with a longer time
+    # window, i.e. sources still active at the end of the time window are
+    # updated in the last iteration, so the kept state is that of the model
+    # with a longer time window.
+    if G.checkpoint and G.checkpoint.final:
+        stopmax = np.inf
+    else:
+        stopmax = G.timewindow
+
     # Waveform definitions
     cmdname = '#waveform'
     if multicmds[cmdname] is not None:
@@ -139,20 +150,20 @@ def process_multicmds(multicmds, G):
                 if stop - start <= 0:
                     raise CmdInputError("'" + cmdname + ': ' + ' '.join(tmp) + "'" + ' duration of the source should not be zero or less')
                 v.start = start
-                if stop > G.timewindow:
-                    v.stop = G.timewindow
+                if stop > stopmax:
+                    v.stop = stopmax
                 else:
                     v.stop = stop
                 startstop = ' start time {:g} secs, finish time {:g} secs '.format(v.start, v.stop)
             else:
                 v.start = 0
-                v.stop = G.timewindow
+                v.stop = stopmax
                 startstop = ' '
 
             v.calculate_waveform_values(G)
 
             if G.messages:
-                print('Voltage source with polarity {} at {:g}m, {:g}m, {:g}m, resistance {:.1f} Ohms,'.format(v.polarisation, v.xcoord * G.dx, v.ycoord * G.dy, v.zcoord * G.dz, v.resistance) + startstop + 'using waveform {} created.'.format(v.waveformID))
+                print('Voltage source with polarity {} at {:g}m, {:g}m, {:g}m, resistance {:.1f} Ohms,'.format(v.polarisation, G.calculate_position('x', v.xcoord), G.calculate_position('y', v.ycoord), G.calculate_position('z', v.zcoord), v.resistance) + startstop + 'using waveform {} created.'.format(v.waveformID))
 
             G.voltagesources.append(v)
 
@@ -191,11 +202,11 @@ def process_multicmds(multicmds, G):
 
             # Set length of dipole to grid size in polarisation direction
             if h.polarisation == 'x':
-                h.dl = G.dx
+                h.dl = G.cell_size('Ex', xcoord, ycoord, zcoord)[0]
             elif h.polarisation == 'y':
-                h.dl = G.dy
+                h.dl = G.cell_size('Ey', xcoord, ycoord, zcoord)[1]
             elif h.polarisation == 'z':
-                h.dl = G.dz
+                h.dl = G.cell_size('Ez', xcoord, ycoord, zcoord)[2]
 
             h.xcoord = xcoord
             h.ycoord = ycoord
@@ -217,23 +228,23 @@ def process_multicmds(multicmds, G):
                 if stop - start <= 0:
                     raise CmdInputError("'" + cmdname + ': ' + ' '.join(tmp) + "'" + ' duration of the source should not be zero or less')
                 h.start = start
-                if stop > G.timewindow:
-                    h.stop = G.timewindow
+                if stop > stopmax:
+                    h.stop = stopmax
                 else:
                     h.stop = stop
                 startstop = ' start time {:g} secs, finish time {:g} secs '.format(h.start, h.stop)
             else:
                 h.start = 0
-                h.stop = G.timewindow
+                h.stop = stopmax
                 startstop = ' '
 
             h.calculate_waveform_values(G)
 
             if G.messages:
                 if G.mode == '2D':
-                    print('Hertzian dipole is a line source in 2D with polarity {} at {:g}m, {:g}m, {:g}m,'.format(h.polarisation, h.xcoord * G.dx, h.ycoord * G.dy, h.zcoord * G.dz) + startstop + 'using waveform {} created.'.format(h.waveformID))
+                    print('Hertzian dipole is a line source in 2D with polarity {} at {:g}m, {:g}m, {:g}m,'.format(h.polarisation, G.calculate_position('x', h.xcoord), G.calculate_position('y', h.ycoord), G.calculate_position('z', h.zcoord)) + startstop + 'using waveform {} created.'.format(h.waveformID))
                 else:
-                    print('Hertzian dipole with polarity {} at {:g}m, {:g}m, {:g}m,'.format(h.polarisation, h.xcoord * G.dx, h.ycoord * G.dy, h.zcoord * G.dz) + startstop + 'using waveform {} created.'.format(h.waveformID))
+                    print('Hertzian dipole with polarity {} at {:g}m, {:g}m, {:g}m,'.format(h.polarisation, G.calculate_position('x', h.xcoord), G.calculate_position('y', h.ycoord), G.calculate_position('z', h.zcoord)) + startstop + 'using waveform {} created.'.format(h.waveformID))
 
             G.hertziandipoles.append(h)
 
@@ -289,20 +300,20 @@ def process_multicmds(multicmds, G):
                 if stop - start <= 0:
                     raise CmdInputError("'" + cmdname + ': ' + ' '.join(tmp) + "'" + ' duration of the source should not be zero or less')
                 m.start = start
-                if stop > G.timewindow:
-                    m.stop = G.timewindow
+                if stop > stopmax:
+                    m.stop = stopmax
                 else:
                     m.stop = stop
                 startstop = ' start time {:g} secs, finish time {:g} secs '.format(m.start, m.stop)
             else:
                 m.start = 0
-                m.stop = G.timewindow
+                m.stop = stopmax
                 startstop = ' '
 
             m.calculate_waveform_values(G)
 
             if G.messages:
-                print('Magnetic dipole with polarity {} at {:g}m, {:g}m, {:g}m,'.format(m.polarisation, m.xcoord * G.dx, m.ycoord * G.dy, m.zcoord * G.dz) + startstop + 'using waveform {} created.'.format(m.waveformID))
+                print('Magnetic dipole with polarity {} at {:g}m, {:g}m, {:g}m,'.format(m.polarisation, G.calculate_position('x', m.xcoord), G.calculate_position('y', m.ycoord), G.calculate_position('z', m.zcoord)) + startstop + 'using waveform {} created.'.format(m.waveformID))
 
             G.magneticdipoles.append(m)
 
@@ -364,36 +375,37 @@ def process_multicmds(multicmds, G):
                 if stop - start <= 0:
                     raise CmdInputError("'" + cmdname + ': ' + ' '.join(tmp) + "'" + ' duration of the source should not be zero or less')
                 t.start = start
-                if stop > G.timewindow:
-                    t.stop = G.timewindow
+                if stop > stopmax:
+                    t.stop = stopmax
                 else:
                     t.stop = stop
                 startstop = ' start time {:g} secs, finish time {:g} secs '.format(t.start, t.stop)
             else:
                 t.start = 0
-                t.stop = G.timewindow
+                t.stop = stopmax
                 startstop = ' '
 
             t.calculate_waveform_values(G)
             t.calculate_incident_V_I(G)
 
             if G.messages:
-                print('Transmission line with polarity {} at {:g}m, {:g}m, {:g}m, resistance {:.1f} Ohms,'.format(t.polarisation, t.xcoord * G.dx, t.ycoord * G.dy, t.zcoord * G.dz, t.resistance) + startstop + 'using waveform {} created.'.format(t.waveformID))
+                print('Transmission line with polarity {} at {:g}m, {:g}m, {:g}m, resistance {:.1f} Ohms,'.format(t.polarisation, G.calculate_position('x', t.xcoord), G.calculate_position('y', t.ycoord), G.calculate_position('z', t.zcoord), t.resistance) + startstop + 'using waveform {} created.'.format(t.waveformID))
 
             G.transmissionlines.append(t)
 
     # Receiver
     cmdname = '#rx'
     if multicmds[cmdname] is not None:
-        for cmdinstance in multicmds[cmdname]:
+        cmdorder = G.rxcmdorder.get(cmdname, range(len(multicmds[cmdname])))
+        for cmdindex, cmdinstance in enumerate(multicmds[cmdname]):
             tmp = cmdinstance.split()
             if len(tmp) != 3 and len(tmp) < 5:
                 raise CmdInputError("'" + cmdname + ': ' + ' '.join(tmp) + "'" + ' has an incorrect number of parameters')
 
             # Check position parameters
-            xcoord = round_value(float(tmp[0]) / G.dx)
-            ycoord = round_value(float(tmp[1]) / G.dy)
-            zcoord = round_value(float(tmp[2]) / G.dz)
+            xcoord = G.calculate_coord('x', tmp[0])
+            ycoord = G.calculate_coord('y', tmp[1])
+            zcoord = G.calculate_coord('z', tmp[2])
             check_coordinates(xcoord, ycoord, zcoord)
             if xcoord < G.pmlthickness['x0'] or xcoord > G.nx - G.pmlthickness['xmax'] or ycoord < G.pmlthickness['y0'] or ycoord > G.ny - G.pmlthickness['ymax'] or zcoord < G.pmlthickness['z0'] or zcoord > G.nz - G.pmlthickness['zmax']:
                 print(Fore.RED + "WARNING: '" + cmdname + ': ' + ' '.join(tmp) + "'" + ' sources and receivers should not normally be positioned within the PML.' + Style.RESET_ALL)
@@ -405,6 +417,7 @@ def process_multicmds(multicmds, G):
             r.xcoordorigin = xcoord
             r.ycoordorigin = ycoord
             r.zcoordorigin = zcoord
+            r.inputorder = (0, cmdorder[cmdindex], 0)
 
             # If no ID or outputs are specified, use default
             if len(tmp) == 3:
@@ -426,14 +439,15 @@ def process_multicmds(multicmds, G):
                         raise CmdInputError("'" + cmdname + ': ' + ' '.join(tmp) + "'" + ' contains an output type that is not allowable. Allowable outputs in current context are {}'.format(allowableoutputs))
 
             if G.messages:
-                print('Receiver at {:g}m, {:g}m, {:g}m with output component(s) {} created.'.format(r.xcoord * G.dx, r.ycoord * G.dy, r.zcoord * G.dz, ', '.join(r.outputs)))
+                print('Receiver at {:g}m, {:g}m, {:g}m with output component(s) {} created.'.format(G.calculate_position('x', r.xcoord), G.calculate_position('y', r.ycoord), G.calculate_position('z', r.zcoord), ', '.join(r.outputs)))
 
             G.rxs.append(r)
 
     # Receiver array
     cmdname = '#rx_array'
     if multicmds[cmdname] is not None:
-        for cmdinstance in multicmds[cmdname]:
+        cmdorder = G.rxcmdorder.get(cmdname, range(len(multicmds[cmdname])))
+        for cmdindex, cmdinstance in enumerate(multicmds[cmdname]):
             tmp = cmdinstance.split()
             if len(tmp) != 9:
                 raise CmdInputError("'" + cmdname + ': ' + ' '.join(tmp) + "'" + ' requires exactly nine parameters')
@@ -476,11 +490,23 @@ def process_multicmds(multicmds, G):
                     raise CmdInputError("'" + cmdname + ': ' + ' '.join(tmp) + "'" + ' the step size should not be less than the spatial discretisation')
 
             if G.messages:
-                print('Receiver array {:g}m, {:g}m, {:g}m, to {:g}m, {:g}m, {:g}m with steps {:g}m, {:g}m, {:g}m'.format(xs * G.dx, ys * G.dy, zs * G.dz, xf * G.dx, yf * G.dy, zf * G.dz, dx * G.dx, dy * G.dy, dz * G.dz))
-
-            for x in range(xs, xf + 1, dx):
-                for y in range(ys, yf + 1, dy):
-                    for z in range(zs, zf + 1, dz):
+                print('Receiver array {:g}m, {:g}m, {:g}m, to {:g}m, {:g}m, {:g}m with steps {:g}m, {:g}m, {:g}m'.format(G.calculate_position('x', xs), G.calculate_position('y', ys), G.calculate_position('z', zs), G.calculate_position('x', xf), G.calculate_position('y', yf), G.calculate_position('z', zf), *(float(step) if getattr(G, coord + 'spacing') is not None else d * getattr(G, 'd' + coord) for coord, d, step in zip('xyz', (dx, dy, dz), tmp[6:9]))))
+
+            # Receivers are positioned at the nodes nearest each step along
+            # an axis with a graded mesh
+            rxcoords = []
+            for coord, start, finish, d, step in zip('xyz', (xs, ys, zs), (xf, yf, zf), (dx, dy, dz), tmp[6:9]):
+                if getattr(G, coord + 'spacing') is None:
+                    rxcoords.append(range(start, finish + 1, d))
+                else:
+                    start = G.calculate_position(coord, start)
+                    finish = G.calculate_position(coord, finish)
+                    nsteps = int((finish - start) / float(step) + 1e-6) if float(step) > 0 else 0
+                    rxcoords.append(sorted(set(G.calculate_coord(coord, start + n * float(step)) for n in range(nsteps + 1))))
+
+            for x in rxcoords[0]:
+                for y in rxcoords[1]:
+                    for z in rxcoords[2]:
                         r = Rx()
                         r.xcoord = x
                         r.ycoord = y
@@ -488,11 +514,12 @@ def process_multicmds(multicmds, G):
                         r.xcoordorigin = x
                         r.ycoordorigin = y
                         r.zcoordorigin = z
+                        r.inputorder = (1, cmdorder[cmdindex], len(G.rxs))
                         r.ID = r.__class__.__name__ + '(' + str(x) + ',' + str(y) + ',' + str(z) + ')'
                         for key in Rx.defaultoutputs:
                             r.outputs[key] = np.zeros(G.iterations, dtype=floattype)
                         if G.messages:
-                            print('  Receiver at {:g}m, {:g}m, {:g}m with output component(s) {} created.'.format(r.xcoord * G.dx, r.ycoord * G.dy, r.zcoord * G.dz, ', '.join(r.outputs)))
+                            print('  Receiver at {:g}m, {:g}m, {:g}m with output component(s) {} created.'.format(G.calculate_position('x', r.xcoord), G.calculate_position('y', r.ycoord), G.calculate_position('z', r.zcoord), ', '.join(r.outputs)))
                         G.rxs.append(r)
 
     # Snapshot
@@ -502,6 +529,8 @@ def process_multicmds(multicmds, G):
             tmp = cmdinstance.split()
             if len(tmp) != 11:
                 raise CmdInputError("'" + cmdname + ': ' + ' '.join(tmp) + "'" + ' requires exactly eleven parameters')
+            if G.grading is not None:
+                raise CmdInputError("'" + cmdname + ': ' + ' '.join(tmp) + "'" + ' can not be used with a graded mesh')
 
             xs = G.calculate_coord('x', tmp[0])
             ys = G.calculate_coord('y', tmp[1])
@@ -728,6 +757,8 @@ def process_multicmds(multicmds, G):
             tmp = cmdinstance.split()
             if len(tmp) != 11:
                 raise CmdInputError("'" + cmdname + ': ' + ' '.join(tmp) + "'" + ' requires exactly eleven parameters')
+            if G.grading is not None:
+                raise CmdInputError("'" + cmdname + ': ' + ' '.join(tmp) + "'" + ' can not be used with a graded mesh')
 
             xs = G.calculate_coord('x', tmp[0])
             ys = G.calculate_coord('y', tmp[1])
@@ -778,6 +809,8 @@ def process_multicmds(multicmds, G):
             tmp = cmdinstance.split()
             if len(tmp) != 7:
                 raise CmdInputError("'" + cmdname + ': ' + ' '.join(tmp) + "'" + ' requires exactly seven parameters')
+            if G.grading is not None:
+                raise CmdInputError("'" + cmdname + ': ' + ' '.join(tmp) + "'" + ' can not be used with a graded mesh')
 
             xs = G.calculate_coord('x', tmp[0])
             ys = G.calculate_coord('y', tmp[1])
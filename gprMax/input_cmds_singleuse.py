@@ -128,6 +128,24 @@ def process_singlecmds(singlecmds, G):
     if G.messages:
         print('Spatial discretisation: {:g} x {:g} x {:g}m'.format(G.dx, G.dy, G.dz))
 
+    # Graded mesh, i.e. spatial steps of the cells along an axis
+    for coord in 'xyz':
+        cmd = '#d' + coord + '_profile'
+        if singlecmds[cmd] is not None:
+            tmp = singlecmds[cmd].split()
+            if len(tmp) < 2 or len(tmp) % 2 != 0:
+                raise CmdInputError(cmd + ' requires pairs of parameters, i.e. a spatial step and a number of cells')
+            spacing = []
+            for step, cells in zip(tmp[0::2], tmp[1::2]):
+                if float(step) <= 0:
+                    raise CmdInputError(cmd + ' requires the spatial steps to be greater than zero')
+                if int(cells) < 1:
+                    raise CmdInputError(cmd + ' requires at least one cell for each spatial step')
+                spacing += [float(step)] * int(cells)
+            setattr(G, coord + 'spacing', np.array(spacing))
+            if G.messages:
+                print('Spatial discretisation ({}-direction, graded): {:g} to {:g}m'.format(coord, min(spacing), max(spacing)))
+
     # Domain
     cmd = '#domain'
     tmp = [float(x) for x in singlecmds[cmd].split()]
@@ -136,11 +154,26 @@ def process_singlecmds(singlecmds, G):
     G.nx = round_value(tmp[0] / G.dx)
     G.ny = round_value(tmp[1] / G.dy)
     G.nz = round_value(tmp[2] / G.dz)
+    for coord, size in zip('xyz', tmp):
+        spacing = getattr(G, coord + 'spacing')
+        if spacing is not None:
+            if abs(spacing.sum() - size) > 0.5 * spacing.min():
+                raise CmdInputError(cmd + ' the size of the domain in the {}-direction ({:g}m) does not match the spatial steps of #d{}_profile ({:g}m)'.format(coord, size, coord, spacing.sum()))
+            setattr(G, 'n' + coord, len(spacing))
     if G.nx == 0 or G.ny == 0 or G.nz == 0:
         raise CmdInputError(cmd + ' requires at least one cell in every dimension')
     if G.messages:
         print('Domain size: {:g} x {:g} x {:g}m ({:d} x {:d} x {:d} = {:g} cells)'.format(tmp[0], tmp[1], tmp[2], G.nx, G.ny, G.nz, (G.nx * G.ny * G.nz)))
 
+    # Graded mesh - update coefficients of materials are calculated with the
+    # smallest spatial step along each axis, which also sets the time step
+    if G.xspacing is not None or G.yspacing is not None or G.zspacing is not None:
+        if G.nx == 1 or G.ny == 1 or G.nz == 1:
+            raise CmdInputError('#dx_profile, #dy_profile and #dz_profile can only be used in 3D models')
+        if G.gpu is not None:
+            raise CmdInputError('#dx_profile, #dy_profile and #dz_profile can not be used with a GPU')
+        G.initialise_grading()
+
     # Time step CFL limit (either 2D or 3D); switch off appropriate PMLs for 2D
     if G.nx == 1:
         G.dt = 1 / (c * np.sqrt((1 / G.dy) * (1 / G.dy) + (1 / G.dz) * (1 / G.dz)))
@@ -224,6 +257,13 @@ def process_singlecmds(singlecmds, G):
             G.pmlthickness['zmax'] = int(tmp[5])
     if 2 * G.pmlthickness['x0'] >= G.nx or 2 * G.pmlthickness['y0'] >= G.ny or 2 * G.pmlthickness['z0'] >= G.nz or 2 * G.pmlthickness['xmax'] >= G.nx or 2 * G.pmlthickness['ymax'] >= G.ny or 2 * G.pmlthickness['zmax'] >= G.nz:
         raise CmdInputError(cmd + ' has too many cells for the domain size')
+    # PML slabs are updated with a single spatial step normal to the slab
+    for coord in 'xyz':
+        spacing = getattr(G, coord + 'spacing')
+        if spacing is not None:
+            for slab in (spacing[:G.pmlthickness[coord + '0']], spacing[len(spacing) - G.pmlthickness[coord + 'max']:]):
+                if slab.size and not np.allclose(slab, slab[0]):
+                    raise CmdInputError('#d' + coord + '_profile requires the spatial step to be constant within the PML')
 
     # PML formulation
     cmd = '#pml_formulation'
@@ -245,6 +285,8 @@ def process_singlecmds(singlecmds, G):
         G.srcsteps[0] = round_value(float(tmp[0]) / G.dx)
         G.srcsteps[1] = round_value(float(tmp[1]) / G.dy)
         G.srcsteps[2] = round_value(float(tmp[2]) / G.dz)
+        if any(step != 0 and getattr(G, coord + 'spacing') is not None for step, coord in zip(G.srcsteps, 'xyz')):
+            raise CmdInputError(cmd + ' can not move simple sources along an axis with a graded mesh')
         if G.messages:
             print('Simple sources will step {:g}m, {:g}m, {:g}m for each model run.'.format(G.srcsteps[0] * G.dx, G.srcsteps[1] * G.dy, G.srcsteps[2] * G.dz))
 
@@ -257,6 +299,8 @@ def process_singlecmds(singlecmds, G):
         G.rxsteps[0] = round_value(float(tmp[0]) / G.dx)
         G.rxsteps[1] = round_value(float(tmp[1]) / G.dy)
         G.rxsteps[2] = round_value(float(tmp[2]) / G.dz)
+        if any(step != 0 and getattr(G, coord + 'spacing') is not None for step, coord in zip(G.rxsteps, 'xyz')):
+            raise CmdInputError(cmd + ' can not move receivers along an axis with a graded mesh')
         if G.messages:
             print('All receivers will step {:g}m, {:g}m, {:g}m for each model run.'.format(G.rxsteps[0] * G.dx, G.rxsteps[1] * G.dy, G.rxsteps[2] * G.dz))
 
@@ -66,6 +66,15 @@ class Material(object):
         self.tau = []
         self.alpha = []
 
+    @property
+    def realpoles(self):
+        """Whether all poles of the material are real, i.e. Debye and Drude
+            poles, so that its dispersive update coefficients and temporary
+            values are real. Lorentz poles are complex.
+        """
+
+        return 'lorentz' not in self.type
+
     def calculate_update_coeffsH(self, G):
         """Calculates the magnetic update coefficients of the material.
 
@@ -89,6 +98,11 @@ class Material(object):
                     describing the model.
         """
 
+        # Conductivity, including that of any Drude poles (which is not added
+        # to the material, so coefficients can be calculated more than once,
+        # e.g. for materials reused by the next model)
+        se = self.se
+
         # The implementation of the dispersive material modelling comes from the
         # derivation in: http://dx.doi.org/10.1109/TAP.2014.2308549
         if self.maxpoles > 0:
@@ -113,7 +127,7 @@ class Material(object):
                     # tau for Drude materials are pole frequencies
                     # alpha for Drude materials are the inverse of relaxation times
                     wp2 = (2 * np.pi * self.tau[x])**2
-                    self.se += wp2 / self.alpha[x]
+                    se += wp2 / self.alpha[x]
                     self.w[x] = - (wp2 / self.alpha[x])
                     self.q[x] = - self.alpha[x]
 
@@ -122,14 +136,17 @@ class Material(object):
                 self.zt[x] = (self.w[x] / self.q[x]) * (1 - self.eqt[x]) / G.dt
                 self.zt2[x] = (self.w[x] / self.q[x]) * (1 - self.eqt2[x])
 
-            EA = (e0 * self.er / G.dt) + 0.5 * self.se - (e0 / G.dt) * np.sum(self.zt2.real)
-            EB = (e0 * self.er / G.dt) - 0.5 * self.se - (e0 / G.dt) * np.sum(self.zt2.real)
+            # Sum as a Python float, so coefficients are calculated in double
+            # precision whatever the type of the constitutive parameters
+            zt2sum = float(np.sum(self.zt2.real))
+            EA = (e0 * self.er / G.dt) + 0.5 * se - (e0 / G.dt) * zt2sum
+            EB = (e0 * self.er / G.dt) - 0.5 * se - (e0 / G.dt) * zt2sum
 
         else:
-            EA = (e0 * self.er / G.dt) + 0.5 * self.se
-            EB = (e0 * self.er / G.dt) - 0.5 * self.se
+            EA = (e0 * self.er / G.dt) + 0.5 * se
+            EB = (e0 * self.er / G.dt) - 0.5 * se
 
-        if self.ID == 'pec' or self.se == float('inf'):
+        if self.ID == 'pec' or se == float('inf'):
             self.CA = 0
             self.CBx = 0
             self.CBy = 0
@@ -204,7 +221,11 @@ def process_materials(G):
         if Material.maxpoles > 0:
             z = 0
             for pole in range(Material.maxpoles):
-                G.updatecoeffsdispersive[material.numID, z:z + 3] = e0 * material.eqt2[pole], material.eqt[pole], material.zt[pole]
+                coeffs = e0 * material.eqt2[pole], material.eqt[pole], material.zt[pole]
+                # Real coefficients if all poles are real (see Material.realpoles)
+                if not np.iscomplexobj(G.updatecoeffsdispersive):
+                    coeffs = [coeff.real for coeff in coeffs]
+                G.updatecoeffsdispersive[material.numID, z:z + 3] = coeffs
                 z += 3
 
         # Construct information on material properties for printing table
@@ -31,10 +31,14 @@ import numpy as np
 from terminaltables import AsciiTable
 from tqdm import tqdm
 
+from gprMax.active_region import ActiveRegion
+from gprMax.batch import ModelBatch
+from gprMax.checkpoint import Checkpoint
 from gprMax.constants import floattype
 from gprMax.constants import complextype
 from gprMax.constants import cudafloattype
 from gprMax.constants import cudacomplextype
+from gprMax.energy_monitor import EnergyMonitor
 from gprMax.exceptions import GeneralError
 
 from gprMax.fields_outputs import store_outputs
@@ -42,14 +46,38 @@ from gprMax.fields_outputs import kernel_template_store_outputs
 from gprMax.fields_outputs import write_hdf5_outputfile
 
 from gprMax.fields_updates_ext import update_electric
+from gprMax.fields_updates_ext import update_electric_slab
+from gprMax.fields_updates_ext import update_electric_box
+from gprMax.fields_updates_ext import update_electric_batch
+from gprMax.fields_updates_ext import update_electric_tiled
+from gprMax.fields_updates_ext import update_electric_runs
+from gprMax.fields_updates_ext import update_electric_graded
 from gprMax.fields_updates_ext import update_magnetic
-from gprMax.fields_updates_ext import update_electric_dispersive_multipole_A
-from gprMax.fields_updates_ext import update_electric_dispersive_multipole_B
-from gprMax.fields_updates_ext import update_electric_dispersive_1pole_A
-from gprMax.fields_updates_ext import update_electric_dispersive_1pole_B
+from gprMax.fields_updates_ext import update_magnetic_slab
+from gprMax.fields_updates_ext import update_magnetic_box
+from gprMax.fields_updates_ext import update_magnetic_batch
+from gprMax.fields_updates_ext import update_magnetic_tiled
+from gprMax.fields_updates_ext import update_magnetic_runs
+from gprMax.fields_updates_ext import update_magnetic_graded
+from gprMax.fields_updates_ext import update_electric_dispersive_multipole
+from gprMax.fields_updates_ext import update_electric_dispersive_1pole
+from gprMax.fields_updates_ext import update_electric_dispersive_cells
+from gprMax.fields_updates_ext import update_electric_dispersive_cells_phi
+from gprMax.fields_updates_ext import update_electric_TMx
+from gprMax.fields_updates_ext import update_electric_TMy
+from gprMax.fields_updates_ext import update_electric_TMz
+from gprMax.fields_updates_ext import update_magnetic_TMx
+from gprMax.fields_updates_ext import update_magnetic_TMy
+from gprMax.fields_updates_ext import update_magnetic_TMz
+from gprMax.fields_updates_ext import update_electric_dispersive_cells_2D
+from gprMax.fields_updates_ext import update_electric_dispersive_cells_phi_2D
 from gprMax.fields_updates_gpu import kernels_template_fields
+from gprMax.geometry_cache import GeometryCache
+from gprMax.geometry_cache import geometry_hash
+from gprMax.geometry_cache import reuse_geometry
 
 from gprMax.grid import FDTDGrid
+from gprMax.grid import FDTDPlane
 from gprMax.grid import dispersion_analysis
 
 from gprMax.input_cmds_geometry import process_geometrycmds
@@ -60,16 +88,26 @@ from gprMax.input_cmds_multiuse import process_multicmds
 from gprMax.input_cmds_singleuse import process_singlecmds
 from gprMax.materials import Material
 from gprMax.materials import process_materials
+from gprMax.mpi_domain import MPIDomain
 from gprMax.pml import CFS
 from gprMax.pml import PML
 from gprMax.pml import build_pmls
+from gprMax.pml_updates.pml_updates_ext import PMLSlabs
+from gprMax.receivers import cpu_initialise_rx_arrays
 from gprMax.receivers import gpu_initialise_rx_arrays
 from gprMax.receivers import gpu_get_rx_array
+from gprMax.shm_slabs import SharedMemorySlabs
 from gprMax.snapshots import Snapshot
 from gprMax.snapshots import gpu_initialise_snapshot_array
 from gprMax.snapshots import gpu_get_snapshot_array
 from gprMax.snapshots_gpu import kernel_template_store_snapshot
+from gprMax.solve_cpu_ext import CPUSolver
+from gprMax.subgrids import process_subgrids
+from gprMax.sources import cpu_initialise_src_arrays
 from gprMax.sources import gpu_initialise_src_arrays
+from gprMax.source_updates_ext import update_hertzian_dipole
+from gprMax.source_updates_ext import update_magnetic_dipole
+from gprMax.source_updates_ext import update_voltage_source
 from gprMax.source_updates_gpu import kernels_template_sources
 from gprMax.utilities import get_host_info
 from gprMax.utilities import get_terminal_width
@@ -79,6 +117,28 @@ from gprMax.utilities import round32
 from gprMax.utilities import timer
 from gprMax.yee_cell_build_ext import build_electric_components
 from gprMax.yee_cell_build_ext import build_magnetic_components
+from gprMax.yee_cell_build_ext import build_material_runs
+
+# Grid of the previous model, whose built geometry is reused by the next model
+# if it has the same geometry
+Gprevious = None
+
+# Batch of models advanced together, which is solved once its last model has
+# been built
+modelbatch = None
+
+
+def clear_models():
+    """Clear the grid of the model, and any grids kept to be reused, from a
+        previous simulation run in the same process, e.g. one that was
+        interrupted, so they are not reused by the next simulation.
+    """
+
+    global Gprevious, modelbatch
+
+    globals().pop('G', None)
+    Gprevious = None
+    modelbatch = None
 
 
 def run_model(args, currentmodelrun, modelend, numbermodelruns, inputfile, usernamespace):
@@ -101,7 +161,7 @@ def run_model(args, currentmodelrun, modelend, numbermodelruns, inputfile, usern
     p = psutil.Process()
 
     # Declare variable to hold FDTDGrid class
-    global G
+    global G, Gprevious, modelbatch
 
     # Used for naming geometry and output files
     appendmodelnumber = '' if numbermodelruns == 1 and not args.task and not args.restart else str(currentmodelrun)
@@ -112,6 +172,10 @@ def run_model(args, currentmodelrun, modelend, numbermodelruns, inputfile, usern
         # Initialise an instance of the FDTDGrid class
         G = FDTDGrid()
 
+        # Maximum number of poles of dispersive materials of the model, i.e.
+        # not of any model previously run by the same process
+        Material.maxpoles = 0
+
         # Get information about host machine
         # (need to save this info to FDTDGrid instance after it has been created)
         G.hostinfo = get_host_info()
@@ -120,6 +184,21 @@ def run_model(args, currentmodelrun, modelend, numbermodelruns, inputfile, usern
         if args.gpu:
             G.gpu = args.gpu
 
+        # Cache blocking (tiling) of field updates on CPU
+        G.tiling = args.cpu_tiling
+
+        # Temporal blocking (wavefront) of time stepping loop on CPU
+        G.wavefront = args.cpu_wavefront
+
+        # Compiled (nogil) driver for time stepping loop on CPU
+        G.compiled = args.cpu_compiled
+
+        # Slabs of the domain updated by worker processes sharing field arrays
+        G.shmslabs = args.shm_slabs
+
+        # Fused update of all PML slabs in a single parallel region on CPU
+        G.pmlfused = args.cpu_pml_fused
+
         G.inputfilename = os.path.split(inputfile.name)[1]
         G.inputdirectory = os.path.dirname(os.path.abspath(inputfile.name))
         inputfilestr = '\n--- Model {}/{}, input file: {}'.format(currentmodelrun, modelend, inputfile.name)
@@ -161,9 +240,56 @@ def run_model(args, currentmodelrun, modelend, numbermodelruns, inputfile, usern
         # Process parameters for commands that can only occur once in the model
         process_singlecmds(singlecmds, G)
 
+        # Create any subgrids and move commands for objects, sources and
+        # receivers inside them to the subgrids
+        geometry = process_subgrids(multicmds, geometry, G)
+
+        # Checkpoints of the state of the solver, which the model can be
+        # resumed from without building its geometry, or whose time window
+        # can be extended from the state at the end of the simulation (before
+        # sources and receivers are created for the time window)
+        if args.checkpoint or args.resume or args.save_state or args.extend:
+            if G.subgrids:
+                raise GeneralError('Checkpoints are only available for models without subgrids')
+            G.checkpoint = Checkpoint(os.path.join(G.inputdirectory, os.path.splitext(G.inputfilename)[0] + appendmodelnumber + '_checkpoint.h5'), args.checkpoint, args.save_state or bool(args.extend))
+            if args.extend:
+                G.iterations = G.checkpoint.finished_iterations() + args.extend
+                G.timewindow = (G.iterations - 1) * G.dt
+                if G.messages:
+                    print('Time window - extended: {:g} secs ({} iterations)'.format(G.timewindow, G.iterations))
+
+        # Monitor of the total energy of the fields
+        if args.energy_monitor or args.energy_stop:
+            G.energymonitor = EnergyMonitor(args.energy_monitor or 100, args.energy_stop)
+
+        # Hash of the commands the geometry is built from, so the geometry of
+        # the previous model, or cached geometry, can be reused if it is the same
+        if not G.subgrids and args.mpi_domain is None:
+            G.geometryhash = geometry_hash(singlecmds, multicmds, geometry, G)
+
+        # Cache of built geometry, shared with other models (and processes)
+        # that build the same geometry
+        if args.geometry_cache:
+            if G.subgrids:
+                if G.messages:
+                    print(Fore.RED + '\nWARNING: Cache of built geometry is not available for models with subgrids, so the geometry will be built.' + Style.RESET_ALL)
+            elif G.geometryhash is None:
+                if G.messages:
+                    print(Fore.RED + '\nWARNING: Geometry is random, i.e. a fractal seed is not given, so it will not be cached.' + Style.RESET_ALL)
+            else:
+                G.geometrycache = GeometryCache(G.inputdirectory if args.geometry_cache is True else args.geometry_cache, G.geometryhash)
+
         # Process parameters for commands that can occur multiple times in the model
         if G.messages: print()
         process_multicmds(multicmds, G)
+        for subgrid in G.subgrids:
+            subgrid.process_cmds(G)
+
+        # Decompose the domain across MPI ranks
+        if args.mpi_domain is not None:
+            G.domain = MPIDomain(args.mpi_domain, G)
+            if G.messages:
+                print('\nDomain decomposition: {} MPI ranks, subdomain of first rank: {} x {} x {} cells'.format(' x '.join(str(p) for p in G.domain.dims), *G.domain.shape))
 
         # Estimate and check memory (RAM) usage
         G.memory_estimate_basic()
@@ -174,122 +300,193 @@ def run_model(args, currentmodelrun, modelend, numbermodelruns, inputfile, usern
             else:
                 print('\nMemory (RAM) required: ~{} host + ~{} GPU\n'.format(human_size(G.memoryusage), human_size(G.memoryusage)))
 
-        # Initialise an array for volumetric material IDs (solid), boolean
-        # arrays for specifying materials not to be averaged (rigid),
-        # an array for cell edge IDs (ID)
-        G.initialise_geometry_arrays()
-
-        # Initialise arrays for the field components
-        if G.gpu is None:
-            G.initialise_field_arrays()
-
-        # Process geometry commands in the order they were given
-        process_geometrycmds(geometry, G)
+        # Built geometry of the previous model, if it is the same
+        previous = Gprevious if Gprevious is not None and G.geometryhash is not None and Gprevious.geometryhash == G.geometryhash else None
+        Gprevious = None
 
-        # Build the PMLs and calculate initial coefficients
-        if G.messages: print()
-        if all(value == 0 for value in G.pmlthickness.values()):
+        if G.checkpoint and G.checkpoint.exists() and (args.resume or args.extend):
+            G.checkpoint.read(G)
             if G.messages:
-                print('PML: switched off')
-            pass  # If all the PMLs are switched off don't need to build anything
+                print('Resuming model from checkpoint file {} at iteration {}/{}'.format(G.checkpoint.filename, G.checkpoint.iteration, G.iterations))
+
         else:
-            # Set default CFS parameters for PML if not given
-            if not G.cfs:
-                G.cfs = [CFS()]
-            if G.messages:
-                if all(value == G.pmlthickness['x0'] for value in G.pmlthickness.values()):
-                    pmlinfo = str(G.pmlthickness['x0'])
-                else:
-                    pmlinfo = ''
-                    for key, value in G.pmlthickness.items():
-                        pmlinfo += '{}: {}, '.format(key, value)
-                    pmlinfo = pmlinfo[:-2] + ' cells'
-                print('PML: formulation: {}, order: {}, thickness: {}'.format(G.pmlformulation, len(G.cfs), pmlinfo))
-            pbar = tqdm(total=sum(1 for value in G.pmlthickness.values() if value > 0), desc='Building PML boundaries', ncols=get_terminal_width() - 1, file=sys.stdout, disable=not G.progressbars)
-            build_pmls(G, pbar)
-            pbar.close()
+            # Material IDs, materials and PMLs from the previous model, or from
+            # the cache, if the geometry has already been built
+            cached = previous is not None or (G.geometrycache is not None and G.geometrycache.exists())
+            if previous is not None:
+                reuse_geometry(previous, G)
+                previous = None
+                if G.messages:
+                    print('Geometry reused from previous model (geometry commands unchanged)')
+            elif cached:
+                G.geometrycache.read(G)
+                if G.messages:
+                    print('Geometry read from cache file {}'.format(G.geometrycache.filename))
+
+            # Initialise an array for volumetric material IDs (solid), boolean
+            # arrays for specifying materials not to be averaged (rigid),
+            # an array for cell edge IDs (ID)
+            else:
+                G.initialise_geometry_arrays()
 
-        # Build the model, i.e. set the material properties (ID) for every edge
-        # of every Yee cell
-        if G.messages: print()
-        pbar = tqdm(total=2, desc='Building main grid', ncols=get_terminal_width() - 1, file=sys.stdout, disable=not G.progressbars)
-        build_electric_components(G.solid, G.rigidE, G.ID, G)
-        pbar.update()
-        build_magnetic_components(G.solid, G.rigidH, G.ID, G)
-        pbar.update()
-        pbar.close()
-
-        # Add PEC boundaries to invariant direction in 2D modes
-        # N.B. 2D modes are a single cell slice of 3D grid
-        if '2D TMx' in G.mode:
-            # Ey & Ez components
-            G.ID[1, 0, :, :] = 0
-            G.ID[1, 1, :, :] = 0
-            G.ID[2, 0, :, :] = 0
-            G.ID[2, 1, :, :] = 0
-        elif '2D TMy' in G.mode:
-            # Ex & Ez components
-            G.ID[0, :, 0, :] = 0
-            G.ID[0, :, 1, :] = 0
-            G.ID[2, :, 0, :] = 0
-            G.ID[2, :, 1, :] = 0
-        elif '2D TMz' in G.mode:
-            # Ex & Ey components
-            G.ID[0, :, :, 0] = 0
-            G.ID[0, :, :, 1] = 0
-            G.ID[1, :, :, 0] = 0
-            G.ID[1, :, :, 1] = 0
-
-        # Process any voltage sources (that have resistance) to create a new
-        # material at the source location
-        for voltagesource in G.voltagesources:
-            voltagesource.create_material(G)
-
-        # Initialise arrays of update coefficients to pass to update functions
-        G.initialise_std_update_coeff_arrays()
-
-        # Initialise arrays of update coefficients and temporary values if
-        # there are any dispersive materials
-        if Material.maxpoles != 0:
-            # Update estimated memory (RAM) usage
-            G.memoryusage += int(3 * Material.maxpoles * (G.nx + 1) * (G.ny + 1) * (G.nz + 1) * np.dtype(complextype).itemsize)
-            G.memory_check()
-            if G.messages:
-                print('\nMemory (RAM) required - updated (dispersive): ~{}\n'.format(human_size(G.memoryusage)))
-
-            G.initialise_dispersive_arrays()
-
-        # Check there is sufficient memory to store any snapshots
-        if G.snapshots:
-            snapsmemsize = 0
-            for snap in G.snapshots:
-                # 2 x required to account for electric and magnetic fields
-                snapsmemsize += (2 * snap.datasizefield)
-            G.memoryusage += int(snapsmemsize)
-            G.memory_check(snapsmemsize=int(snapsmemsize))
-            if G.messages:
-                print('\nMemory (RAM) required - updated (snapshots): ~{}\n'.format(human_size(G.memoryusage)))
+            # Initialise arrays for the field components
+            if G.gpu is None:
+                G.initialise_field_arrays()
 
-        # Process complete list of materials - calculate update coefficients,
-        # store in arrays, and build text list of materials/properties
-        materialsdata = process_materials(G)
-        if G.messages:
-            print('\nMaterials:')
-            materialstable = AsciiTable(materialsdata)
-            materialstable.outer_border = False
-            materialstable.justify_columns[0] = 'right'
-            print(materialstable.table)
-
-        # Check to see if numerical dispersion might be a problem
-        results = dispersion_analysis(G)
-        if results['error'] and G.messages:
-            print(Fore.RED + "\nWARNING: Numerical dispersion analysis not carried out as {}".format(results['error']) + Style.RESET_ALL)
-        elif results['N'] < G.mingridsampling:
-            raise GeneralError("Non-physical wave propagation: Material '{}' has wavelength sampled by {} cells, less than required minimum for physical wave propagation. Maximum significant frequency estimated as {:g}Hz".format(results['material'].ID, results['N'], results['maxfreq']))
-        elif results['deltavp'] and np.abs(results['deltavp']) > G.maxnumericaldisp and G.messages:
-            print(Fore.RED + "\nWARNING: Potentially significant numerical dispersion. Estimated largest physical phase-velocity error is {:.2f}% in material '{}' whose wavelength sampled by {} cells. Maximum significant frequency estimated as {:g}Hz".format(results['deltavp'], results['material'].ID, results['N'], results['maxfreq']) + Style.RESET_ALL)
-        elif results['deltavp'] and G.messages:
-            print("\nNumerical dispersion analysis: estimated largest physical phase-velocity error is {:.2f}% in material '{}' whose wavelength sampled by {} cells. Maximum significant frequency estimated as {:g}Hz".format(results['deltavp'], results['material'].ID, results['N'], results['maxfreq']))
+            # Process geometry commands in the order they were given
+            if not cached:
+                process_geometrycmds(geometry, G)
+
+            # Grid of a domain decomposed across MPI ranks is the subdomain of the
+            # rank from here on
+            if G.domain:
+                G.domain.localise(G)
+
+            # Build the PMLs and calculate initial coefficients
+            if G.messages: print()
+            if all(value == 0 for value in G.pmlthickness.values()):
+                if G.messages:
+                    print('PML: switched off')
+                pass  # If all the PMLs are switched off don't need to build anything
+            else:
+                # Set default CFS parameters for PML if not given
+                if not G.cfs:
+                    G.cfs = [CFS()]
+                if G.messages:
+                    if all(value == G.pmlthickness['x0'] for value in G.pmlthickness.values()):
+                        pmlinfo = str(G.pmlthickness['x0'])
+                    else:
+                        pmlinfo = ''
+                        for key, value in G.pmlthickness.items():
+                            pmlinfo += '{}: {}, '.format(key, value)
+                        pmlinfo = pmlinfo[:-2] + ' cells'
+                    print('PML: formulation: {}, order: {}, thickness: {}'.format(G.pmlformulation, len(G.cfs), pmlinfo))
+                if not cached:
+                    pbar = tqdm(total=sum(1 for value in G.pmlthickness.values() if value > 0), desc='Building PML boundaries', ncols=get_terminal_width() - 1, file=sys.stdout, disable=not G.progressbars)
+                    if G.domain:
+                        G.domain.build_pmls(G, pbar)
+                    else:
+                        build_pmls(G, pbar)
+                    pbar.close()
+
+            if not cached:
+                # Build the model, i.e. set the material properties (ID) for every edge
+                # of every Yee cell
+                if G.messages: print()
+                pbar = tqdm(total=2, desc='Building main grid', ncols=get_terminal_width() - 1, file=sys.stdout, disable=not G.progressbars)
+                build_electric_components(G.solid, G.rigidE, G.ID, G)
+                pbar.update()
+                build_magnetic_components(G.solid, G.rigidH, G.ID, G)
+                pbar.update()
+                pbar.close()
+
+                # Add PEC boundaries to invariant direction in 2D modes
+                # N.B. 2D modes are a single cell slice of 3D grid
+                if '2D TMx' in G.mode:
+                    # Ey & Ez components
+                    G.ID[1, 0, :, :] = 0
+                    G.ID[1, 1, :, :] = 0
+                    G.ID[2, 0, :, :] = 0
+                    G.ID[2, 1, :, :] = 0
+                elif '2D TMy' in G.mode:
+                    # Ex & Ez components
+                    G.ID[0, :, 0, :] = 0
+                    G.ID[0, :, 1, :] = 0
+                    G.ID[2, :, 0, :] = 0
+                    G.ID[2, :, 1, :] = 0
+                elif '2D TMz' in G.mode:
+                    # Ex & Ey components
+                    G.ID[0, :, :, 0] = 0
+                    G.ID[0, :, :, 1] = 0
+                    G.ID[1, :, :, 0] = 0
+                    G.ID[1, :, :, 1] = 0
+
+                # Process any voltage sources (that have resistance) to create a new
+                # material at the source location
+                if G.domain:
+                    G.domain.create_materials(G)
+                else:
+                    for voltagesource in G.voltagesources:
+                        voltagesource.create_material(G)
+
+            # Find runs of cells in the z direction that share a single material
+            # so homogeneous regions are updated without gathering coefficients
+            if G.mode == '3D' and G.gpu is None and G.grading is None and G.materialruns is None:
+                G.materialruns = build_material_runs(G.ID, G.nx, G.ny, G.nz)
+
+            # Initialise arrays of update coefficients to pass to update functions
+            G.initialise_std_update_coeff_arrays()
+
+            # Initialise arrays of update coefficients and temporary values if
+            # there are any dispersive materials
+            if Material.maxpoles != 0:
+                # Store real coefficients and temporary values if all poles are
+                # real, and store temporary values only for cells in dispersive
+                # materials where this requires less memory (CPU only)
+                if G.gpu is None and not cached:
+                    if all(material.realpoles for material in G.materials):
+                        G.dispersivetype = floattype
+                    G.find_dispersive_cells()
+
+                # Update estimated memory (RAM) usage
+                G.memoryusage += G.memory_estimate_dispersive()
+                G.memory_check()
+                if G.messages:
+                    print('\nMemory (RAM) required - updated (dispersive): ~{}\n'.format(human_size(G.memoryusage)))
+
+                G.initialise_dispersive_arrays()
+
+            # Check there is sufficient memory to store any snapshots
+            if G.snapshots:
+                snapsmemsize = 0
+                for snap in G.snapshots:
+                    # 2 x required to account for electric and magnetic fields
+                    snapsmemsize += (2 * snap.datasizefield)
+                G.memoryusage += int(snapsmemsize)
+                G.memory_check(snapsmemsize=int(snapsmemsize))
+                if G.messages:
+                    print('\nMemory (RAM) required - updated (snapshots): ~{}\n'.format(human_size(G.memoryusage)))
+
+            # Process complete list of materials - calculate update coefficients,
+            # store in arrays, and build text list of materials/properties
+            materialsdata = process_materials(G)
+            if G.messages:
+                print('\nMaterials:')
+                materialstable = AsciiTable(materialsdata)
+                materialstable.outer_border = False
+                materialstable.justify_columns[0] = 'right'
+                print(materialstable.table)
+
+            # Use narrowest integer type for solid and ID arrays that can store the
+            # numeric IDs of all materials (CPU only as GPU kernels use 32-bit IDs)
+            if G.gpu is None:
+                saving = G.narrow_geometry_arrays()
+                if saving:
+                    G.memoryusage -= saving
+                    if G.messages:
+                        print('\nMemory (RAM) required - updated ({}-bit material IDs): ~{}'.format(8 * G.ID.itemsize, human_size(G.memoryusage)))
+
+            if G.geometrycache is not None and not cached:
+                G.geometrycache.write(G)
+
+            # Build any subgrids, and their coupling with the main grid
+            if G.subgrids:
+                if G.messages: print()
+                for subgrid in G.subgrids:
+                    subgrid.build(G)
+                if G.messages:
+                    print('\nMemory (RAM) required - updated (subgrids): ~{}'.format(human_size(G.memoryusage)))
+
+            # Check to see if numerical dispersion might be a problem
+            results = dispersion_analysis(G)
+            if results['error'] and G.messages:
+                print(Fore.RED + "\nWARNING: Numerical dispersion analysis not carried out as {}".format(results['error']) + Style.RESET_ALL)
+            elif results['N'] < G.mingridsampling:
+                raise GeneralError("Non-physical wave propagation: Material '{}' has wavelength sampled by {} cells, less than required minimum for physical wave propagation. Maximum significant frequency estimated as {:g}Hz".format(results['material'].ID, results['N'], results['maxfreq']))
+            elif results['deltavp'] and np.abs(results['deltavp']) > G.maxnumericaldisp and G.messages:
+                print(Fore.RED + "\nWARNING: Potentially significant numerical dispersion. Estimated largest physical phase-velocity error is {:.2f}% in material '{}' whose wavelength sampled by {} cells. Maximum significant frequency estimated as {:g}Hz".format(results['deltavp'], results['material'].ID, results['N'], results['maxfreq']) + Style.RESET_ALL)
+            elif results['deltavp'] and G.messages:
+                print("\nNumerical dispersion analysis: estimated largest physical phase-velocity error is {:.2f}% in material '{}' whose wavelength sampled by {} cells. Maximum significant frequency estimated as {:g}Hz".format(results['deltavp'], results['material'].ID, results['N'], results['maxfreq']))
 
     # If geometry information to be reused between model runs
     else:
@@ -305,11 +502,18 @@ def run_model(args, currentmodelrun, modelend, numbermodelruns, inputfile, usern
             for pml in G.pmls:
                 pml.initialise_field_arrays()
 
+            # Clear arrays for fields in any subgrids and their PML
+            for subgrid in G.subgrids:
+                subgrid.initialise_field_arrays()
+                for pml in subgrid.pmls:
+                    pml.initialise_field_arrays()
+
     # Adjust position of simple sources and receivers if required
+    nx, ny, nz = G.domain.size if G.domain else (G.nx, G.ny, G.nz)
     if G.srcsteps[0] != 0 or G.srcsteps[1] != 0 or G.srcsteps[2] != 0:
         for source in itertools.chain(G.hertziandipoles, G.magneticdipoles):
             if currentmodelrun == 1:
-                if source.xcoord + G.srcsteps[0] * modelend < 0 or source.xcoord + G.srcsteps[0] * modelend > G.nx or source.ycoord + G.srcsteps[1] * modelend < 0 or source.ycoord + G.srcsteps[1] * modelend > G.ny or source.zcoord + G.srcsteps[2] * modelend < 0 or source.zcoord + G.srcsteps[2] * modelend > G.nz:
+                if source.xcoord + G.srcsteps[0] * modelend < 0 or source.xcoord + G.srcsteps[0] * modelend > nx or source.ycoord + G.srcsteps[1] * modelend < 0 or source.ycoord + G.srcsteps[1] * modelend > ny or source.zcoord + G.srcsteps[2] * modelend < 0 or source.zcoord + G.srcsteps[2] * modelend > nz:
                     raise GeneralError('Source(s) will be stepped to a position outside the domain.')
             source.xcoord = source.xcoordorigin + (currentmodelrun - 1) * G.srcsteps[0]
             source.ycoord = source.ycoordorigin + (currentmodelrun - 1) * G.srcsteps[1]
@@ -317,23 +521,25 @@ def run_model(args, currentmodelrun, modelend, numbermodelruns, inputfile, usern
     if G.rxsteps[0] != 0 or G.rxsteps[1] != 0 or G.rxsteps[2] != 0:
         for receiver in G.rxs:
             if currentmodelrun == 1:
-                if receiver.xcoord + G.rxsteps[0] * modelend < 0 or receiver.xcoord + G.rxsteps[0] * modelend > G.nx or receiver.ycoord + G.rxsteps[1] * modelend < 0 or receiver.ycoord + G.rxsteps[1] * modelend > G.ny or receiver.zcoord + G.rxsteps[2] * modelend < 0 or receiver.zcoord + G.rxsteps[2] * modelend > G.nz:
+                if receiver.xcoord + G.rxsteps[0] * modelend < 0 or receiver.xcoord + G.rxsteps[0] * modelend > nx or receiver.ycoord + G.rxsteps[1] * modelend < 0 or receiver.ycoord + G.rxsteps[1] * modelend > ny or receiver.zcoord + G.rxsteps[2] * modelend < 0 or receiver.zcoord + G.rxsteps[2] * modelend > nz:
                     raise GeneralError('Receiver(s) will be stepped to a position outside the domain.')
             receiver.xcoord = receiver.xcoordorigin + (currentmodelrun - 1) * G.rxsteps[0]
             receiver.ycoord = receiver.ycoordorigin + (currentmodelrun - 1) * G.rxsteps[1]
             receiver.zcoord = receiver.zcoordorigin + (currentmodelrun - 1) * G.rxsteps[2]
 
-    # Write files for any geometry views and geometry object outputs
+    # Write files for any geometry views and geometry object outputs (except
+    # for a model resumed from a checkpoint, i.e. they have been written)
+    resumed = G.checkpoint is not None and G.checkpoint.iteration > 0
     if not (G.geometryviews or G.geometryobjectswrite) and args.geometry_only and G.messages:
         print(Fore.RED + '\nWARNING: No geometry views or geometry objects to output found.' + Style.RESET_ALL)
-    if G.geometryviews:
+    if G.geometryviews and not resumed:
         if G.messages: print()
         for i, geometryview in enumerate(G.geometryviews):
             geometryview.set_filename(appendmodelnumber, G)
             pbar = tqdm(total=geometryview.datawritesize, unit='byte', unit_scale=True, desc='Writing geometry view file {}/{}, {}'.format(i + 1, len(G.geometryviews), os.path.split(geometryview.filename)[1]), ncols=get_terminal_width() - 1, file=sys.stdout, disable=not G.progressbars)
             geometryview.write_vtk(G, pbar)
             pbar.close()
-    if G.geometryobjectswrite:
+    if G.geometryobjectswrite and not resumed:
         for i, geometryobject in enumerate(G.geometryobjectswrite):
             pbar = tqdm(total=geometryobject.datawritesize, unit='byte', unit_scale=True, desc='Writing geometry object file {}/{}, {}'.format(i + 1, len(G.geometryobjectswrite), os.path.split(geometryobject.filename)[1]), ncols=get_terminal_width() - 1, file=sys.stdout, disable=not G.progressbars)
             geometryobject.write_hdf5(G, pbar)
@@ -355,7 +561,7 @@ def run_model(args, currentmodelrun, modelend, numbermodelruns, inputfile, usern
         curdir = os.getcwd()
         os.chdir(inputdirectory)
         outputdir = os.path.abspath(outputdir)
-        if not os.path.isdir(outputdir):
+        if not os.path.isdir(outputdir) and (not G.domain or G.domain.rank == 0):
             os.mkdir(outputdir)
             if G.messages:
                 print('\nCreated output directory: {}'.format(outputdir))
@@ -368,27 +574,39 @@ def run_model(args, currentmodelrun, modelend, numbermodelruns, inputfile, usern
 
         # Main FDTD solving functions for either CPU or GPU
         if G.gpu is None:
-            tsolve = solve_cpu(currentmodelrun, modelend, G)
+            # Sources and receivers of a domain decomposed across MPI ranks
+            # are updated by the ranks that own them, and their outputs
+            # gathered to the first rank
+            if G.domain:
+                G.domain.route(G)
+            # Models advanced together in a batch are solved, and their
+            # outputs written, once the last model of the batch is added
+            if args.batch and args.batch > 1:
+                if modelbatch is None:
+                    modelbatch = ModelBatch(min(args.batch, modelend - currentmodelrun + 1), G)
+                modelbatch.add(G, outputfile, appendmodelnumber)
+                if not modelbatch.full():
+                    if G.messages:
+                        print('Model added to batch of models solved together ({}/{})'.format(len(modelbatch.models), modelbatch.nmodels))
+                    Gprevious = G if G.geometryhash is not None else None
+                    del G
+                    return 0
+                tsolve = solve_cpu_batch(currentmodelrun, modelend, modelbatch)
+            else:
+                tsolve = solve_cpu(currentmodelrun, modelend, G)
+            if G.domain:
+                G.domain.gather_outputs(G)
         else:
             tsolve, memsolve = solve_gpu(currentmodelrun, modelend, G)
 
-        # Write an output file in HDF5 format
-        write_hdf5_outputfile(outputfile, G)
-
-        # Write any snapshots to file
-        if G.snapshots:
-            # Create directory and construct filename from user-supplied name and model run number
-            snapshotdir = os.path.join(G.inputdirectory, os.path.splitext(G.inputfilename)[0] + '_snaps' + appendmodelnumber)
-            if not os.path.exists(snapshotdir):
-                os.mkdir(snapshotdir)
-
-            if G.messages: print()
-            for i, snap in enumerate(G.snapshots):
-                snap.filename = os.path.abspath(os.path.join(snapshotdir, snap.basefilename + '.vti'))
-                pbar = tqdm(total=snap.vtkdatawritesize, leave=True, unit='byte', unit_scale=True, desc='Writing snapshot file {} of {}, {}'.format(i + 1, len(G.snapshots), os.path.split(snap.filename)[1]), ncols=get_terminal_width() - 1, file=sys.stdout, disable=not G.progressbars)
-                snap.write_vtk_imagedata(pbar, G)
-                pbar.close()
-            if G.messages: print()
+        # Write output files, and any snapshots, of the model or of every
+        # model in the batch
+        if modelbatch is not None:
+            for Gm, outputfilem, appendmodelnumberm in modelbatch.models:
+                write_outputs(outputfilem, appendmodelnumberm, Gm)
+            modelbatch = None
+        else:
+            write_outputs(outputfile, appendmodelnumber, G)
 
         if G.messages:
             if G.gpu is None:
@@ -398,13 +616,126 @@ def run_model(args, currentmodelrun, modelend, numbermodelruns, inputfile, usern
             print('Solving time [HH:MM:SS]: {}'.format(datetime.timedelta(seconds=tsolve)))
 
     # If geometry information to be reused between model runs then FDTDGrid
-    # class instance must be global so that it persists
+    # class instance must be global so that it persists. Otherwise it is kept
+    # so its geometry can be reused if the next model has the same geometry
     if not args.geometry_fixed:
+        Gprevious = G if G.geometryhash is not None and currentmodelrun < modelend else None
         del G
 
     return tsolve
 
 
+def write_outputs(outputfile, appendmodelnumber, G):
+    """
+    Writes the output file, and any snapshots, of a model once it has been
+    solved.
+
+    Args:
+        outputfile (str): Name of the output file.
+        appendmodelnumber (str): Number appended to file names of the model.
+        G (class): Grid class instance - holds essential parameters describing the model.
+    """
+
+    # Write an output file in HDF5 format (from the first rank only for a
+    # domain decomposed across MPI ranks)
+    if not G.domain or G.domain.rank == 0:
+        write_hdf5_outputfile(outputfile, G)
+
+    # Checkpoint is no longer needed once the model has finished, unless
+    # it is of the state at the end of the simulation
+    if G.checkpoint and not G.checkpoint.final:
+        G.checkpoint.remove()
+
+    # Write any snapshots to file
+    if G.snapshots and (not G.domain or G.domain.rank == 0):
+        # Create directory and construct filename from user-supplied name and model run number
+        snapshotdir = os.path.join(G.inputdirectory, os.path.splitext(G.inputfilename)[0] + '_snaps' + appendmodelnumber)
+        if not os.path.exists(snapshotdir):
+            os.mkdir(snapshotdir)
+
+        if G.messages: print()
+        for i, snap in enumerate(G.snapshots):
+            snap.filename = os.path.abspath(os.path.join(snapshotdir, snap.basefilename + '.vti'))
+            pbar = tqdm(total=snap.vtkdatawritesize, leave=True, unit='byte', unit_scale=True, desc='Writing snapshot file {} of {}, {}'.format(i + 1, len(G.snapshots), os.path.split(snap.filename)[1]), ncols=get_terminal_width() - 1, file=sys.stdout, disable=not G.progressbars)
+            snap.write_vtk_imagedata(pbar, G)
+            pbar.close()
+        if G.messages: print()
+
+
+def stop_early(iteration, G):
+    """
+    Stops a model early once the total energy of the fields has decayed (see
+    EnergyMonitor). Receiver outputs for the remaining iterations are zero,
+    and any snapshots of the remaining iterations are stored from the field
+    components at the iteration the model is stopped at.
+
+    Args:
+        iteration (int): Iteration the model is stopped at.
+        G (class): Grid class instance - holds essential parameters describing the model.
+    """
+
+    for snap in G.snapshots:
+        if snap.time > iteration + 1:
+            snap.store(G)
+
+    if G.messages:
+        print('\nTotal energy of the fields has decayed below {:g} of its peak, model stopped at iteration {} of {}'.format(G.energymonitor.threshold, iteration + 1, G.iterations))
+
+
+def tune_tiles(G, trials=2):
+    """
+    Selects tile sizes for the cache blocked (tiled) electric and magnetic
+    field updates by timing a few trial iterations of each candidate on the
+    grid. The trial iterations are carried out before the simulation starts,
+    i.e. on zero field arrays (or those of a model resumed from a
+    checkpoint), which are reset afterwards.
+
+    Args:
+        G (class): Grid class instance - holds essential parameters describing the model.
+        trials (int): Number of timed trial iterations for each candidate.
+
+    Returns:
+        tiles (tuple): Fastest tile size (x, y) in cells.
+    """
+
+    # Candidate tile sizes - a tile of a single x-slice and full y-extent is
+    # equivalent to the standard (untiled) updates
+    candidates = [(1, G.ny)]
+    for tilex in (1, 4, 16):
+        for tiley in (8, 32, 128):
+            if tilex < G.nx and tiley < G.ny:
+                candidates.append((tilex, tiley))
+
+    # Field arrays of a model resumed from a checkpoint are restored afterwards
+    fields = (G.Ex, G.Ey, G.Ez, G.Hx, G.Hy, G.Hz)
+    resumed = [field.copy() for field in fields] if G.checkpoint and G.checkpoint.iteration else None
+
+    tiles = candidates[0]
+    tmin = float('inf')
+    for candidate in candidates:
+        # Warm up caches before timing
+        update_magnetic_tiled(G.nx, G.ny, G.nz, G.nthreads, candidate[0], candidate[1], G.updatecoeffsH, G.ID, G.Ex, G.Ey, G.Ez, G.Hx, G.Hy, G.Hz)
+        tstart = timer()
+        for trial in range(trials):
+            update_magnetic_tiled(G.nx, G.ny, G.nz, G.nthreads, candidate[0], candidate[1], G.updatecoeffsH, G.ID, G.Ex, G.Ey, G.Ez, G.Hx, G.Hy, G.Hz)
+            update_electric_tiled(G.nx, G.ny, G.nz, G.nthreads, candidate[0], candidate[1], G.updatecoeffsE, G.ID, G.Ex, G.Ey, G.Ez, G.Hx, G.Hy, G.Hz)
+        t = timer() - tstart
+        if t < tmin:
+            tmin = t
+            tiles = candidate
+
+    for n, field in enumerate(fields):
+        if resumed:
+            field[:] = resumed[n]
+        else:
+            field.fill(0)
+
+    if G.messages:
+        print('Cache blocking (tiling) of field updates: tile size {} x {} cells\n'.format(tiles[0], tiles[1]))
+
+    return tiles
+
+
 def solve_cpu(currentmodelrun, modelend, G):
     """
     Solving using FDTD method on CPU. Parallelised using Cython (OpenMP) for
@@ -419,58 +750,707 @@ def solve_cpu(currentmodelrun, modelend, G):
         tsolve (float): Time taken to execute solving
     """
 
+    # Slabs of the domain updated by worker processes sharing field arrays (3D, non-dispersive, without subgrids and with uniform spatial steps only)
+    if G.shmslabs:
+        if G.mode == '3D' and Material.maxpoles == 0 and not G.subgrids and G.grading is None:
+            return solve_cpu_shm(currentmodelrun, modelend, G)
+        elif G.messages:
+            print(Fore.RED + 'WARNING: slabs of the domain in shared memory are only available for 3D models with non-dispersive materials, without subgrids and with uniform spatial steps, standard field updates will be used.' + Style.RESET_ALL)
+
+    # Temporal blocking (wavefront) of time stepping loop (3D, non-dispersive, without subgrids and with uniform spatial steps only)
+    if G.wavefront:
+        if G.mode == '3D' and Material.maxpoles == 0 and not G.subgrids and G.grading is None:
+            return solve_cpu_wavefront(currentmodelrun, modelend, G)
+        elif G.messages:
+            print(Fore.RED + 'WARNING: temporal blocking (wavefront) is only available for 3D models with non-dispersive materials, without subgrids and with uniform spatial steps, standard field updates will be used.' + Style.RESET_ALL)
+
+    # 2D models are solved using arrays of the plane of the model
+    if '2D' in G.mode:
+        if G.tiling and G.messages:
+            print(Fore.RED + 'WARNING: cache blocked (tiled) field updates are only available for 3D models, 2D field updates will be used.' + Style.RESET_ALL)
+        if G.compiled and G.messages:
+            print(Fore.RED + 'WARNING: compiled driver for time stepping loop is only available for 3D models, 2D field updates will be used.' + Style.RESET_ALL)
+        return solve_cpu_2d(currentmodelrun, modelend, G)
+
+    # Select tile sizes for cache blocked (tiled) field updates (3D with uniform spatial steps only)
+    if G.tiling and G.tiles is None and G.mode == '3D':
+        if G.grading is None:
+            G.tiles = tune_tiles(G)
+        elif G.messages:
+            print(Fore.RED + 'WARNING: cache blocked (tiled) field updates are only available for models with uniform spatial steps, standard field updates will be used.' + Style.RESET_ALL)
+
+    # Compiled (nogil) driver for time stepping loop (without subgrids and with uniform spatial steps only)
+    if G.compiled:
+        if not G.subgrids and G.grading is None:
+            return solve_cpu_compiled(currentmodelrun, modelend, G)
+        elif G.messages:
+            print(Fore.RED + 'WARNING: compiled driver for time stepping loop is only available for models without subgrids and with uniform spatial steps, standard time stepping loop will be used.' + Style.RESET_ALL)
+
+    # Arrays of source information and waveform values so that sources of
+    # each class are updated together by a compiled kernel
+    srcs_voltage = cpu_initialise_src_arrays(G.voltagesources, G)
+    srcs_hertzian = cpu_initialise_src_arrays(G.hertziandipoles, G)
+    srcs_magnetic = cpu_initialise_src_arrays(G.magneticdipoles, G)
+
+    # Arrays of receiver cells and output components so that field components
+    # for every receiver are stored by a compiled kernel
+    rxarrays = cpu_initialise_rx_arrays(G.rxs, G)
+
+    # PML slabs are updated in turn, or all together in a single parallel region
+    pmls = [PMLSlabs(G)] if G.pmlfused and G.pmls else G.pmls
+
+    # Dispersive terms of electric field updates for cells in dispersive
+    # materials, if temporary dispersive arrays are only stored for these cells
+    if G.dispersivecells is not None:
+        dispersivephi = [np.zeros(cells.size, dtype=np.float32) for cells in G.dispersivecells]
+
+    for subgrid in G.subgrids:
+        subgrid.initialise_solve()
+
+    # Iteration to start from, and receiver outputs up to it, for a model
+    # resumed from a checkpoint
+    iterationstart = G.checkpoint.restore_outputs(G) if G.checkpoint else 0
+
+    # Box of cells around the sources outside of which field components are
+    # still zero, so field and PML updates are restricted to it until it
+    # covers the domain (non-dispersive, without subgrids and with uniform
+    # spatial steps only, and all field components must be zero at the start)
+    sources = G.voltagesources + G.hertziandipoles + G.magneticdipoles + G.transmissionlines
+    if sources and iterationstart == 0 and Material.maxpoles == 0 and not G.subgrids and G.materialruns and not G.domain:
+        region = ActiveRegion(G)
+    else:
+        region = None
+
+    if G.energymonitor:
+        G.energymonitor.initialise(G)
+
     tsolvestart = timer()
 
-    for iteration in tqdm(range(G.iterations), desc='Running simulation, model ' + str(currentmodelrun) + '/' + str(modelend), ncols=get_terminal_width() - 1, file=sys.stdout, disable=not G.progressbars):
+    for iteration in tqdm(range(iterationstart, G.iterations), desc='Running simulation, model ' + str(currentmodelrun) + '/' + str(modelend), ncols=get_terminal_width() - 1, file=sys.stdout, disable=not G.progressbars):
+        # Write a checkpoint of the state of the solver
+        if G.checkpoint and G.checkpoint.interval and iteration > iterationstart and iteration % G.checkpoint.interval == 0:
+            G.checkpoint.write(iteration, G)
+
         # Store field component values for every receiver and transmission line
-        store_outputs(iteration, G.Ex, G.Ey, G.Ez, G.Hx, G.Hy, G.Hz, G)
+        store_outputs(iteration, G.Ex, G.Ey, G.Ez, G.Hx, G.Hy, G.Hz, G, rxarrays)
 
         # Store any snapshots
         for snap in G.snapshots:
             if snap.time == iteration + 1:
                 snap.store(G)
 
+        # Grow box of cells outside of which field components are zero
+        if region:
+            region.grow()
+            if region.full():
+                region = None
+
         # Update magnetic field components
-        update_magnetic(G.nx, G.ny, G.nz, G.nthreads, G.updatecoeffsH, G.ID, G.Ex, G.Ey, G.Ez, G.Hx, G.Hy, G.Hz)
+        if region:
+            update_magnetic_box(*region.extent(), G.nx, G.ny, G.nz, G.nthreads, G.updatecoeffsH, G.ID, G.materialruns[0], G.materialruns[1], G.Ex, G.Ey, G.Ez, G.Hx, G.Hy, G.Hz)
+        elif G.tiles:
+            update_magnetic_tiled(G.nx, G.ny, G.nz, G.nthreads, G.tiles[0], G.tiles[1], G.updatecoeffsH, G.ID, G.Ex, G.Ey, G.Ez, G.Hx, G.Hy, G.Hz)
+        elif G.grading is not None:
+            update_magnetic_graded(G.nx, G.ny, G.nz, G.nthreads, G.updatecoeffsH, G.ID, *G.grading[3:], G.Ex, G.Ey, G.Ez, G.Hx, G.Hy, G.Hz)
+        elif G.materialruns:
+            update_magnetic_runs(G.nx, G.ny, G.nz, G.nthreads, G.updatecoeffsH, G.ID, G.materialruns[0], G.materialruns[1], G.Ex, G.Ey, G.Ez, G.Hx, G.Hy, G.Hz)
+        else:
+            update_magnetic(G.nx, G.ny, G.nz, G.nthreads, G.updatecoeffsH, G.ID, G.Ex, G.Ey, G.Ez, G.Hx, G.Hy, G.Hz)
 
         # Update magnetic field components with the PML correction
-        for pml in G.pmls:
+        for pml in region.active_pmls(pmls, G) if region else pmls:
             pml.update_magnetic(G)
 
+        # Exchange magnetic field components with neighbouring MPI ranks
+        if G.domain:
+            G.domain.exchange_magnetic(G)
+
         # Update magnetic field components from sources
-        for source in G.transmissionlines + G.magneticdipoles:
+        for source in G.transmissionlines:
             source.update_magnetic(iteration, G.updatecoeffsH, G.ID, G.Hx, G.Hy, G.Hz, G)
+        if G.magneticdipoles:
+            update_magnetic_dipole(len(G.magneticdipoles), iteration, G.dt, *srcs_magnetic, G.updatecoeffsH, G.ID, G.Hx, G.Hy, G.Hz)
+
+        # Advance subgrids, and correct magnetic field components on their outer surfaces
+        for subgrid in G.subgrids:
+            subgrid.update_magnetic(iteration, G)
+
+        # Grow box of cells outside of which field components are zero
+        if region:
+            region.grow()
+            if region.full():
+                region = None
 
         # Update electric field components
-        # All materials are non-dispersive so do standard update
-        if Material.maxpoles == 0:
-            update_electric(G.nx, G.ny, G.nz, G.nthreads, G.updatecoeffsE, G.ID, G.Ex, G.Ey, G.Ez, G.Hx, G.Hy, G.Hz)
-        # If there are any dispersive materials do 1st part of dispersive update
-        # (it is split into two parts as it requires present and updated electric field values).
+        # The dispersive update is split into two parts as it requires present
+        # and updated electric field values, so the 2nd part can only be
+        # carried out after the PML and source updates. It is carried out
+        # together with the 1st part in the next iteration, i.e. in a single
+        # sweep over the temporary dispersive arrays.
+        # All materials are non-dispersive, or temporary dispersive arrays are
+        # only stored for cells in dispersive materials, so do standard update
+        # (with dispersive update carried out on the dispersive cells before,
+        # and dispersive term applied after, if required)
+        if Material.maxpoles == 0 or G.dispersivecells is not None:
+            if G.dispersivecells is not None:
+                update_electric_dispersive_cells(G.nthreads, Material.maxpoles, G.updatecoeffsdispersive, G.ID, *G.dispersivecells, G.Tx, G.Ty, G.Tz, *dispersivephi, G.Ex, G.Ey, G.Ez)
+            if region:
+                update_electric_box(*region.extent(), G.nx, G.ny, G.nz, G.nthreads, G.updatecoeffsE, G.ID, G.materialruns[0], G.materialruns[1], G.Ex, G.Ey, G.Ez, G.Hx, G.Hy, G.Hz)
+            elif G.tiles:
+                update_electric_tiled(G.nx, G.ny, G.nz, G.nthreads, G.tiles[0], G.tiles[1], G.updatecoeffsE, G.ID, G.Ex, G.Ey, G.Ez, G.Hx, G.Hy, G.Hz)
+            elif G.grading is not None:
+                update_electric_graded(G.nx, G.ny, G.nz, G.nthreads, G.updatecoeffsE, G.ID, *G.grading[:3], G.Ex, G.Ey, G.Ez, G.Hx, G.Hy, G.Hz)
+            elif G.materialruns:
+                update_electric_runs(G.nx, G.ny, G.nz, G.nthreads, G.updatecoeffsE, G.ID, G.materialruns[0], G.materialruns[1], G.Ex, G.Ey, G.Ez, G.Hx, G.Hy, G.Hz)
+            else:
+                update_electric(G.nx, G.ny, G.nz, G.nthreads, G.updatecoeffsE, G.ID, G.Ex, G.Ey, G.Ez, G.Hx, G.Hy, G.Hz)
+            if G.dispersivecells is not None:
+                update_electric_dispersive_cells_phi(G.nthreads, G.updatecoeffsE, G.ID, *G.dispersivecells, *dispersivephi, G.Ex, G.Ey, G.Ez)
+        # If there are any dispersive materials do dispersive update
         elif Material.maxpoles == 1:
-            update_electric_dispersive_1pole_A(G.nx, G.ny, G.nz, G.nthreads, G.updatecoeffsE, G.updatecoeffsdispersive, G.ID, G.Tx, G.Ty, G.Tz, G.Ex, G.Ey, G.Ez, G.Hx, G.Hy, G.Hz)
+            update_electric_dispersive_1pole(G.nx, G.ny, G.nz, G.nthreads, G.updatecoeffsE, G.updatecoeffsdispersive, G.ID, G.Tx, G.Ty, G.Tz, G.Ex, G.Ey, G.Ez, G.Hx, G.Hy, G.Hz)
         elif Material.maxpoles > 1:
-            update_electric_dispersive_multipole_A(G.nx, G.ny, G.nz, G.nthreads, Material.maxpoles, G.updatecoeffsE, G.updatecoeffsdispersive, G.ID, G.Tx, G.Ty, G.Tz, G.Ex, G.Ey, G.Ez, G.Hx, G.Hy, G.Hz)
+            update_electric_dispersive_multipole(G.nx, G.ny, G.nz, G.nthreads, Material.maxpoles, G.updatecoeffsE, G.updatecoeffsdispersive, G.ID, G.Tx, G.Ty, G.Tz, G.Ex, G.Ey, G.Ez, G.Hx, G.Hy, G.Hz)
 
         # Update electric field components with the PML correction
-        for pml in G.pmls:
+        for pml in region.active_pmls(pmls, G) if region else pmls:
             pml.update_electric(G)
 
         # Update electric field components from sources (update any Hertzian dipole sources last)
-        for source in G.voltagesources + G.transmissionlines + G.hertziandipoles:
+        if G.voltagesources:
+            update_voltage_source(len(G.voltagesources), iteration, G.dt, *srcs_voltage, G.updatecoeffsE, G.ID, G.Ex, G.Ey, G.Ez)
+        for source in G.transmissionlines:
             source.update_electric(iteration, G.updatecoeffsE, G.ID, G.Ex, G.Ey, G.Ez, G)
+        if G.hertziandipoles:
+            update_hertzian_dipole(len(G.hertziandipoles), iteration, G.dt, *srcs_hertzian, G.updatecoeffsE, G.ID, G.Ex, G.Ey, G.Ez)
 
-        # If there are any dispersive materials do 2nd part of dispersive update
-        # (it is split into two parts as it requires present and updated electric
-        # field values). Therefore it can only be completely updated after the
-        # electric field has been updated by the PML and source updates.
-        if Material.maxpoles == 1:
-            update_electric_dispersive_1pole_B(G.nx, G.ny, G.nz, G.nthreads, G.updatecoeffsdispersive, G.ID, G.Tx, G.Ty, G.Tz, G.Ex, G.Ey, G.Ez)
-        elif Material.maxpoles > 1:
-            update_electric_dispersive_multipole_B(G.nx, G.ny, G.nz, G.nthreads, Material.maxpoles, G.updatecoeffsdispersive, G.ID, G.Tx, G.Ty, G.Tz, G.Ex, G.Ey, G.Ez)
+        # Advance subgrids, and correct electric field components on their outer surfaces
+        for subgrid in G.subgrids:
+            subgrid.update_electric(iteration, G)
+
+        # Exchange electric field components with neighbouring MPI ranks
+        if G.domain:
+            G.domain.exchange_electric(G)
+
+        # Sample total energy of the fields, and stop the model once it has decayed
+        if G.energymonitor and (iteration + 1) % G.energymonitor.interval == 0 and G.energymonitor.check(iteration, G, G.Ex, G.Ey, G.Ez, G.Hx, G.Hy, G.Hz):
+            stop_early(iteration, G)
+            break
 
     tsolve = timer() - tsolvestart
 
+    # Write a checkpoint of the state at the end of the simulation
+    if G.checkpoint and G.checkpoint.final:
+        G.checkpoint.write(G.iterations, G)
+
+    return tsolve
+
+
+def solve_cpu_batch(currentmodelrun, modelend, batch):
+    """
+    Solving using FDTD method on CPU for a batch of models, e.g. traces of a
+    B-scan, that are advanced together. If the models share their geometry
+    the electric and magnetic field updates of all of them are carried out in
+    a single sweep over the grid, so the material IDs and update coefficients
+    are loaded once for the batch. PML, sources, receivers and snapshots are
+    updated for each model in turn.
+
+    Args:
+        currentmodelrun (int): Current model run number, i.e. last model of the batch.
+        modelend (int): Number of last model to run.
+        batch (class): ModelBatch class instance - holds the models of the batch.
+
+    Returns:
+        tsolve (float): Time taken to execute solving
+    """
+
+    grids = batch.grids()
+    G = grids[0]
+    firstmodelrun = currentmodelrun - len(grids) + 1
+    batch.separate_pmls()
+
+    # Models that do not share their geometry are solved in turn
+    if not batch.shared():
+        if G.messages:
+            print(Fore.RED + 'WARNING: models of the batch do not share their geometry and time window, or are not 3D models with non-dispersive materials, without subgrids and with uniform spatial steps, so they will be solved in turn.' + Style.RESET_ALL)
+        return sum(solve_cpu(firstmodelrun + m, modelend, Gm) for m, Gm in enumerate(grids))
+
+    # Arrays of source and receiver information, and PML slabs, of each model
+    models = []
+    for Gm in grids:
+        srcs_voltage = cpu_initialise_src_arrays(Gm.voltagesources, Gm)
+        srcs_hertzian = cpu_initialise_src_arrays(Gm.hertziandipoles, Gm)
+        srcs_magnetic = cpu_initialise_src_arrays(Gm.magneticdipoles, Gm)
+        rxarrays = cpu_initialise_rx_arrays(Gm.rxs, Gm)
+        pmls = [PMLSlabs(Gm)] if Gm.pmlfused and Gm.pmls else Gm.pmls
+        models.append((Gm, srcs_voltage, srcs_hertzian, srcs_magnetic, rxarrays, pmls))
+
+    tsolvestart = timer()
+
+    for iteration in tqdm(range(G.iterations), desc='Running simulation, models ' + str(firstmodelrun) + '-' + str(currentmodelrun) + '/' + str(modelend), ncols=get_terminal_width() - 1, file=sys.stdout, disable=not G.progressbars):
+        # Store field component values for every receiver and transmission
+        # line, and any snapshots, of each model
+        for Gm, srcs_voltage, srcs_hertzian, srcs_magnetic, rxarrays, pmls in models:
+            store_outputs(iteration, Gm.Ex, Gm.Ey, Gm.Ez, Gm.Hx, Gm.Hy, Gm.Hz, Gm, rxarrays)
+            for snap in Gm.snapshots:
+                if snap.time == iteration + 1:
+                    snap.store(Gm)
+
+        # Update magnetic field components of all models
+        update_magnetic_batch(len(grids), G.nx, G.ny, G.nz, G.nthreads, G.updatecoeffsH, G.ID, G.materialruns[0], G.materialruns[1], batch.Ex, batch.Ey, batch.Ez, batch.Hx, batch.Hy, batch.Hz)
+
+        # Update magnetic field components with the PML correction, and from
+        # sources, of each model
+        for Gm, srcs_voltage, srcs_hertzian, srcs_magnetic, rxarrays, pmls in models:
+            for pml in pmls:
+                pml.update_magnetic(Gm)
+            for source in Gm.transmissionlines:
+                source.update_magnetic(iteration, Gm.updatecoeffsH, Gm.ID, Gm.Hx, Gm.Hy, Gm.Hz, Gm)
+            if Gm.magneticdipoles:
+                update_magnetic_dipole(len(Gm.magneticdipoles), iteration, Gm.dt, *srcs_magnetic, Gm.updatecoeffsH, Gm.ID, Gm.Hx, Gm.Hy, Gm.Hz)
+
+        # Update electric field components of all models
+        update_electric_batch(len(grids), G.nx, G.ny, G.nz, G.nthreads, G.updatecoeffsE, G.ID, G.materialruns[0], G.materialruns[1], batch.Ex, batch.Ey, batch.Ez, batch.Hx, batch.Hy, batch.Hz)
+
+        # Update electric field components with the PML correction, and from
+        # sources (update any Hertzian dipole sources last), of each model
+        for Gm, srcs_voltage, srcs_hertzian, srcs_magnetic, rxarrays, pmls in models:
+            for pml in pmls:
+                pml.update_electric(Gm)
+            if Gm.voltagesources:
+                update_voltage_source(len(Gm.voltagesources), iteration, Gm.dt, *srcs_voltage, Gm.updatecoeffsE, Gm.ID, Gm.Ex, Gm.Ey, Gm.Ez)
+            for source in Gm.transmissionlines:
+                source.update_electric(iteration, Gm.updatecoeffsE, Gm.ID, Gm.Ex, Gm.Ey, Gm.Ez, Gm)
+            if Gm.hertziandipoles:
+                update_hertzian_dipole(len(Gm.hertziandipoles), iteration, Gm.dt, *srcs_hertzian, Gm.updatecoeffsE, Gm.ID, Gm.Ex, Gm.Ey, Gm.Ez)
+
+    tsolve = timer() - tsolvestart
+
+    return tsolve
+
+
+def solve_cpu_2d(currentmodelrun, modelend, G):
+    """
+    Solving using FDTD method on CPU for 2D (TMx, TMy or TMz) models. Only
+    the field components that are live in the plane of the model are stored
+    and updated, as 2D arrays (see FDTDPlane), rather than a single cell slice
+    of the 3D grid, together with the PML field arrays and temporary
+    dispersive arrays of these components.
+
+    Args:
+        currentmodelrun (int): Current model run number.
+        modelend (int): Number of last model to run.
+        G (class): Grid class instance - holds essential parameters describing the model.
+
+    Returns:
+        tsolve (float): Time taken to execute solving
+    """
+
+    P = FDTDPlane(G)
+    update_electric_2D, update_magnetic_2D = {'2D TMx': (update_electric_TMx, update_magnetic_TMx),
+                                              '2D TMy': (update_electric_TMy, update_magnetic_TMy),
+                                              '2D TMz': (update_electric_TMz, update_magnetic_TMz)}[G.mode]
+    Ex, Ey, Ez, Hx, Hy, Hz = P.fields.values()
+
+    # Sources are polarised along the invariant direction of the grid (see
+    # process_multicmds), and only sources in the plane of the model are updated
+    voltagesources = [src for src in G.voltagesources if P.in_plane(src)]
+    hertziandipoles = [src for src in G.hertziandipoles if P.in_plane(src)]
+    magneticdipoles = [src for src in G.magneticdipoles if P.in_plane(src)]
+    transmissionlines = [src for src in G.transmissionlines if P.in_plane(src)]
+    srcs_voltage = cpu_initialise_src_arrays(voltagesources, G)
+    srcs_hertzian = cpu_initialise_src_arrays(hertziandipoles, G)
+    srcs_magnetic = cpu_initialise_src_arrays(magneticdipoles, G)
+
+    # Receivers store field components from the plane of the model, so
+    # receivers in the invariant direction of the grid have no outputs
+    rxindices, rxcomponents, rxspacings, rxoutputs = cpu_initialise_rx_arrays(G.rxs, G)
+    for i, rx in enumerate(G.rxs):
+        if not P.in_plane(rx):
+            rxcomponents[i, :] = -1
+    rxarrays = (P.flat_indices(rxindices, G), rxcomponents, rxspacings, rxoutputs)
+
+    # PML corrections of the plane of the model
+    pmlselectric = [pml.plane_update(G, P, 'electric') for pml in G.pmls]
+    pmlsmagnetic = [pml.plane_update(G, P, 'magnetic') for pml in G.pmls]
+
+    # Dispersive update of the electric field component, which is carried out
+    # for cells in dispersive materials (see find_dispersive_cells)
+    if Material.maxpoles != 0:
+        dispersivecells = P.flat_indices(G.dispersivecells[P.axis], G)
+        dispersiveT = (G.Tx, G.Ty, G.Tz)[P.axis]
+        dispersivephi = np.zeros(dispersivecells.size, dtype=np.float32)
+
+    # Iteration to start from, and receiver outputs up to it, for a model
+    # resumed from a checkpoint
+    iterationstart = G.checkpoint.restore_outputs(G) if G.checkpoint else 0
+
+    if G.energymonitor:
+        G.energymonitor.initialise(G)
+
+    tsolvestart = timer()
+
+    for iteration in tqdm(range(iterationstart, G.iterations), desc='Running simulation, model ' + str(currentmodelrun) + '/' + str(modelend), ncols=get_terminal_width() - 1, file=sys.stdout, disable=not G.progressbars):
+        # Write a checkpoint of the state of the solver
+        if G.checkpoint and G.checkpoint.interval and iteration > iterationstart and iteration % G.checkpoint.interval == 0:
+            G.checkpoint.write(iteration, G)
+
+        # Store field component values for every receiver and transmission line
+        store_outputs(iteration, Ex, Ey, Ez, Hx, Hy, Hz, G, rxarrays)
+
+        # Store any snapshots
+        for snap in G.snapshots:
+            if snap.time == iteration + 1:
+                snap.store(G)
+
+        # Update magnetic field components
+        update_magnetic_2D(*P.n, G.nthreads, G.updatecoeffsH, P.ID, P.E, *P.H)
+
+        # Update magnetic field components with the PML correction
+        for func, args in pmlsmagnetic:
+            func(*args)
+
+        # Update magnetic field components from sources
+        for source in transmissionlines:
+            source.update_magnetic(iteration, G.updatecoeffsH, G.ID, Hx, Hy, Hz, G)
+        if magneticdipoles:
+            update_magnetic_dipole(len(magneticdipoles), iteration, G.dt, *srcs_magnetic, G.updatecoeffsH, G.ID, Hx, Hy, Hz)
+
+        # Update electric field component (see solve_cpu for dispersive update)
+        if Material.maxpoles != 0:
+            update_electric_dispersive_cells_2D(G.nthreads, Material.maxpoles, G.updatecoeffsdispersive, P.ID, dispersivecells, dispersiveT, dispersivephi, P.E)
+        update_electric_2D(*P.n, G.nthreads, G.updatecoeffsE, P.ID, P.E, *P.H)
+        if Material.maxpoles != 0:
+            update_electric_dispersive_cells_phi_2D(G.nthreads, G.updatecoeffsE, P.ID, dispersivecells, dispersivephi, P.E)
+
+        # Update electric field component with the PML correction
+        for func, args in pmlselectric:
+            func(*args)
+
+        # Update electric field component from sources (update any Hertzian dipole sources last)
+        if voltagesources:
+            update_voltage_source(len(voltagesources), iteration, G.dt, *srcs_voltage, G.updatecoeffsE, G.ID, Ex, Ey, Ez)
+        for source in transmissionlines:
+            source.update_electric(iteration, G.updatecoeffsE, G.ID, Ex, Ey, Ez, G)
+        if hertziandipoles:
+            update_hertzian_dipole(len(hertziandipoles), iteration, G.dt, *srcs_hertzian, G.updatecoeffsE, G.ID, Ex, Ey, Ez)
+
+        # Sample total energy of the fields, and stop the model once it has decayed
+        if G.energymonitor and (iteration + 1) % G.energymonitor.interval == 0 and G.energymonitor.check(iteration, G, Ex, Ey, Ez, Hx, Hy, Hz):
+            stop_early(iteration, G)
+            break
+
+    tsolve = timer() - tsolvestart
+
+    # Write a checkpoint of the state at the end of the simulation
+    if G.checkpoint and G.checkpoint.final:
+        G.checkpoint.write(G.iterations, G)
+
+    return tsolve
+
+
+def solve_cpu_compiled(currentmodelrun, modelend, G, callbacks=100):
+    """
+    Solving using FDTD method on CPU with the time stepping loop carried out
+    by a compiled driver without the GIL. PML slabs, sources and receivers
+    are registered with the driver before the simulation starts, and the
+    driver only returns to Python to store snapshots and update progress.
+
+    Args:
+        currentmodelrun (int): Current model run number.
+        modelend (int): Number of last model to run.
+        G (class): Grid class instance - holds essential parameters describing the model.
+        callbacks (int): Number of times to return to Python to update progress.
+
+    Returns:
+        tsolve (float): Time taken to execute solving
+    """
+
+    solver = CPUSolver(G)
+
+    # Iterations to return to Python at, i.e. at intervals for progress and
+    # before any snapshots are stored
+    interval = max(1, G.iterations // callbacks)
+    stops = set(range(interval, G.iterations, interval))
+    stops.update(snap.time - 1 for snap in G.snapshots if 0 < snap.time - 1 < G.iterations)
+    stops.add(G.iterations)
+
+    tsolvestart = timer()
+
+    pbar = tqdm(total=G.iterations, desc='Running simulation, model ' + str(currentmodelrun) + '/' + str(modelend), ncols=get_terminal_width() - 1, file=sys.stdout, disable=not G.progressbars)
+    iteration = 0
+    for stop in sorted(stops):
+        # Store any snapshots
+        for snap in G.snapshots:
+            if snap.time == iteration + 1:
+                snap.store(G)
+
+        solver.run(iteration, stop)
+        pbar.update(stop - iteration)
+        iteration = stop
+    pbar.close()
+
+    # Copy receiver outputs and transmission line values from driver
+    solver.finalise(G)
+
+    tsolve = timer() - tsolvestart
+
+    return tsolve
+
+
+def solve_cpu_wavefront(currentmodelrun, modelend, G, cachesize=2**24):
+    """
+    Solving using FDTD method on CPU with temporal blocking (wavefront) of the
+    time stepping loop. The domain is split into slabs of x-planes, and each
+    block of iterations is carried out by sweeping a wavefront through the
+    slabs, i.e. slab s is advanced to iteration n + t in the same sweep step
+    as slab s + t is advanced to iteration n. The electric (magnetic) field in
+    a slab only depends on the magnetic (electric) field in the neighbouring
+    slab below (above), so the slabs in flight stay in cache whilst they are
+    advanced through the block. PML corrections, sources and receivers are
+    applied to the slab they belong to, and snapshots are stored at block
+    boundaries. Results are identical to solve_cpu.
+
+    Args:
+        currentmodelrun (int): Current model run number.
+        modelend (int): Number of last model to run.
+        G (class): Grid class instance - holds essential parameters describing the model.
+        cachesize (int): Size (bytes) of cache the slabs in flight should fit in.
+
+    Returns:
+        tsolve (float): Time taken to execute solving
+    """
+
+    # Width (x-planes) of slabs so that the slabs in flight fit in cache.
+    # Magnetic field components are defined on x-planes 0 to nx.
+    planebytes = (G.ny + 1) * (G.nz + 1) * 6 * (G.Ex.itemsize + G.ID.itemsize)
+    width = max(1, min(G.nx + 1, cachesize // (planebytes * (G.wavefront + 1))))
+    slabs = [(xs, min(xs + width, G.nx + 1)) for xs in range(0, G.nx + 1, width)]
+
+    def slab_index(x):
+        return min(max(x, 0) // width, len(slabs) - 1)
+
+    # PML corrections restricted to each slab
+    pmlsE = [[update for update in (pml.slab_update(G, 'electric', xs, xf) for pml in G.pmls) if update] for xs, xf in slabs]
+    pmlsH = [[update for update in (pml.slab_update(G, 'magnetic', xs, xf) for pml in G.pmls) if update] for xs, xf in slabs]
+
+    # Sources are updated after the slab containing their position. Outputs
+    # (which include currents, i.e. magnetic field at x - 1) are stored before
+    # the slab containing the position below them is advanced.
+    # Sources other than transmission lines are updated together for each
+    # slab by compiled kernels.
+    tlsources = [[] for slab in slabs]
+    for tl in G.transmissionlines:
+        tlsources[slab_index(tl.xcoord)].append(tl)
+    srcs_voltage = [cpu_initialise_src_arrays([source for source in G.voltagesources if slab_index(source.xcoord) == s], G) for s in range(len(slabs))]
+    srcs_hertzian = [cpu_initialise_src_arrays([source for source in G.hertziandipoles if slab_index(source.xcoord) == s], G) for s in range(len(slabs))]
+    srcs_magnetic = [cpu_initialise_src_arrays([source for source in G.magneticdipoles if slab_index(source.xcoord) == s], G) for s in range(len(slabs))]
+    rxarrays = [cpu_initialise_rx_arrays([rx for rx in G.rxs if slab_index(rx.xcoord - 1) == s], G) for s in range(len(slabs))]
+    tls = [[] for slab in slabs]
+    for tl in G.transmissionlines:
+        tls[slab_index(tl.xcoord - 1)].append(tl)
+
+    # Transmission lines read the magnetic field at x - 1, so a magnetic dipole
+    # there would be applied out of order
+    for tl in G.transmissionlines:
+        if any(source.xcoord == tl.xcoord - 1 for source in G.magneticdipoles):
+            if G.messages:
+                print(Fore.RED + 'WARNING: temporal blocking (wavefront) is not available for models with a magnetic dipole next to a transmission line, standard field updates will be used.' + Style.RESET_ALL)
+            G.wavefront = None
+            return solve_cpu(currentmodelrun, modelend, G)
+
+    if G.messages:
+        print('Temporal blocking (wavefront) of time stepping loop: {} iterations per block, slabs of {} x-planes\n'.format(G.wavefront, width))
+
+    tsolvestart = timer()
+
+    pbar = tqdm(total=G.iterations, desc='Running simulation, model ' + str(currentmodelrun) + '/' + str(modelend), ncols=get_terminal_width() - 1, file=sys.stdout, disable=not G.progressbars)
+    iteration = 0
+    while iteration < G.iterations:
+        # Store any snapshots, and end the block at the next snapshot
+        blockiterations = min(G.wavefront, G.iterations - iteration)
+        for snap in G.snapshots:
+            if snap.time == iteration + 1:
+                snap.store(G)
+            elif snap.time > iteration + 1:
+                blockiterations = min(blockiterations, snap.time - 1 - iteration)
+
+        for step in range(len(slabs) + blockiterations - 1):
+            for t in range(blockiterations):
+                s = step - t
+                if s < 0 or s >= len(slabs):
+                    continue
+                xs, xf = slabs[s]
+
+                # Store field component values for receivers and transmission lines
+                store_outputs(iteration + t, G.Ex, G.Ey, G.Ez, G.Hx, G.Hy, G.Hz, G, rxarrays[s], tls[s])
+
+                # Update magnetic field components, with PML correction and sources
+                update_magnetic_slab(xs, xf, G.nx, G.ny, G.nz, G.nthreads, G.updatecoeffsH, G.ID, G.Ex, G.Ey, G.Ez, G.Hx, G.Hy, G.Hz)
+                for func, args in pmlsH[s]:
+                    func(*args)
+                for source in tlsources[s]:
+                    source.update_magnetic(iteration + t, G.updatecoeffsH, G.ID, G.Hx, G.Hy, G.Hz, G)
+                if len(srcs_magnetic[s][0]):
+                    update_magnetic_dipole(len(srcs_magnetic[s][0]), iteration + t, G.dt, *srcs_magnetic[s], G.updatecoeffsH, G.ID, G.Hx, G.Hy, G.Hz)
+
+                # Update electric field components, with PML correction and sources
+                update_electric_slab(xs, xf, G.nx, G.ny, G.nz, G.nthreads, G.updatecoeffsE, G.ID, G.Ex, G.Ey, G.Ez, G.Hx, G.Hy, G.Hz)
+                for func, args in pmlsE[s]:
+                    func(*args)
+                if len(srcs_voltage[s][0]):
+                    update_voltage_source(len(srcs_voltage[s][0]), iteration + t, G.dt, *srcs_voltage[s], G.updatecoeffsE, G.ID, G.Ex, G.Ey, G.Ez)
+                for source in tlsources[s]:
+                    source.update_electric(iteration + t, G.updatecoeffsE, G.ID, G.Ex, G.Ey, G.Ez, G)
+                if len(srcs_hertzian[s][0]):
+                    update_hertzian_dipole(len(srcs_hertzian[s][0]), iteration + t, G.dt, *srcs_hertzian[s], G.updatecoeffsE, G.ID, G.Ex, G.Ey, G.Ez)
+
+        iteration += blockiterations
+        pbar.update(blockiterations)
+    pbar.close()
+
+    for pml in G.pmls:
+        pml.slab_restore()
+
+    tsolve = timer() - tsolvestart
+
+    return tsolve
+
+
+def solve_cpu_shm(currentmodelrun, modelend, G):
+    """
+    Solving using FDTD method on CPU with the domain split into slabs of
+    x-planes that are updated by worker processes sharing the field arrays
+    (see SharedMemorySlabs), e.g. on multi-socket machines without MPI. The
+    update of each slab is parallelised using Cython (OpenMP). Results are
+    identical to solve_cpu.
+
+    Args:
+        currentmodelrun (int): Current model run number.
+        modelend (int): Number of last model to run.
+        G (class): Grid class instance - holds essential parameters describing the model.
+
+    Returns:
+        tsolve (float): Time taken to execute solving
+    """
+
+    # Transmission lines read the magnetic field around them once the magnetic
+    # field of every slab has been updated, so a magnetic dipole there would
+    # be applied out of order
+    for tl in G.transmissionlines:
+        if any(max(abs(source.xcoord - tl.xcoord), abs(source.ycoord - tl.ycoord), abs(source.zcoord - tl.zcoord)) <= 1 for source in G.magneticdipoles):
+            if G.messages:
+                print(Fore.RED + 'WARNING: slabs of the domain in shared memory are not available for models with a magnetic dipole next to a transmission line, standard field updates will be used.' + Style.RESET_ALL)
+            G.shmslabs = None
+            return solve_cpu(currentmodelrun, modelend, G)
+
+    S = SharedMemorySlabs(G.shmslabs, G)
+
+    # Field and geometry arrays are filled by the worker of each slab
+    for name in S.fields + ('ID',):
+        S.share(name, getattr(G, name), copy=False)
+
+    # Sources and outputs are updated and stored by the worker whose slab
+    # contains their position. Receivers are sorted by slab so the outputs of
+    # each slab are contiguous in the shared array of receiver outputs.
+    rxs = sorted(G.rxs, key=lambda rx: S.slab_index(rx.xcoord))
+    rxindices, rxcomponents, rxspacings, rxoutputs = cpu_initialise_rx_arrays(rxs, G)
+    rxslabs = np.searchsorted([S.slab_index(rx.xcoord) for rx in rxs], np.arange(S.nworkers + 1))
+    S.share('rxoutputs', rxoutputs)
+    for i, tl in enumerate(G.transmissionlines):
+        S.share(('Vtotal', i), tl.Vtotal)
+        S.share(('Itotal', i), tl.Itotal)
+
+    # Snapshots are stored by the first worker
+    snapshots = [snap for snap in G.snapshots if 1 <= snap.time <= G.iterations]
+    for i, snap in enumerate(snapshots):
+        S.share(('electric', i), np.zeros(3 * snap.ncells, dtype=floattype))
+        S.share(('magnetic', i), np.zeros(3 * snap.ncells, dtype=floattype))
+
+    def solve_slab(w):
+        xs, xf = S.slabs[w]
+        G.nthreads = S.nthreads
+        S.touch(w, G)
+
+        # PML corrections restricted to the slab
+        pmlsE = [update for update in (pml.slab_update(G, 'electric', xs, xf) for pml in G.pmls) if update]
+        pmlsH = [update for update in (pml.slab_update(G, 'magnetic', xs, xf) for pml in G.pmls) if update]
+
+        tls = [tl for tl in G.transmissionlines if S.slab_index(tl.xcoord) == w]
+        for i, tl in enumerate(G.transmissionlines):
+            tl.Vtotal = S.arrays[('Vtotal', i)]
+            tl.Itotal = S.arrays[('Itotal', i)]
+        srcs_voltage = cpu_initialise_src_arrays([source for source in G.voltagesources if S.slab_index(source.xcoord) == w], G)
+        srcs_hertzian = cpu_initialise_src_arrays([source for source in G.hertziandipoles if S.slab_index(source.xcoord) == w], G)
+        srcs_magnetic = cpu_initialise_src_arrays([source for source in G.magneticdipoles if S.slab_index(source.xcoord) == w], G)
+        rxstart, rxstop = rxslabs[w], rxslabs[w + 1]
+        rxarrays = (rxindices[rxstart:rxstop], rxcomponents[rxstart:rxstop], rxspacings[rxstart:rxstop], S.arrays['rxoutputs'][rxstart:rxstop])
+
+        store_outputs(0, G.Ex, G.Ey, G.Ez, G.Hx, G.Hy, G.Hz, G, rxarrays, tls)
+
+        for iteration in tqdm(range(G.iterations), desc='Running simulation, model ' + str(currentmodelrun) + '/' + str(modelend), ncols=get_terminal_width() - 1, file=sys.stdout, disable=not G.progressbars or w != 0):
+            # Store any snapshots before the magnetic field of any slab is updated
+            snaps = [(i, snap) for i, snap in enumerate(snapshots) if snap.time == iteration + 1]
+            if snaps:
+                if w == 0:
+                    for i, snap in snaps:
+                        snap.store(G)
+                        S.arrays[('electric', i)][:] = snap.electric
+                        S.arrays[('magnetic', i)][:] = snap.magnetic
+                S.barrier.wait()
+
+            # Update magnetic field components, with PML correction and sources
+            update_magnetic_slab(xs, xf, G.nx, G.ny, G.nz, G.nthreads, G.updatecoeffsH, G.ID, G.Ex, G.Ey, G.Ez, G.Hx, G.Hy, G.Hz)
+            for func, args in pmlsH:
+                func(*args)
+            if len(srcs_magnetic[0]):
+                update_magnetic_dipole(len(srcs_magnetic[0]), iteration, G.dt, *srcs_magnetic, G.updatecoeffsH, G.ID, G.Hx, G.Hy, G.Hz)
+
+            S.barrier.wait()
+
+            # Update electric field components, with PML correction and sources
+            for source in tls:
+                source.update_magnetic(iteration, G.updatecoeffsH, G.ID, G.Hx, G.Hy, G.Hz, G)
+            update_electric_slab(xs, xf, G.nx, G.ny, G.nz, G.nthreads, G.updatecoeffsE, G.ID, G.Ex, G.Ey, G.Ez, G.Hx, G.Hy, G.Hz)
+            for func, args in pmlsE:
+                func(*args)
+            if len(srcs_voltage[0]):
+                update_voltage_source(len(srcs_voltage[0]), iteration, G.dt, *srcs_voltage, G.updatecoeffsE, G.ID, G.Ex, G.Ey, G.Ez)
+            for source in tls:
+                source.update_electric(iteration, G.updatecoeffsE, G.ID, G.Ex, G.Ey, G.Ez, G)
+            if len(srcs_hertzian[0]):
+                update_hertzian_dipole(len(srcs_hertzian[0]), iteration, G.dt, *srcs_hertzian, G.updatecoeffsE, G.ID, G.Ex, G.Ey, G.Ez)
+
+            # Store field component values for receivers and transmission lines
+            # of the slab for the next iteration, i.e. while the magnetic field
+            # is not being updated by any worker
+            if iteration + 1 < G.iterations:
+                store_outputs(iteration + 1, G.Ex, G.Ey, G.Ez, G.Hx, G.Hy, G.Hz, G, rxarrays, tls)
+
+            S.barrier.wait()
+
+    if G.messages:
+        print('Slabs of the domain in shared memory: {} worker processes with {} thread(s) each, slabs of {} x-planes\n'.format(S.nworkers, S.nthreads, S.slabs[0][1] - S.slabs[0][0]))
+
+    tsolvestart = timer()
+
+    try:
+        S.run(solve_slab)
+        tsolve = timer() - tsolvestart
+
+        # Copy field components and outputs back from shared memory
+        for name in S.fields:
+            getattr(G, name)[:] = S.arrays[name]
+        rxoutputs[:] = S.arrays['rxoutputs']
+        for i, tl in enumerate(G.transmissionlines):
+            tl.Vtotal[:] = S.arrays[('Vtotal', i)]
+            tl.Itotal[:] = S.arrays[('Itotal', i)]
+        for i, snap in enumerate(snapshots):
+            snap.electric = S.arrays[('electric', i)].copy()
+            snap.magnetic = S.arrays[('magnetic', i)].copy()
+    finally:
+        S.release()
+
     return tsolve
 
 
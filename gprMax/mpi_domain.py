@@ -0,0 +1,414 @@
+# Copyright (C) 2015-2019: The University of Edinburgh
+#                 Authors: Craig Warren and Antonis Giannopoulos
+#
+# This file is part of gprMax.
+#
+# gprMax is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# gprMax is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with gprMax.  If not, see <http://www.gnu.org/licenses/>.
+
+from copy import copy
+import os
+import sys
+
+import numpy as np
+
+from gprMax.constants import floattype
+from gprMax.exceptions import GeneralError
+from gprMax.pml import PML
+
+
+def initialise_ranks():
+    """Silence the output of all but the first MPI rank, and abort every rank
+        if any rank raises an error, rather than leave the others waiting on
+        it in a halo exchange.
+    """
+
+    from mpi4py import MPI
+
+    comm = MPI.COMM_WORLD
+    if comm.rank != 0:
+        sys.stdout = open(os.devnull, 'w')
+
+    def excepthook(exctype, value, traceback):
+        sys.__excepthook__(exctype, value, traceback)
+        comm.Abort(1)
+
+    sys.excepthook = excepthook
+
+
+class MPIDomain(object):
+    """
+    Cartesian decomposition of the domain of a single model across MPI ranks.
+
+    Each rank owns a block of cells of the domain, and holds the geometry and
+    field arrays of its subdomain, i.e. the cells it owns and a layer of ghost
+    cells on each side with a neighbouring rank. After the magnetic and the
+    electric field updates of every iteration, the tangential field components
+    on the faces between subdomains are exchanged with the neighbouring ranks
+    (halo exchange), so the fields of owned cells are the same as those of the
+    model run by a single process.
+    """
+
+    # Field components that are tangential to the faces normal to each axis
+    tangentialE = (('Ey', 'Ez'), ('Ex', 'Ez'), ('Ex', 'Ey'))
+    tangentialH = (('Hy', 'Hz'), ('Hx', 'Hz'), ('Hx', 'Hy'))
+
+    # Lists of sources and receivers that are routed to the ranks that own them
+    routed = ('voltagesources', 'hertziandipoles', 'magneticdipoles', 'transmissionlines', 'rxs')
+
+    def __init__(self, dims, G):
+        """
+        Args:
+            dims (list): Number of ranks in the x, y and z directions, or an
+                            empty list to choose them automatically.
+            G (class): Grid class instance - holds essential parameters describing the model.
+        """
+
+        from mpi4py import MPI
+
+        if G.gpu is not None or '2D' in G.mode or G.subgrids or G.grading is not None:
+            raise GeneralError('Domain decomposition across MPI ranks is only available for 3D models on CPU, without subgrids and with uniform spatial steps')
+        if G.geometryviews or G.geometryobjectswrite:
+            raise GeneralError('Geometry views and geometry objects can not be written from a model decomposed across MPI ranks')
+
+        comm = MPI.COMM_WORLD
+        if not dims:
+            dims = MPI.Compute_dims(comm.size, 3)
+        elif len(dims) != 3 or int(np.prod(dims)) != comm.size:
+            raise GeneralError('Domain decomposition requires the number of MPI ranks in the x, y and z directions, whose product is the number of MPI ranks ({})'.format(comm.size))
+
+        self.comm = comm.Create_cart(dims, periods=[False] * 3, reorder=False)
+        self.rank = self.comm.rank
+        self.dims = tuple(dims)
+        self.coords = tuple(self.comm.Get_coords(self.rank))
+
+        # Number of cells of the domain, and cells of the domain owned by
+        # the rank (upper coordinates exclusive)
+        self.size = (G.nx, G.ny, G.nz)
+        self.start = tuple(c * n // p for c, n, p in zip(self.coords, self.size, self.dims))
+        self.finish = tuple((c + 1) * n // p for c, n, p in zip(self.coords, self.size, self.dims))
+
+        # Origin of the subdomain in the domain, i.e. a ghost cell before the
+        # owned cells if there is a neighbouring rank, and number of cells of
+        # the subdomain, whose last node is on the ghost face shared with any
+        # neighbouring rank after the owned cells
+        self.origin = tuple(s - 1 if c > 0 else 0 for s, c in zip(self.start, self.coords))
+        self.shape = tuple(f - o for f, o in zip(self.finish, self.origin))
+
+        # Neighbouring ranks before and after the subdomain in each direction
+        self.neighbours = [self.comm.Shift(axis, 1) for axis in range(3)]
+        self.procnull = MPI.PROC_NULL
+
+        # PML slabs must be within the subdomains of the ranks at the
+        # boundaries of the domain
+        for axis, (n, p) in enumerate(zip(self.size, self.dims)):
+            coord = 'xyz'[axis]
+            if n // p < 2:
+                raise GeneralError('Domain decomposition requires at least two cells in the {} direction for each MPI rank'.format(coord))
+            if G.pmlthickness[coord + '0'] >= n // p or G.pmlthickness[coord + 'max'] > n - (p - 1) * n // p:
+                raise GeneralError('Domain decomposition requires the PML in the {} direction to be within the subdomains of the MPI ranks at the boundaries, i.e. use fewer MPI ranks in the {} direction'.format(coord, coord))
+
+        # Buffers for the tangential field components on the faces between subdomains
+        self.buffers = []
+        for axis in range(3):
+            shape = [2] + [n + 1 for n in self.shape]
+            del shape[axis + 1]
+            self.buffers.append((np.zeros(shape, dtype=floattype), np.zeros(shape, dtype=floattype)))
+
+    def random_seed(self):
+        """Seed for random number generators that is shared by every rank,
+            e.g. for fractals that are given without a seed.
+
+        Returns:
+            (int): Seed.
+        """
+
+        return self.comm.bcast(np.random.randint(2**31 - 1) if self.rank == 0 else None, root=0)
+
+    def localise(self, G):
+        """Set the number of cells of the grid to those of the subdomain.
+
+        Args:
+            G (class): Grid class instance - holds essential parameters describing the model.
+        """
+
+        G.nx, G.ny, G.nz = self.shape
+
+    def owner(self, obj):
+        """Rank that owns the position of a source or receiver. The node on
+            the upper boundary of the domain is owned by the last rank.
+
+        Args:
+            obj (class): Source or receiver.
+
+        Returns:
+            (int): Rank.
+        """
+
+        coords = []
+        for co, n, p in zip((obj.xcoord, obj.ycoord, obj.zcoord), self.size, self.dims):
+            coords.append(next(c for c in range(p) if co < (c + 1) * n // p or c == p - 1))
+
+        return self.comm.Get_cart_rank(coords)
+
+    def holds(self, obj):
+        """Whether the position of a source or receiver is in the subdomain,
+            including its ghost cells.
+
+        Args:
+            obj (class): Source or receiver.
+
+        Returns:
+            (bool): Position is in the subdomain.
+        """
+
+        return all(o <= co <= o + n for co, o, n in zip((obj.xcoord, obj.ycoord, obj.zcoord), self.origin, self.shape))
+
+    def local(self, obj):
+        """Copy of a source or receiver at its position in the subdomain.
+
+        Args:
+            obj (class): Source or receiver.
+
+        Returns:
+            local (class): Source or receiver.
+        """
+
+        local = copy(obj)
+        local.xcoord = obj.xcoord - self.origin[0]
+        local.ycoord = obj.ycoord - self.origin[1]
+        local.zcoord = obj.zcoord - self.origin[2]
+
+        return local
+
+    def build_pmls(self, G, pbar):
+        """Build the parts of PML slabs in the subdomain (see build_pmls). The
+            profiles of the slabs are based on the materials of their inner
+            faces across the whole domain, which are gathered from every rank.
+
+        Args:
+            G (class): Grid class instance - holds essential parameters describing the model.
+            pbar (class): Progress bar class instance.
+        """
+
+        er = {material.numID: material.er for material in G.materials}
+        mr = {material.numID: material.mr for material in G.materials}
+
+        for key, value in G.pmlthickness.items():
+            if value > 0:
+                axis = 'xyz'.index(key[0])
+                n = self.size[axis]
+
+                # Extent of the slab in the subdomain
+                extent = {}
+                for i, coord in enumerate('xyz'):
+                    extent[coord + 's'] = 0
+                    extent[coord + 'f'] = self.shape[i]
+                if key[1:] == '0':
+                    direction = key[0] + 'minus'
+                    face = 0
+                    extent[key[0] + 'f'] = value
+                    onboundary = self.coords[axis] == 0
+                else:
+                    direction = key[0] + 'plus'
+                    face = n - value
+                    extent[key[0] + 's'] = n - value - self.origin[axis]
+                    onboundary = self.coords[axis] == self.dims[axis] - 1
+
+                # Gather the material IDs of the inner face of the slab from
+                # the ranks that own its cells
+                block = None
+                if self.start[axis] <= face < self.finish[axis]:
+                    index = [slice(s - o, f - o) for s, f, o in zip(self.start, self.finish, self.origin)]
+                    index[axis] = face - self.origin[axis]
+                    block = (np.delete(self.start, axis), G.solid[tuple(index)].copy())
+                solid = np.zeros(np.delete(self.size, axis), dtype=G.solid.dtype)
+                for part in self.comm.allgather(block):
+                    if part is not None:
+                        start, data = part
+                        solid[start[0]:start[0] + data.shape[0], start[1]:start[1] + data.shape[1]] = data
+
+                sumer = 0  # Sum of relative permittivities in PML slab
+                summr = 0  # Sum of relative permeabilities in PML slab
+                for numID in solid.flat:
+                    sumer += er[numID]
+                    summr += mr[numID]
+
+                if onboundary:
+                    pml = PML(G, ID=key, direction=direction, **extent)
+                    G.pmls.append(pml)
+                    pml.calculate_update_coeffs(sumer / solid.size, summr / solid.size, G)
+                    pml.cpu_get_update_funcs(G)
+
+                # Any sigma max of the CFS parameters, which are shared by all
+                # slabs, is calculated from the first slab of the domain (see
+                # PML.calculate_update_coeffs), whether it is in the subdomain
+                else:
+                    for cfs in G.cfs:
+                        if not cfs.sigma.max:
+                            cfs.calculate_sigmamax((G.dx, G.dy, G.dz)[axis], sumer / solid.size, summr / solid.size, G)
+                pbar.update()
+
+    def create_materials(self, G):
+        """Create the materials of voltage sources (see
+            VoltageSource.create_material) on the ranks that own them. Like
+            materials from averaging, they are only created by the ranks
+            with cells that use them.
+
+        Args:
+            G (class): Grid class instance - holds essential parameters describing the model.
+        """
+
+        for voltagesource in G.voltagesources:
+            if voltagesource.resistance != 0 and self.owner(voltagesource) == self.rank:
+                self.local(voltagesource).create_material(G)
+
+    def route(self, G):
+        """Keep the sources and receivers of the model that are owned by the
+            rank, at their positions in the subdomain. Magnetic dipoles are
+            also kept by ranks with their position in a ghost cell, as the
+            magnetic field components are exchanged before they are updated.
+
+        Args:
+            G (class): Grid class instance - holds essential parameters describing the model.
+        """
+
+        self.models = {}
+        for name in MPIDomain.routed:
+            objs = getattr(G, name)
+            self.models[name] = objs
+            if name == 'magneticdipoles':
+                setattr(G, name, [self.local(obj) for obj in objs if self.holds(obj)])
+            else:
+                setattr(G, name, [self.local(obj) for obj in objs if self.owner(obj) == self.rank])
+
+    def gather_outputs(self, G):
+        """Restore the sources and receivers of the model, and the number of
+            cells of the domain, and gather the outputs of receivers and
+            transmission lines to the first rank.
+
+        Args:
+            G (class): Grid class instance - holds essential parameters describing the model.
+        """
+
+        for name in MPIDomain.routed:
+            setattr(G, name, self.models[name])
+        G.nx, G.ny, G.nz = self.size
+
+        # Receivers share their outputs with the copies that were updated
+        rxs = {i: rx.outputs for i, rx in enumerate(G.rxs) if self.owner(rx) == self.rank}
+        tls = {i: (tl.Vtotal, tl.Itotal) for i, tl in enumerate(G.transmissionlines) if self.owner(tl) == self.rank}
+        gathered = self.comm.gather((rxs, tls), root=0)
+        if self.rank == 0:
+            for rxs, tls in gathered:
+                for i, outputs in rxs.items():
+                    G.rxs[i].outputs = outputs
+                for i, (Vtotal, Itotal) in tls.items():
+                    G.transmissionlines[i].Vtotal = Vtotal
+                    G.transmissionlines[i].Itotal = Itotal
+
+    def gather_snapshot(self, snap, G):
+        """Gather the field components at the nodes of a snapshot to the first rank.
+
+        Args:
+            snap (class): Snapshot class instance.
+            G (class): Grid class instance - holds essential parameters describing the model.
+
+        Returns:
+            (list): Field components Ex, Ey, Ez, Hx, Hy, Hz at the nodes of
+                        the snapshot on the first rank, otherwise None.
+        """
+
+        # Nodes of the snapshot owned by the rank in each direction
+        nodes, owned = [], []
+        for n, s, f, o, sample in zip(self.size, self.start, self.finish, self.origin, (snap.sx, snap.sy, snap.sz)):
+            nodes.append(np.arange(n + 1)[sample])
+            mask = (nodes[-1] >= s) & ((nodes[-1] < f) | (nodes[-1] == n) & (f == n))
+            owned.append((np.flatnonzero(mask), nodes[-1][mask] - o))
+
+        block = None
+        if all(len(indices) for indices, local in owned):
+            local = np.ix_(*(local for indices, local in owned))
+            block = ([indices[0] for indices, local in owned], [getattr(G, field)[local] for field in ('Ex', 'Ey', 'Ez', 'Hx', 'Hy', 'Hz')])
+
+        gathered = self.comm.gather(block, root=0)
+        if self.rank != 0:
+            return None
+
+        slices = [np.zeros([len(n) for n in nodes], dtype=floattype) for field in range(6)]
+        for part in gathered:
+            if part is not None:
+                (i, j, k), data = part
+                for fieldslice, fielddata in zip(slices, data):
+                    fieldslice[i:i + fielddata.shape[0], j:j + fielddata.shape[1], k:k + fielddata.shape[2]] = fielddata
+
+        return slices
+
+    def exchange(self, G, components, upper):
+        """Exchange the tangential field components on the faces between
+            subdomains with the neighbouring ranks.
+
+        Args:
+            G (class): Grid class instance - holds essential parameters describing the model.
+            components (tuple): Tangential field components for faces normal to each direction.
+            upper (bool): Send components of the last owned face to the rank
+                            after the subdomain, and receive the ghost face
+                            before it, otherwise send components of the first
+                            owned face to the rank before the subdomain and
+                            receive the ghost face after it.
+        """
+
+        for axis in range(3):
+            lower, higher = self.neighbours[axis]
+            if upper:
+                source, dest = lower, higher
+                send, recv = self.finish[axis] - 1 - self.origin[axis], 0
+            else:
+                source, dest = higher, lower
+                send, recv = self.start[axis] - self.origin[axis], self.shape[axis]
+            if source == self.procnull and dest == self.procnull:
+                continue
+
+            sendbuf, recvbuf = self.buffers[axis]
+            fields = [getattr(G, component) for component in components[axis]]
+            sendindex = [slice(None)] * 3
+            sendindex[axis] = send
+            recvindex = [slice(None)] * 3
+            recvindex[axis] = recv
+            if dest != self.procnull:
+                for buf, field in zip(sendbuf, fields):
+                    buf[...] = field[tuple(sendindex)]
+            self.comm.Sendrecv(sendbuf, dest=dest, recvbuf=recvbuf, source=source)
+            if source != self.procnull:
+                for buf, field in zip(recvbuf, fields):
+                    field[tuple(recvindex)] = buf
+
+    def exchange_magnetic(self, G):
+        """Exchange the tangential magnetic field components, which are sent
+            to the rank after each face between subdomains.
+
+        Args:
+            G (class): Grid class instance - holds essential parameters describing the model.
+        """
+
+        self.exchange(G, MPIDomain.tangentialH, True)
+
+    def exchange_electric(self, G):
+        """Exchange the tangential electric field components, which are sent
+            to the rank before each face between subdomains.
+
+        Args:
+            G (class): Grid class instance - holds essential parameters describing the model.
+        """
+
+        self.exchange(G, MPIDomain.tangentialE, False)
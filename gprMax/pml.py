@@ -194,29 +194,56 @@ class PML(object):
             self.d = G.dz
             self.thickness = self.nz
 
+        # Graded mesh - spatial step is constant within the slab (see process_singlecmds)
+        spacing = getattr(G, self.direction[0] + 'spacing')
+        if spacing is not None:
+            self.d = spacing[self.xs if self.direction[0] == 'x' else self.ys if self.direction[0] == 'y' else self.zs]
+
         self.CFS = G.cfs
 
+        # Invariant direction of a 2D model
+        self.invariant = 'xyz'.index(G.mode[-1]) if '2D' in G.mode else None
+
+        # Copies of PML field arrays for slabs of x-planes (see slab_update)
+        self.slabcopies = []
+
         if G.gpu is None:
             self.initialise_field_arrays()
 
+    @staticmethod
+    def field_array_shapes(direction, nx, ny, nz, invariant=None):
+        """Gets the shapes of the arrays to store fields in a PML slab, i.e.
+            of EPhi1, EPhi2, HPhi1 and HPhi2 for each CFS.
+
+        Args:
+            direction (str): Direction of increasing absorption, or its axis.
+            nx, ny, nz (int): Size of the PML slab in cells.
+            invariant (int): Invariant direction of a 2D model, or None.
+
+        Returns:
+            shapes (list): Shapes of the PML field arrays.
+        """
+
+        if direction[0] == 'x':
+            shapes = [(nx + 1, ny, nz + 1), (nx + 1, ny + 1, nz), (nx, ny + 1, nz), (nx, ny, nz + 1)]
+        elif direction[0] == 'y':
+            shapes = [(nx, ny + 1, nz + 1), (nx + 1, ny + 1, nz), (nx + 1, ny, nz), (nx, ny, nz + 1)]
+        elif direction[0] == 'z':
+            shapes = [(nx, ny + 1, nz + 1), (nx + 1, ny, nz + 1), (nx + 1, ny, nz), (nx, ny + 1, nz)]
+
+        # 2D models only correct the field components that are live in the
+        # plane of the model, whose PML field arrays have a single cell in
+        # the invariant direction (see plane_update), so the others are empty
+        if invariant is not None:
+            shapes = [shape if shape[invariant] == 1 else shape[:invariant] + (0,) + shape[invariant + 1:] for shape in shapes]
+
+        return shapes
+
     def initialise_field_arrays(self):
         """Initialise arrays to store fields in PML."""
 
-        if self.direction[0] == 'x':
-            self.EPhi1 = np.zeros((len(self.CFS), self.nx + 1, self.ny, self.nz + 1), dtype=floattype)
-            self.EPhi2 = np.zeros((len(self.CFS), self.nx + 1, self.ny + 1, self.nz), dtype=floattype)
-            self.HPhi1 = np.zeros((len(self.CFS), self.nx, self.ny + 1, self.nz), dtype=floattype)
-            self.HPhi2 = np.zeros((len(self.CFS), self.nx, self.ny, self.nz + 1), dtype=floattype)
-        elif self.direction[0] == 'y':
-            self.EPhi1 = np.zeros((len(self.CFS), self.nx, self.ny + 1, self.nz + 1), dtype=floattype)
-            self.EPhi2 = np.zeros((len(self.CFS), self.nx + 1, self.ny + 1, self.nz), dtype=floattype)
-            self.HPhi1 = np.zeros((len(self.CFS), self.nx + 1, self.ny, self.nz), dtype=floattype)
-            self.HPhi2 = np.zeros((len(self.CFS), self.nx, self.ny, self.nz + 1), dtype=floattype)
-        elif self.direction[0] == 'z':
-            self.EPhi1 = np.zeros((len(self.CFS), self.nx, self.ny + 1, self.nz + 1), dtype=floattype)
-            self.EPhi2 = np.zeros((len(self.CFS), self.nx + 1, self.ny, self.nz + 1), dtype=floattype)
-            self.HPhi1 = np.zeros((len(self.CFS), self.nx + 1, self.ny, self.nz), dtype=floattype)
-            self.HPhi2 = np.zeros((len(self.CFS), self.nx, self.ny + 1, self.nz), dtype=floattype)
+        shapes = self.field_array_shapes(self.direction, self.nx, self.ny, self.nz, self.invariant)
+        self.EPhi1, self.EPhi2, self.HPhi1, self.HPhi2 = (np.zeros((len(self.CFS),) + shape, dtype=floattype) for shape in shapes)
 
     def calculate_update_coeffs(self, er, mr, G):
         """Calculates electric and magnetic update coefficients for the PML.
@@ -273,6 +300,17 @@ class PML(object):
                 self.HRE[x, :] = ((2 * e0) - G.dt * Halpha) / tmp
                 self.HRF[x, :] = (2 * Hsigma * G.dt) / tmp
 
+    def cpu_get_update_funcs(self, G):
+        """Get update functions from PML extension modules.
+
+        Args:
+            G (class): Grid class instance - holds essential parameters describing the model.
+        """
+
+        func = 'order' + str(len(self.CFS)) + '_' + self.direction
+        self.update_electric_cpu = getattr(import_module('gprMax.pml_updates.pml_updates_electric_' + G.pmlformulation + '_ext'), func)
+        self.update_magnetic_cpu = getattr(import_module('gprMax.pml_updates.pml_updates_magnetic_' + G.pmlformulation + '_ext'), func)
+
     def update_electric(self, G):
         """This functions updates electric field components with the PML correction.
 
@@ -280,9 +318,7 @@ class PML(object):
             G (class): Grid class instance - holds essential parameters describing the model.
         """
 
-        pmlmodule = 'gprMax.pml_updates.pml_updates_electric_' + G.pmlformulation + '_ext'
-        func = getattr(import_module(pmlmodule), 'order' + str(len(self.CFS)) + '_' + self.direction)
-        func(self.xs, self.xf, self.ys, self.yf, self.zs, self.zf, G.nthreads, G.updatecoeffsE, G.ID, G.Ex, G.Ey, G.Ez, G.Hx, G.Hy, G.Hz, self.EPhi1, self.EPhi2, self.ERA, self.ERB, self.ERE, self.ERF, self.d)
+        self.update_electric_cpu(self.xs, self.xf, self.ys, self.yf, self.zs, self.zf, G.nthreads, G.updatecoeffsE, G.ID, G.Ex, G.Ey, G.Ez, G.Hx, G.Hy, G.Hz, self.EPhi1, self.EPhi2, self.ERA, self.ERB, self.ERE, self.ERF, self.d)
 
     def update_magnetic(self, G):
         """This functions updates magnetic field components with the PML correction.
@@ -291,9 +327,130 @@ class PML(object):
             G (class): Grid class instance - holds essential parameters describing the model.
         """
 
-        pmlmodule = 'gprMax.pml_updates.pml_updates_magnetic_' + G.pmlformulation + '_ext'
-        func = getattr(import_module(pmlmodule), 'order' + str(len(self.CFS)) + '_' + self.direction)
-        func(self.xs, self.xf, self.ys, self.yf, self.zs, self.zf, G.nthreads, G.updatecoeffsH, G.ID, G.Ex, G.Ey, G.Ez, G.Hx, G.Hy, G.Hz, self.HPhi1, self.HPhi2, self.HRA, self.HRB, self.HRE, self.HRF, self.d)
+        self.update_magnetic_cpu(self.xs, self.xf, self.ys, self.yf, self.zs, self.zf, G.nthreads, G.updatecoeffsH, G.ID, G.Ex, G.Ey, G.Ez, G.Hx, G.Hy, G.Hz, self.HPhi1, self.HPhi2, self.HRA, self.HRB, self.HRE, self.HRF, self.d)
+
+    def slab_update(self, G, field, xs, xf):
+        """Gets the PML correction for the electric or magnetic field components
+            restricted to a slab of x-planes of the domain, i.e. for use with
+            temporal blocking (wavefront) of the time stepping loop.
+
+        Args:
+            G (class): Grid class instance - holds essential parameters describing the model.
+            field (str): Type of field components to correct, 'electric' or 'magnetic'.
+            xs, xf (int): Start and finish x-planes of the slab.
+
+        Returns:
+            update (tuple): PML update function and its arguments, or None if
+                            the PML does not intersect the slab.
+        """
+
+        if field == 'electric':
+            updatecoeffs = G.updatecoeffsE
+            Phi1, Phi2, RA, RB, RE, RF = self.EPhi1, self.EPhi2, self.ERA, self.ERB, self.ERE, self.ERF
+        else:
+            updatecoeffs = G.updatecoeffsH
+            Phi1, Phi2, RA, RB, RE, RF = self.HPhi1, self.HPhi2, self.HRA, self.HRB, self.HRE, self.HRF
+
+        # Range of (local) x-indices of the PML that lie in the slab. PML slabs
+        # in the xminus direction are indexed in reverse from the end of the
+        # slab, and their magnetic components are offset by one cell.
+        if self.direction == 'xminus':
+            offset = 0 if field == 'electric' else 1
+            istart = max(self.xf - offset - xf + 1, 0)
+            istop = min(self.xf - offset - xs + 1, self.nx)
+            pmlxf = self.xf - istart
+            pmlxs = pmlxf - (istop - istart)
+        else:
+            istart = max(xs - self.xs, 0)
+            istop = min(xf - self.xs, self.nx)
+            pmlxs = self.xs + istart
+            pmlxf = self.xs + istop
+
+        if istop <= istart:
+            return None
+
+        # PML update functions require C-contiguous arrays, so any field arrays
+        # for the slab that are not (PML of order > 1) are copied, and copied
+        # back when the simulation is finished using slab_restore
+        Phi1 = self.slab_array(Phi1[:, istart:istop, :, :])
+        Phi2 = self.slab_array(Phi2[:, istart:istop, :, :])
+        if self.direction[0] == 'x':
+            RA, RB, RE, RF = (np.ascontiguousarray(R[:, istart:istop]) for R in (RA, RB, RE, RF))
+
+        func = self.update_electric_cpu if field == 'electric' else self.update_magnetic_cpu
+
+        return func, (pmlxs, pmlxf, self.ys, self.yf, self.zs, self.zf, G.nthreads, updatecoeffs, G.ID, G.Ex, G.Ey, G.Ez, G.Hx, G.Hy, G.Hz, Phi1, Phi2, RA, RB, RE, RF, self.d)
+
+    def plane_update(self, G, plane, field):
+        """Gets the PML correction for the electric or magnetic field component
+            of a 2D model, i.e. for use with the field arrays of the plane of
+            the model (see FDTDPlane).
+
+        Args:
+            G (class): Grid class instance - holds essential parameters describing the model.
+            plane (FDTDPlane): Field arrays of the plane of the model.
+            field (str): Type of field components to correct, 'electric' or 'magnetic'.
+
+        Returns:
+            update (tuple): PML update function and its arguments.
+        """
+
+        func = getattr(import_module('gprMax.pml_updates.pml_updates_' + field + '_' + G.pmlformulation + '_ext'), 'order' + str(len(self.CFS)) + '_2D')
+
+        # Axis of the grid normal to the slab, and axis of the plane normal to the slab
+        slabaxis = 'xyz'.index(self.direction[0])
+        axis = plane.axes.index(slabaxis)
+        extents = ((self.xs, self.xf), (self.ys, self.yf), (self.zs, self.zf))
+        s, f = extents[slabaxis]
+        os, of = extents[plane.axes[1 - axis]]
+
+        # The electric field component is normal to the plane, and the magnetic
+        # field component that is corrected is the one parallel to the slab.
+        # The sign of the correction, and the PML field array, are those of
+        # the component in the update functions for 3D slabs, where Phi1 is
+        # for the first of the two components parallel to the slab.
+        components = [component for component in range(3) if component != slabaxis]
+        if field == 'electric':
+            component = plane.axis
+            sign = 1 if (component - slabaxis) % 3 == 2 else -1
+            Phi = (self.EPhi1, self.EPhi2)[components.index(component)]
+            updatecoeffs, ID, fields = G.updatecoeffsE, plane.ID[0], (plane.E, plane.H[1 - axis])
+            RA, RB, RE, RF = self.ERA, self.ERB, self.ERE, self.ERF
+        else:
+            component = plane.axes[1 - axis]
+            sign = 1 if (component - slabaxis) % 3 == 1 else -1
+            Phi = (self.HPhi1, self.HPhi2)[components.index(component)]
+            updatecoeffs, ID, fields = G.updatecoeffsH, plane.ID[2 - axis], (plane.H[1 - axis], plane.E)
+            RA, RB, RE, RF = self.HRA, self.HRB, self.HRE, self.HRF
+
+        # PML field array has a single cell in the invariant direction
+        Phi = np.squeeze(Phi, axis=plane.axis + 1)
+
+        return func, (axis, self.direction.endswith('minus'), s, f, os, of, G.nthreads, sign, updatecoeffs, ID, *fields, Phi, RA, RB, RE, RF, self.d)
+
+    def slab_array(self, view):
+        """Gets a C-contiguous PML field array for a slab of x-planes.
+
+        Args:
+            view (array): View of PML field array for the slab.
+
+        Returns:
+            array (array): C-contiguous PML field array for the slab.
+        """
+
+        if view.flags['C_CONTIGUOUS']:
+            return view
+        else:
+            array = np.ascontiguousarray(view)
+            self.slabcopies.append((view, array))
+            return array
+
+    def slab_restore(self):
+        """Copies any PML field arrays for slabs of x-planes back into the PML field arrays."""
+
+        for view, array in self.slabcopies:
+            view[:] = array
+        self.slabcopies = []
 
     def gpu_set_blocks_per_grid(self, G):
         """Set the blocks per grid size used for updating the PML field arrays on a GPU.
@@ -426,4 +583,6 @@ def build_pmls(G, pbar):
                 averagemr = summr / (G.nx * G.ny)
 
             pml.calculate_update_coeffs(averageer, averagemr, G)
+            if G.gpu is None:
+                pml.cpu_get_update_funcs(G)
             pbar.update()
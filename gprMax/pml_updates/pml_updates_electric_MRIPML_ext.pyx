@@ -21,6 +21,7 @@ cimport numpy as np
 from cython.parallel import prange
 
 from gprMax.constants cimport floattype_t
+from gprMax.constants cimport idtype_t
 
 
 cpdef void order1_xminus(
@@ -32,7 +33,7 @@ cpdef void order1_xminus(
                         int zf,
                         int nthreads,
                         floattype_t[:, ::1] updatecoeffsE,
-                        np.uint32_t[:, :, :, ::1] ID,
+                        idtype_t[:, :, :, ::1] ID,
                         floattype_t[:, :, ::1] Ex,
                         floattype_t[:, :, ::1] Ey,
                         floattype_t[:, :, ::1] Ez,
@@ -46,7 +47,7 @@ cpdef void order1_xminus(
                         floattype_t[:, ::1] RE,
                         floattype_t[:, ::1] RF,
                         float d
-                ):
+                ) noexcept nogil:
     """This function updates the Ey and Ez field components for the xminus slab.
 
         Args:
@@ -97,7 +98,7 @@ cpdef void order2_xminus(
                         int zf,
                         int nthreads,
                         floattype_t[:, ::1] updatecoeffsE,
-                        np.uint32_t[:, :, :, ::1] ID,
+                        idtype_t[:, :, :, ::1] ID,
                         floattype_t[:, :, ::1] Ex,
                         floattype_t[:, :, ::1] Ey,
                         floattype_t[:, :, ::1] Ez,
@@ -111,7 +112,7 @@ cpdef void order2_xminus(
                         floattype_t[:, ::1] RE,
                         floattype_t[:, ::1] RF,
                         float d
-                ):
+                ) noexcept nogil:
     """This function updates the Ey and Ez field components for the xminus slab.
 
         Args:
@@ -171,7 +172,7 @@ cpdef void order1_xplus(
                         int zf,
                         int nthreads,
                         floattype_t[:, ::1] updatecoeffsE,
-                        np.uint32_t[:, :, :, ::1] ID,
+                        idtype_t[:, :, :, ::1] ID,
                         floattype_t[:, :, ::1] Ex,
                         floattype_t[:, :, ::1] Ey,
                         floattype_t[:, :, ::1] Ez,
@@ -185,7 +186,7 @@ cpdef void order1_xplus(
                         floattype_t[:, ::1] RE,
                         floattype_t[:, ::1] RF,
                         float d
-                ):
+                ) noexcept nogil:
     """This function updates the Ey and Ez field components for the xplus slab.
 
     Args:
@@ -236,7 +237,7 @@ cpdef void order2_xplus(
                         int zf,
                         int nthreads,
                         floattype_t[:, ::1] updatecoeffsE,
-                        np.uint32_t[:, :, :, ::1] ID,
+                        idtype_t[:, :, :, ::1] ID,
                         floattype_t[:, :, ::1] Ex,
                         floattype_t[:, :, ::1] Ey,
                         floattype_t[:, :, ::1] Ez,
@@ -250,7 +251,7 @@ cpdef void order2_xplus(
                         floattype_t[:, ::1] RE,
                         floattype_t[:, ::1] RF,
                         float d
-                ):
+                ) noexcept nogil:
     """This function updates the Ey and Ez field components for the xplus slab.
 
     Args:
@@ -310,7 +311,7 @@ cpdef void order1_yminus(
                         int zf,
                         int nthreads,
                         floattype_t[:, ::1] updatecoeffsE,
-                        np.uint32_t[:, :, :, ::1] ID,
+                        idtype_t[:, :, :, ::1] ID,
                         floattype_t[:, :, ::1] Ex,
                         floattype_t[:, :, ::1] Ey,
                         floattype_t[:, :, ::1] Ez,
@@ -324,7 +325,7 @@ cpdef void order1_yminus(
                         floattype_t[:, ::1] RE,
                         floattype_t[:, ::1] RF,
                         float d
-                ):
+                ) noexcept nogil:
     """This function updates the Ex and Ez field components for the yminus slab.
 
     Args:
@@ -375,7 +376,7 @@ cpdef void order2_yminus(
                         int zf,
                         int nthreads,
                         floattype_t[:, ::1] updatecoeffsE,
-                        np.uint32_t[:, :, :, ::1] ID,
+                        idtype_t[:, :, :, ::1] ID,
                         floattype_t[:, :, ::1] Ex,
                         floattype_t[:, :, ::1] Ey,
                         floattype_t[:, :, ::1] Ez,
@@ -389,7 +390,7 @@ cpdef void order2_yminus(
                         floattype_t[:, ::1] RE,
                         floattype_t[:, ::1] RF,
                         float d
-                ):
+                ) noexcept nogil:
     """This function updates the Ex and Ez field components for the yminus slab.
 
     Args:
@@ -449,7 +450,7 @@ cpdef void order1_yplus(
                         int zf,
                         int nthreads,
                         floattype_t[:, ::1] updatecoeffsE,
-                        np.uint32_t[:, :, :, ::1] ID,
+                        idtype_t[:, :, :, ::1] ID,
                         floattype_t[:, :, ::1] Ex,
                         floattype_t[:, :, ::1] Ey,
                         floattype_t[:, :, ::1] Ez,
@@ -463,7 +464,7 @@ cpdef void order1_yplus(
                         floattype_t[:, ::1] RE,
                         floattype_t[:, ::1] RF,
                         float d
-                ):
+                ) noexcept nogil:
     """This function updates the Ex and Ez field components for the yplus slab.
 
     Args:
@@ -514,7 +515,7 @@ cpdef void order2_yplus(
                         int zf,
                         int nthreads,
                         floattype_t[:, ::1] updatecoeffsE,
-                        np.uint32_t[:, :, :, ::1] ID,
+                        idtype_t[:, :, :, ::1] ID,
                         floattype_t[:, :, ::1] Ex,
                         floattype_t[:, :, ::1] Ey,
                         floattype_t[:, :, ::1] Ez,
@@ -528,7 +529,7 @@ cpdef void order2_yplus(
                         floattype_t[:, ::1] RE,
                         floattype_t[:, ::1] RF,
                         float d
-                ):
+                ) noexcept nogil:
     """This function updates the Ex and Ez field components for the yplus slab.
 
     Args:
@@ -588,7 +589,7 @@ cpdef void order1_zminus(
                         int zf,
                         int nthreads,
                         floattype_t[:, ::1] updatecoeffsE,
-                        np.uint32_t[:, :, :, ::1] ID,
+                        idtype_t[:, :, :, ::1] ID,
                         floattype_t[:, :, ::1] Ex,
                         floattype_t[:, :, ::1] Ey,
                         floattype_t[:, :, ::1] Ez,
@@ -602,7 +603,7 @@ cpdef void order1_zminus(
                         floattype_t[:, ::1] RE,
                         floattype_t[:, ::1] RF,
                         float d
-                ):
+                ) noexcept nogil:
     """This function updates the Ex and Ey field components for the zminus slab.
 
         Args:
@@ -653,7 +654,7 @@ cpdef void order2_zminus(
                         int zf,
                         int nthreads,
                         floattype_t[:, ::1] updatecoeffsE,
-                        np.uint32_t[:, :, :, ::1] ID,
+                        idtype_t[:, :, :, ::1] ID,
                         floattype_t[:, :, ::1] Ex,
                         floattype_t[:, :, ::1] Ey,
                         floattype_t[:, :, ::1] Ez,
@@ -667,7 +668,7 @@ cpdef void order2_zminus(
                         floattype_t[:, ::1] RE,
                         floattype_t[:, ::1] RF,
                         float d
-                ):
+                ) noexcept nogil:
     """This function updates the Ex and Ey field components for the zminus slab.
 
         Args:
@@ -727,7 +728,7 @@ cpdef void order1_zplus(
                         int zf,
                         int nthreads,
                         floattype_t[:, ::1] updatecoeffsE,
-                        np.uint32_t[:, :, :, ::1] ID,
+                        idtype_t[:, :, :, ::1] ID,
                         floattype_t[:, :, ::1] Ex,
                         floattype_t[:, :, ::1] Ey,
                         floattype_t[:, :, ::1] Ez,
@@ -741,7 +742,7 @@ cpdef void order1_zplus(
                         floattype_t[:, ::1] RE,
                         floattype_t[:, ::1] RF,
                         float d
-                ):
+                ) noexcept nogil:
     """This function updates the Ex and Ey field components for the zplus slab.
 
     Args:
@@ -792,7 +793,7 @@ cpdef void order2_zplus(
                         int zf,
                         int nthreads,
                         floattype_t[:, ::1] updatecoeffsE,
-                        np.uint32_t[:, :, :, ::1] ID,
+                        idtype_t[:, :, :, ::1] ID,
                         floattype_t[:, :, ::1] Ex,
                         floattype_t[:, :, ::1] Ey,
                         floattype_t[:, :, ::1] Ez,
@@ -806,7 +807,7 @@ cpdef void order2_zplus(
                         floattype_t[:, ::1] RE,
                         floattype_t[:, ::1] RF,
                         float d
-                ):
+                ) noexcept nogil:
     """This function updates the Ex and Ey field components for the zplus slab.
 
     Args:
@@ -855,3 +856,237 @@ cpdef void order2_zplus(
                 Ey[ii, jj, kk] = Ey[ii, jj, kk] + updatecoeffsE[materialEy, 4] * (IRA1 * dHx - IRA * Psi2)
                 Phi2[1, i, j, k] = RE1 * Phi2[1, i, j, k] + RC1 * (dHx - Psi2)
                 Phi2[0, i, j, k] = RE0 * Phi2[0, i, j, k] + RC0 * (dHx - Psi2)
+
+
+cpdef void order1_2D(
+                        int axis,
+                        bint minus,
+                        int s,
+                        int f,
+                        int os,
+                        int of,
+                        int nthreads,
+                        floattype_t sign,
+                        floattype_t[:, ::1] updatecoeffsE,
+                        idtype_t[:, ::1] ID,
+                        floattype_t[:, ::1] E,
+                        floattype_t[:, ::1] H,
+                        floattype_t[:, :, ::1] Phi,
+                        floattype_t[:, ::1] RA,
+                        floattype_t[:, ::1] RB,
+                        floattype_t[:, ::1] RE,
+                        floattype_t[:, ::1] RF,
+                        float d
+                ) noexcept nogil:
+    """This function updates the electric field component of a 2D model (TMx, TMy
+        or TMz), i.e. normal to the plane of the model, for a PML slab.
+
+    Args:
+        axis (int): Axis of the plane of the model (0 or 1) normal to the slab
+        minus (bint): Slab is in the minus direction, i.e. xminus, yminus or zminus
+        s, f (int): Cell coordinates of slab along axis
+        os, of (int): Cell coordinates of slab along other axis of the plane
+        nthreads (int): Number of threads to use
+        sign (float): Sign of the PML correction, i.e. 1 or -1
+        updatecoeffs, ID, E, H (memoryviews): Access to update coefficients,
+            ID (of E) and field component arrays of the plane
+        Phi, RA, RB, RE, RF (memoryviews): Access to PML coefficient arrays
+        d (float): Spatial discretisation along axis
+    """
+
+    cdef Py_ssize_t i, j, ii, jj, n, m, si, sj, pi, pj, ps
+    cdef int material
+    cdef floattype_t dx, dH, IRA, IRA1, RB0, RC0, RE0, RF0
+    cdef floattype_t *e = &E[0, 0]
+    cdef floattype_t *h = &H[0, 0]
+    cdef floattype_t *phi = &Phi[0, 0, 0]
+    cdef idtype_t *IDflat = &ID[0, 0]
+    dx = d
+
+    # Strides of field arrays and of PML field array along axis, and along
+    # other axis of the plane
+    if axis == 0:
+        si = E.shape[1]
+        sj = 1
+        pi = Phi.shape[2]
+        pj = 1
+    else:
+        si = 1
+        sj = E.shape[1]
+        pi = 1
+        pj = Phi.shape[2]
+    ps = Phi.shape[1] * Phi.shape[2]
+
+    for j in prange(0, of - os, nogil=True, schedule='static', num_threads=nthreads):
+        jj = j + os
+        for i in range(0, f - s):
+            if minus:
+                ii = f - i
+            else:
+                ii = i + s
+            IRA = 1 / RA[0, i]
+            IRA1 = IRA - 1
+            RB0 = RB[0, i]
+            RE0 = RE[0, i]
+            RF0 = RF[0, i]
+            RC0 = IRA * RB0 * RF0
+            n = ii * si + jj * sj
+            m = i * pi + j * pj
+            material = IDflat[n]
+            dH = (h[n] - h[n - si]) / dx
+            e[n] = e[n] + sign * updatecoeffsE[material, 4] * (IRA1 * dH - IRA * phi[m])
+            phi[m] = RE0 * phi[m] + RC0 * dH - RC0 * phi[m]
+
+cpdef void order2_2D(
+                        int axis,
+                        bint minus,
+                        int s,
+                        int f,
+                        int os,
+                        int of,
+                        int nthreads,
+                        floattype_t sign,
+                        floattype_t[:, ::1] updatecoeffsE,
+                        idtype_t[:, ::1] ID,
+                        floattype_t[:, ::1] E,
+                        floattype_t[:, ::1] H,
+                        floattype_t[:, :, ::1] Phi,
+                        floattype_t[:, ::1] RA,
+                        floattype_t[:, ::1] RB,
+                        floattype_t[:, ::1] RE,
+                        floattype_t[:, ::1] RF,
+                        float d
+                ) noexcept nogil:
+    """This function updates the electric field component of a 2D model (TMx, TMy
+        or TMz), i.e. normal to the plane of the model, for a PML slab.
+
+    Args:
+        axis (int): Axis of the plane of the model (0 or 1) normal to the slab
+        minus (bint): Slab is in the minus direction, i.e. xminus, yminus or zminus
+        s, f (int): Cell coordinates of slab along axis
+        os, of (int): Cell coordinates of slab along other axis of the plane
+        nthreads (int): Number of threads to use
+        sign (float): Sign of the PML correction, i.e. 1 or -1
+        updatecoeffs, ID, E, H (memoryviews): Access to update coefficients,
+            ID (of E) and field component arrays of the plane
+        Phi, RA, RB, RE, RF (memoryviews): Access to PML coefficient arrays
+        d (float): Spatial discretisation along axis
+    """
+
+    cdef Py_ssize_t i, j, ii, jj, n, m, si, sj, pi, pj, ps
+    cdef int material
+    cdef floattype_t dx, dH, IRA, IRA1, RB0, RC0, RE0, RF0, RB1, RC1, RE1, RF1, Psi
+    cdef floattype_t *e = &E[0, 0]
+    cdef floattype_t *h = &H[0, 0]
+    cdef floattype_t *phi = &Phi[0, 0, 0]
+    cdef idtype_t *IDflat = &ID[0, 0]
+    dx = d
+
+    # Strides of field arrays and of PML field array along axis, and along
+    # other axis of the plane
+    if axis == 0:
+        si = E.shape[1]
+        sj = 1
+        pi = Phi.shape[2]
+        pj = 1
+    else:
+        si = 1
+        sj = E.shape[1]
+        pi = 1
+        pj = Phi.shape[2]
+    ps = Phi.shape[1] * Phi.shape[2]
+
+    for j in prange(0, of - os, nogil=True, schedule='static', num_threads=nthreads):
+        jj = j + os
+        for i in range(0, f - s):
+            if minus:
+                ii = f - i
+            else:
+                ii = i + s
+            IRA = 1 / (RA[0, i] + RA[1, i])
+            IRA1 = IRA - 1
+            RB0 = RB[0, i]
+            RE0 = RE[0, i]
+            RF0 = RF[0, i]
+            RC0 = IRA * RF0
+            RB1 = RB[1, i]
+            RE1 = RE[1, i]
+            RF1 = RF[1, i]
+            RC1 = IRA * RF1
+            n = ii * si + jj * sj
+            m = i * pi + j * pj
+            material = IDflat[n]
+            dH = (h[n] - h[n - si]) / dx
+            Psi = RB0 * phi[m] + RB1 * phi[ps + m]
+            e[n] = e[n] + sign * updatecoeffsE[material, 4] * (IRA1 * dH - IRA * Psi)
+            phi[ps + m] = RE1 * phi[ps + m] + RC1 * (dH - Psi)
+            phi[m] = RE0 * phi[m] + RC0 * (dH - Psi)
+
+
+cdef void update_pml(
+                        int order,
+                        int direction,
+                        int xs,
+                        int xf,
+                        int ys,
+                        int yf,
+                        int zs,
+                        int zf,
+                        int nthreads,
+                        floattype_t[:, ::1] updatecoeffsE,
+                        idtype_t[:, :, :, ::1] ID,
+                        floattype_t[:, :, ::1] Ex,
+                        floattype_t[:, :, ::1] Ey,
+                        floattype_t[:, :, ::1] Ez,
+                        floattype_t[:, :, ::1] Hx,
+                        floattype_t[:, :, ::1] Hy,
+                        floattype_t[:, :, ::1] Hz,
+                        floattype_t[:, :, :, ::1] Phi1,
+                        floattype_t[:, :, :, ::1] Phi2,
+                        floattype_t[:, ::1] RA,
+                        floattype_t[:, ::1] RB,
+                        floattype_t[:, ::1] RE,
+                        floattype_t[:, ::1] RF,
+                        float d
+                ) noexcept nogil:
+    """This function selects the update function for the PML correction of the
+        electric field components from the order of the PML (number of CFS
+        parameters) and the direction of the PML slab, so it can be called
+        without the GIL.
+
+    Args:
+        order (int): Order of PML, i.e. number of CFS parameters
+        direction (int): Direction of PML slab (index in PML.directions)
+        xs, xf, ys, yf, zs, zf (int): Cell coordinates of entire box
+        nthreads (int): Number of threads to use
+        updatecoeffs, ID, E, H (memoryviews): Access to update coefficients, ID and field component arrays
+        Phi, RA, RB, RE, RF (memoryviews): Access to PML coefficient arrays
+        d (float): Spatial discretisation, e.g. dx, dy or dz
+    """
+
+    if order == 1:
+        if direction == 0:
+            order1_xminus(xs, xf, ys, yf, zs, zf, nthreads, updatecoeffsE, ID, Ex, Ey, Ez, Hx, Hy, Hz, Phi1, Phi2, RA, RB, RE, RF, d)
+        elif direction == 1:
+            order1_yminus(xs, xf, ys, yf, zs, zf, nthreads, updatecoeffsE, ID, Ex, Ey, Ez, Hx, Hy, Hz, Phi1, Phi2, RA, RB, RE, RF, d)
+        elif direction == 2:
+            order1_zminus(xs, xf, ys, yf, zs, zf, nthreads, updatecoeffsE, ID, Ex, Ey, Ez, Hx, Hy, Hz, Phi1, Phi2, RA, RB, RE, RF, d)
+        elif direction == 3:
+            order1_xplus(xs, xf, ys, yf, zs, zf, nthreads, updatecoeffsE, ID, Ex, Ey, Ez, Hx, Hy, Hz, Phi1, Phi2, RA, RB, RE, RF, d)
+        elif direction == 4:
+            order1_yplus(xs, xf, ys, yf, zs, zf, nthreads, updatecoeffsE, ID, Ex, Ey, Ez, Hx, Hy, Hz, Phi1, Phi2, RA, RB, RE, RF, d)
+        elif direction == 5:
+            order1_zplus(xs, xf, ys, yf, zs, zf, nthreads, updatecoeffsE, ID, Ex, Ey, Ez, Hx, Hy, Hz, Phi1, Phi2, RA, RB, RE, RF, d)
+    elif order == 2:
+        if direction == 0:
+            order2_xminus(xs, xf, ys, yf, zs, zf, nthreads, updatecoeffsE, ID, Ex, Ey, Ez, Hx, Hy, Hz, Phi1, Phi2, RA, RB, RE, RF, d)
+        elif direction == 1:
+            order2_yminus(xs, xf, ys, yf, zs, zf, nthreads, updatecoeffsE, ID, Ex, Ey, Ez, Hx, Hy, Hz, Phi1, Phi2, RA, RB, RE, RF, d)
+        elif direction == 2:
+            order2_zminus(xs, xf, ys, yf, zs, zf, nthreads, updatecoeffsE, ID, Ex, Ey, Ez, Hx, Hy, Hz, Phi1, Phi2, RA, RB, RE, RF, d)
+        elif direction == 3:
+            order2_xplus(xs, xf, ys, yf, zs, zf, nthreads, updatecoeffsE, ID, Ex, Ey, Ez, Hx, Hy, Hz, Phi1, Phi2, RA, RB, RE, RF, d)
+        elif direction == 4:
+            order2_yplus(xs, xf, ys, yf, zs, zf, nthreads, updatecoeffsE, ID, Ex, Ey, Ez, Hx, Hy, Hz, Phi1, Phi2, RA, RB, RE, RF, d)
+        elif direction == 5:
+            order2_zplus(xs, xf, ys, yf, zs, zf, nthreads, updatecoeffsE, ID, Ex, Ey, Ez, Hx, Hy, Hz, Phi1, Phi2, RA, RB, RE, RF, d)
@@ -0,0 +1,40 @@
+# Copyright (C) 2015-2019: The University of Edinburgh
+#                 Authors: Craig Warren and Antonis Giannopoulos
+#
+# This file is part of gprMax.
+#
+# gprMax is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# gprMax is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with gprMax.  If not, see <http://www.gnu.org/licenses/>.
+
+from gprMax.constants cimport floattype_t
+from gprMax.constants cimport idtype_t
+
+
+cdef class PMLSlab:
+    cdef int formulation, order, direction, xs, xf, ys, yf, zs, zf
+    cdef float d
+    cdef floattype_t[:, :, :, ::1] EPhi1, EPhi2, HPhi1, HPhi2
+    cdef floattype_t[:, ::1] ERA, ERB, ERE, ERF, HRA, HRB, HRE, HRF
+
+    cdef void update(self, bint electric, int nthreads, int istart, int istop, floattype_t[:, ::1] updatecoeffs, idtype_t[:, :, :, ::1] ID, floattype_t[:, :, ::1] Ex, floattype_t[:, :, ::1] Ey, floattype_t[:, :, ::1] Ez, floattype_t[:, :, ::1] Hx, floattype_t[:, :, ::1] Hy, floattype_t[:, :, ::1] Hz) noexcept nogil
+
+
+cdef class PMLSlabs:
+    cdef int npmls, nthreads
+    cdef bint fused
+    cdef PMLSlab pml0, pml1, pml2, pml3, pml4, pml5
+    cdef int[:, ::1] chunks
+    cdef int[::1] phases
+
+    cdef void update(self, bint electric, floattype_t[:, ::1] updatecoeffs, idtype_t[:, :, :, ::1] ID, floattype_t[:, :, ::1] Ex, floattype_t[:, :, ::1] Ey, floattype_t[:, :, ::1] Ez, floattype_t[:, :, ::1] Hx, floattype_t[:, :, ::1] Hy, floattype_t[:, :, ::1] Hz) noexcept nogil
+    cdef void update_chunk(self, Py_ssize_t n, bint electric, floattype_t[:, ::1] updatecoeffs, idtype_t[:, :, :, ::1] ID, floattype_t[:, :, ::1] Ex, floattype_t[:, :, ::1] Ey, floattype_t[:, :, ::1] Ez, floattype_t[:, :, ::1] Hx, floattype_t[:, :, ::1] Hy, floattype_t[:, :, ::1] Hz) noexcept nogil
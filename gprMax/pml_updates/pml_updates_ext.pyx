@@ -0,0 +1,252 @@
+# Copyright (C) 2015-2019: The University of Edinburgh
+#                 Authors: Craig Warren and Antonis Giannopoulos
+#
+# This file is part of gprMax.
+#
+# gprMax is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# gprMax is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with gprMax.  If not, see <http://www.gnu.org/licenses/>.
+
+import numpy as np
+cimport numpy as np
+from cython.parallel import prange
+
+from gprMax.constants cimport floattype_t
+from gprMax.constants cimport idtype_t
+from gprMax.pml_updates.pml_updates_electric_HORIPML_ext cimport update_pml as update_pml_electric_HORIPML
+from gprMax.pml_updates.pml_updates_electric_MRIPML_ext cimport update_pml as update_pml_electric_MRIPML
+from gprMax.pml_updates.pml_updates_magnetic_HORIPML_ext cimport update_pml as update_pml_magnetic_HORIPML
+from gprMax.pml_updates.pml_updates_magnetic_MRIPML_ext cimport update_pml as update_pml_magnetic_MRIPML
+
+# Maximum number of PML slabs, i.e. one at each boundary of the domain
+DEF MAXPMLS = 6
+
+# Number of chunks of x-planes per thread that the PML slabs in each direction
+# are divided into for a fused update (see PMLSlabs)
+DEF CHUNKSPERTHREAD = 4
+
+
+cdef class PMLSlab:
+    """Field and coefficient arrays of a PML slab, registered so the PML
+        correction can be carried out without the GIL.
+    """
+
+    def __init__(self, pml, G):
+        """
+        Args:
+            pml (PML): PML slab.
+            G (class): Grid class instance - holds essential parameters describing the model.
+        """
+
+        self.formulation = pml.formulations.index(G.pmlformulation)
+        self.order = len(pml.CFS)
+        self.direction = pml.directions.index(pml.direction)
+        self.xs = pml.xs
+        self.xf = pml.xf
+        self.ys = pml.ys
+        self.yf = pml.yf
+        self.zs = pml.zs
+        self.zf = pml.zf
+        self.d = pml.d
+        self.EPhi1 = pml.EPhi1
+        self.EPhi2 = pml.EPhi2
+        self.HPhi1 = pml.HPhi1
+        self.HPhi2 = pml.HPhi2
+        self.ERA = pml.ERA
+        self.ERB = pml.ERB
+        self.ERE = pml.ERE
+        self.ERF = pml.ERF
+        self.HRA = pml.HRA
+        self.HRB = pml.HRB
+        self.HRE = pml.HRE
+        self.HRF = pml.HRF
+
+    cdef void update(self, bint electric, int nthreads, int istart, int istop, floattype_t[:, ::1] updatecoeffs, idtype_t[:, :, :, ::1] ID, floattype_t[:, :, ::1] Ex, floattype_t[:, :, ::1] Ey, floattype_t[:, :, ::1] Ez, floattype_t[:, :, ::1] Hx, floattype_t[:, :, ::1] Hy, floattype_t[:, :, ::1] Hz) noexcept nogil:
+        """Updates electric or magnetic field components with the PML
+            correction for a range of (local) x-indices of the PML slab.
+
+        Args:
+            electric (bint): Update electric (True) or magnetic (False) field components.
+            nthreads (int): Number of threads to use
+            istart, istop (int): Range of (local) x-indices of the PML slab.
+            updatecoeffs, ID, E, H (memoryviews): Access to update coefficients, ID and field component arrays
+        """
+
+        cdef int xs, xf
+        cdef floattype_t[:, :, :, ::1] Phi1, Phi2
+        cdef floattype_t[:, ::1] RA, RB, RE, RF
+
+        if electric:
+            Phi1, Phi2, RA, RB, RE, RF = self.EPhi1, self.EPhi2, self.ERA, self.ERB, self.ERE, self.ERF
+        else:
+            Phi1, Phi2, RA, RB, RE, RF = self.HPhi1, self.HPhi2, self.HRA, self.HRB, self.HRE, self.HRF
+
+        # PML slabs in the xminus direction are indexed in reverse from the
+        # end of the slab. Field arrays of the PML are indexed by the local
+        # x-index, as are coefficient arrays of PML slabs in the x direction.
+        if self.direction == 0:
+            xs = self.xf - istop
+            xf = self.xf - istart
+        else:
+            xs = self.xs + istart
+            xf = self.xs + istop
+        if xf - xs < self.xf - self.xs:
+            Phi1 = Phi1[:, istart:istop]
+            Phi2 = Phi2[:, istart:istop]
+            if self.direction == 0 or self.direction == 3:
+                RA = RA[:, istart:istop]
+                RB = RB[:, istart:istop]
+                RE = RE[:, istart:istop]
+                RF = RF[:, istart:istop]
+
+        if electric:
+            if self.formulation == 0:
+                update_pml_electric_HORIPML(self.order, self.direction, xs, xf, self.ys, self.yf, self.zs, self.zf, nthreads, updatecoeffs, ID, Ex, Ey, Ez, Hx, Hy, Hz, Phi1, Phi2, RA, RB, RE, RF, self.d)
+            else:
+                update_pml_electric_MRIPML(self.order, self.direction, xs, xf, self.ys, self.yf, self.zs, self.zf, nthreads, updatecoeffs, ID, Ex, Ey, Ez, Hx, Hy, Hz, Phi1, Phi2, RA, RB, RE, RF, self.d)
+        else:
+            if self.formulation == 0:
+                update_pml_magnetic_HORIPML(self.order, self.direction, xs, xf, self.ys, self.yf, self.zs, self.zf, nthreads, updatecoeffs, ID, Ex, Ey, Ez, Hx, Hy, Hz, Phi1, Phi2, RA, RB, RE, RF, self.d)
+            else:
+                update_pml_magnetic_MRIPML(self.order, self.direction, xs, xf, self.ys, self.yf, self.zs, self.zf, nthreads, updatecoeffs, ID, Ex, Ey, Ez, Hx, Hy, Hz, Phi1, Phi2, RA, RB, RE, RF, self.d)
+
+
+cdef class PMLSlabs:
+    """
+    All PML slabs of the model, registered so the PML correction can be
+    carried out without the GIL. Slabs are either updated in turn, each with
+    its own parallel region, or (fused) with one parallel region for the
+    slabs in each direction.
+
+    For a fused update the x-planes of the slabs are divided into chunks that
+    are shared dynamically between threads, so small slabs, and the edge and
+    corner regions where slabs overlap, do not leave threads idle. Slabs in
+    the x, y and z directions are updated in turn, each in a parallel region
+    that ends when all of its chunks are finished, as slabs in different
+    directions correct the same field components where they overlap. The
+    corrections in these regions are therefore summed in a different order
+    to updating slabs in turn, i.e. results can differ by round-off.
+    """
+
+    def __init__(self, G):
+        """
+        Args:
+            G (class): Grid class instance - holds essential parameters describing the model.
+        """
+
+        if len(G.pmls) > MAXPMLS:
+            raise ValueError('Too many PML slabs for compiled PML update')
+        self.npmls = len(G.pmls)
+        self.nthreads = G.nthreads
+        self.fused = G.pmlfused
+        pmls = [PMLSlab(pml, G) for pml in G.pmls] + [None] * (MAXPMLS - len(G.pmls))
+        self.pml0, self.pml1, self.pml2, self.pml3, self.pml4, self.pml5 = pmls
+
+        # Chunks of x-planes - index of slab, and start and stop (local)
+        # x-indices; and index of first chunk for slabs in each direction
+        chunks = []
+        phases = [0]
+        for axis in ('x', 'y', 'z'):
+            slabs = [(n, pml) for n, pml in enumerate(G.pmls) if pml.direction[0] == axis]
+            work = sum(pml.nx * pml.ny * pml.nz for n, pml in slabs)
+            for n, pml in slabs:
+                step = max(work // (CHUNKSPERTHREAD * G.nthreads * max(pml.ny * pml.nz, 1)), 1)
+                chunks += [(n, i, min(i + step, pml.nx)) for i in range(0, pml.nx, step)]
+            phases.append(len(chunks))
+        self.chunks = np.array(chunks, dtype=np.int32).reshape(-1, 3)
+        self.phases = np.array(phases, dtype=np.int32)
+
+    def update_electric(self, G):
+        """Updates electric field components with the PML correction.
+
+        Args:
+            G (class): Grid class instance - holds essential parameters describing the model.
+        """
+
+        self.update_fields(True, G.updatecoeffsE, G.ID, G.Ex, G.Ey, G.Ez, G.Hx, G.Hy, G.Hz)
+
+    def update_magnetic(self, G):
+        """Updates magnetic field components with the PML correction.
+
+        Args:
+            G (class): Grid class instance - holds essential parameters describing the model.
+        """
+
+        self.update_fields(False, G.updatecoeffsH, G.ID, G.Ex, G.Ey, G.Ez, G.Hx, G.Hy, G.Hz)
+
+    def update_fields(self, bint electric, floattype_t[:, ::1] updatecoeffs, idtype_t[:, :, :, ::1] ID, floattype_t[:, :, ::1] Ex, floattype_t[:, :, ::1] Ey, floattype_t[:, :, ::1] Ez, floattype_t[:, :, ::1] Hx, floattype_t[:, :, ::1] Hy, floattype_t[:, :, ::1] Hz):
+        with nogil:
+            self.update(electric, updatecoeffs, ID, Ex, Ey, Ez, Hx, Hy, Hz)
+
+    cdef void update(self, bint electric, floattype_t[:, ::1] updatecoeffs, idtype_t[:, :, :, ::1] ID, floattype_t[:, :, ::1] Ex, floattype_t[:, :, ::1] Ey, floattype_t[:, :, ::1] Ez, floattype_t[:, :, ::1] Hx, floattype_t[:, :, ::1] Hy, floattype_t[:, :, ::1] Hz) noexcept nogil:
+        """Updates electric or magnetic field components with the PML correction.
+
+        Args:
+            electric (bint): Update electric (True) or magnetic (False) field components.
+            updatecoeffs, ID, E, H (memoryviews): Access to update coefficients, ID and field component arrays
+        """
+
+        cdef Py_ssize_t n
+        cdef int xchunks, ychunks, zchunks
+
+        if self.fused:
+            xchunks = self.phases[1]
+            ychunks = self.phases[2]
+            zchunks = self.phases[3]
+            # Each direction has its own parallel region, so all slabs in a
+            # direction are finished before slabs in the next are started
+            for n in prange(0, xchunks, schedule='dynamic', num_threads=self.nthreads):
+                self.update_chunk(n, electric, updatecoeffs, ID, Ex, Ey, Ez, Hx, Hy, Hz)
+            for n in prange(xchunks, ychunks, schedule='dynamic', num_threads=self.nthreads):
+                self.update_chunk(n, electric, updatecoeffs, ID, Ex, Ey, Ez, Hx, Hy, Hz)
+            for n in prange(ychunks, zchunks, schedule='dynamic', num_threads=self.nthreads):
+                self.update_chunk(n, electric, updatecoeffs, ID, Ex, Ey, Ez, Hx, Hy, Hz)
+        else:
+            if self.npmls > 0:
+                self.pml0.update(electric, self.nthreads, 0, self.pml0.xf - self.pml0.xs, updatecoeffs, ID, Ex, Ey, Ez, Hx, Hy, Hz)
+            if self.npmls > 1:
+                self.pml1.update(electric, self.nthreads, 0, self.pml1.xf - self.pml1.xs, updatecoeffs, ID, Ex, Ey, Ez, Hx, Hy, Hz)
+            if self.npmls > 2:
+                self.pml2.update(electric, self.nthreads, 0, self.pml2.xf - self.pml2.xs, updatecoeffs, ID, Ex, Ey, Ez, Hx, Hy, Hz)
+            if self.npmls > 3:
+                self.pml3.update(electric, self.nthreads, 0, self.pml3.xf - self.pml3.xs, updatecoeffs, ID, Ex, Ey, Ez, Hx, Hy, Hz)
+            if self.npmls > 4:
+                self.pml4.update(electric, self.nthreads, 0, self.pml4.xf - self.pml4.xs, updatecoeffs, ID, Ex, Ey, Ez, Hx, Hy, Hz)
+            if self.npmls > 5:
+                self.pml5.update(electric, self.nthreads, 0, self.pml5.xf - self.pml5.xs, updatecoeffs, ID, Ex, Ey, Ez, Hx, Hy, Hz)
+
+    cdef void update_chunk(self, Py_ssize_t n, bint electric, floattype_t[:, ::1] updatecoeffs, idtype_t[:, :, :, ::1] ID, floattype_t[:, :, ::1] Ex, floattype_t[:, :, ::1] Ey, floattype_t[:, :, ::1] Ez, floattype_t[:, :, ::1] Hx, floattype_t[:, :, ::1] Hy, floattype_t[:, :, ::1] Hz) noexcept nogil:
+        """Updates field components with the PML correction for a chunk of
+            x-planes of a PML slab, using a single thread.
+
+        Args:
+            n (int): Index of chunk.
+            electric (bint): Update electric (True) or magnetic (False) field components.
+            updatecoeffs, ID, E, H (memoryviews): Access to update coefficients, ID and field component arrays
+        """
+
+        cdef int slab = self.chunks[n, 0]
+        cdef int istart = self.chunks[n, 1]
+        cdef int istop = self.chunks[n, 2]
+
+        if slab == 0:
+            self.pml0.update(electric, 1, istart, istop, updatecoeffs, ID, Ex, Ey, Ez, Hx, Hy, Hz)
+        elif slab == 1:
+            self.pml1.update(electric, 1, istart, istop, updatecoeffs, ID, Ex, Ey, Ez, Hx, Hy, Hz)
+        elif slab == 2:
+            self.pml2.update(electric, 1, istart, istop, updatecoeffs, ID, Ex, Ey, Ez, Hx, Hy, Hz)
+        elif slab == 3:
+            self.pml3.update(electric, 1, istart, istop, updatecoeffs, ID, Ex, Ey, Ez, Hx, Hy, Hz)
+        elif slab == 4:
+            self.pml4.update(electric, 1, istart, istop, updatecoeffs, ID, Ex, Ey, Ez, Hx, Hy, Hz)
+        elif slab == 5:
+            self.pml5.update(electric, 1, istart, istop, updatecoeffs, ID, Ex, Ey, Ez, Hx, Hy, Hz)
@@ -0,0 +1,52 @@
+# Copyright (C) 2015-2019: The University of Edinburgh
+#                 Authors: Craig Warren and Antonis Giannopoulos
+#
+# This file is part of gprMax.
+#
+# gprMax is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# gprMax is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with gprMax.  If not, see <http://www.gnu.org/licenses/>.
+
+cimport numpy as np
+
+from gprMax.constants cimport floattype_t
+from gprMax.constants cimport idtype_t
+
+
+# Update function for the PML correction of the magnetic field components,
+# selected from the order of the PML and the direction of the PML slab
+cdef void update_pml(
+                        int order,
+                        int direction,
+                        int xs,
+                        int xf,
+                        int ys,
+                        int yf,
+                        int zs,
+                        int zf,
+                        int nthreads,
+                        floattype_t[:, ::1] updatecoeffsH,
+                        idtype_t[:, :, :, ::1] ID,
+                        floattype_t[:, :, ::1] Ex,
+                        floattype_t[:, :, ::1] Ey,
+                        floattype_t[:, :, ::1] Ez,
+                        floattype_t[:, :, ::1] Hx,
+                        floattype_t[:, :, ::1] Hy,
+                        floattype_t[:, :, ::1] Hz,
+                        floattype_t[:, :, :, ::1] Phi1,
+                        floattype_t[:, :, :, ::1] Phi2,
+                        floattype_t[:, ::1] RA,
+                        floattype_t[:, ::1] RB,
+                        floattype_t[:, ::1] RE,
+                        floattype_t[:, ::1] RF,
+                        float d
+                ) noexcept nogil
@@ -40,6 +40,53 @@ class Rx(object):
         self.xcoordorigin = None
         self.ycoordorigin = None
         self.zcoordorigin = None
+        # Order of the receiver in the input file, i.e. receivers are numbered
+        # in this order in output files even if some are inside subgrids
+        self.inputorder = None
+
+
+def cpu_initialise_rx_arrays(rxs, G):
+    """Initialise arrays for receiver cells, output components, and to store
+        field components for receivers. The outputs of each receiver are
+        replaced with views of the array used to store field components.
+
+    Args:
+        rxs (list): Receivers.
+        G (class): Grid class instance - holds essential parameters describing the model.
+
+    Returns:
+        rxindices (int): numpy array of flat indices of receiver cells in field arrays.
+        rxcomponents (int): numpy array of output components (indices of
+                            Rx.allowableoutputs), -1 if there is no output or
+                            the output is always zero, i.e. current on an
+                            edge of the domain.
+        rxspacings (float): numpy array of sizes of receiver cells, i.e. the
+                            spatial discretisation, or spacings of the dual
+                            grid of a graded mesh at the receiver.
+        rxoutputs (float): numpy array to store field components for receivers
+                            - rows are receivers; columns are output components;
+                            pages are iterations.
+    """
+
+    rxindices = np.zeros(len(rxs), dtype=np.int64)
+    rxcomponents = np.full((len(rxs), max([len(rx.outputs) for rx in rxs] + [1])), -1, dtype=np.int32)
+    rxspacings = np.zeros((len(rxs), 3), dtype=floattype)
+    rxoutputs = np.zeros((len(rxs), rxcomponents.shape[1], G.iterations), dtype=floattype)
+    for i, rx in enumerate(rxs):
+        rxindices[i] = (rx.xcoord * (G.ny + 1) + rx.ycoord) * (G.nz + 1) + rx.zcoord
+        # Currents are calculated from magnetic field components on the edges
+        # of the dual grid (see Ix, Iy and Iz in grid.py)
+        rxspacings[i, 0] = G.cell_size('Ey', rx.xcoord, rx.ycoord, rx.zcoord)[0]
+        rxspacings[i, 1] = G.cell_size('Ez', rx.xcoord, rx.ycoord, rx.zcoord)[1]
+        rxspacings[i, 2] = G.cell_size('Ex', rx.xcoord, rx.ycoord, rx.zcoord)[2]
+        for j, output in enumerate(rx.outputs):
+            if not ((output == 'Ix' and (rx.ycoord == 0 or rx.zcoord == 0))
+                    or (output == 'Iy' and (rx.xcoord == 0 or rx.zcoord == 0))
+                    or (output == 'Iz' and (rx.xcoord == 0 or rx.ycoord == 0))):
+                rxcomponents[i, j] = Rx.allowableoutputs.index(output)
+            rx.outputs[output] = rxoutputs[i, j, :]
+
+    return rxindices, rxcomponents, rxspacings, rxoutputs
 
 
 def gpu_initialise_rx_arrays(G):
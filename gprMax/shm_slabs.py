@@ -0,0 +1,213 @@
+# Copyright (C) 2015-2019: The University of Edinburgh
+#                 Authors: Craig Warren and Antonis Giannopoulos
+#
+# This file is part of gprMax.
+#
+# gprMax is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# gprMax is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with gprMax.  If not, see <http://www.gnu.org/licenses/>.
+
+import multiprocessing
+from multiprocessing import shared_memory
+import os
+import sys
+from threading import BrokenBarrierError
+
+import numpy as np
+
+from gprMax.exceptions import GeneralError
+
+
+def cpu_sockets():
+    """Get the CPUs available to the process grouped by socket (physical package).
+
+    Returns:
+        sockets (list): Lists of CPU numbers of each socket, or an empty list
+                        if CPU affinity can not be set on the platform.
+    """
+
+    if not hasattr(os, 'sched_getaffinity'):
+        return []
+
+    sockets = {}
+    for cpu in sorted(os.sched_getaffinity(0)):
+        try:
+            with open('/sys/devices/system/cpu/cpu{}/topology/physical_package_id'.format(cpu)) as f:
+                socket = int(f.read())
+        except (OSError, ValueError):
+            socket = 0
+        sockets.setdefault(socket, []).append(cpu)
+
+    return [sockets[socket] for socket in sorted(sockets)]
+
+
+class SharedMemorySlabs(object):
+    """
+    Decomposition of the domain of a single model into slabs of x-planes that
+    are updated by worker processes on a single machine, i.e. without MPI.
+
+    Field arrays are held in shared memory, so there is no halo exchange
+    between slabs: the workers synchronise at a barrier after the magnetic
+    and after the electric field updates of every iteration. Each worker is
+    pinned to the CPUs of a socket, and is the first to touch its slab of the
+    shared arrays, so on multi-socket (NUMA) machines the memory of a slab is
+    local to the socket that updates it.
+    """
+
+    # Arrays of the grid that are held in shared memory
+    fields = ('Ex', 'Ey', 'Ez', 'Hx', 'Hy', 'Hz')
+
+    def __init__(self, nworkers, G):
+        """
+        Args:
+            nworkers (int): Number of worker processes, i.e. slabs.
+            G (class): Grid class instance - holds essential parameters describing the model.
+        """
+
+        if not hasattr(os, 'fork'):
+            raise GeneralError('Slabs of the domain in shared memory require worker processes to be started by fork, which is not available on this platform')
+        if nworkers < 1 or nworkers > G.nx + 1:
+            raise GeneralError('Slabs of the domain in shared memory require between 1 and {} (number of x-planes) worker processes'.format(G.nx + 1))
+
+        self.nworkers = nworkers
+        self.slabs = [(w * (G.nx + 1) // nworkers, (w + 1) * (G.nx + 1) // nworkers) for w in range(nworkers)]
+
+        # Threads of each worker, and CPUs each worker is pinned to, i.e. a
+        # socket, or several sockets if there are fewer workers than sockets.
+        # Neighbouring slabs are placed on the same socket where possible.
+        self.nthreads = max(1, G.nthreads // nworkers)
+        sockets = cpu_sockets()
+        self.cpus = []
+        for w in range(nworkers if sockets else 0):
+            first = w * len(sockets) // nworkers
+            last = max((w + 1) * len(sockets) // nworkers, first + 1)
+            self.cpus.append([cpu for socket in sockets[first:last] for cpu in socket])
+
+        self.context = multiprocessing.get_context('fork')
+        self.barrier = self.context.Barrier(nworkers)
+        self.errors = self.context.SimpleQueue()
+
+        # Shared memory blocks, and arrays in them
+        self.blocks = []
+        self.arrays = {}
+
+    def slab_index(self, x):
+        """Get the slab (worker) that contains an x-plane.
+
+        Args:
+            x (int): x-plane of the domain.
+
+        Returns:
+            w (int): Slab containing the x-plane.
+        """
+
+        for w, (xs, xf) in enumerate(self.slabs):
+            if x < xf:
+                return w
+        return self.nworkers - 1
+
+    def share(self, key, array, copy=True):
+        """Create an array in shared memory with the shape and type of an array.
+
+        Args:
+            key (str/tuple): Key of the shared array in arrays.
+            array (ndarray): Array to share.
+            copy (bool): Copy the values of the array, otherwise the shared
+                            array is left untouched to be filled by the workers.
+
+        Returns:
+            shared (ndarray): Array in shared memory.
+        """
+
+        block = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+        self.blocks.append(block)
+        shared = np.ndarray(array.shape, dtype=array.dtype, buffer=block.buf)
+        if copy:
+            shared[:] = array
+        self.arrays[key] = shared
+
+        return shared
+
+    def touch(self, w, G):
+        """Copy the slab of a worker into the shared field and geometry arrays
+            (first touch), and replace the arrays of the grid of the worker
+            with the shared arrays.
+
+        Args:
+            w (int): Slab (worker).
+            G (class): Grid class instance - holds essential parameters describing the model.
+        """
+
+        xs, xf = self.slabs[w]
+        for name in self.fields + ('ID',):
+            index = (slice(None), slice(xs, xf)) if name == 'ID' else slice(xs, xf)
+            self.arrays[name][index] = getattr(G, name)[index]
+            setattr(G, name, self.arrays[name])
+        self.barrier.wait()
+
+    def run(self, target):
+        """Run a function for each slab in a worker process, and wait for the
+            workers to finish.
+
+        Args:
+            target (function): Function called with the slab (worker) number.
+        """
+
+        workers = [self.context.Process(target=self.worker, args=(target, w)) for w in range(self.nworkers)]
+        for worker in workers:
+            worker.start()
+        try:
+            for worker in workers:
+                worker.join()
+        finally:
+            for worker in workers:
+                if worker.is_alive():
+                    worker.terminate()
+
+        if any(worker.exitcode != 0 for worker in workers):
+            error = self.errors.get() if not self.errors.empty() else 'exit code {}'.format(next(worker.exitcode for worker in workers if worker.exitcode != 0))
+            raise GeneralError('A worker process updating a slab of the domain failed with: {}'.format(error))
+
+    def worker(self, target, w):
+        """Pin a worker process to its CPUs and run a function for its slab.
+            If the function raises an error, the barrier is broken so the other
+            workers do not wait on it.
+
+        Args:
+            target (function): Function called with the slab (worker) number.
+            w (int): Slab (worker).
+        """
+
+        if self.cpus:
+            os.sched_setaffinity(0, self.cpus[w])
+
+        # Only the first worker prints messages and progress
+        if w != 0:
+            sys.stdout = open(os.devnull, 'w')
+
+        try:
+            target(w)
+        except BrokenBarrierError:
+            sys.exit(1)
+        except BaseException as e:
+            self.barrier.abort()
+            self.errors.put('{}: {}'.format(type(e).__name__, e))
+            sys.exit(1)
+
+    def release(self):
+        """Free the shared memory blocks."""
+
+        self.arrays = {}
+        for block in self.blocks:
+            block.close()
+            block.unlink()
+        self.blocks = []
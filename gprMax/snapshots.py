@@ -91,13 +91,28 @@ class Snapshot(object):
             G (class): Grid class instance - holds essential parameters describing the model.
         """
 
+        # Field values at the nodes of a domain decomposed across MPI ranks
+        # are gathered to, and the snapshot only stored by, the first rank
+        if G.domain:
+            slices = G.domain.gather_snapshot(self, G)
+            if slices is None:
+                return
+            Exslice, Eyslice, Ezslice, Hxslice, Hyslice, Hzslice = slices
+
         # Memory views of field arrays to dimensions required for the snapshot
-        Exslice = np.ascontiguousarray(G.Ex[self.sx, self.sy, self.sz])
-        Eyslice = np.ascontiguousarray(G.Ey[self.sx, self.sy, self.sz])
-        Ezslice = np.ascontiguousarray(G.Ez[self.sx, self.sy, self.sz])
-        Hxslice = np.ascontiguousarray(G.Hx[self.sx, self.sy, self.sz])
-        Hyslice = np.ascontiguousarray(G.Hy[self.sx, self.sy, self.sz])
-        Hzslice = np.ascontiguousarray(G.Hz[self.sx, self.sy, self.sz])
+        else:
+            Exslice = np.ascontiguousarray(G.Ex[self.sx, self.sy, self.sz])
+            Eyslice = np.ascontiguousarray(G.Ey[self.sx, self.sy, self.sz])
+            Ezslice = np.ascontiguousarray(G.Ez[self.sx, self.sy, self.sz])
+            Hxslice = np.ascontiguousarray(G.Hx[self.sx, self.sy, self.sz])
+            Hyslice = np.ascontiguousarray(G.Hy[self.sx, self.sy, self.sz])
+            Hzslice = np.ascontiguousarray(G.Hz[self.sx, self.sy, self.sz])
+
+            # Field arrays of 2D models have a single cell in the invariant
+            # direction (see FDTDPlane), beyond which field values are zero
+            if '2D' in G.mode:
+                shape = tuple(len(range(*s.indices(n + 1))) for s, n in zip((self.sx, self.sy, self.sz), (G.nx, G.ny, G.nz)))
+                Exslice, Eyslice, Ezslice, Hxslice, Hyslice, Hzslice = (np.pad(fieldslice, [(0, n - m) for n, m in zip(shape, fieldslice.shape)]) for fieldslice in (Exslice, Eyslice, Ezslice, Hxslice, Hyslice, Hzslice))
 
         # Create arrays to hold the field data for snapshot
         Exsnap = np.zeros((self.nx, self.ny, self.nz), dtype=floattype)
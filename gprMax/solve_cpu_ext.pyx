@@ -0,0 +1,526 @@
+# Copyright (C) 2015-2019: The University of Edinburgh
+#                 Authors: Craig Warren and Antonis Giannopoulos
+#
+# This file is part of gprMax.
+#
+# gprMax is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# gprMax is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with gprMax.  If not, see <http://www.gnu.org/licenses/>.
+
+import numpy as np
+cimport numpy as np
+
+from gprMax.constants import c
+from gprMax.constants import floattype
+from gprMax.receivers import cpu_initialise_rx_arrays
+from gprMax.constants cimport floattype_t
+from gprMax.constants cimport complextype_t
+from gprMax.constants cimport idtype_t
+from gprMax.constants cimport dispersivetype_t
+from gprMax.fields_outputs_ext cimport store_rx_outputs
+from gprMax.fields_updates_ext cimport update_electric
+from gprMax.fields_updates_ext cimport update_electric_tiled
+from gprMax.fields_updates_ext cimport update_electric_runs
+from gprMax.fields_updates_ext cimport update_magnetic
+from gprMax.fields_updates_ext cimport update_magnetic_tiled
+from gprMax.fields_updates_ext cimport update_magnetic_runs
+from gprMax.fields_updates_ext cimport update_electric_dispersive_multipole
+from gprMax.fields_updates_ext cimport update_electric_dispersive_1pole
+from gprMax.fields_updates_ext cimport update_electric_dispersive_cells
+from gprMax.fields_updates_ext cimport update_electric_dispersive_cells_phi
+from gprMax.pml_updates.pml_updates_ext cimport PMLSlabs
+
+
+# Types of sources in the source tables of the solver
+DEF VOLTAGESOURCE = 0
+DEF HERTZIANDIPOLE = 1
+DEF MAGNETICDIPOLE = 2
+DEF TRANSMISSIONLINE = 3
+
+cdef class CPUSolver:
+    """
+    Compiled driver for the time stepping loop on CPU. Field arrays, update
+    coefficients, PML slabs, sources (in source tables), transmission lines
+    and receiver outputs are registered up front, so that any number of
+    iterations can be carried out without the GIL.
+    """
+
+    cdef int nx, ny, nz, nthreads, maxpoles, tilex, tiley, ntls
+    cdef double dt
+    cdef floattype_t dx, dy, dz
+    cdef floattype_t[:, ::1] updatecoeffsE, updatecoeffsH
+    cdef int iditemsize
+    cdef np.uint8_t[:, :, :, ::1] ID8
+    cdef np.uint16_t[:, :, :, ::1] ID16
+    cdef np.uint32_t[:, :, :, ::1] ID32
+    cdef floattype_t[:, :, ::1] Ex, Ey, Ez, Hx, Hy, Hz
+
+    # Dispersive update coefficients and temporary arrays, which are real if
+    # all poles are real (see Material.realpoles), otherwise complex
+    cdef bint realpoles
+    cdef complextype_t[:, ::1] updatecoeffsdispersive
+    cdef complextype_t[:, :, :, ::1] Tx, Ty, Tz
+    cdef floattype_t[:, ::1] updatecoeffsdispersivereal
+    cdef floattype_t[:, :, :, ::1] Txreal, Tyreal, Tzreal
+
+    # Temporary dispersive arrays stored only for cells in dispersive
+    # materials - flat indices of cells, temporary values, and dispersive
+    # terms of electric field updates
+    cdef bint dispersivecells
+    cdef np.int64_t[::1] cellsx, cellsy, cellsz
+    cdef complextype_t[:, ::1] Tcx, Tcy, Tcz
+    cdef floattype_t[:, ::1] Tcxreal, Tcyreal, Tczreal
+    cdef float[::1] phix, phiy, phiz
+
+    # Runs of cells in the z direction that share a single material
+    cdef bint materialruns
+    cdef int[:, ::1] runoffsets, runs
+
+    cdef PMLSlabs pmls
+
+    # Source tables - type, cell coordinates, polarisation and index of
+    # transmission line; resistance or length, and scaling coefficient;
+    # start and stop times; and waveform values for electric (J) and
+    # magnetic (M) sources
+    cdef int[:, ::1] srcinfoE, srcinfoM
+    cdef floattype_t[:, ::1] srcvaluesE, srcvaluesM
+    cdef double[:, ::1] srctimesE, srctimesM
+    cdef floattype_t[:, ::1] srcwavesE, srcwavesM
+
+    # Transmission lines - source position, antenna position and number of
+    # cells; voltage, source, ABC and current coefficients; voltage, current
+    # and ABC values; and total voltage and current outputs. Coefficients are
+    # double precision as the line is updated in double precision in sources.py
+    cdef int[:, ::1] tlinfo
+    cdef double[:, ::1] tlcoeffs
+    cdef floattype_t[:, ::1] tlvoltage, tlcurrent, tlabc
+    cdef floattype_t[:, :, ::1] tloutputs
+
+    # Receiver outputs - flat indices of cells, output components, sizes of
+    # cells, and values (see cpu_initialise_rx_arrays)
+    cdef np.int64_t[::1] rxindices
+    cdef int[:, ::1] rxcomponents
+    cdef floattype_t[:, ::1] rxspacings
+    cdef floattype_t[:, :, ::1] rxoutputs
+
+    def __init__(self, G):
+        """
+        Args:
+            G (class): Grid class instance - holds essential parameters describing the model.
+        """
+
+        from gprMax.materials import Material
+
+        self.nx = G.nx
+        self.ny = G.ny
+        self.nz = G.nz
+        self.nthreads = G.nthreads
+        self.maxpoles = Material.maxpoles
+        self.dispersivecells = G.dispersivecells is not None
+        self.tilex, self.tiley = G.tiles if G.tiles and (Material.maxpoles == 0 or self.dispersivecells) else (0, 0)
+        self.materialruns = G.materialruns is not None
+        if self.materialruns:
+            self.runoffsets, self.runs = G.materialruns
+        self.dt = G.dt
+        self.dx = G.dx
+        self.dy = G.dy
+        self.dz = G.dz
+        self.updatecoeffsE = G.updatecoeffsE
+        self.updatecoeffsH = G.updatecoeffsH
+        # ID array is stored in a view for its integer type
+        self.iditemsize = G.ID.itemsize
+        if self.iditemsize == 1:
+            self.ID8 = G.ID
+        elif self.iditemsize == 2:
+            self.ID16 = G.ID
+        else:
+            self.ID32 = G.ID
+        self.Ex = G.Ex
+        self.Ey = G.Ey
+        self.Ez = G.Ez
+        self.Hx = G.Hx
+        self.Hy = G.Hy
+        self.Hz = G.Hz
+        if Material.maxpoles > 0:
+            self.realpoles = not np.iscomplexobj(G.updatecoeffsdispersive)
+            if self.realpoles:
+                self.updatecoeffsdispersivereal = G.updatecoeffsdispersive
+            else:
+                self.updatecoeffsdispersive = G.updatecoeffsdispersive
+        if self.dispersivecells:
+            self.cellsx, self.cellsy, self.cellsz = G.dispersivecells
+            if self.realpoles:
+                self.Tcxreal, self.Tcyreal, self.Tczreal = G.Tx, G.Ty, G.Tz
+            else:
+                self.Tcx, self.Tcy, self.Tcz = G.Tx, G.Ty, G.Tz
+            self.phix, self.phiy, self.phiz = (np.zeros(cells.size, dtype=np.float32) for cells in G.dispersivecells)
+        elif Material.maxpoles > 0:
+            if self.realpoles:
+                self.Txreal, self.Tyreal, self.Tzreal = G.Tx, G.Ty, G.Tz
+            else:
+                self.Tx, self.Ty, self.Tz = G.Tx, G.Ty, G.Tz
+
+        # PML slabs
+        self.pmls = PMLSlabs(G)
+
+        # Transmission lines
+        self.ntls = len(G.transmissionlines)
+        nl = max([tl.nl for tl in G.transmissionlines] + [1])
+        tlinfo = np.zeros((self.ntls, 3), dtype=np.int32)
+        tlcoeffs = np.zeros((self.ntls, 4), dtype=np.float64)
+        tlvoltage = np.zeros((self.ntls, nl), dtype=floattype)
+        tlcurrent = np.zeros((self.ntls, nl), dtype=floattype)
+        tlabc = np.zeros((self.ntls, 2), dtype=floattype)
+        for n, tl in enumerate(G.transmissionlines):
+            tlinfo[n, :] = (tl.srcpos, tl.antpos, tl.nl)
+            tlcoeffs[n, 0] = tl.resistance * (c * G.dt / tl.dl)
+            tlcoeffs[n, 1] = c * G.dt / tl.dl
+            tlcoeffs[n, 2] = (c * G.dt - tl.dl) / (c * G.dt + tl.dl)
+            tlcoeffs[n, 3] = (1 / tl.resistance) * (c * G.dt / tl.dl)
+            tlvoltage[n, :tl.nl] = tl.voltage[:tl.nl]
+            tlcurrent[n, :tl.nl] = tl.current[:tl.nl]
+            tlabc[n, :] = (tl.abcv0, tl.abcv1)
+        self.tlinfo = tlinfo
+        self.tlcoeffs = tlcoeffs
+        self.tlvoltage = tlvoltage
+        self.tlcurrent = tlcurrent
+        self.tlabc = tlabc
+        self.tloutputs = np.zeros((self.ntls, 2, G.iterations), dtype=floattype)
+
+        # Source tables (in the same order as sources are updated in solve_cpu)
+        self.srcinfoE, self.srcvaluesE, self.srctimesE, self.srcwavesE = self.source_table(G.voltagesources + G.transmissionlines + G.hertziandipoles, G, 'J')
+        self.srcinfoM, self.srcvaluesM, self.srctimesM, self.srcwavesM = self.source_table(G.transmissionlines + G.magneticdipoles, G, 'M')
+
+        # Receiver outputs (stored directly in the outputs of the receivers)
+        self.rxindices, self.rxcomponents, self.rxspacings, self.rxoutputs = cpu_initialise_rx_arrays(G.rxs, G)
+
+    def source_table(self, sources, G, waveform):
+        """Creates source table arrays for a list of sources.
+
+        Args:
+            sources (list): Sources in the order they are updated.
+            G (class): Grid class instance - holds essential parameters describing the model.
+            waveform (str): Waveform values to use, 'J' (electric) or 'M' (magnetic).
+
+        Returns:
+            srcinfo (array): Type, cell coordinates, polarisation, and index of transmission line.
+            srcvalues (array): Resistance (voltage source) or length (Hertzian
+                                dipole), and scaling coefficient for waveform.
+            srctimes (array): Start and stop times.
+            srcwaves (array): Waveform values.
+        """
+
+        srcinfo = np.zeros((len(sources), 6), dtype=np.int32)
+        srcvalues = np.zeros((len(sources), 2), dtype=floattype)
+        srctimes = np.zeros((len(sources), 2), dtype=np.float64)
+        srcwaves = np.zeros((len(sources), G.iterations), dtype=floattype)
+        for n, src in enumerate(sources):
+            if src.__class__.__name__ == 'VoltageSource':
+                srcinfo[n, 0] = VOLTAGESOURCE
+                srcvalues[n, 0] = src.resistance
+                if src.resistance != 0:
+                    if src.polarisation == 'x':
+                        srcvalues[n, 1] = 1 / (src.resistance * G.dy * G.dz)
+                    elif src.polarisation == 'y':
+                        srcvalues[n, 1] = 1 / (src.resistance * G.dx * G.dz)
+                    elif src.polarisation == 'z':
+                        srcvalues[n, 1] = 1 / (src.resistance * G.dx * G.dy)
+            elif src.__class__.__name__ == 'HertzianDipole':
+                srcinfo[n, 0] = HERTZIANDIPOLE
+                srcvalues[n, 0] = src.dl
+                srcvalues[n, 1] = 1 / (G.dx * G.dy * G.dz)
+            elif src.__class__.__name__ == 'MagneticDipole':
+                srcinfo[n, 0] = MAGNETICDIPOLE
+                srcvalues[n, 1] = 1 / (G.dx * G.dy * G.dz)
+            elif src.__class__.__name__ == 'TransmissionLine':
+                srcinfo[n, 0] = TRANSMISSIONLINE
+                srcinfo[n, 5] = G.transmissionlines.index(src)
+            srcinfo[n, 1] = src.xcoord
+            srcinfo[n, 2] = src.ycoord
+            srcinfo[n, 3] = src.zcoord
+            srcinfo[n, 4] = 'xyz'.index(src.polarisation)
+            srctimes[n, 0] = src.start
+            srctimes[n, 1] = src.stop
+            srcwaves[n, :] = src.waveformvaluesJ if waveform == 'J' else src.waveformvaluesM
+
+        return srcinfo, srcvalues, srctimes, srcwaves
+
+    def finalise(self, G):
+        """Copies the state of transmission lines back to the transmission
+            lines in the model.
+
+        Args:
+            G (class): Grid class instance - holds essential parameters describing the model.
+        """
+
+        for n, tl in enumerate(G.transmissionlines):
+            tl.voltage[:tl.nl] = self.tlvoltage[n, :tl.nl]
+            tl.current[:tl.nl] = self.tlcurrent[n, :tl.nl]
+            tl.abcv0 = self.tlabc[n, 0]
+            tl.abcv1 = self.tlabc[n, 1]
+            tl.Vtotal[:] = self.tloutputs[n, 0, :]
+            tl.Itotal[:] = self.tloutputs[n, 1, :]
+
+    cpdef void run(self, int iterationstart, int iterationstop):
+        """Carries out iterations of the time stepping loop without the GIL.
+
+        Args:
+            iterationstart, iterationstop (int): Range of iterations to carry out.
+        """
+
+        cdef int iteration
+
+        with nogil:
+            for iteration in range(iterationstart, iterationstop):
+                if self.iditemsize == 1:
+                    self.iterate(self.ID8, iteration)
+                elif self.iditemsize == 2:
+                    self.iterate(self.ID16, iteration)
+                else:
+                    self.iterate(self.ID32, iteration)
+
+    cdef void iterate(self, idtype_t[:, :, :, ::1] ID, int iteration) noexcept nogil:
+        """Carries out an iteration of the time stepping loop (see solve_cpu).
+
+        Args:
+            ID (memoryview): Access to ID array.
+            iteration (int): Current iteration (timestep).
+        """
+
+        # Store field component values for every receiver and transmission line
+        self.store_outputs(iteration)
+
+        # Update magnetic field components
+        if self.tilex:
+            update_magnetic_tiled(self.nx, self.ny, self.nz, self.nthreads, self.tilex, self.tiley, self.updatecoeffsH, ID, self.Ex, self.Ey, self.Ez, self.Hx, self.Hy, self.Hz)
+        elif self.materialruns:
+            update_magnetic_runs(self.nx, self.ny, self.nz, self.nthreads, self.updatecoeffsH, ID, self.runoffsets, self.runs, self.Ex, self.Ey, self.Ez, self.Hx, self.Hy, self.Hz)
+        else:
+            update_magnetic(self.nx, self.ny, self.nz, self.nthreads, self.updatecoeffsH, ID, self.Ex, self.Ey, self.Ez, self.Hx, self.Hy, self.Hz)
+
+        # Update magnetic field components with the PML correction
+        self.pmls.update(False, self.updatecoeffsH, ID, self.Ex, self.Ey, self.Ez, self.Hx, self.Hy, self.Hz)
+
+        # Update magnetic field components from sources
+        self.update_sources_magnetic(ID, iteration)
+
+        # Update electric field components
+        if self.maxpoles == 0 or self.dispersivecells:
+            if self.dispersivecells:
+                if self.realpoles:
+                    self.update_dispersive(ID, self.updatecoeffsdispersivereal, self.Txreal, self.Tyreal, self.Tzreal, self.Tcxreal, self.Tcyreal, self.Tczreal)
+                else:
+                    self.update_dispersive(ID, self.updatecoeffsdispersive, self.Tx, self.Ty, self.Tz, self.Tcx, self.Tcy, self.Tcz)
+            if self.tilex:
+                update_electric_tiled(self.nx, self.ny, self.nz, self.nthreads, self.tilex, self.tiley, self.updatecoeffsE, ID, self.Ex, self.Ey, self.Ez, self.Hx, self.Hy, self.Hz)
+            elif self.materialruns:
+                update_electric_runs(self.nx, self.ny, self.nz, self.nthreads, self.updatecoeffsE, ID, self.runoffsets, self.runs, self.Ex, self.Ey, self.Ez, self.Hx, self.Hy, self.Hz)
+            else:
+                update_electric(self.nx, self.ny, self.nz, self.nthreads, self.updatecoeffsE, ID, self.Ex, self.Ey, self.Ez, self.Hx, self.Hy, self.Hz)
+            if self.dispersivecells:
+                update_electric_dispersive_cells_phi(self.nthreads, self.updatecoeffsE, ID, self.cellsx, self.cellsy, self.cellsz, self.phix, self.phiy, self.phiz, self.Ex, self.Ey, self.Ez)
+        elif self.realpoles:
+            self.update_dispersive(ID, self.updatecoeffsdispersivereal, self.Txreal, self.Tyreal, self.Tzreal, self.Tcxreal, self.Tcyreal, self.Tczreal)
+        else:
+            self.update_dispersive(ID, self.updatecoeffsdispersive, self.Tx, self.Ty, self.Tz, self.Tcx, self.Tcy, self.Tcz)
+
+        # Update electric field components with the PML correction
+        self.pmls.update(True, self.updatecoeffsE, ID, self.Ex, self.Ey, self.Ez, self.Hx, self.Hy, self.Hz)
+
+        # Update electric field components from sources
+        self.update_sources_electric(ID, iteration)
+
+    cdef void update_dispersive(self, idtype_t[:, :, :, ::1] ID,
+                                dispersivetype_t[:, ::1] updatecoeffsdispersive,
+                                dispersivetype_t[:, :, :, ::1] Tx,
+                                dispersivetype_t[:, :, :, ::1] Ty,
+                                dispersivetype_t[:, :, :, ::1] Tz,
+                                dispersivetype_t[:, ::1] Tcx,
+                                dispersivetype_t[:, ::1] Tcy,
+                                dispersivetype_t[:, ::1] Tcz) noexcept nogil:
+        """Dispersive update, i.e. of temporary values for cells in dispersive
+            materials (before the standard update), or of the electric field
+            components and temporary values for every cell. The 2nd part of
+            the dispersive update from the previous iteration is carried out
+            in the same sweep (see update_electric_dispersive_multipole).
+
+        Args:
+            ID (memoryview): Access to ID array.
+            updatecoeffsdispersive, T, Tc (memoryviews): Access to real or
+                complex dispersive update coefficients, and temporary arrays
+                for every cell or for cells in dispersive materials.
+        """
+
+        if self.dispersivecells:
+            update_electric_dispersive_cells(self.nthreads, self.maxpoles, updatecoeffsdispersive, ID, self.cellsx, self.cellsy, self.cellsz, Tcx, Tcy, Tcz, self.phix, self.phiy, self.phiz, self.Ex, self.Ey, self.Ez)
+        elif self.maxpoles == 1:
+            update_electric_dispersive_1pole(self.nx, self.ny, self.nz, self.nthreads, self.updatecoeffsE, updatecoeffsdispersive, ID, Tx, Ty, Tz, self.Ex, self.Ey, self.Ez, self.Hx, self.Hy, self.Hz)
+        else:
+            update_electric_dispersive_multipole(self.nx, self.ny, self.nz, self.nthreads, self.maxpoles, self.updatecoeffsE, updatecoeffsdispersive, ID, Tx, Ty, Tz, self.Ex, self.Ey, self.Ez, self.Hx, self.Hy, self.Hz)
+
+    cdef floattype_t current(self, int component, int x, int y, int z) noexcept nogil:
+        """Calculates a component of current at a grid position (see Ix, Iy and Iz in grid.py).
+
+        Args:
+            component (int): Component of current, 0 (x), 1 (y) or 2 (z).
+            x, y, z (int): Cell coordinates of position in grid.
+
+        Returns:
+            I (float): Current component.
+        """
+
+        if component == 0:
+            if y == 0 or z == 0:
+                return 0
+            return self.dy * (self.Hy[x, y, z - 1] - self.Hy[x, y, z]) + self.dz * (self.Hz[x, y, z] - self.Hz[x, y - 1, z])
+        elif component == 1:
+            if x == 0 or z == 0:
+                return 0
+            return self.dx * (self.Hx[x, y, z] - self.Hx[x, y, z - 1]) + self.dz * (self.Hz[x - 1, y, z] - self.Hz[x, y, z])
+        else:
+            if x == 0 or y == 0:
+                return 0
+            return self.dx * (self.Hx[x, y - 1, z] - self.Hx[x, y, z]) + self.dy * (self.Hy[x, y, z] - self.Hy[x - 1, y, z])
+
+    cdef void store_outputs(self, int iteration) noexcept nogil:
+        """Stores field component values for every receiver and transmission line (see store_outputs)."""
+
+        cdef Py_ssize_t n
+
+        store_rx_outputs(self.rxindices.shape[0], iteration, self.rxindices, self.rxcomponents, self.rxspacings, self.rxoutputs, self.Ex, self.Ey, self.Ez, self.Hx, self.Hy, self.Hz)
+
+        for n in range(self.ntls):
+            self.tloutputs[n, 0, iteration] = self.tlvoltage[n, self.tlinfo[n, 1]]
+            self.tloutputs[n, 1, iteration] = self.tlcurrent[n, self.tlinfo[n, 1]]
+
+    cdef void update_sources_electric(self, idtype_t[:, :, :, ::1] ID, int iteration) noexcept nogil:
+        """Updates electric field values from sources (see VoltageSource,
+            HertzianDipole and TransmissionLine update_electric).
+        """
+
+        cdef Py_ssize_t n
+        cdef int i, j, k, polarisation, tl
+        cdef floattype_t coeff
+        cdef floattype_t[:, :, ::1] E
+
+        for n in range(self.srcinfoE.shape[0]):
+            if iteration * self.dt < self.srctimesE[n, 0] or iteration * self.dt > self.srctimesE[n, 1]:
+                continue
+
+            i = self.srcinfoE[n, 1]
+            j = self.srcinfoE[n, 2]
+            k = self.srcinfoE[n, 3]
+            polarisation = self.srcinfoE[n, 4]
+            if polarisation == 0:
+                E = self.Ex
+            elif polarisation == 1:
+                E = self.Ey
+            else:
+                E = self.Ez
+            coeff = self.updatecoeffsE[ID[polarisation, i, j, k], 4]
+
+            if self.srcinfoE[n, 0] == VOLTAGESOURCE:
+                if self.srcvaluesE[n, 0] != 0:
+                    E[i, j, k] -= coeff * self.srcwavesE[n, iteration] * self.srcvaluesE[n, 1]
+                else:
+                    if polarisation == 0:
+                        E[i, j, k] = -1 * self.srcwavesE[n, iteration] / self.dx
+                    elif polarisation == 1:
+                        E[i, j, k] = -1 * self.srcwavesE[n, iteration] / self.dy
+                    else:
+                        E[i, j, k] = -1 * self.srcwavesE[n, iteration] / self.dz
+
+            elif self.srcinfoE[n, 0] == HERTZIANDIPOLE:
+                E[i, j, k] -= coeff * self.srcwavesE[n, iteration] * self.srcvaluesE[n, 0] * self.srcvaluesE[n, 1]
+
+            elif self.srcinfoE[n, 0] == TRANSMISSIONLINE:
+                tl = self.srcinfoE[n, 5]
+                self.update_tl_voltage(tl, self.srcwavesE[n, iteration])
+                if polarisation == 0:
+                    E[i, j, k] = - self.tlvoltage[tl, self.tlinfo[tl, 1]] / self.dx
+                elif polarisation == 1:
+                    E[i, j, k] = - self.tlvoltage[tl, self.tlinfo[tl, 1]] / self.dy
+                else:
+                    E[i, j, k] = - self.tlvoltage[tl, self.tlinfo[tl, 1]] / self.dz
+
+    cdef void update_sources_magnetic(self, idtype_t[:, :, :, ::1] ID, int iteration) noexcept nogil:
+        """Updates magnetic field values from sources (see MagneticDipole and
+            TransmissionLine update_magnetic).
+        """
+
+        cdef Py_ssize_t n
+        cdef int i, j, k, polarisation, tl
+        cdef floattype_t coeff
+        cdef floattype_t[:, :, ::1] H
+
+        for n in range(self.srcinfoM.shape[0]):
+            if iteration * self.dt < self.srctimesM[n, 0] or iteration * self.dt > self.srctimesM[n, 1]:
+                continue
+
+            i = self.srcinfoM[n, 1]
+            j = self.srcinfoM[n, 2]
+            k = self.srcinfoM[n, 3]
+            polarisation = self.srcinfoM[n, 4]
+
+            if self.srcinfoM[n, 0] == MAGNETICDIPOLE:
+                if polarisation == 0:
+                    H = self.Hx
+                elif polarisation == 1:
+                    H = self.Hy
+                else:
+                    H = self.Hz
+                coeff = self.updatecoeffsH[ID[3 + polarisation, i, j, k], 4]
+                H[i, j, k] -= coeff * self.srcwavesM[n, iteration] * self.srcvaluesM[n, 1]
+
+            elif self.srcinfoM[n, 0] == TRANSMISSIONLINE:
+                tl = self.srcinfoM[n, 5]
+                self.tlcurrent[tl, self.tlinfo[tl, 1]] = self.current(polarisation, i, j, k)
+                self.update_tl_current(tl, self.srcwavesM[n, iteration])
+
+    cdef void update_tl_voltage(self, int tl, floattype_t waveformvalue) noexcept nogil:
+        """Updates voltage values along a transmission line, and the ABC at
+            the end of the line (see TransmissionLine update_voltage and update_abc).
+
+        Args:
+            tl (int): Index of transmission line.
+            waveformvalue (float): Waveform value (electric) for the iteration.
+        """
+
+        cdef Py_ssize_t n
+        cdef int srcpos = self.tlinfo[tl, 0]
+        cdef int nl = self.tlinfo[tl, 2]
+
+        for n in range(1, nl):
+            self.tlvoltage[tl, n] -= self.tlcoeffs[tl, 0] * (self.tlcurrent[tl, n] - self.tlcurrent[tl, n - 1])
+
+        self.tlvoltage[tl, srcpos] += self.tlcoeffs[tl, 1] * waveformvalue
+
+        self.tlvoltage[tl, 0] = self.tlcoeffs[tl, 2] * (self.tlvoltage[tl, 1] - self.tlabc[tl, 0]) + self.tlabc[tl, 1]
+        self.tlabc[tl, 0] = self.tlvoltage[tl, 0]
+        self.tlabc[tl, 1] = self.tlvoltage[tl, 1]
+
+    cdef void update_tl_current(self, int tl, floattype_t waveformvalue) noexcept nogil:
+        """Updates current values along a transmission line (see TransmissionLine update_current).
+
+        Args:
+            tl (int): Index of transmission line.
+            waveformvalue (float): Waveform value (magnetic) for the iteration.
+        """
+
+        cdef Py_ssize_t n
+        cdef int srcpos = self.tlinfo[tl, 0]
+        cdef int nl = self.tlinfo[tl, 2]
+
+        for n in range(0, nl - 1):
+            self.tlcurrent[tl, n] -= self.tlcoeffs[tl, 3] * (self.tlvoltage[tl, n + 1] - self.tlvoltage[tl, n])
+
+        self.tlcurrent[tl, srcpos - 1] += self.tlcoeffs[tl, 3] * waveformvalue
@@ -0,0 +1,186 @@
+# Copyright (C) 2015-2019: The University of Edinburgh
+#                 Authors: Craig Warren and Antonis Giannopoulos
+#
+# This file is part of gprMax.
+#
+# gprMax is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# gprMax is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with gprMax.  If not, see <http://www.gnu.org/licenses/>.
+
+cimport numpy as np
+
+from gprMax.constants cimport floattype_t
+from gprMax.constants cimport idtype_t
+
+
+########################################
+# Voltage source electric field update #
+########################################
+cpdef void update_voltage_source(
+                    int NVOLTSRC,
+                    int iteration,
+                    double dt,
+                    int[:, ::1] srcinfo1,
+                    floattype_t[:, ::1] srcinfo2,
+                    double[:, ::1] srctimes,
+                    floattype_t[:, ::1] srcwaveforms,
+                    floattype_t[:, ::1] updatecoeffsE,
+                    idtype_t[:, :, :, ::1] ID,
+                    floattype_t[:, :, ::1] Ex,
+                    floattype_t[:, :, ::1] Ey,
+                    floattype_t[:, :, ::1] Ez
+            ) noexcept nogil:
+    """This function updates electric field values for voltage sources
+        (see VoltageSource update_electric).
+
+    Args:
+        NVOLTSRC (int): Total number of voltage sources in the model
+        iteration (int): Current iteration (timestep)
+        dt (float): Temporal discretisation
+        srcinfo1, srcinfo2, srctimes, srcwaveforms (memoryviews): Access to
+            source information and waveform values (see cpu_initialise_src_arrays)
+        updatecoeffs, ID, E (memoryviews): Access to update coeffients, ID and field component arrays
+    """
+
+    cdef Py_ssize_t src
+    cdef int i, j, k, polarisation
+    cdef floattype_t[:, :, ::1] E
+
+    # Sources are updated in turn, i.e. in the same order as the Python
+    # update methods, as several sources may share a cell
+    for src in range(NVOLTSRC):
+        if iteration * dt < srctimes[src, 0] or iteration * dt > srctimes[src, 1]:
+            continue
+
+        i = srcinfo1[src, 0]
+        j = srcinfo1[src, 1]
+        k = srcinfo1[src, 2]
+        polarisation = srcinfo1[src, 3]
+
+        if polarisation == 0:
+            E = Ex
+        elif polarisation == 1:
+            E = Ey
+        else:
+            E = Ez
+
+        # Resistive voltage source
+        if srcinfo2[src, 0] != 0:
+            E[i, j, k] -= updatecoeffsE[ID[polarisation, i, j, k], 4] * srcwaveforms[src, iteration] * srcinfo2[src, 1]
+
+        # Hard voltage source
+        else:
+            E[i, j, k] = -1 * srcwaveforms[src, iteration] / srcinfo2[src, 1]
+
+
+#########################################
+# Hertzian dipole electric field update #
+#########################################
+cpdef void update_hertzian_dipole(
+                    int NHERTZDIPOLE,
+                    int iteration,
+                    double dt,
+                    int[:, ::1] srcinfo1,
+                    floattype_t[:, ::1] srcinfo2,
+                    double[:, ::1] srctimes,
+                    floattype_t[:, ::1] srcwaveforms,
+                    floattype_t[:, ::1] updatecoeffsE,
+                    idtype_t[:, :, :, ::1] ID,
+                    floattype_t[:, :, ::1] Ex,
+                    floattype_t[:, :, ::1] Ey,
+                    floattype_t[:, :, ::1] Ez
+            ) noexcept nogil:
+    """This function updates electric field values for Hertzian dipole sources
+        (see HertzianDipole update_electric).
+
+    Args:
+        NHERTZDIPOLE (int): Total number of Hertzian dipoles in the model
+        iteration (int): Current iteration (timestep)
+        dt (float): Temporal discretisation
+        srcinfo1, srcinfo2, srctimes, srcwaveforms (memoryviews): Access to
+            source information and waveform values (see cpu_initialise_src_arrays)
+        updatecoeffs, ID, E (memoryviews): Access to update coeffients, ID and field component arrays
+    """
+
+    cdef Py_ssize_t src
+    cdef int i, j, k, polarisation
+    cdef floattype_t[:, :, ::1] E
+
+    for src in range(NHERTZDIPOLE):
+        if iteration * dt < srctimes[src, 0] or iteration * dt > srctimes[src, 1]:
+            continue
+
+        i = srcinfo1[src, 0]
+        j = srcinfo1[src, 1]
+        k = srcinfo1[src, 2]
+        polarisation = srcinfo1[src, 3]
+
+        if polarisation == 0:
+            E = Ex
+        elif polarisation == 1:
+            E = Ey
+        else:
+            E = Ez
+
+        E[i, j, k] -= updatecoeffsE[ID[polarisation, i, j, k], 4] * srcwaveforms[src, iteration] * srcinfo2[src, 0] * srcinfo2[src, 1]
+
+
+#########################################
+# Magnetic dipole magnetic field update #
+#########################################
+cpdef void update_magnetic_dipole(
+                    int NMAGDIPOLE,
+                    int iteration,
+                    double dt,
+                    int[:, ::1] srcinfo1,
+                    floattype_t[:, ::1] srcinfo2,
+                    double[:, ::1] srctimes,
+                    floattype_t[:, ::1] srcwaveforms,
+                    floattype_t[:, ::1] updatecoeffsH,
+                    idtype_t[:, :, :, ::1] ID,
+                    floattype_t[:, :, ::1] Hx,
+                    floattype_t[:, :, ::1] Hy,
+                    floattype_t[:, :, ::1] Hz
+            ) noexcept nogil:
+    """This function updates magnetic field values for magnetic dipole sources
+        (see MagneticDipole update_magnetic).
+
+    Args:
+        NMAGDIPOLE (int): Total number of magnetic dipoles in the model
+        iteration (int): Current iteration (timestep)
+        dt (float): Temporal discretisation
+        srcinfo1, srcinfo2, srctimes, srcwaveforms (memoryviews): Access to
+            source information and waveform values (see cpu_initialise_src_arrays)
+        updatecoeffs, ID, H (memoryviews): Access to update coeffients, ID and field component arrays
+    """
+
+    cdef Py_ssize_t src
+    cdef int i, j, k, polarisation
+    cdef floattype_t[:, :, ::1] H
+
+    for src in range(NMAGDIPOLE):
+        if iteration * dt < srctimes[src, 0] or iteration * dt > srctimes[src, 1]:
+            continue
+
+        i = srcinfo1[src, 0]
+        j = srcinfo1[src, 1]
+        k = srcinfo1[src, 2]
+        polarisation = srcinfo1[src, 3]
+
+        if polarisation == 0:
+            H = Hx
+        elif polarisation == 1:
+            H = Hy
+        else:
+            H = Hz
+
+        H[i, j, k] -= updatecoeffsH[ID[3 + polarisation, i, j, k], 4] * srcwaveforms[src, iteration] * srcinfo2[src, 1]
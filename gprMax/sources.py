@@ -94,24 +94,25 @@ class VoltageSource(Source):
             j = self.ycoord
             k = self.zcoord
             componentID = 'E' + self.polarisation
+            dx, dy, dz = G.cell_size(componentID, i, j, k)
 
             if self.polarisation == 'x':
                 if self.resistance != 0:
-                    Ex[i, j, k] -= updatecoeffsE[ID[G.IDlookup[componentID], i, j, k], 4] * self.waveformvaluesJ[iteration] * (1 / (self.resistance * G.dy * G.dz))
+                    Ex[i, j, k] -= updatecoeffsE[ID[G.IDlookup[componentID], i, j, k], 4] * self.waveformvaluesJ[iteration] * (1 / (self.resistance * dy * dz))
                 else:
-                    Ex[i, j, k] = -1 * self.waveformvaluesJ[iteration] / G.dx
+                    Ex[i, j, k] = -1 * self.waveformvaluesJ[iteration] / dx
 
             elif self.polarisation == 'y':
                 if self.resistance != 0:
-                    Ey[i, j, k] -= updatecoeffsE[ID[G.IDlookup[componentID], i, j, k], 4] * self.waveformvaluesJ[iteration] * (1 / (self.resistance * G.dx * G.dz))
+                    Ey[i, j, k] -= updatecoeffsE[ID[G.IDlookup[componentID], i, j, k], 4] * self.waveformvaluesJ[iteration] * (1 / (self.resistance * dx * dz))
                 else:
-                    Ey[i, j, k] = -1 * self.waveformvaluesJ[iteration] / G.dy
+                    Ey[i, j, k] = -1 * self.waveformvaluesJ[iteration] / dy
 
             elif self.polarisation == 'z':
                 if self.resistance != 0:
-                    Ez[i, j, k] -= updatecoeffsE[ID[G.IDlookup[componentID], i, j, k], 4] * self.waveformvaluesJ[iteration] * (1 / (self.resistance * G.dx * G.dy))
+                    Ez[i, j, k] -= updatecoeffsE[ID[G.IDlookup[componentID], i, j, k], 4] * self.waveformvaluesJ[iteration] * (1 / (self.resistance * dx * dy))
                 else:
-                    Ez[i, j, k] = -1 * self.waveformvaluesJ[iteration] / G.dz
+                    Ez[i, j, k] = -1 * self.waveformvaluesJ[iteration] / dz
 
     def create_material(self, G):
         """
@@ -128,6 +129,7 @@ class VoltageSource(Source):
             k = self.zcoord
 
             componentID = 'E' + self.polarisation
+            dx, dy, dz = G.cell_size(componentID, i, j, k)
             requirednumID = G.ID[G.IDlookup[componentID], i, j, k]
             material = next(x for x in G.materials if x.numID == requirednumID)
             newmaterial = deepcopy(material)
@@ -138,11 +140,11 @@ class VoltageSource(Source):
 
             # Add conductivity of voltage source to underlying conductivity
             if self.polarisation == 'x':
-                newmaterial.se += G.dx / (self.resistance * G.dy * G.dz)
+                newmaterial.se += dx / (self.resistance * dy * dz)
             elif self.polarisation == 'y':
-                newmaterial.se += G.dy / (self.resistance * G.dx * G.dz)
+                newmaterial.se += dy / (self.resistance * dx * dz)
             elif self.polarisation == 'z':
-                newmaterial.se += G.dz / (self.resistance * G.dx * G.dy)
+                newmaterial.se += dz / (self.resistance * dx * dy)
 
             G.ID[G.IDlookup[componentID], i, j, k] = newmaterial.numID
             G.materials.append(newmaterial)
@@ -171,15 +173,16 @@ class HertzianDipole(Source):
             j = self.ycoord
             k = self.zcoord
             componentID = 'E' + self.polarisation
+            dx, dy, dz = G.cell_size(componentID, i, j, k)
 
             if self.polarisation == 'x':
-                Ex[i, j, k] -= updatecoeffsE[ID[G.IDlookup[componentID], i, j, k], 4] * self.waveformvaluesJ[iteration] * self.dl * (1 / (G.dx * G.dy * G.dz))
+                Ex[i, j, k] -= updatecoeffsE[ID[G.IDlookup[componentID], i, j, k], 4] * self.waveformvaluesJ[iteration] * self.dl * (1 / (dx * dy * dz))
 
             elif self.polarisation == 'y':
-                Ey[i, j, k] -= updatecoeffsE[ID[G.IDlookup[componentID], i, j, k], 4] * self.waveformvaluesJ[iteration] * self.dl * (1 / (G.dx * G.dy * G.dz))
+                Ey[i, j, k] -= updatecoeffsE[ID[G.IDlookup[componentID], i, j, k], 4] * self.waveformvaluesJ[iteration] * self.dl * (1 / (dx * dy * dz))
 
             elif self.polarisation == 'z':
-                Ez[i, j, k] -= updatecoeffsE[ID[G.IDlookup[componentID], i, j, k], 4] * self.waveformvaluesJ[iteration] * self.dl * (1 / (G.dx * G.dy * G.dz))
+                Ez[i, j, k] -= updatecoeffsE[ID[G.IDlookup[componentID], i, j, k], 4] * self.waveformvaluesJ[iteration] * self.dl * (1 / (dx * dy * dz))
 
 
 class MagneticDipole(Source):
@@ -204,15 +207,83 @@ class MagneticDipole(Source):
             j = self.ycoord
             k = self.zcoord
             componentID = 'H' + self.polarisation
+            dx, dy, dz = G.cell_size(componentID, i, j, k)
 
             if self.polarisation == 'x':
-                Hx[i, j, k] -= updatecoeffsH[ID[G.IDlookup[componentID], i, j, k], 4] * self.waveformvaluesM[iteration] * (1 / (G.dx * G.dy * G.dz))
+                Hx[i, j, k] -= updatecoeffsH[ID[G.IDlookup[componentID], i, j, k], 4] * self.waveformvaluesM[iteration] * (1 / (dx * dy * dz))
 
             elif self.polarisation == 'y':
-                Hy[i, j, k] -= updatecoeffsH[ID[G.IDlookup[componentID], i, j, k], 4] * self.waveformvaluesM[iteration] * (1 / (G.dx * G.dy * G.dz))
+                Hy[i, j, k] -= updatecoeffsH[ID[G.IDlookup[componentID], i, j, k], 4] * self.waveformvaluesM[iteration] * (1 / (dx * dy * dz))
 
             elif self.polarisation == 'z':
-                Hz[i, j, k] -= updatecoeffsH[ID[G.IDlookup[componentID], i, j, k], 4] * self.waveformvaluesM[iteration] * (1 / (G.dx * G.dy * G.dz))
+                Hz[i, j, k] -= updatecoeffsH[ID[G.IDlookup[componentID], i, j, k], 4] * self.waveformvaluesM[iteration] * (1 / (dx * dy * dz))
+
+
+def cpu_initialise_src_arrays(sources, G):
+    """Initialise arrays for source coordinates/polarisation, other source
+        information, source active times, and source waveform values, so
+        sources of one class can be updated together by a compiled kernel.
+
+    Args:
+        sources (list): List of sources of one class, e.g. HertzianDipoles.
+        G (class): Grid class instance - holds essential parameters describing the model.
+
+    Returns:
+        srcinfo1 (int): numpy array of source cell coordinates and polarisation information.
+        srcinfo2 (float): numpy array of other source information, i.e.
+                            resistance (voltage source) or length (Hertzian
+                            dipole), and scaling coefficient for waveform, or
+                            length of cell edge (hard voltage source).
+        srctimes (float): numpy array of source start and stop times.
+        srcwaves (float): numpy array of source waveform values.
+    """
+
+    srcinfo1 = np.zeros((len(sources), 4), dtype=np.int32)
+    srcinfo2 = np.zeros((len(sources), 2), dtype=floattype)
+    srctimes = np.zeros((len(sources), 2), dtype=np.float64)
+    srcwaves = np.zeros((len(sources), G.iterations), dtype=floattype)
+    for i, src in enumerate(sources):
+        srcinfo1[i, 0] = src.xcoord
+        srcinfo1[i, 1] = src.ycoord
+        srcinfo1[i, 2] = src.zcoord
+
+        if src.polarisation == 'x':
+            srcinfo1[i, 3] = 0
+        elif src.polarisation == 'y':
+            srcinfo1[i, 3] = 1
+        elif src.polarisation == 'z':
+            srcinfo1[i, 3] = 2
+
+        # Size of the cell at the source field component (see FDTDGrid cell_size)
+        if src.__class__.__name__ == 'MagneticDipole':
+            dx, dy, dz = G.cell_size('H' + src.polarisation, src.xcoord, src.ycoord, src.zcoord)
+        else:
+            dx, dy, dz = G.cell_size('E' + src.polarisation, src.xcoord, src.ycoord, src.zcoord)
+
+        if src.__class__.__name__ == 'HertzianDipole':
+            srcinfo2[i, 0] = src.dl
+            srcinfo2[i, 1] = 1 / (dx * dy * dz)
+            srcwaves[i, :] = src.waveformvaluesJ
+        elif src.__class__.__name__ == 'VoltageSource':
+            srcinfo2[i, 0] = src.resistance
+            if src.resistance != 0:
+                if src.polarisation == 'x':
+                    srcinfo2[i, 1] = 1 / (src.resistance * dy * dz)
+                elif src.polarisation == 'y':
+                    srcinfo2[i, 1] = 1 / (src.resistance * dx * dz)
+                elif src.polarisation == 'z':
+                    srcinfo2[i, 1] = 1 / (src.resistance * dx * dy)
+            else:
+                srcinfo2[i, 1] = (dx, dy, dz)[srcinfo1[i, 3]]
+            srcwaves[i, :] = src.waveformvaluesJ
+        elif src.__class__.__name__ == 'MagneticDipole':
+            srcinfo2[i, 1] = 1 / (dx * dy * dz)
+            srcwaves[i, :] = src.waveformvaluesM
+
+        srctimes[i, 0] = src.start
+        srctimes[i, 1] = src.stop
+
+    return srcinfo1, srcinfo2, srctimes, srcwaves
 
 
 def gpu_initialise_src_arrays(sources, G):
@@ -380,15 +451,16 @@ class TransmissionLine(Source):
             k = self.zcoord
 
             self.update_voltage(iteration, G)
+            dx, dy, dz = G.cell_size('E' + self.polarisation, i, j, k)
 
             if self.polarisation == 'x':
-                Ex[i, j, k] = - self.voltage[self.antpos] / G.dx
+                Ex[i, j, k] = - self.voltage[self.antpos] / dx
 
             elif self.polarisation == 'y':
-                Ey[i, j, k] = - self.voltage[self.antpos] / G.dy
+                Ey[i, j, k] = - self.voltage[self.antpos] / dy
 
             elif self.polarisation == 'z':
-                Ez[i, j, k] = - self.voltage[self.antpos] / G.dz
+                Ez[i, j, k] = - self.voltage[self.antpos] / dz
 
     def update_magnetic(self, iteration, updatecoeffsH, ID, Hx, Hy, Hz, G):
         """Updates current value in transmission line from magnetic field values in the main grid.
@@ -407,13 +479,13 @@ class TransmissionLine(Source):
             k = self.zcoord
 
             if self.polarisation == 'x':
-                self.current[self.antpos] = Ix(i, j, k, G.Hx, G.Hy, G.Hz, G)
+                self.current[self.antpos] = Ix(i, j, k, Hx, Hy, Hz, G)
 
             elif self.polarisation == 'y':
-                self.current[self.antpos] = Iy(i, j, k, G.Hx, G.Hy, G.Hz, G)
+                self.current[self.antpos] = Iy(i, j, k, Hx, Hy, Hz, G)
 
             elif self.polarisation == 'z':
-                self.current[self.antpos] = Iz(i, j, k, G.Hx, G.Hy, G.Hz, G)
+                self.current[self.antpos] = Iz(i, j, k, Hx, Hy, Hz, G)
 
             self.update_current(iteration, G)
 
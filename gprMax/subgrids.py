@@ -0,0 +1,677 @@
+# Copyright (C) 2015-2019: The University of Edinburgh
+#                 Authors: Craig Warren and Antonis Giannopoulos
+#
+# This file is part of gprMax.
+#
+# gprMax is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# gprMax is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with gprMax.  If not, see <http://www.gnu.org/licenses/>.
+
+from collections import deque
+from collections import OrderedDict
+from copy import deepcopy
+
+import numpy as np
+from tqdm import tqdm
+
+from gprMax.constants import floattype
+from gprMax.exceptions import CmdInputError
+from gprMax.fields_outputs import store_outputs
+from gprMax.fields_updates_ext import update_electric
+from gprMax.fields_updates_ext import update_electric_runs
+from gprMax.fields_updates_ext import update_electric_dispersive_1pole
+from gprMax.fields_updates_ext import update_electric_dispersive_multipole
+from gprMax.fields_updates_ext import update_electric_dispersive_cells
+from gprMax.fields_updates_ext import update_electric_dispersive_cells_phi
+from gprMax.fields_updates_ext import update_magnetic
+from gprMax.fields_updates_ext import update_magnetic_runs
+from gprMax.grid import FDTDGrid
+from gprMax.input_cmds_geometry import process_geometrycmds
+from gprMax.input_cmds_multiuse import process_multicmds
+from gprMax.materials import Material
+from gprMax.materials import process_materials
+from gprMax.pml import CFS
+from gprMax.pml import PML
+from gprMax.pml import build_pmls
+from gprMax.receivers import cpu_initialise_rx_arrays
+from gprMax.sources import cpu_initialise_src_arrays
+from gprMax.source_updates_ext import update_hertzian_dipole
+from gprMax.source_updates_ext import update_magnetic_dipole
+from gprMax.source_updates_ext import update_voltage_source
+from gprMax.utilities import human_size
+from gprMax.yee_cell_build_ext import build_electric_components
+from gprMax.yee_cell_build_ext import build_magnetic_components
+from gprMax.yee_cell_build_ext import build_material_runs
+
+
+def huygens_surface(lo, hi):
+    """Field components that are coupled across the faces of a box by the
+        Huygens surface (total-field/scattered-field) corrections. The
+        tangential electric field components on each face are inside the
+        box, and the tangential magnetic field components half a cell
+        outside each face are outside the box.
+
+    Args:
+        lo, hi (tuple): Lower and upper corners of the box (cells).
+
+    Returns:
+        terms (list): For each face and tangential electric field component,
+                        the normal axis (a), the axes of the electric (c)
+                        and magnetic (b) field components, the sign of the
+                        corrections (s), and the indices of the electric and
+                        magnetic field components (for each axis a tuple of
+                        start, stop and whether the component is staggered).
+    """
+
+    terms = []
+    for a in range(3):
+        for side, (Epos, Hpos, sign) in enumerate(((lo[a], lo[a] - 1, -1), (hi[a], hi[a], 1))):
+            for c in range(3):
+                if c == a:
+                    continue
+                b = 3 - a - c
+                # Levi-Civita symbol of the curl, i.e. E_c is updated with
+                # +/-(H_b(a + 1/2) - H_b(a - 1/2)) and H_b with +/-(E_c(a + 1) - E_c(a))
+                levicivita = 1 if (c, a, b) in ((0, 1, 2), (1, 2, 0), (2, 0, 1)) else -1
+                Eindices = [None] * 3
+                Hindices = [None] * 3
+                Eindices[a] = (Epos, Epos + 1, False)
+                Hindices[a] = (Hpos, Hpos + 1, True)
+                Eindices[c] = Hindices[c] = (lo[c], hi[c], True)
+                Eindices[b] = Hindices[b] = (lo[b], hi[b] + 1, False)
+                terms.append((a, c, b, sign * levicivita, tuple(Eindices), tuple(Hindices)))
+
+    return terms
+
+
+def lagrange_stencil(u):
+    """Quadratic Lagrange interpolation at fractional indices.
+
+    Args:
+        u (float): numpy array of fractional indices.
+
+    Returns:
+        start (int): numpy array of the first index of the stencil of each point.
+        weights (float): numpy array of weights of the three points of each stencil.
+    """
+
+    i = np.rint(u).astype(np.int64)
+    t = u - i
+    weights = np.stack((t * (t - 1) / 2, 1 - t * t, t * (t + 1) / 2))
+
+    return i - 1, weights
+
+
+class SubGrid(FDTDGrid):
+    """
+    Locally refined region of the main grid, i.e. a grid with a spatial and
+    temporal discretisation that is a (odd) ratio finer than the main grid,
+    which is coupled to the main grid by Huygens surfaces (Berenger, 2006,
+    http://dx.doi.org/10.1109/TAP.2006.886507). The subgrid has its own PML,
+    and its field is the total field inside its inner surface (IS), and the
+    field scattered by the objects and sources inside the IS elsewhere. The
+    field of the main grid at the IS, interpolated in space and time, is
+    injected into the subgrid at the IS; and the scattered field of the
+    subgrid at the outer surface (OS), a few cells of the main grid outside
+    the IS, is injected into the main grid at the OS. The main grid has the
+    field without the objects and sources inside the IS everywhere inside
+    the OS, e.g. in any snapshots or geometry views.
+    """
+
+    # Distance between the inner and outer surfaces (cells of the main grid)
+    isos = 2
+
+    def __init__(self, G, islo, ishi, ratio, pmlcells):
+        """
+        Args:
+            G (class): Grid class instance of the main grid.
+            islo, ishi (tuple): Lower and upper corners of the IS (cells of the main grid).
+            ratio (int): Ratio of the discretisation of the main grid to that of the subgrid.
+            pmlcells (int): Thickness of the PML of the subgrid (cells).
+        """
+
+        super(SubGrid, self).__init__()
+
+        self.ratio = ratio
+        self.islo = tuple(islo)
+        self.ishi = tuple(ishi)
+        self.oslo = tuple(n - self.isos for n in islo)
+        self.oshi = tuple(n + self.isos for n in ishi)
+
+        # Subgrid cells outside the OS, i.e. the PML and enough cells for the
+        # magnetic field half a cell of the main grid outside the OS
+        self.offset = pmlcells + (ratio + 1) // 2 + 2
+
+        self.mode = G.mode
+        self.messages = False
+        self.progressbars = False
+        self.hostinfo = G.hostinfo
+        self.nthreads = G.nthreads
+        self.inputdirectory = G.inputdirectory
+        self.averagevolumeobjects = G.averagevolumeobjects
+        self.dx = G.dx / ratio
+        self.dy = G.dy / ratio
+        self.dz = G.dz / ratio
+        self.nx, self.ny, self.nz = (2 * self.offset + ratio * (hi - lo) for lo, hi in zip(self.oslo, self.oshi))
+        self.dt = G.dt / ratio
+        self.iterations = ratio * G.iterations
+        self.timewindow = G.timewindow
+        self.pmlthickness = OrderedDict((key, pmlcells) for key in PML.boundaryIDs)
+        self.pmlformulation = G.pmlformulation
+        # CFS parameters are copied before the PML of the main grid is built
+        # as an optimum sigma max is stored in them
+        self.cfs = deepcopy(G.cfs)
+        self.waveforms = G.waveforms
+        self.mixingmodels = G.mixingmodels
+
+        # Position of the subgrid in the main grid (metres)
+        self.origin = tuple(n * D - self.offset * d for n, D, d in zip(self.oslo, (G.dx, G.dy, G.dz), (self.dx, self.dy, self.dz)))
+
+        # Commands for objects and sources inside the IS (in the coordinates of the subgrid)
+        self.multicmds = {}
+        self.geometry = []
+
+    def fine_index(self, axis, n):
+        """Index in the subgrid of a node of the main grid.
+
+        Args:
+            axis (int): Axis of the index.
+            n (int): Index of the node in the main grid.
+
+        Returns:
+            (int): Index of the node in the subgrid.
+        """
+
+        return self.offset + self.ratio * (n - self.oslo[axis])
+
+    def fine_slices(self, indices):
+        """Strided slices of the subgrid that select the field components
+            co-located with field components of the main grid.
+
+        Args:
+            indices (tuple): For each axis, start, stop and whether the component is staggered (main grid).
+
+        Returns:
+            (tuple): Slices of the subgrid.
+        """
+
+        slices = []
+        for axis, (start, stop, staggered) in enumerate(indices):
+            shift = (self.ratio - 1) // 2 if staggered else 0
+            slices.append(slice(self.fine_index(axis, start) + shift, self.fine_index(axis, stop - 1) + shift + 1, self.ratio))
+
+        return tuple(slices)
+
+    def position(self, obj):
+        """Position of a source or receiver in the main grid (metres)."""
+
+        return tuple(o + coord * d for o, coord, d in zip(self.origin, (obj.xcoord, obj.ycoord, obj.zcoord), (self.dx, self.dy, self.dz)))
+
+    def translate(self, axis, value):
+        """Coordinate (metres) of the main grid in the subgrid, as a string for a command."""
+
+        return repr(float(value) - self.origin[axis])
+
+    def process_cmds(self, G):
+        """Process the commands for sources and receivers inside the IS, once
+            the materials and waveforms of the main grid are known (but
+            before any geometry is built).
+
+        Args:
+            G (class): Grid class instance of the main grid.
+        """
+
+        self.materials = deepcopy(G.materials)
+        process_multicmds(self.multicmds, self)
+
+    def build(self, G):
+        """Build the subgrid, i.e. geometry, PML and update coefficients, and
+            the Huygens surfaces, once the main grid is built.
+
+        Args:
+            G (class): Grid class instance of the main grid.
+        """
+
+        self.memory_estimate_basic()
+        G.memoryusage += self.memoryusage
+        G.memory_check()
+
+        self.initialise_geometry_arrays()
+        self.initialise_field_arrays()
+        process_geometrycmds(self.geometry, self)
+
+        if not self.cfs:
+            self.cfs = [CFS()]
+        pbar = tqdm(disable=True)
+        build_pmls(self, pbar)
+        pbar.close()
+
+        build_electric_components(self.solid, self.rigidE, self.ID, self)
+        build_magnetic_components(self.solid, self.rigidH, self.ID, self)
+        for voltagesource in self.voltagesources:
+            voltagesource.create_material(self)
+        self.materialruns = build_material_runs(self.ID, self.nx, self.ny, self.nz)
+        self.initialise_std_update_coeff_arrays()
+
+        if Material.maxpoles != 0:
+            if all(material.realpoles for material in self.materials):
+                self.dispersivetype = floattype
+            self.find_dispersive_cells()
+            G.memoryusage += self.memory_estimate_dispersive()
+            G.memory_check()
+            self.initialise_dispersive_arrays()
+
+        process_materials(self)
+        saving = self.narrow_geometry_arrays()
+        G.memoryusage -= saving
+
+        # Huygens surface corrections of the subgrid at the IS (with the
+        # incident field interpolated from the main grid), and coefficients
+        # of the corrections
+        self.isterms = []
+        for a, c, b, s, Eindices, Hindices in huygens_surface([self.fine_index(axis, n) for axis, n in enumerate(self.islo)], [self.fine_index(axis, n) for axis, n in enumerate(self.ishi)]):
+            Eslices = tuple(slice(start, stop) for start, stop, staggered in Eindices)
+            Hslices = tuple(slice(start, stop) for start, stop, staggered in Hindices)
+            coeffE = s * self.updatecoeffsE[self.ID[c][Eslices], 1 + a]
+            coeffH = s * self.updatecoeffsH[self.ID[3 + b][Hslices], 1 + a]
+            self.isterms.append((c, b, Eslices, Hslices, coeffE, coeffH, self.interpolation(Eindices), self.interpolation(Hindices)))
+
+        # Huygens surface corrections of the main grid at the OS (with the
+        # scattered field of the subgrid), and coefficients of the corrections
+        self.osterms = []
+        for a, c, b, s, Eindices, Hindices in huygens_surface(self.oslo, self.oshi):
+            Eslices = tuple(slice(start, stop) for start, stop, staggered in Eindices)
+            Hslices = tuple(slice(start, stop) for start, stop, staggered in Hindices)
+            coeffE = -s * G.updatecoeffsE[G.ID[c][Eslices], 1 + a]
+            coeffH = -s * G.updatecoeffsH[G.ID[3 + b][Hslices], 1 + a]
+            self.osterms.append((c, b, Eslices, Hslices, coeffE, coeffH, self.fine_slices(Eindices), self.fine_slices(Hindices)))
+
+        if G.messages:
+            print('Subgrid from {:g}m, {:g}m, {:g}m, to {:g}m, {:g}m, {:g}m with ratio {}: {:d} x {:d} x {:d} cells, PML {} cells, {} source(s), {} receiver(s), memory (RAM) required: ~{}'.format(self.islo[0] * G.dx, self.islo[1] * G.dy, self.islo[2] * G.dz, self.ishi[0] * G.dx, self.ishi[1] * G.dy, self.ishi[2] * G.dz, self.ratio, self.nx, self.ny, self.nz, self.pmlthickness['x0'], len(self.voltagesources + self.hertziandipoles + self.magneticdipoles + self.transmissionlines), len(self.rxs), human_size(self.memoryusage)))
+
+    def interpolation(self, indices):
+        """Stencils of the (quadratic) interpolation of field components of
+            the main grid at field components of the subgrid.
+
+        Args:
+            indices (tuple): For each axis, start, stop and whether the component is staggered (subgrid).
+
+        Returns:
+            stencils (list): For each axis, first index of the stencil of each
+                                component, and weights (see lagrange_stencil).
+        """
+
+        stencils = []
+        for axis, (start, stop, staggered) in enumerate(indices):
+            shift = 0.5 if staggered else 0
+            # Position in cells of the main grid, and fractional index of the
+            # component of the main grid (staggered in the same way)
+            position = self.oslo[axis] + (np.arange(start, stop) + shift - self.offset) / self.ratio
+            stencils.append(lagrange_stencil(position - shift))
+
+        return stencils
+
+    def interpolate(self, field, stencils):
+        """Interpolate a field component of the main grid.
+
+        Args:
+            field (float): Field component array of the main grid.
+            stencils (list): Stencils of the interpolation (see interpolation).
+
+        Returns:
+            values (float): Interpolated field component values.
+        """
+
+        lower = [start.min() for start, weights in stencils]
+        upper = [start.max() + 3 for start, weights in stencils]
+        values = field[lower[0]:upper[0], lower[1]:upper[1], lower[2]:upper[2]].astype(np.float64)
+        for axis, (start, weights) in enumerate(stencils):
+            shape = [1, 1, 1]
+            shape[axis] = -1
+            values = sum(weights[k].reshape(shape) * np.take(values, start - lower[axis] + k, axis=axis) for k in range(3))
+
+        return values.astype(floattype)
+
+    def initialise_solve(self):
+        """Initialise arrays of sources and receivers, and incident field
+            values, before the main FDTD loop.
+        """
+
+        self.srcs_voltage = cpu_initialise_src_arrays(self.voltagesources, self)
+        self.srcs_hertzian = cpu_initialise_src_arrays(self.hertziandipoles, self)
+        self.srcs_magnetic = cpu_initialise_src_arrays(self.magneticdipoles, self)
+        self.rxarrays = cpu_initialise_rx_arrays(self.rxs, self)
+        if self.dispersivecells is not None:
+            self.dispersivephi = [np.zeros(cells.size, dtype=np.float32) for cells in self.dispersivecells]
+
+        # Incident field values at the IS at the last three times the fields
+        # of the main grid were updated, and the last of these times (in
+        # iterations of the main grid)
+        self.Einc = [deque([np.zeros(coeffH.shape, dtype=floattype)] * 3, maxlen=3) for c, b, Eslices, Hslices, coeffE, coeffH, Estencils, Hstencils in self.isterms]
+        self.Hinc = [deque([np.zeros(coeffE.shape, dtype=floattype)] * 3, maxlen=3) for c, b, Eslices, Hslices, coeffE, coeffH, Estencils, Hstencils in self.isterms]
+        self.Etime = 0
+        self.Htime = -0.5
+
+    def incident(self, levels, t, T):
+        """Incident field values at a time, by quadratic interpolation of the
+            last three values (at times T - 2, T - 1 and T).
+
+        Args:
+            levels (deque): Last three incident field values.
+            t (float): Time of the values (iterations of the main grid).
+            T (float): Time of the last values (iterations of the main grid).
+
+        Returns:
+            (float): Incident field values.
+        """
+
+        tau = t - (T - 1)
+        return levels[0] * floattype(tau * (tau - 1) / 2) + levels[1] * floattype(1 - tau * tau) + levels[2] * floattype(tau * (tau + 1) / 2)
+
+    def update_magnetic(self, iteration, G):
+        """Advance the subgrid to the electric field at the time of the
+            current magnetic field update of the main grid, and correct the
+            magnetic field of the main grid at the OS. Called after the
+            magnetic field (and PML and source) update of the main grid.
+
+        Args:
+            iteration (int): Current iteration of the main grid.
+            G (class): Grid class instance of the main grid.
+        """
+
+        for term, levels in zip(self.isterms, self.Hinc):
+            levels.append(self.interpolate(getattr(G, 'H' + 'xyz'[term[1]]), term[7]))
+        self.Htime += 1
+
+        if iteration > 0:
+            start = (iteration - 1) * self.ratio + (self.ratio - 1) // 2
+            self.fine_electric(start)
+            for fineiteration in range(start + 1, iteration * self.ratio):
+                store_outputs(fineiteration, self.Ex, self.Ey, self.Ez, self.Hx, self.Hy, self.Hz, self, self.rxarrays)
+                self.fine_magnetic(fineiteration)
+                self.fine_electric(fineiteration)
+
+        for c, b, Eslices, Hslices, coeffE, coeffH, fineEslices, fineHslices in self.osterms:
+            getattr(G, 'H' + 'xyz'[b])[Hslices] += coeffH * getattr(self, 'E' + 'xyz'[c])[fineEslices]
+
+    def update_electric(self, iteration, G):
+        """Advance the subgrid to the magnetic field at the time of the
+            current electric field update of the main grid, and correct the
+            electric field of the main grid at the OS. Called after the
+            electric field (and PML and source) update of the main grid.
+
+        Args:
+            iteration (int): Current iteration of the main grid.
+            G (class): Grid class instance of the main grid.
+        """
+
+        for term, levels in zip(self.isterms, self.Einc):
+            levels.append(self.interpolate(getattr(G, 'E' + 'xyz'[term[0]]), term[6]))
+        self.Etime += 1
+
+        start = iteration * self.ratio
+        stop = start + (self.ratio - 1) // 2
+        for fineiteration in range(start, stop + 1):
+            store_outputs(fineiteration, self.Ex, self.Ey, self.Ez, self.Hx, self.Hy, self.Hz, self, self.rxarrays)
+            self.fine_magnetic(fineiteration)
+            if fineiteration != stop:
+                self.fine_electric(fineiteration)
+
+        for c, b, Eslices, Hslices, coeffE, coeffH, fineEslices, fineHslices in self.osterms:
+            getattr(G, 'E' + 'xyz'[c])[Eslices] += coeffE * getattr(self, 'H' + 'xyz'[b])[fineHslices]
+
+    def fine_magnetic(self, iteration):
+        """Magnetic field update of the subgrid, with the incident electric
+            field at the IS.
+
+        Args:
+            iteration (int): Current iteration of the subgrid.
+        """
+
+        if self.materialruns:
+            update_magnetic_runs(self.nx, self.ny, self.nz, self.nthreads, self.updatecoeffsH, self.ID, self.materialruns[0], self.materialruns[1], self.Ex, self.Ey, self.Ez, self.Hx, self.Hy, self.Hz)
+        else:
+            update_magnetic(self.nx, self.ny, self.nz, self.nthreads, self.updatecoeffsH, self.ID, self.Ex, self.Ey, self.Ez, self.Hx, self.Hy, self.Hz)
+
+        for pml in self.pmls:
+            pml.update_magnetic(self)
+
+        for (c, b, Eslices, Hslices, coeffE, coeffH, Estencils, Hstencils), levels in zip(self.isterms, self.Einc):
+            getattr(self, 'H' + 'xyz'[b])[Hslices] += coeffH * self.incident(levels, iteration / self.ratio, self.Etime)
+
+        for source in self.transmissionlines:
+            source.update_magnetic(iteration, self.updatecoeffsH, self.ID, self.Hx, self.Hy, self.Hz, self)
+        if self.magneticdipoles:
+            update_magnetic_dipole(len(self.magneticdipoles), iteration, self.dt, *self.srcs_magnetic, self.updatecoeffsH, self.ID, self.Hx, self.Hy, self.Hz)
+
+    def fine_electric(self, iteration):
+        """Electric field update of the subgrid, with the incident magnetic
+            field at the IS (see solve_cpu for dispersive updates).
+
+        Args:
+            iteration (int): Current iteration of the subgrid.
+        """
+
+        if Material.maxpoles == 0 or self.dispersivecells is not None:
+            if self.dispersivecells is not None:
+                update_electric_dispersive_cells(self.nthreads, Material.maxpoles, self.updatecoeffsdispersive, self.ID, *self.dispersivecells, self.Tx, self.Ty, self.Tz, *self.dispersivephi, self.Ex, self.Ey, self.Ez)
+            if self.materialruns:
+                update_electric_runs(self.nx, self.ny, self.nz, self.nthreads, self.updatecoeffsE, self.ID, self.materialruns[0], self.materialruns[1], self.Ex, self.Ey, self.Ez, self.Hx, self.Hy, self.Hz)
+            else:
+                update_electric(self.nx, self.ny, self.nz, self.nthreads, self.updatecoeffsE, self.ID, self.Ex, self.Ey, self.Ez, self.Hx, self.Hy, self.Hz)
+            if self.dispersivecells is not None:
+                update_electric_dispersive_cells_phi(self.nthreads, self.updatecoeffsE, self.ID, *self.dispersivecells, *self.dispersivephi, self.Ex, self.Ey, self.Ez)
+        elif Material.maxpoles == 1:
+            update_electric_dispersive_1pole(self.nx, self.ny, self.nz, self.nthreads, self.updatecoeffsE, self.updatecoeffsdispersive, self.ID, self.Tx, self.Ty, self.Tz, self.Ex, self.Ey, self.Ez, self.Hx, self.Hy, self.Hz)
+        else:
+            update_electric_dispersive_multipole(self.nx, self.ny, self.nz, self.nthreads, Material.maxpoles, self.updatecoeffsE, self.updatecoeffsdispersive, self.ID, self.Tx, self.Ty, self.Tz, self.Ex, self.Ey, self.Ez, self.Hx, self.Hy, self.Hz)
+
+        for pml in self.pmls:
+            pml.update_electric(self)
+
+        for (c, b, Eslices, Hslices, coeffE, coeffH, Estencils, Hstencils), levels in zip(self.isterms, self.Hinc):
+            getattr(self, 'E' + 'xyz'[c])[Eslices] += coeffE * self.incident(levels, (iteration + 0.5) / self.ratio, self.Htime)
+
+        if self.voltagesources:
+            update_voltage_source(len(self.voltagesources), iteration, self.dt, *self.srcs_voltage, self.updatecoeffsE, self.ID, self.Ex, self.Ey, self.Ez)
+        for source in self.transmissionlines:
+            source.update_electric(iteration, self.updatecoeffsE, self.ID, self.Ex, self.Ey, self.Ez, self)
+        if self.hertziandipoles:
+            update_hertzian_dipole(len(self.hertziandipoles), iteration, self.dt, *self.srcs_hertzian, self.updatecoeffsE, self.ID, self.Ex, self.Ey, self.Ez)
+
+
+# Coordinate parameters of geometry commands, i.e. index of parameter and axis
+boxcoords = [(1, 0), (2, 1), (3, 2), (4, 0), (5, 1), (6, 2)]
+geometrycoords = {'#edge:': boxcoords,
+                  '#plate:': boxcoords,
+                  '#box:': boxcoords,
+                  '#triangle:': boxcoords + [(7, 0), (8, 1), (9, 2)],
+                  '#cylinder:': boxcoords,
+                  '#sphere:': boxcoords[:3]}
+
+
+def geometry_extent(tmp):
+    """Coordinate parameters and bounding box of a geometry command.
+
+    Args:
+        tmp (list): Command name and parameters.
+
+    Returns:
+        coords (list): Index of parameter and axis of each coordinate parameter.
+        lower, upper (float): numpy arrays of corners of the bounding box (metres).
+    """
+
+    if tmp[0] == '#cylindrical_sector:':
+        normal = 'xyz'.index(tmp[1])
+        ctr1, ctr2 = (axis for axis in range(3) if axis != normal)
+        coords = [(2, ctr1), (3, ctr2), (4, normal), (5, normal)]
+    else:
+        coords = geometrycoords[tmp[0]]
+
+    lower = np.full(3, np.inf)
+    upper = np.full(3, -np.inf)
+    for index, axis in coords:
+        lower[axis] = min(lower[axis], float(tmp[index]))
+        upper[axis] = max(upper[axis], float(tmp[index]))
+
+    if tmp[0] == '#triangle:':
+        # Thickness is in the direction normal to the triangle
+        upper[lower == upper] += float(tmp[10])
+    elif tmp[0] == '#cylinder:':
+        lower -= float(tmp[7])
+        upper += float(tmp[7])
+    elif tmp[0] == '#sphere:':
+        lower -= float(tmp[4])
+        upper += float(tmp[4])
+    elif tmp[0] == '#cylindrical_sector:':
+        for axis in (ctr1, ctr2):
+            lower[axis] -= float(tmp[6])
+            upper[axis] += float(tmp[6])
+
+    return coords, lower, upper
+
+
+def process_subgrids(multicmds, geometry, G):
+    """
+    Checks the validity of subgrid command parameters, creates instances of
+        SubGrid, and moves the commands for objects, sources and receivers
+        inside the IS of each subgrid to the subgrid (translated to its
+        coordinates). Objects must either be inside the IS, outside the OS,
+        or be a box that contains the OS (which is built everywhere in the
+        subgrid, i.e. the background of the subgrid); and sources and
+        receivers must either be inside the IS or outside the OS.
+
+    Args:
+        multicmds (dict): Commands that can have multiple instances in the model.
+        geometry (list): Geometry commands in the model.
+        G (class): Grid class instance - holds essential parameters describing the model.
+
+    Returns:
+        geometry (list): Geometry commands of the main grid.
+    """
+
+    cmdname = '#subgrid'
+    for cmdinstance in multicmds.pop(cmdname, []):
+        tmp = cmdinstance.split()
+        if len(tmp) != 7 and len(tmp) != 8:
+            raise CmdInputError("'" + cmdname + ': ' + ' '.join(tmp) + "'" + ' requires exactly seven or eight parameters')
+        if G.mode != '3D':
+            raise CmdInputError("'" + cmdname + ': ' + ' '.join(tmp) + "'" + ' can only be used in 3D models')
+        if G.gpu is not None:
+            raise CmdInputError("'" + cmdname + ': ' + ' '.join(tmp) + "'" + ' can not be used with a GPU')
+        if G.grading is not None:
+            raise CmdInputError("'" + cmdname + ': ' + ' '.join(tmp) + "'" + ' can not be used with a graded mesh')
+
+        islo = [G.calculate_coord(coord, tmp[axis]) for axis, coord in enumerate('xyz')]
+        ishi = [G.calculate_coord(coord, tmp[axis + 3]) for axis, coord in enumerate('xyz')]
+        ratio = int(tmp[6])
+        pmlcells = int(tmp[7]) if len(tmp) == 8 else 6
+
+        if any(lo >= hi for lo, hi in zip(islo, ishi)):
+            raise CmdInputError("'" + cmdname + ': ' + ' '.join(tmp) + "'" + ' the lower coordinates should be less than the upper coordinates')
+        if ratio < 1 or ratio % 2 == 0:
+            raise CmdInputError("'" + cmdname + ': ' + ' '.join(tmp) + "'" + ' requires an odd ratio of discretisations')
+        if pmlcells < 1:
+            raise CmdInputError("'" + cmdname + ': ' + ' '.join(tmp) + "'" + ' requires a PML thickness of at least one cell')
+
+        subgrid = SubGrid(G, islo, ishi, ratio, pmlcells)
+        if (any(lo < G.pmlthickness[key] for lo, key in zip(subgrid.oslo, ('x0', 'y0', 'z0'))) or
+                any(hi > n - G.pmlthickness[key] for hi, n, key in zip(subgrid.oshi, (G.nx, G.ny, G.nz), ('xmax', 'ymax', 'zmax')))):
+            raise CmdInputError("'" + cmdname + ': ' + ' '.join(tmp) + "'" + ' the subgrid, including {} cells around it, should not be within the PML'.format(SubGrid.isos))
+        for other in G.subgrids:
+            if all(lo <= otherhi and otherlo <= hi for lo, hi, otherlo, otherhi in zip(subgrid.oslo, subgrid.oshi, other.oslo, other.oshi)):
+                raise CmdInputError("'" + cmdname + ': ' + ' '.join(tmp) + "'" + ' the subgrid, including {} cells around it, should not overlap another subgrid'.format(SubGrid.isos))
+
+        subgrid.multicmds = {key: [] for key in multicmds}
+        G.subgrids.append(subgrid)
+
+    if not G.subgrids:
+        return geometry
+
+    def locate(lower, upper):
+        """Subgrid whose IS contains the cells of sources or receivers, i.e.
+            every field component at them, or None if they are outside every OS.
+        """
+        for subgrid in G.subgrids:
+            if all(lo >= islo and hi < ishi for lo, hi, islo, ishi in zip(lower, upper, subgrid.islo, subgrid.ishi)):
+                return subgrid
+            if all(lo <= oshi and hi >= oslo for lo, hi, oslo, oshi in zip(lower, upper, subgrid.oslo, subgrid.oshi)):
+                raise CmdInputError("'" + cmdname + ': ' + ' '.join(tmp) + "'" + ' should either be inside or outside (by {} cells) a subgrid'.format(SubGrid.isos))
+        return None
+
+    # Sources and receivers
+    for cmdname, coords in (('#voltage_source', [(1, 0), (2, 1), (3, 2)]), ('#hertzian_dipole', [(1, 0), (2, 1), (3, 2)]), ('#magnetic_dipole', [(1, 0), (2, 1), (3, 2)]), ('#transmission_line', [(1, 0), (2, 1), (3, 2)]), ('#rx', [(0, 0), (1, 1), (2, 2)]), ('#rx_array', [(0, 0), (1, 1), (2, 2), (3, 0), (4, 1), (5, 2)])):
+        main = []
+        for cmdindex, cmdinstance in enumerate(multicmds[cmdname]):
+            tmp = cmdinstance.split()
+            if len(tmp) <= max(index for index, axis in coords):
+                raise CmdInputError("'" + cmdname + ': ' + ' '.join(tmp) + "'" + ' has an incorrect number of parameters')
+            lower = [G.calculate_coord('xyz'[axis], tmp[index]) for index, axis in coords[:3]]
+            upper = [G.calculate_coord('xyz'[axis], tmp[index]) for index, axis in coords[-3:]]
+            subgrid = locate(lower, upper)
+            if subgrid is None:
+                main.append(cmdinstance)
+                grid = G
+            else:
+                if any(G.srcsteps) or any(G.rxsteps):
+                    raise CmdInputError("'" + cmdname + ': ' + ' '.join(tmp) + "'" + ' sources and receivers inside a subgrid can not be moved between models')
+                for index, axis in coords:
+                    tmp[index] = subgrid.translate(axis, tmp[index])
+                subgrid.multicmds[cmdname].append(' '.join(tmp))
+                grid = subgrid
+            # Receivers are numbered in the order of their commands in the input file
+            if cmdname in ('#rx', '#rx_array'):
+                grid.rxcmdorder.setdefault(cmdname, []).append(cmdindex)
+        multicmds[cmdname] = main
+
+    # Geometry objects
+    main = []
+    for cmdinstance in geometry:
+        tmp = cmdinstance.split()
+        cmdname = tmp[0].rstrip(':')
+        if tmp[0] not in geometrycoords and tmp[0] != '#cylindrical_sector:':
+            # Fractal boxes and surfaces, and objects read from file, are only
+            # built in the main grid so must be outside every OS
+            if tmp[0] != '#geometry_objects_read:':
+                lower = [G.calculate_coord('xyz'[axis], tmp[index]) for index, axis in boxcoords[:3]]
+                upper = [G.calculate_coord('xyz'[axis], tmp[index]) for index, axis in boxcoords[3:]]
+                for subgrid in G.subgrids:
+                    if all(lo <= oshi and hi >= oslo for lo, hi, oslo, oshi in zip(lower, upper, subgrid.oslo, subgrid.oshi)):
+                        raise CmdInputError("'" + cmdname + ': ' + ' '.join(tmp[1:]) + "'" + ' can not be built in a subgrid')
+            main.append(cmdinstance)
+            continue
+
+        coords, lower, upper = geometry_extent(tmp)
+        lower = lower / np.array([G.dx, G.dy, G.dz])
+        upper = upper / np.array([G.dx, G.dy, G.dz])
+        inside = None
+        for subgrid in G.subgrids:
+            # Boxes that contain the OS (and a cell around it) are built
+            # everywhere in the subgrid
+            if tmp[0] == '#box:' and all(lo <= oslo - 1 and hi >= oshi + 1 for lo, hi, oslo, oshi in zip(lower, upper, subgrid.oslo, subgrid.oshi)):
+                for index, axis in coords:
+                    tmp[index] = repr((0, (subgrid.nx, subgrid.ny, subgrid.nz)[axis] * (subgrid.dx, subgrid.dy, subgrid.dz)[axis])[index > 3])
+                subgrid.geometry.append(' '.join(tmp))
+                tmp = cmdinstance.split()
+            elif all(lo >= islo - 1e-6 and hi <= ishi + 1e-6 for lo, hi, islo, ishi in zip(lower, upper, subgrid.islo, subgrid.ishi)):
+                inside = subgrid
+            elif all(lo < oshi + 1 and hi > oslo - 1 for lo, hi, oslo, oshi in zip(lower, upper, subgrid.oslo, subgrid.oshi)):
+                raise CmdInputError("'" + cmdname + ': ' + ' '.join(tmp[1:]) + "'" + ' should either be inside or outside (by {} cells) a subgrid, or be a box that contains it'.format(SubGrid.isos + 1))
+
+        if inside is None:
+            main.append(cmdinstance)
+        else:
+            for index, axis in coords:
+                tmp[index] = inside.translate(axis, tmp[index])
+            inside.geometry.append(' '.join(tmp))
+
+    return main
@@ -18,7 +18,9 @@
 
 import numpy as np
 cimport numpy as np
+from cython.parallel import prange
 
+from gprMax.constants cimport idtype_t
 from gprMax.materials import Material
 from gprMax.yee_cell_setget_rigid_ext cimport get_rigid_Ex
 from gprMax.yee_cell_setget_rigid_ext cimport get_rigid_Ey
@@ -28,30 +30,27 @@ from gprMax.yee_cell_setget_rigid_ext cimport get_rigid_Hy
 from gprMax.yee_cell_setget_rigid_ext cimport get_rigid_Hz
 
 
-cpdef void create_electric_average(int i, int j, int k, int numID1, int numID2, int numID3, int numID4, int componentID, G):
+cpdef int create_electric_average(int numID1, int numID2, int numID3, int numID4, G):
     """This function creates a new material by averaging the dielectric properties of the surrounding cells.
 
     Args:
-        i, j, k (int): Cell coordinates.
         numID1, numID2, numID3, numID4 (int): Numeric IDs for materials in surrounding cells.
-        componentID (int): Numeric ID for electric field component.
         G (class): Grid class instance - holds essential parameters describing the model.
-    """
 
-    # Make an ID composed of the names of the four materials that will be averaged
-    requiredID = G.materials[numID1].ID + '+' + G.materials[numID2].ID + '+' + G.materials[numID3].ID + '+' + G.materials[numID4].ID
+    Returns:
+        numID (int): Numeric ID of the averaged material.
+    """
 
-    # Check if this material already exists
-    tmp = requiredID.split('+')
-    material = [x for x in G.materials if
-             x.ID.count(tmp[0]) == requiredID.count(tmp[0]) and
-             x.ID.count(tmp[1]) == requiredID.count(tmp[1]) and
-             x.ID.count(tmp[2]) == requiredID.count(tmp[2]) and
-             x.ID.count(tmp[3]) == requiredID.count(tmp[3])]
+    # Check if this material already exists, i.e. has been averaged from the same materials
+    key = tuple(sorted((numID1, numID2, numID3, numID4)))
+    numID = G.averagedmaterials.get(key)
 
-    if material:
-        G.ID[componentID, i, j, k] = material[0].numID
+    if numID is not None:
+        return numID
     else:
+        # Make an ID composed of the names of the four materials that will be averaged
+        requiredID = G.materials[numID1].ID + '+' + G.materials[numID2].ID + '+' + G.materials[numID3].ID + '+' + G.materials[numID4].ID
+
         # Create new material
         newNumID = len(G.materials)
         m = Material(newNumID, requiredID)
@@ -64,33 +63,36 @@ cpdef void create_electric_average(int i, int j, int k, int numID1, int numID2,
 
         # Append the new material object to the materials list
         G.materials.append(m)
+        G.averagedmaterials[key] = newNumID
 
-        G.ID[componentID, i, j, k] = newNumID
+        return newNumID
 
 
-cpdef void create_magnetic_average(int i, int j, int k, int numID1, int numID2, int componentID, G):
+cpdef int create_magnetic_average(int numID1, int numID2, G):
     """This function creates a new material by averaging the dielectric properties of the surrounding cells.
 
     Args:
-        i, j, k (int): Cell coordinates.
         numID1, numID2 (int): Numeric IDs for materials in surrounding cells.
-        componentID (int): Numeric ID for electric field component.
         G (class): Grid class instance - holds essential parameters describing the model.
-    """
 
-    # Make an ID composed of the names of the two materials that will be averaged
-    requiredID = G.materials[numID1].ID + '+' + G.materials[numID2].ID
+    Returns:
+        numID (int): Numeric ID of the averaged material.
+    """
 
-    # Check if this material already exists
-    tmp = requiredID.split('+')
-    material = [x for x in G.materials if
-                (x.ID.count(tmp[0]) == requiredID.count(tmp[0]) and
-                 x.ID.count(tmp[1]) == requiredID.count(tmp[1])) or
-                (x.ID.count(tmp[0]) % 2 == 0 and x.ID.count(tmp[1]) % 2 == 0)]
+    # Check if this material already exists, i.e. has been averaged from the
+    # same materials, or in equal proportions from the same materials for an
+    # electric field component
+    key = tuple(sorted((numID1, numID2)))
+    numID = G.averagedmaterials.get(key)
+    if numID is None:
+        numID = G.averagedmaterials.get(tuple(sorted(key + key)))
 
-    if material:
-        G.ID[componentID, i, j, k] = material[0].numID
+    if numID is not None:
+        return numID
     else:
+        # Make an ID composed of the names of the two materials that will be averaged
+        requiredID = G.materials[numID1].ID + '+' + G.materials[numID2].ID
+
         # Create new material
         newNumID = len(G.materials)
         m = Material(newNumID, requiredID)
@@ -103,86 +105,196 @@ cpdef void create_magnetic_average(int i, int j, int k, int numID1, int numID2,
 
         # Append the new material object to the materials list
         G.materials.append(m)
+        G.averagedmaterials[key] = newNumID
 
-        G.ID[componentID, i, j, k] = newNumID
+        return newNumID
 
 
-cpdef void build_electric_components(np.uint32_t[:, :, ::1] solid, np.int8_t[:, :, :, ::1] rigidE, np.uint32_t[:, :, :, ::1] ID, G):
-    """This function builds the electric field components in the ID array.
+cdef inline bint get_rigid(int componentID, int i, int j, int k, np.int8_t[:, :, :, ::1] rigid) noexcept nogil:
+    """This function gets the rigid flag of a field component of a cell.
 
     Args:
-        solid, rigid, ID (memoryviews): Access to solid, rigid and ID arrays
-        G (class): Grid class instance - holds essential parameters describing the model.
+        componentID (int): Numeric ID for field component.
+        i, j, k (int): Cell coordinates.
+        rigid (memoryview): Access to rigid electric or magnetic array.
     """
 
-    cdef Py_ssize_t i, j, k
-    cdef int numID1, numID2, numID3, numID4, componentID
+    if componentID == 0:
+        return get_rigid_Ex(i, j, k, rigid)
+    elif componentID == 1:
+        return get_rigid_Ey(i, j, k, rigid)
+    elif componentID == 2:
+        return get_rigid_Ez(i, j, k, rigid)
+    elif componentID == 3:
+        return get_rigid_Hx(i, j, k, rigid)
+    elif componentID == 4:
+        return get_rigid_Hy(i, j, k, rigid)
+    else:
+        return get_rigid_Hz(i, j, k, rigid)
+
+
+cdef void find_averages(
+                    int npass,
+                    int componentID,
+                    int ncells,
+                    int ai,
+                    int aj,
+                    int ak,
+                    int bi,
+                    int bj,
+                    int bk,
+                    int nx,
+                    int ny,
+                    int nz,
+                    int nthreads,
+                    np.uint32_t[:, :, ::1] solid,
+                    np.int8_t[:, :, :, ::1] rigid,
+                    np.uint32_t[:, :, :, ::1] ID,
+                    np.int64_t[::1] counts,
+                    np.uint32_t[:, ::1] constituents,
+                    np.uint32_t[::1] averagedIDs
+            ) noexcept nogil:
+    """This function finds the field components of a type that require averaging,
+        i.e. that are not rigid and where the surrounding cells are of different
+        materials, in parallel over slabs of cells in the x direction. The
+        surrounding cells are offset from a cell by a and b, a + b, and b.
 
-    # Ex component
-    componentID = G.IDlookup['Ex']
-    for i in range(0, G.nx):
-        for j in range(1, G.ny):
-            for k in range(1, G.nz):
+    Args:
+        npass (int): 0 - sets components that do not require averaging, marks
+                            those that do, and counts them in each slab;
+                        1 - stores the materials of the surrounding cells of
+                            marked components;
+                        2 - sets marked components to their averaged materials.
+        componentID (int): Numeric ID for field component.
+        ncells (int): Number of surrounding cells, i.e. 4 for electric and 2 for magnetic components.
+        ai, aj, ak, bi, bj, bk (int): Offsets of surrounding cells.
+        nx, ny, nz (int): Grid size in cells.
+        nthreads (int): Number of threads to use.
+        solid, rigid, ID (memoryviews): Access to solid, rigid and ID arrays.
+        counts (memoryview): Number of components that require averaging in each
+                                slab (npass 0), or index of the first of them (npass 1 and 2).
+        constituents (memoryview): Materials of the surrounding cells of each
+                                    component that requires averaging.
+        averagedIDs (memoryview): Averaged material of each component that requires averaging.
+    """
 
-                # If rigid is True do not average
-                if get_rigid_Ex(i, j, k, rigidE):
-                    pass
-                else:
-                    numID1 = solid[i, j, k]
-                    numID2 = solid[i, j - 1, k]
-                    numID3 = solid[i, j - 1, k - 1]
-                    numID4 = solid[i, j, k - 1]
+    cdef Py_ssize_t i, j, k, n
+    cdef int numID1, numID2, numID3, numID4
+    cdef int istart = 1 if ai or bi else 0
+    cdef int jstart = 1 if aj or bj else 0
+    cdef int kstart = 1 if ak or bk else 0
+    # ID of components that require averaging until their averaged materials are known
+    cdef np.uint32_t marker = 4294967295
+
+    if npass == 0:
+        for i in prange(istart, nx, nogil=True, schedule='static', num_threads=nthreads):
+            n = 0
+            for j in range(jstart, ny):
+                for k in range(kstart, nz):
+                    # If rigid is True do not average
+                    if get_rigid(componentID, i, j, k, rigid):
+                        continue
 
-                    # If all values are the same no need to average
-                    if numID1 == numID2 and numID1 == numID3 and numID1 == numID4:
-                        ID[componentID, i, j, k] = numID1
-                    else:
-                        # Averaging is required
-                        create_electric_average(i, j, k, numID1, numID2, numID3, numID4, componentID, G)
-
-    # Ey component
-    componentID = G.IDlookup['Ey']
-    for i in range(1, G.nx):
-        for j in range(0, G.ny):
-            for k in range(1, G.nz):
-
-                # If rigid is True do not average
-                if get_rigid_Ey(i, j, k, rigidE):
-                    pass
-                else:
                     numID1 = solid[i, j, k]
-                    numID2 = solid[i - 1, j, k]
-                    numID3 = solid[i - 1, j, k - 1]
-                    numID4 = solid[i, j, k - 1]
-
-                    # If all values are the same no need to average
-                    if numID1 == numID2 and numID1 == numID3 and numID1 == numID4:
-                        ID[componentID, i, j, k] = numID1
+                    numID2 = solid[i - ai, j - aj, k - ak]
+                    if ncells == 4:
+                        numID3 = solid[i - ai - bi, j - aj - bj, k - ak - bk]
+                        numID4 = solid[i - bi, j - bj, k - bk]
                     else:
-                        # Averaging is required
-                        create_electric_average(i, j, k, numID1, numID2, numID3, numID4, componentID, G)
-
-    # Ez component
-    componentID = G.IDlookup['Ez']
-    for i in range(1, G.nx):
-        for j in range(1, G.ny):
-            for k in range(0, G.nz):
-
-                # If rigid is True do not average
-                if get_rigid_Ez(i, j, k, rigidE):
-                    pass
-                else:
-                    numID1 = solid[i, j, k]
-                    numID2 = solid[i - 1, j, k]
-                    numID3 = solid[i - 1, j - 1, k]
-                    numID4 = solid[i, j - 1, k]
+                        numID3 = numID1
+                        numID4 = numID1
 
                     # If all values are the same no need to average
                     if numID1 == numID2 and numID1 == numID3 and numID1 == numID4:
                         ID[componentID, i, j, k] = numID1
                     else:
-                        # Averaging is required
-                        create_electric_average(i, j, k, numID1, numID2, numID3, numID4, componentID, G)
+                        ID[componentID, i, j, k] = marker
+                        n = n + 1
+            counts[i] = n
+
+    else:
+        for i in prange(istart, nx, nogil=True, schedule='static', num_threads=nthreads):
+            n = counts[i]
+            for j in range(jstart, ny):
+                for k in range(kstart, nz):
+                    if ID[componentID, i, j, k] == marker:
+                        if npass == 1:
+                            constituents[n, 0] = solid[i, j, k]
+                            constituents[n, 1] = solid[i - ai, j - aj, k - ak]
+                            if ncells == 4:
+                                constituents[n, 2] = solid[i - ai - bi, j - aj - bj, k - ak - bk]
+                                constituents[n, 3] = solid[i - bi, j - bj, k - bk]
+                        else:
+                            ID[componentID, i, j, k] = averagedIDs[n]
+                        n = n + 1
+
+
+cdef void build_components(int componentID, int ai, int aj, int ak, int bi, int bj, int bk, np.uint32_t[:, :, ::1] solid, np.int8_t[:, :, :, ::1] rigid, np.uint32_t[:, :, :, ::1] ID, G):
+    """This function builds a field component in the ID array in two phases. The
+        components that require averaging, and their surrounding materials, are
+        found in parallel (see find_averages). Averaged materials are then
+        created once for each unique combination of surrounding materials, in
+        the order the combinations are first found in the grid.
+
+    Args:
+        componentID (int): Numeric ID for field component.
+        ai, aj, ak, bi, bj, bk (int): Offsets of surrounding cells, b is zero for magnetic components.
+        solid, rigid, ID (memoryviews): Access to solid, rigid and ID arrays
+        G (class): Grid class instance - holds essential parameters describing the model.
+    """
+
+    cdef int ncells = 4 if bi or bj or bk else 2
+
+    counts = np.zeros(G.nx + 1, dtype=np.int64)
+    find_averages(0, componentID, ncells, ai, aj, ak, bi, bj, bk, G.nx, G.ny, G.nz, G.nthreads, solid, rigid, ID, counts, None, None)
+
+    # Index of the first component that requires averaging in each slab
+    total = counts.sum()
+    if total == 0:
+        return
+    counts = np.cumsum(counts) - counts
+
+    constituents = np.zeros((total, ncells), dtype=np.uint32)
+    find_averages(1, componentID, ncells, ai, aj, ak, bi, bj, bk, G.nx, G.ny, G.nz, G.nthreads, solid, rigid, ID, counts, constituents, None)
+
+    # Unique combinations of surrounding materials, regardless of their order.
+    # Combinations are packed into a single integer where the numeric IDs
+    # allow, as finding unique rows of an array is much slower.
+    combinations = np.sort(constituents, axis=1)
+    bits = 64 // ncells
+    if len(G.materials) <= 1 << bits:
+        combinations = sum(combinations[:, n].astype(np.uint64) << np.uint64(bits * (ncells - n - 1)) for n in range(ncells))
+        combinations, first, inverse = np.unique(combinations, return_index=True, return_inverse=True)
+    else:
+        combinations, first, inverse = np.unique(combinations, axis=0, return_index=True, return_inverse=True)
+
+    averagedIDs = np.zeros(len(combinations), dtype=np.uint32)
+    for n in np.argsort(first):
+        if ncells == 4:
+            averagedIDs[n] = create_electric_average(*constituents[first[n]], G)
+        else:
+            averagedIDs[n] = create_magnetic_average(*constituents[first[n]], G)
+    averagedIDs = averagedIDs[inverse.ravel()]
+
+    find_averages(2, componentID, ncells, ai, aj, ak, bi, bj, bk, G.nx, G.ny, G.nz, G.nthreads, solid, rigid, ID, counts, constituents, averagedIDs)
+
+
+cpdef void build_electric_components(np.uint32_t[:, :, ::1] solid, np.int8_t[:, :, :, ::1] rigidE, np.uint32_t[:, :, :, ::1] ID, G):
+    """This function builds the electric field components in the ID array.
+
+    Args:
+        solid, rigid, ID (memoryviews): Access to solid, rigid and ID arrays
+        G (class): Grid class instance - holds essential parameters describing the model.
+    """
+
+    # Ex component - surrounding cells offset in the y and z directions
+    build_components(G.IDlookup['Ex'], 0, 1, 0, 0, 0, 1, solid, rigidE, ID, G)
+
+    # Ey component - surrounding cells offset in the x and z directions
+    build_components(G.IDlookup['Ey'], 1, 0, 0, 0, 0, 1, solid, rigidE, ID, G)
+
+    # Ez component - surrounding cells offset in the x and y directions
+    build_components(G.IDlookup['Ez'], 1, 0, 0, 0, 1, 0, solid, rigidE, ID, G)
 
 
 cpdef void build_magnetic_components(np.uint32_t[:, :, ::1] solid, np.int8_t[:, :, :, ::1] rigidH, np.uint32_t[:, :, :, ::1] ID, G):
@@ -193,65 +305,93 @@ cpdef void build_magnetic_components(np.uint32_t[:, :, ::1] solid, np.int8_t[:,
         G (class): Grid class instance - holds essential parameters describing the model.
     """
 
-    cdef Py_ssize_t i, j, k
-    cdef int numID1, numID2, componentID
+    # Hx component - surrounding cell offset in the x direction
+    build_components(G.IDlookup['Hx'], 1, 0, 0, 0, 0, 0, solid, rigidH, ID, G)
 
-    # Hx component
-    componentID = G.IDlookup['Hx']
-    for i in range(1, G.nx):
-        for j in range(0, G.ny):
-            for k in range(0, G.nz):
+    # Hy component - surrounding cell offset in the y direction
+    build_components(G.IDlookup['Hy'], 0, 1, 0, 0, 0, 0, solid, rigidH, ID, G)
 
-                # If rigid is True do not average
-                if get_rigid_Hx(i, j, k, rigidH):
-                    pass
-                else:
-                    numID1 = solid[i, j, k]
-                    numID2 = solid[i - 1, j, k]
+    # Hz component - surrounding cell offset in the z direction
+    build_components(G.IDlookup['Hz'], 0, 0, 1, 0, 0, 0, solid, rigidH, ID, G)
 
-                    # If all values are the same no need to average
-                    if numID1 == numID2:
-                        ID[componentID, i, j, k] = numID1
-                    else:
-                        # Averaging is required
-                        create_magnetic_average(i, j, k, numID1, numID2, componentID, G)
-
-    # Hy component
-    componentID = G.IDlookup['Hy']
-    for i in range(0, G.nx):
-        for j in range(1, G.ny):
-            for k in range(0, G.nz):
-
-                # If rigid is True do not average
-                if get_rigid_Hy(i, j, k, rigidH):
-                    pass
-                else:
-                    numID1 = solid[i, j, k]
-                    numID2 = solid[i, j - 1, k]
 
-                    # If all values are the same no need to average
-                    if numID1 == numID2:
-                        ID[4, i, j, k] = numID1
-                    else:
-                        # Averaging is required
-                        create_magnetic_average(i, j, k, numID1, numID2, componentID, G)
-
-    # Hz component
-    componentID = G.IDlookup['Hz']
-    for i in range(0, G.nx):
-        for j in range(0, G.ny):
-            for k in range(1, G.nz):
-
-                # If rigid is True do not average
-                if get_rigid_Hz(i, j, k, rigidH):
-                    pass
-                else:
-                    numID1 = solid[i, j, k]
-                    numID2 = solid[i, j, k - 1]
+cpdef tuple build_material_runs(idtype_t[:, :, :, ::1] ID, int nx, int ny, int nz, int minrun=8):
+    """This function finds runs of cells in the z direction that share a single
+        material for each field component in the ID array, i.e. so the update
+        coefficients can be loaded once per run rather than gathered for every
+        cell. Runs shorter than minrun are merged into heterogeneous runs
+        (material -1) that use the per cell ID.
 
-                    # If all values are the same no need to average
-                    if numID1 == numID2:
-                        ID[5, i, j, k] = numID1
-                    else:
-                        # Averaging is required
-                        create_magnetic_average(i, j, k, numID1, numID2, componentID, G)
+    Args:
+        ID (memoryview): Access to ID array
+        nx, ny, nz (int): Grid size in cells
+        minrun (int): Minimum number of cells for a homogeneous run
+
+    Returns:
+        offsets (array): Indices of the first run for each component and
+                            column (i * (ny + 1) + j) of cells.
+        runs (array): Start and stop z coordinates, and material of each run.
+    """
+
+    cdef Py_ssize_t c, i, j, k, kstart, kstop, runstart, n, col
+    cdef int material, nruns, pending
+    cdef int[:, ::1] offsetsview
+    cdef int[:, ::1] runsview
+
+    # z coordinates updated in the main loops for Ex, Ey, Ez, Hx, Hy, Hz
+    kstarts = (1, 1, 1, 0, 0, 1)
+    kstops = (nz, nz, nz, nz, nz, nz + 1)
+
+    offsets = np.zeros((6, (nx + 1) * (ny + 1) + 1), dtype=np.int32)
+    offsetsview = offsets
+
+    # First pass counts runs, second pass stores them
+    for n in range(2):
+        nruns = 0
+        for c in range(6):
+            kstart = kstarts[c]
+            kstop = kstops[c]
+            for i in range(nx + 1):
+                for j in range(ny + 1):
+                    col = i * (ny + 1) + j
+                    if n == 0:
+                        offsetsview[c, col] = nruns
+                    pending = 0
+                    runstart = kstart
+                    k = kstart
+                    while k < kstop:
+                        material = ID[c, i, j, k]
+                        k += 1
+                        if k < kstop and ID[c, i, j, k] == material:
+                            continue
+                        # Run of identical material from runstart to k
+                        if k - runstart >= minrun:
+                            if pending:
+                                if n == 1:
+                                    runsview[nruns, 0] = pending - 1
+                                    runsview[nruns, 1] = runstart
+                                    runsview[nruns, 2] = -1
+                                nruns += 1
+                                pending = 0
+                            if n == 1:
+                                runsview[nruns, 0] = runstart
+                                runsview[nruns, 1] = k
+                                runsview[nruns, 2] = material
+                            nruns += 1
+                        elif not pending:
+                            # Start of heterogeneous run (stored offset by one)
+                            pending = runstart + 1
+                        runstart = k
+                    if pending:
+                        if n == 1:
+                            runsview[nruns, 0] = pending - 1
+                            runsview[nruns, 1] = kstop
+                            runsview[nruns, 2] = -1
+                        nruns += 1
+            if n == 0:
+                offsetsview[c, (nx + 1) * (ny + 1)] = nruns
+        if n == 0:
+            runs = np.zeros((nruns, 3), dtype=np.int32)
+            runsview = runs
+
+    return offsets, runs
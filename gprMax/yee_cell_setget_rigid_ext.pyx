@@ -21,7 +21,7 @@ cimport numpy as np
 
 # Get and set functions for the rigid electric component array. The rigid array is 4D with the 1st dimension holding
 # the 12 electric edge components of a cell - Ex1, Ex2, Ex3, Ex4, Ey1, Ey2, Ey3, Ey4, Ez1, Ez2, Ez3, Ez4
-cdef bint get_rigid_Ex(int i, int j, int k, np.int8_t[:, :, :, ::1] rigidE):
+cdef bint get_rigid_Ex(int i, int j, int k, np.int8_t[:, :, :, ::1] rigidE) noexcept nogil:
     cdef bint result
     result = False
     if rigidE[0, i, j, k]:
@@ -37,7 +37,7 @@ cdef bint get_rigid_Ex(int i, int j, int k, np.int8_t[:, :, :, ::1] rigidE):
             result = True
     return result
 
-cdef bint get_rigid_Ey(int i, int j, int k, np.int8_t[:, :, :, ::1] rigidE):
+cdef bint get_rigid_Ey(int i, int j, int k, np.int8_t[:, :, :, ::1] rigidE) noexcept nogil:
     cdef bint result
     result = False
     if rigidE[4, i, j, k]:
@@ -53,7 +53,7 @@ cdef bint get_rigid_Ey(int i, int j, int k, np.int8_t[:, :, :, ::1] rigidE):
             result = True
     return result
 
-cdef bint get_rigid_Ez(int i, int j, int k, np.int8_t[:, :, :, ::1] rigidE):
+cdef bint get_rigid_Ez(int i, int j, int k, np.int8_t[:, :, :, ::1] rigidE) noexcept nogil:
     cdef bint result
     result = False
     if rigidE[8, i, j, k]:
@@ -104,7 +104,7 @@ cdef void unset_rigid_E(int i, int j, int k, np.int8_t[:, :, :, ::1] rigidE):
 
 # Get and set functions for the rigid magnetic component array. The rigid array is 4D with the 1st dimension holding
 # the 6 magnetic edge components - Hx1, Hx2, Hy1, Hy2, Hz1, Hz2
-cdef bint get_rigid_Hx(int i, int j, int k, np.int8_t[:, :, :, ::1] rigidH):
+cdef bint get_rigid_Hx(int i, int j, int k, np.int8_t[:, :, :, ::1] rigidH) noexcept nogil:
     cdef bint result
     result = False
     if rigidH[0, i, j, k]:
@@ -114,7 +114,7 @@ cdef bint get_rigid_Hx(int i, int j, int k, np.int8_t[:, :, :, ::1] rigidH):
             result = True
     return result
 
-cdef bint get_rigid_Hy(int i, int j, int k, np.int8_t[:, :, :, ::1] rigidH):
+cdef bint get_rigid_Hy(int i, int j, int k, np.int8_t[:, :, :, ::1] rigidH) noexcept nogil:
     cdef bint result
     result = False
     if rigidH[2, i, j, k]:
@@ -124,7 +124,7 @@ cdef bint get_rigid_Hy(int i, int j, int k, np.int8_t[:, :, :, ::1] rigidH):
             result = True
     return result
 
-cdef bint get_rigid_Hz(int i, int j, int k, np.int8_t[:, :, :, ::1] rigidH):
+cdef bint get_rigid_Hz(int i, int j, int k, np.int8_t[:, :, :, ::1] rigidH) noexcept nogil:
     cdef bint result
     result = False
     if rigidH[4, i, j, k]:
@@ -111,6 +111,7 @@ if 'cleanall' in sys.argv:
 # Windows
 if sys.platform == 'win32':
     compile_args = ['/O2', '/openmp', '/w']  # No static linking as no static version of OpenMP library; /w disables warnings
+    nocontract_args = []
     linker_args = []
     extra_objects = []
     libraries=[]
@@ -125,12 +126,14 @@ elif sys.platform == 'darwin':
     else:
         raise('Cannot find gcc 4-9 in /usr/local/bin. gprMax requires gcc to be installed - easily done through the Homebrew package manager (http://brew.sh). Note: gcc with OpenMP support is required.')
     compile_args = ['-O3', '-w', '-fopenmp', '-march=native']  # Sometimes worth testing with '-fstrict-aliasing', '-fno-common'
+    nocontract_args = ['-ffp-contract=off']
     linker_args = ['-fopenmp', '-Wl,-rpath,' + rpath]
     libraries = ['iomp5', 'pthread']
     extra_objects = []
 # Linux
 elif sys.platform == 'linux':
     compile_args = ['-O3', '-w', '-fopenmp', '-march=native']
+    nocontract_args = ['-ffp-contract=off']
     linker_args = ['-fopenmp']
     extra_objects = []
     libraries=[]
@@ -151,6 +154,11 @@ for file in cythonfiles:
                           extra_compile_args=compile_args,
                           extra_link_args=linker_args,
                           extra_objects=extra_objects)
+    # Compiled CPU solver, source updates and receiver outputs repeat the
+    # source and current arithmetic from sources.py and grid.py, so keep them
+    # from being fused into multiply-adds
+    if os.path.basename(tmp[0]) in ('solve_cpu_ext', 'source_updates_ext', 'fields_outputs_ext'):
+        extension.extra_compile_args = compile_args + nocontract_args
     extensions.append(extension)
 
 # Cythonize (build .c files)
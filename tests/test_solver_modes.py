@@ -0,0 +1,602 @@
+# Copyright (C) 2015-2019: The University of Edinburgh
+#                 Authors: Craig Warren and Antonis Giannopoulos
+#
+# This file is part of gprMax.
+#
+# gprMax is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# gprMax is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with gprMax.  If not, see <http://www.gnu.org/licenses/>.
+
+import functools
+import importlib.util
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import unittest
+from unittest import mock
+
+import h5py
+import numpy as np
+
+from gprMax.active_region import ActiveRegion
+from gprMax.checkpoint import Checkpoint
+from gprMax.fields_outputs import store_rx_outputs
+from gprMax.geometry_cache import reuse_geometry
+from gprMax.gprMax import api
+from gprMax.grid import FDTDGrid
+from gprMax.materials import Material
+from gprMax.model_build_run import solve_cpu
+from gprMax.model_build_run import solve_cpu_2d
+from gprMax.model_build_run import solve_cpu_compiled
+from gprMax.model_build_run import solve_cpu_shm
+from gprMax.model_build_run import solve_cpu_wavefront
+from gprMax.model_build_run import stop_early
+from gprMax.model_build_run import tune_tiles
+from gprMax.source_updates_ext import update_hertzian_dipole
+from gprMax.source_updates_ext import update_magnetic_dipole
+from gprMax.source_updates_ext import update_voltage_source
+
+"""Compare outputs of models run with solver modes to those of the standard solver
+
+    Usage:
+        cd gprMax
+        python -m unittest tests.test_solver_modes
+"""
+
+basepath = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'models_')
+
+
+def read_outputs(outputfile):
+    """Read all outputs, i.e. datasets, from an output file.
+
+    Args:
+        outputfile (str): Name of output file.
+
+    Returns:
+        outputs (dict): Arrays of outputs keyed by their paths in the file.
+    """
+
+    outputs = {}
+    with h5py.File(outputfile, 'r') as f:
+        f.visititems(lambda name, obj: outputs.update({name: obj[()]}) if isinstance(obj, h5py.Dataset) else None)
+
+    return outputs
+
+
+class SolverModesTest(unittest.TestCase):
+    """Run test models in a temporary directory with and without a solver mode."""
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def copy_model(self, models, model, name=None, timewindow=None, cmds=(), materials=None, remove=()):
+        """Copy a test model to the temporary directory.
+
+        Args:
+            models (str): Set of test models, e.g. modes.
+            model (str): Name of test model.
+            name (str): Name of copied input file, if different to the model.
+            timewindow (str): Time window of copied model, if different to the model.
+            cmds (tuple): Commands to add to copied model.
+            materials (dict): New names of materials of copied model, keyed by
+                                their names in the model.
+            remove (tuple): Names of commands to remove from copied model.
+
+        Returns:
+            inputfile (str): Name of copied input file.
+        """
+
+        inputfile = os.path.join(self.directory, (name or model) + '.in')
+        with open(os.path.join(basepath + models, model, model + '.in')) as f:
+            lines = f.readlines()
+        if timewindow:
+            lines = ['#time_window: ' + timewindow + '\n' if line.startswith('#time_window:') else line for line in lines]
+        if materials:
+            lines = [' '.join(materials.get(word, word) for word in line.split()) + '\n' for line in lines]
+        lines = [line for line in lines if line.split(':')[0] not in remove]
+        lines += [cmd + '\n' for cmd in cmds]
+        with open(inputfile, 'w') as f:
+            f.writelines(lines)
+
+        return inputfile
+
+    def run_model(self, inputfile, **kwargs):
+        """Run a model and read the outputs of each of its model runs.
+
+        Args:
+            inputfile (str): Name of input file.
+            kwargs (dict): Options to run the model with.
+
+        Returns:
+            outputs (list): Outputs of each model run.
+        """
+
+        api(inputfile, **kwargs)
+        n = kwargs.get('n', 1)
+        basename = os.path.splitext(inputfile)[0]
+        if n == 1:
+            return [read_outputs(basename + '.out')]
+        else:
+            return [read_outputs(basename + str(modelrun) + '.out') for modelrun in range(1, n + 1)]
+
+    def assertOutputsEqual(self, outputs, outputsref):
+        """Check outputs are identical to reference outputs."""
+
+        self.assertEqual(len(outputs), len(outputsref))
+        for output, outputref in zip(outputs, outputsref):
+            self.assertEqual(sorted(output), sorted(outputref))
+            for name in outputref:
+                np.testing.assert_array_equal(output[name], outputref[name], err_msg=name)
+
+    def assertOutputsClose(self, outputs, outputsref, rtol=1e-5):
+        """Check outputs agree with reference outputs, relative to the
+            maximum of the reference outputs of the same field of each receiver,
+            i.e. up to round-off, also for components that are nearly zero.
+        """
+
+        self.assertEqual(sorted(outputs), sorted(outputsref))
+        fieldmax = {}
+        for name in outputsref:
+            field = os.path.dirname(name), os.path.basename(name)[0]
+            fieldmax[field] = max(fieldmax.get(field, 0), np.abs(outputsref[name]).max())
+        for name in outputsref:
+            field = os.path.dirname(name), os.path.basename(name)[0]
+            np.testing.assert_allclose(outputs[name], outputsref[name], rtol=0, atol=rtol * fieldmax[field], err_msg=name)
+
+    def run_traces(self, inputfile, n):
+        """Run each model of a set of models on its own, i.e. as a task of a
+            job array, so it builds its geometry.
+
+        Args:
+            inputfile (str): Name of input file.
+            n (int): Number of models.
+
+        Returns:
+            outputs (list): Outputs of each model.
+        """
+
+        basename = os.path.splitext(inputfile)[0]
+        for task in range(1, n + 1):
+            api(inputfile, n=n, task=task)
+
+        return [read_outputs(basename + str(modelrun) + '.out') for modelrun in range(1, n + 1)]
+
+    def read_reference(self, models, model):
+        """Read the outputs of the reference solution of a test model, i.e.
+            from the standard solver before any of the solver modes. Reference
+            solutions of dispersive models agree to within 1e-4, as their
+            update coefficients were calculated in single precision.
+
+        Args:
+            models (str): Set of test models, e.g. modes.
+            model (str): Name of test model.
+
+        Returns:
+            outputs (dict): Arrays of outputs keyed by their paths in the file.
+        """
+
+        return read_outputs(os.path.join(basepath + models, model, model + '_ref.out'))
+
+    def test_tiling(self):
+        """A model with cache blocked (tiled) field updates matches a model
+            with the standard field updates.
+        """
+
+        inputfile = self.copy_model('modes', 'averaged_materials')
+        outputsref = self.run_model(inputfile)
+        with mock.patch('gprMax.model_build_run.tune_tiles', wraps=tune_tiles) as tune:
+            outputs = self.run_model(inputfile, cpu_tiling=True)
+        tune.assert_called_once()
+        self.assertOutputsEqual(outputs, outputsref)
+
+    def test_wavefront(self):
+        """A model with temporal blocking (wavefront) of the time stepping loop,
+            over slabs small enough that several are in flight, matches a model
+            solved with the standard time stepping loop.
+        """
+
+        inputfile = self.copy_model('modes', 'averaged_materials')
+        outputsref = self.run_model(inputfile)
+        for iterations in (1, 4):
+            with mock.patch('gprMax.model_build_run.solve_cpu_wavefront', wraps=functools.partial(solve_cpu_wavefront, cachesize=2**16)) as solve:
+                outputs = self.run_model(inputfile, cpu_wavefront=iterations)
+            solve.assert_called_once()
+            self.assertOutputsEqual(outputs, outputsref)
+
+    def test_compiled(self):
+        """Models of a B-scan, with dispersive materials, solved with the
+            compiled driver of the time stepping loop match models solved with
+            the standard time stepping loop.
+        """
+
+        inputfile = self.copy_model('modes', 'dispersive_cylinders', cmds=('#src_steps: 0.004 0 0', '#rx_steps: 0.004 0 0'))
+        outputsref = self.run_model(inputfile, n=3)
+        with mock.patch('gprMax.model_build_run.solve_cpu_compiled', wraps=solve_cpu_compiled) as solve:
+            outputs = self.run_model(inputfile, n=3, cpu_compiled=True)
+        self.assertEqual(solve.call_count, 3)
+        self.assertOutputsEqual(outputs, outputsref)
+
+    def test_material_runs(self):
+        """A model updating homogeneous runs of cells without gathering their
+            material IDs matches a model gathering the ID of every cell, and
+            the reference solution.
+        """
+
+        inputfile = self.copy_model('modes', 'averaged_materials')
+        with mock.patch('gprMax.model_build_run.build_material_runs', return_value=None):
+            outputsref = self.run_model(inputfile)
+        with mock.patch('gprMax.model_build_run.solve_cpu', wraps=solve_cpu) as solve:
+            outputs = self.run_model(inputfile)
+        self.assertIsNotNone(solve.call_args[0][2].materialruns)
+        self.assertOutputsEqual(outputs, outputsref)
+        self.assertOutputsClose(outputs[0], self.read_reference('modes', 'averaged_materials'))
+
+    def test_narrow_ids(self):
+        """A model with 8-bit solid and ID arrays matches a model with 32-bit
+            arrays, and the reference solution.
+        """
+
+        inputfile = self.copy_model('modes', 'averaged_materials')
+        with mock.patch.object(FDTDGrid, 'narrow_geometry_arrays', return_value=0):
+            outputsref = self.run_model(inputfile)
+        with mock.patch('gprMax.model_build_run.solve_cpu', wraps=solve_cpu) as solve:
+            outputs = self.run_model(inputfile)
+        G = solve.call_args[0][2]
+        self.assertEqual((G.solid.dtype, G.ID.dtype), (np.uint8, np.uint8))
+        self.assertOutputsEqual(outputs, outputsref)
+        self.assertOutputsClose(outputs[0], self.read_reference('modes', 'averaged_materials'))
+
+    def test_sources(self):
+        """A model with voltage sources, Hertzian and magnetic dipoles updated
+            by batched kernels, and a transmission line, matches the reference
+            solution.
+        """
+
+        inputfile = self.copy_model('modes', 'sources_receivers')
+        with mock.patch('gprMax.model_build_run.update_voltage_source', wraps=update_voltage_source) as voltage, \
+                mock.patch('gprMax.model_build_run.update_hertzian_dipole', wraps=update_hertzian_dipole) as hertzian, \
+                mock.patch('gprMax.model_build_run.update_magnetic_dipole', wraps=update_magnetic_dipole) as magnetic:
+            outputs = self.run_model(inputfile)[0]
+        for kernel, sources in ((voltage, 1), (hertzian, 2), (magnetic, 1)):
+            self.assertEqual(kernel.call_args[0][0], sources)
+        self.assertOutputsClose(outputs, self.read_reference('modes', 'sources_receivers'))
+
+    def test_receivers(self):
+        """Receivers, and an array of receivers, whose outputs are stored by a
+            compiled gather match the reference solution.
+        """
+
+        inputfile = self.copy_model('modes', 'sources_receivers')
+        with mock.patch('gprMax.fields_outputs.store_rx_outputs', wraps=store_rx_outputs) as store:
+            outputs = self.run_model(inputfile)[0]
+        self.assertEqual(store.call_args[0][0], 8)
+        outputsref = self.read_reference('modes', 'sources_receivers')
+        self.assertOutputsClose({name: output for name, output in outputs.items() if name.startswith('rxs/')},
+                                {name: output for name, output in outputsref.items() if name.startswith('rxs/')})
+
+    def test_pml(self):
+        """A model whose PML kernels are bound when the PML is built matches
+            the reference solution, and its PML slabs updated together in a
+            single parallel region match the PML slabs updated in turn, up to
+            the different order of the corrections where slabs overlap.
+        """
+
+        inputfile = self.copy_model('modes', 'averaged_materials')
+        outputsref = self.run_model(inputfile)
+        self.assertOutputsClose(outputsref[0], self.read_reference('modes', 'averaged_materials'))
+        self.assertOutputsClose(self.run_model(inputfile, cpu_pml_fused=True)[0], outputsref[0], rtol=1e-4)
+
+    def test_sparse_dispersive(self):
+        """A model storing temporary dispersive arrays only for cells in
+            dispersive materials matches a model storing them for every cell,
+            and the reference solution.
+        """
+
+        inputfile = self.copy_model('modes', 'dispersive_cylinders')
+        with mock.patch.object(FDTDGrid, 'find_dispersive_cells'):
+            outputsref = self.run_model(inputfile)
+        with mock.patch('gprMax.model_build_run.solve_cpu', wraps=solve_cpu) as solve:
+            outputs = self.run_model(inputfile)
+        self.assertIsNotNone(solve.call_args[0][2].dispersivecells)
+        self.assertOutputsClose(outputs[0], outputsref[0])
+        self.assertOutputsClose(outputs[0], self.read_reference('modes', 'dispersive_cylinders'), rtol=1e-4)
+
+    def test_real_poles(self):
+        """A model with Debye and Drude materials, whose dispersive arrays are
+            real, matches a model with complex dispersive arrays, and the
+            reference solution, up to the different rounding of real and
+            complex products.
+        """
+
+        inputfile = self.copy_model('modes', 'real_poles')
+        with mock.patch.object(Material, 'realpoles', False):
+            outputsref = self.run_model(inputfile)
+        with mock.patch('gprMax.model_build_run.solve_cpu', wraps=solve_cpu) as solve:
+            outputs = self.run_model(inputfile)
+        self.assertEqual(solve.call_args[0][2].Tx.dtype, np.float32)
+        self.assertOutputsClose(outputs[0], outputsref[0], rtol=2e-4)
+        self.assertOutputsClose(outputs[0], self.read_reference('modes', 'real_poles'), rtol=2e-4)
+
+    def test_dispersive(self):
+        """Models with single and multiple pole Debye, Lorentz and Drude
+            materials, whose dispersive update is carried out in a single sweep
+            per iteration, match the reference solutions.
+        """
+
+        for model in ('dispersive_cylinders', 'real_poles'):
+            inputfile = self.copy_model('modes', model)
+            self.assertOutputsClose(self.run_model(inputfile)[0], self.read_reference('modes', model), rtol=1e-4)
+
+    def test_2d(self):
+        """2D models, with dispersive materials and PML, solved on arrays of
+            the plane of the model match reference solutions of the 3D field
+            updates, up to round-off, and only store the live components.
+        """
+
+        for axis, mode in enumerate(('TMx', 'TMy', 'TMz')):
+            model = 'cylinders_' + mode
+            inputfile = self.copy_model('modes', model)
+            with mock.patch('gprMax.model_build_run.solve_cpu_2d', wraps=solve_cpu_2d) as solve:
+                outputs = self.run_model(inputfile)[0]
+            self.assertOutputsClose(outputs, self.read_reference('modes', model), rtol=1e-4)
+
+            # Tiled updates and the compiled driver are for 3D models only
+            self.assertOutputsEqual(self.run_model(inputfile, cpu_tiling=True, cpu_compiled=True), [outputs])
+
+            # Field, PML and temporary dispersive arrays have a single cell,
+            # or none, in the invariant direction
+            G = solve.call_args[0][2]
+            for component in G.IDlookup:
+                self.assertEqual(getattr(G, component).shape[axis], 1, msg=component)
+            for pml in G.pmls:
+                self.assertEqual(sorted(getattr(pml, name).shape[axis + 1] for name in ('EPhi1', 'EPhi2', 'HPhi1', 'HPhi2')), [0, 0, 1, 1])
+            self.assertEqual([T.size == 0 for T in (G.Tx, G.Ty, G.Tz)], [component != axis for component in range(3)])
+
+    def test_subgrid(self):
+        """A model with a subgrid matches its reference solution, with receivers
+            numbered in input order across the main grid and the subgrid.
+        """
+
+        inputfile = self.copy_model('subgrids', 'subgrid_sphere')
+        outputs = self.run_model(inputfile)[0]
+        self.assertOutputsClose(outputs, self.read_reference('subgrids', 'subgrid_sphere'))
+
+        with h5py.File(os.path.splitext(inputfile)[0] + '.out', 'r') as f:
+            self.assertEqual([f['/rxs/rx' + str(n)].attrs['Name'] for n in range(1, 4)], ['Rx(24,20,31)', 'rx_subgrid', 'Rx(16,20,31)'])
+
+    def test_subgrid_free_space(self):
+        """A model with an empty subgrid in free space matches the model without
+            the subgrid, up to the interpolation of the field at its surfaces,
+            at receivers outside and inside of the subgrid. Receivers inside
+            are placed so their field components, which are staggered by half
+            a cell of the subgrid, are co-located with those of the main grid.
+        """
+
+        remove = ('#box', '#sphere', '#cylinder', '#rx')
+        cmds = ('#rx: 0.096 0.080 0.124', '#rx: 0.0813333 0.080 0.080 rx_Ex Ex', '#rx: 0.064 0.0693333 0.072 rx_Ey Ey', '#rx: 0.080 0.080 0.0813333 rx_Ez Ez')
+        inputfile = self.copy_model('subgrids', 'subgrid_sphere', cmds=cmds, remove=remove)
+        inputfileref = self.copy_model('subgrids', 'subgrid_sphere', name='ref', cmds=cmds, remove=remove + ('#subgrid',))
+        self.assertOutputsClose(self.run_model(inputfile)[0], self.run_model(inputfileref)[0], rtol=1e-2)
+
+    def test_graded(self):
+        """A model with cells graded in x and z matches its reference solution."""
+
+        inputfile = self.copy_model('graded', 'graded_sphere')
+        outputs = self.run_model(inputfile)[0]
+        self.assertOutputsClose(outputs, self.read_reference('graded', 'graded_sphere'))
+
+    def test_graded_fine(self):
+        """A model with cells graded in x and z matches the model with a
+            uniform spatial step of the finest cells, up to the numerical
+            dispersion of the coarser cells.
+        """
+
+        inputfile = self.copy_model('graded', 'graded_sphere')
+        inputfileref = self.copy_model('graded', 'graded_sphere', name='ref', cmds=('#dx_dy_dz: 0.001 0.002 0.001',), remove=('#dx_dy_dz', '#dx_profile', '#dz_profile'))
+        self.assertOutputsClose(self.run_model(inputfile)[0], self.run_model(inputfileref)[0], rtol=1e-2)
+
+    def test_graded_uniform(self):
+        """Profiles with a constant spatial step match a uniform model."""
+
+        inputfile = self.copy_model('modes', 'dipole_contsine_fs', cmds=('#dx_profile: 0.002 30', '#dy_profile: 0.002 12 0.002 18', '#dz_profile: 0.002 30'))
+        inputfileref = self.copy_model('modes', 'dipole_contsine_fs', name='ref')
+        self.assertOutputsEqual(self.run_model(inputfile), self.run_model(inputfileref))
+
+    @unittest.skipUnless(shutil.which('mpirun') and importlib.util.find_spec('mpi4py'), 'requires mpirun and mpi4py')
+    def test_mpi_domain(self):
+        """A model decomposed across 2 x 2 x 1 MPI ranks matches the model run
+            by a single process.
+        """
+
+        inputfile = self.copy_model('modes', 'dispersive_cylinders')
+        outputsref = self.run_model(inputfile)
+        subprocess.run([shutil.which('mpirun'), '-n', '4', sys.executable, '-m', 'gprMax', inputfile, '--mpi-domain', '2', '2', '1'], check=True)
+        self.assertOutputsEqual([read_outputs(os.path.splitext(inputfile)[0] + '.out')], outputsref)
+
+    def test_shm_slabs(self):
+        """A model split into slabs updated by worker processes in shared
+            memory matches a model solved by a single process.
+        """
+
+        inputfile = self.copy_model('modes', 'averaged_materials')
+        outputsref = self.run_model(inputfile)
+        with mock.patch('gprMax.model_build_run.solve_cpu_shm', wraps=solve_cpu_shm) as solve:
+            outputs = self.run_model(inputfile, shm_slabs=2)
+        solve.assert_called_once()
+        self.assertOutputsEqual(outputs, outputsref)
+
+    def test_resume(self):
+        """A model resumed from a checkpoint, written before the model was
+            interrupted, matches the model run without interruption.
+        """
+
+        # Interrupt models once they have written their second checkpoint
+        write = Checkpoint.write
+        def write_interrupt(checkpoint, iteration, G):
+            write(checkpoint, iteration, G)
+            if iteration == 200:
+                raise InterruptedError
+
+        for model in ('dispersive_cylinders', 'cylinders_TMz'):
+            inputfile = self.copy_model('modes', model)
+            outputsref = self.run_model(inputfile)
+            with mock.patch.object(Checkpoint, 'write', write_interrupt):
+                with self.assertRaises(InterruptedError):
+                    self.run_model(inputfile, checkpoint=100)
+
+            checkpointfile = os.path.splitext(inputfile)[0] + '_checkpoint.h5'
+            self.assertTrue(os.path.isfile(checkpointfile))
+            self.assertOutputsEqual(self.run_model(inputfile, checkpoint=100, resume=True), outputsref)
+            self.assertFalse(os.path.isfile(checkpointfile))
+
+    def test_reuse_geometry(self):
+        """Models of a B-scan that reuse the geometry of the previous model
+            match models that build their geometry.
+        """
+
+        inputfile = self.copy_model('modes', 'dispersive_cylinders', cmds=('#src_steps: 0.004 0 0', '#rx_steps: 0.004 0 0'))
+        outputsref = self.run_traces(inputfile, 3)
+
+        # Models run in turn, and in a batch (which are solved in turn as
+        # their materials are dispersive), reuse the materials, including
+        # Drude materials, of the previous model
+        for batch in (None, 3):
+            with mock.patch('gprMax.model_build_run.reuse_geometry', wraps=reuse_geometry) as reuse:
+                outputs = self.run_model(inputfile, n=3, batch=batch)
+            self.assertEqual(reuse.call_count, 2)
+            self.assertOutputsEqual(outputs, outputsref)
+
+    def test_batch(self):
+        """Models of a B-scan advanced together in a batch match models
+            solved in turn.
+        """
+
+        inputfile = self.copy_model('modes', 'bscan_sphere')
+        outputsref = self.run_model(inputfile, n=3)
+
+        # Models that share their geometry are not solved in turn
+        with mock.patch('gprMax.model_build_run.solve_cpu') as solve:
+            outputs = self.run_model(inputfile, n=3, batch=3)
+        solve.assert_not_called()
+        self.assertOutputsEqual(outputs, outputsref)
+
+        # 2D models are solved in turn
+        inputfile = self.copy_model('modes', 'cylinders_TMz', cmds=('#src_steps: 0.004 0 0', '#rx_steps: 0.004 0 0'))
+        self.assertOutputsEqual(self.run_model(inputfile, n=3, batch=3), self.run_model(inputfile, n=3))
+
+    def test_active_region(self):
+        """A model whose field and PML updates are restricted to the active
+            region around its sources matches a model updating the domain.
+        """
+
+        inputfile = self.copy_model('modes', 'bscan_sphere')
+        with mock.patch('gprMax.model_build_run.ActiveRegion', return_value=None):
+            outputsref = self.run_model(inputfile)
+        with mock.patch('gprMax.model_build_run.ActiveRegion', wraps=ActiveRegion) as region:
+            outputs = self.run_model(inputfile)
+        region.assert_called_once()
+        self.assertOutputsEqual(outputs, outputsref)
+
+    def test_energy_monitor(self):
+        """A model whose total field energy is monitored matches a model
+            without the monitor, and when stopped early once the energy has
+            decayed, up to the iteration it is stopped at.
+        """
+
+        inputfile = self.copy_model('modes', 'bscan_sphere', timewindow='4e-9')
+        outputsref = self.run_model(inputfile)
+        self.assertOutputsEqual(self.run_model(inputfile, energy_monitor=10), outputsref)
+
+        with mock.patch('gprMax.model_build_run.stop_early', wraps=stop_early) as stop:
+            outputs = self.run_model(inputfile, energy_monitor=10, energy_stop=1e-3)[0]
+        stop.assert_called_once()
+        iteration = stop.call_args[0][0] + 1
+        self.assertLess(iteration, outputsref[0]['rxs/rx1/Ez'].size)
+        for name in outputsref[0]:
+            np.testing.assert_array_equal(outputs[name][:iteration], outputsref[0][name][:iteration], err_msg=name)
+            self.assertFalse(outputs[name][iteration:].any(), msg=name)
+
+    def test_extend(self):
+        """Extending the time window of a model, whose source is still active at
+            the end of the original time window, matches a single longer run.
+        """
+
+        inputfile = self.copy_model('modes', 'dipole_contsine_fs')
+        iterations = self.run_model(inputfile, save_state=True)[0]['rxs/rx1/Ez'].size
+        self.run_model(inputfile, extend=100)
+        outputs = self.run_model(inputfile, extend=50)
+
+        inputfileref = self.copy_model('modes', 'dipole_contsine_fs', name='ref', timewindow=str(iterations + 150))
+        self.assertOutputsEqual(outputs, self.run_model(inputfileref))
+
+    def test_geometry_cache(self):
+        """Models that write, and read, their geometry, including dispersive and
+            dielectric-smoothed materials, to and from a cache match a model
+            that builds its geometry.
+        """
+
+        inputfile = self.copy_model('modes', 'dispersive_cylinders')
+        outputsref = self.run_model(inputfile)
+
+        cachedirectory = os.path.join(self.directory, 'cache')
+        self.assertOutputsEqual(self.run_model(inputfile, geometry_cache=cachedirectory), outputsref)
+        cachefiles = os.listdir(cachedirectory)
+        self.assertEqual(len(cachefiles), 1)
+        self.assertOutputsEqual(self.run_model(inputfile, geometry_cache=cachedirectory), outputsref)
+
+        # Materials are stored as attributes of plain types
+        with h5py.File(os.path.join(cachedirectory, cachefiles[0]), 'r') as f:
+            self.assertEqual(len(f['materials']), 15)
+            for grp in f['materials'].values():
+                for value in grp.attrs.values():
+                    self.assertNotEqual(np.asarray(value).dtype.kind, 'V')
+
+    def test_averaged_materials(self):
+        """Dielectric smoothing, with averaged materials looked up by the
+            materials they are averaged from, matches the reference solution,
+            also for materials whose names contain one another.
+        """
+
+        inputfile = self.copy_model('modes', 'averaged_materials')
+        outputs = self.run_model(inputfile)
+        self.assertOutputsClose(outputs[0], self.read_reference('modes', 'averaged_materials'))
+
+        materials = {'sand': 'm1', 'clay': 'm12', 'loam': 'm2', 'silt': 'm21', 'chalk': 'm121', 'granite': 'm1212'}
+        inputfile = self.copy_model('modes', 'averaged_materials', name='renamed', materials=materials)
+        self.assertOutputsEqual(self.run_model(inputfile), outputs)
+
+    def test_parallel_build(self):
+        """Electric and magnetic components built in parallel give the same
+            materials, and material IDs, as when built by a single thread, and
+            match the reference solution.
+        """
+
+        inputfile = self.copy_model('modes', 'averaged_materials')
+        grids = []
+        for threads in ('1', '3'):
+            with mock.patch.dict(os.environ, {'OMP_NUM_THREADS': threads}), \
+                    mock.patch('gprMax.model_build_run.solve_cpu', wraps=solve_cpu) as solve:
+                outputs = self.run_model(inputfile)
+            grids.append(solve.call_args[0][2])
+        self.assertEqual([G.nthreads for G in grids], [1, 3])
+        self.assertEqual(*([material.ID for material in G.materials] for G in grids))
+        np.testing.assert_array_equal(grids[0].ID, grids[1].ID)
+        self.assertOutputsClose(outputs[0], self.read_reference('modes', 'averaged_materials'))
+
+
+if __name__ == '__main__':
+    unittest.main()